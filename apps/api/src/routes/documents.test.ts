@@ -23,6 +23,9 @@ vi.mock('../services/storage.js', () => ({
   storageService: {
     uploadDocument: vi.fn().mockResolvedValue({ path: 'test-user-id/doc-id/test.pdf' }),
     getSignedUrl: vi.fn().mockResolvedValue('https://signed-url'),
+    downloadSearchIndex: vi.fn().mockResolvedValue(null),
+    getSignedUrls: vi.fn().mockResolvedValue([]),
+    downloadExtractionOutput: vi.fn(),
   },
 }));
 
@@ -56,6 +59,7 @@ vi.mock('../services/document-repo.js', () => ({
     }),
     getById: vi.fn().mockResolvedValue(null),
     getExtraction: vi.fn().mockResolvedValue(null),
+    getPages: vi.fn().mockResolvedValue([]),
     updateStatus: vi.fn().mockResolvedValue(null),
     findByHash: vi.fn().mockResolvedValue(null),
   },
@@ -72,6 +76,20 @@ vi.mock('../middleware/rate-limit.js', () => ({
 }));
 
 
+vi.mock('../services/progress.js', () => ({
+  progressService: {
+    latest: vi.fn().mockResolvedValue(null),
+    follow: vi.fn(),
+  },
+}));
+
+vi.mock('../services/queue.js', () => ({
+  queueService: {
+    pdfAdmission: vi.fn().mockResolvedValue({ admitted: true, estimatedWaitSeconds: 0, retryAfterSeconds: 0 }),
+  },
+  redisClient: { ping: vi.fn().mockResolvedValue('PONG') },
+}));
+
 vi.mock('../services/analysis-repo.js', () => ({
   analysisRepo: {
     create: vi.fn().mockResolvedValue({
@@ -339,6 +357,87 @@ describe('Document routes', () => {
     expect(body.data.contentJson.text).toBe('extracted content');
   });
 
+  test('GET /v2/documents/:id/extraction loads an output spilled to storage', async () => {
+    const { documentRepo } = await import('../services/document-repo.js');
+    const { storageService } = await import('../services/storage.js');
+    vi.mocked(documentRepo.getById).mockResolvedValueOnce({
+      id: 'doc-1',
+      userId: 'test-user-id',
+      fileName: 'big.pdf',
+      filePath: 'path',
+      fileSize: 1024,
+      mimeType: 'application/pdf',
+      status: 'completed',
+      pages: 900,
+      errorMessage: null,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    });
+    vi.mocked(documentRepo.getExtraction).mockResolvedValueOnce({
+      id: 'ext-1',
+      documentId: 'doc-1',
+      contentJson: { summary: { pages: 900 } },
+      extractionMethod: 'pdfium',
+      rawText: null,
+      outputKey: 'test-user-id/doc-1/doc-1.extraction.json.gz',
+      tablesCount: 0,
+      imagesCount: 0,
+      createdAt: new Date(),
+    });
+    vi.mocked(storageService.downloadExtractionOutput).mockResolvedValueOnce({
+      rawText: 'full text',
+      contentJson: { pages: [] },
+    });
+
+    const res = await app.request('/v2/documents/doc-1/extraction', {
+      headers: authHeader,
+    });
+    expect(res.status).toBe(200);
+    const body = await res.json();
+    expect(vi.mocked(storageService.downloadExtractionOutput)).toHaveBeenCalledWith(
+      'test-user-id/doc-1/doc-1.extraction.json.gz',
+    );
+    expect(body.data.rawText).toBe('full text');
+    expect(body.data.contentJson).toEqual({ pages: [] });
+  });
+
+  test('GET /v2/documents/:id leaves a spilled output in storage', async () => {
+    const { documentRepo } = await import('../services/document-repo.js');
+    const { storageService } = await import('../services/storage.js');
+    vi.mocked(documentRepo.getById).mockResolvedValueOnce({
+      id: 'doc-1',
+      userId: 'test-user-id',
+      fileName: 'big.pdf',
+      filePath: 'path',
+      fileSize: 1024,
+      mimeType: 'application/pdf',
+      status: 'completed',
+      pages: 900,
+      errorMessage: null,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    });
+    vi.mocked(documentRepo.getExtraction).mockResolvedValueOnce({
+      id: 'ext-1',
+      documentId: 'doc-1',
+      contentJson: { summary: { pages: 900 } },
+      extractionMethod: 'pdfium',
+      rawText: null,
+      outputKey: 'test-user-id/doc-1/doc-1.extraction.json.gz',
+      tablesCount: 0,
+      imagesCount: 0,
+      createdAt: new Date(),
+    });
+
+    const res = await app.request('/v2/documents/doc-1', {
+      headers: authHeader,
+    });
+    expect(res.status).toBe(200);
+    const body = await res.json();
+    expect(vi.mocked(storageService.downloadExtractionOutput)).not.toHaveBeenCalled();
+    expect(body.extraction.contentJson).toEqual({ summary: { pages: 900 } });
+  });
+
   test('GET /v2/documents/:id/extraction returns 404 when not ready', async () => {
     const { documentRepo } = await import('../services/document-repo.js');
     vi.mocked(documentRepo.getById).mockResolvedValueOnce({
@@ -362,6 +461,213 @@ describe('Document routes', () => {
     expect(res.status).toBe(404);
   });
 
+  // ---- GET /:id/pages ----
+
+  test('GET /v2/documents/:id/pages returns the requested page range', async () => {
+    const { documentRepo } = await import('../services/document-repo.js');
+    vi.mocked(documentRepo.getById).mockResolvedValueOnce({
+      id: 'doc-1',
+      userId: 'test-user-id',
+      fileName: 'processo.pdf',
+      filePath: 'path',
+      fileSize: 2048,
+      mimeType: 'application/pdf',
+      status: 'completed',
+      pages: 300,
+      errorMessage: null,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    });
+    vi.mocked(documentRepo.getPages).mockResolvedValueOnce([
+      { documentId: 'doc-1', pageNumber: 137, text: 'Página 137' },
+      { documentId: 'doc-1', pageNumber: 138, text: 'Página 138' },
+    ] as never);
+
+    const res = await app.request('/v2/documents/doc-1/pages?from=137&to=138', {
+      headers: authHeader,
+    });
+    expect(res.status).toBe(200);
+    const body = await res.json();
+    expect(documentRepo.getPages).toHaveBeenCalledWith('doc-1', 137, 138);
+    expect(body.data.map((p: { pageNumber: number }) => p.pageNumber)).toEqual([137, 138]);
+    expect(body.totalPages).toBe(300);
+  });
+
+  test('GET /v2/documents/:id/pages rejects oversized or inverted ranges', async () => {
+    for (const query of ['from=1&to=500', 'from=10&to=2', 'from=0']) {
+      const res = await app.request(`/v2/documents/doc-1/pages?${query}`, {
+        headers: authHeader,
+      });
+      expect(res.status).toBe(400);
+    }
+  });
+
+  // ---- GET /:id/previews ----
+
+  test('GET /v2/documents/:id/previews signs the thumbnails of the pages in view', async () => {
+    const { documentRepo } = await import('../services/document-repo.js');
+    const { storageService } = await import('../services/storage.js');
+    vi.mocked(documentRepo.getById).mockResolvedValueOnce({
+      id: 'doc-1',
+      userId: 'test-user-id',
+      fileName: 'processo.pdf',
+      filePath: 'test-user-id/doc-1/processo.pdf',
+      fileSize: 2048,
+      mimeType: 'application/pdf',
+      status: 'completed',
+      pages: 11,
+      errorMessage: null,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    });
+    vi.mocked(storageService.getSignedUrls).mockResolvedValueOnce(['t10', 'p10', 't11', null]);
+
+    const res = await app.request('/v2/documents/doc-1/previews?from=10&to=20', {
+      headers: authHeader,
+    });
+    expect(res.status).toBe(200);
+    const body = await res.json();
+    expect(storageService.getSignedUrls).toHaveBeenCalledWith([
+      'test-user-id/doc-1/pages/10.thumb.webp',
+      'test-user-id/doc-1/pages/10.preview.webp',
+      'test-user-id/doc-1/pages/11.thumb.webp',
+      'test-user-id/doc-1/pages/11.preview.webp',
+    ]);
+    expect(body.data).toEqual([
+      { page: 10, thumb: 't10', preview: 'p10' },
+      { page: 11, thumb: 't11', preview: null },
+    ]);
+  });
+
+  // ---- GET /:id/search ----
+
+  test('GET /v2/documents/:id/search looks up the index next to the PDF', async () => {
+    const { documentRepo } = await import('../services/document-repo.js');
+    const { storageService } = await import('../services/storage.js');
+    const search = vi.fn().mockReturnValue({ query: 'réu', terms: ['reu'], total: 1, hits: [] });
+    const doc = {
+      id: 'doc-search',
+      userId: 'test-user-id',
+      fileName: 'processo.pdf',
+      filePath: 'test-user-id/doc-search/processo.pdf',
+      fileSize: 2048,
+      mimeType: 'application/pdf',
+      status: 'completed',
+      pages: 300,
+      errorMessage: null,
+      createdAt: new Date(),
+      updatedAt: new Date(),
+    };
+    vi.mocked(documentRepo.getById).mockResolvedValueOnce(doc).mockResolvedValueOnce(doc);
+    vi.mocked(storageService.downloadSearchIndex).mockResolvedValueOnce({ search } as never);
+
+    for (let i = 0; i < 2; i++) {
+      const res = await app.request('/v2/documents/doc-search/search?q=r%C3%A9u&limit=5', {
+        headers: authHeader,
+      });
+      expect(res.status).toBe(200);
+      expect((await res.json()).data.total).toBe(1);
+    }
+    expect(search).toHaveBeenCalledWith('réu', 5);
+    // Parsed once, then served from the in-process cache
+    expect(storageService.downloadSearchIndex).toHaveBeenCalledOnce();
+    expect(storageService.downloadSearchIndex).toHaveBeenCalledWith('test-user-id/doc-search/doc-search.search.gz');
+  });
+
+  test('GET /v2/documents/:id/search returns 404 without an index and 400 without a query', async () => {
+    const { documentRepo } = await import('../services/document-repo.js');
+    vi.mocked(documentRepo.getById).mockResolvedValueOnce({
+      id: 'doc-1',
+      userId: 'test-user-id',
+      fileName: 'processo.pdf',
+      filePath: 'test-user-id/doc-1/processo.pdf',
+      status: 'completed',
+    } as never);
+
+    const missing = await app.request('/v2/documents/doc-1/search?q=autor', { headers: authHeader });
+    expect(missing.status).toBe(404);
+
+    const empty = await app.request('/v2/documents/doc-1/search?q=%20', { headers: authHeader });
+    expect(empty.status).toBe(400);
+  });
+
+  // ---- GET /:id/progress ----
+
+  const processingDoc = {
+    id: 'doc-1',
+    userId: 'test-user-id',
+    fileName: 'processo.pdf',
+    filePath: 'test-user-id/doc-1/processo.pdf',
+    fileSize: 2048,
+    mimeType: 'application/pdf',
+    status: 'extracting',
+    pages: null,
+    errorMessage: null,
+    createdAt: new Date(),
+    updatedAt: new Date(),
+  };
+
+  test('GET /v2/documents/:id/progress streams worker events until the job finishes', async () => {
+    const { documentRepo } = await import('../services/document-repo.js');
+    const { progressService } = await import('../services/progress.js');
+    vi.mocked(documentRepo.getById).mockResolvedValueOnce(processingDoc);
+    vi.mocked(progressService.latest).mockResolvedValueOnce({
+      id: '1-0',
+      event: { stage: 'extract_pages', pagesDone: 10, pagesTotal: 40, elapsedSeconds: 3, etaSeconds: 9 },
+    });
+    vi.mocked(progressService.follow).mockImplementationOnce(async function* () {
+      yield { id: '2-0', event: { stage: 'extract_pages', pagesDone: 40, pagesTotal: 40, elapsedSeconds: 12 } };
+      yield {
+        id: '3-0',
+        event: { stage: 'completed', pagesDone: 40, pagesTotal: 40, elapsedSeconds: 14, status: 'completed', pages: 40 },
+      };
+    });
+
+    const res = await app.request('/v2/documents/doc-1/progress', { headers: authHeader });
+    expect(res.status).toBe(200);
+    expect(res.headers.get('content-type')).toContain('text/event-stream');
+    const body = await res.text();
+    expect(progressService.follow).toHaveBeenCalledWith('doc-1', '1-0', expect.any(AbortSignal));
+    expect(body.match(/event: progress/g)).toHaveLength(3);
+    expect(body).toContain('"etaSeconds":9');
+    expect(body).toContain('event: done\ndata: {"status":"completed"}');
+  });
+
+  test('GET /v2/documents/:id/progress of a finished document ends without following', async () => {
+    const { documentRepo } = await import('../services/document-repo.js');
+    const { progressService } = await import('../services/progress.js');
+    vi.mocked(documentRepo.getById).mockResolvedValueOnce({ ...processingDoc, status: 'completed', pages: 40 });
+
+    const res = await app.request('/v2/documents/doc-1/progress', { headers: authHeader });
+    const body = await res.text();
+    expect(body).toContain('event: done\ndata: {"status":"completed"}');
+    expect(progressService.follow).not.toHaveBeenCalled();
+  });
+
+  test('GET /v2/documents/:id/progress ignores a last event left by an earlier run', async () => {
+    const { documentRepo } = await import('../services/document-repo.js');
+    const { progressService } = await import('../services/progress.js');
+    vi.mocked(documentRepo.getById).mockResolvedValueOnce({ ...processingDoc, status: 'pending' });
+    vi.mocked(progressService.latest).mockResolvedValueOnce({
+      id: '1-0',
+      event: { stage: 'completed', pagesDone: 40, pagesTotal: 40, elapsedSeconds: 14, status: 'completed', pages: 40 },
+    });
+    vi.mocked(progressService.follow).mockImplementationOnce(async function* () {
+      yield { id: '2-0', event: { stage: 'queued', pagesDone: 0, pagesTotal: 0, elapsedSeconds: 0 } };
+      yield {
+        id: '3-0',
+        event: { stage: 'failed', pagesDone: 0, pagesTotal: 0, elapsedSeconds: 1, status: 'failed', error: 'bad pdf' },
+      };
+    });
+
+    const res = await app.request('/v2/documents/doc-1/progress', { headers: authHeader });
+    const body = await res.text();
+    expect(progressService.follow).toHaveBeenCalledWith('doc-1', '1-0', expect.any(AbortSignal));
+    expect(body.match(/event: progress/g)).toHaveLength(2);
+    expect(body).toContain('event: done\ndata: {"status":"failed"}');
+    expect(body).not.toContain('"status":"completed"');
+  });
+
   // ---- POST /:id/analyze ----
 
   test('POST /v2/documents/:id/analyze enqueues analysis and returns 202', async () => {
@@ -495,6 +801,35 @@ describe('Document routes', () => {
     expect(body.deduplicated).toBeUndefined();
   });
 
+  test('POST /v2/documents returns 503 with Retry-After while the queue is over its SLO', async () => {
+    const { queueService } = await import('../services/queue.js');
+    const { storageService } = await import('../services/storage.js');
+    const { triggerService } = await import('../services/trigger.js');
+    vi.mocked(queueService.pdfAdmission).mockResolvedValueOnce({
+      admitted: false,
+      estimatedWaitSeconds: 420,
+      retryAfterSeconds: 120,
+    });
+
+    const formData = new FormData();
+    formData.append(
+      'file',
+      new Blob(['%PDF-1.4 busy content'], { type: 'application/pdf' }),
+      'busy.pdf',
+    );
+
+    const res = await app.request('/v2/documents', {
+      method: 'POST',
+      headers: authHeader,
+      body: formData,
+    });
+
+    expect(res.status).toBe(503);
+    expect(res.headers.get('Retry-After')).toBe('120');
+    expect(vi.mocked(storageService.uploadDocument)).not.toHaveBeenCalled();
+    expect(vi.mocked(triggerService.enqueuePdfExtraction)).not.toHaveBeenCalled();
+  });
+
   test('POST /v2/documents/:id/analyze returns 400 when extraction not ready', async () => {
     const { documentRepo } = await import('../services/document-repo.js');
     vi.mocked(documentRepo.getById).mockResolvedValueOnce({
@@ -1,9 +1,13 @@
 import { Hono } from 'hono';
+import { streamSSE } from 'hono/streaming';
 import { createHash } from 'node:crypto';
 import type { AppEnv } from '../types.js';
 import { z } from 'zod';
 import { storageService } from '../services/storage.js';
+import { searchIndexKey, type SearchIndex } from '../services/search-index.js';
+import { progressService, type ProgressEntry } from '../services/progress.js';
 import { triggerService } from '../services/trigger.js';
+import { queueService } from '../services/queue.js';
 import { documentRepo } from '../services/document-repo.js';
 import { analysisRepo } from '../services/analysis-repo.js';
 import { auditRepo } from '../services/audit-repo.js';
@@ -24,6 +28,59 @@ const listQuerySchema = z.object({
   status: z.enum(['pending', 'processing', 'completed', 'failed', 'reviewed']).optional(),
 });
 
+const MAX_PAGES_PER_REQUEST = 50;
+
+const pagesQuerySchema = z
+  .object({
+    from: z.coerce.number().int().min(1).default(1),
+    to: z.coerce.number().int().min(1).optional(),
+  })
+  .transform(({ from, to }) => ({ from, to: to ?? from }))
+  .refine(({ from, to }) => to >= from && to - from < MAX_PAGES_PER_REQUEST, {
+    message: `Page range must be ascending and span at most ${MAX_PAGES_PER_REQUEST} pages`,
+  });
+
+const searchQuerySchema = z.object({
+  q: z.string().trim().min(1).max(500),
+  limit: z.coerce.number().int().min(1).max(500).default(100),
+});
+
+// Parsed search indexes of recently searched documents (review sessions
+// search the same document repeatedly); re-extraction overwrites the object,
+// so entries expire
+const SEARCH_INDEX_CACHE_SIZE = 32;
+const SEARCH_INDEX_TTL_MS = 5 * 60 * 1000;
+const searchIndexCache = new Map<string, { index: SearchIndex; loadedAt: number }>();
+
+async function getSearchIndex(key: string): Promise<SearchIndex | null> {
+  const cached = searchIndexCache.get(key);
+  searchIndexCache.delete(key);
+  if (cached && Date.now() - cached.loadedAt < SEARCH_INDEX_TTL_MS) {
+    searchIndexCache.set(key, cached);
+    return cached.index;
+  }
+  const index = await storageService.downloadSearchIndex(key);
+  if (!index) return null;
+  searchIndexCache.set(key, { index, loadedAt: Date.now() });
+  if (searchIndexCache.size > SEARCH_INDEX_CACHE_SIZE) {
+    searchIndexCache.delete(searchIndexCache.keys().next().value!);
+  }
+  return index;
+}
+
+type Extraction = NonNullable<Awaited<ReturnType<typeof documentRepo.getExtraction>>>;
+
+/**
+ * Large outputs are spilled to storage (extractions.output_key) and the row
+ * then only holds a summary; load the full rawText/contentJson back so
+ * consumers of the full text see the same shape either way.
+ */
+async function withSpilledOutput(extraction: Extraction): Promise<Extraction> {
+  if (extraction.rawText || !extraction.outputKey) return extraction;
+  const output = await storageService.downloadExtractionOutput(extraction.outputKey);
+  return { ...extraction, rawText: output.rawText, contentJson: output.contentJson };
+}
+
 const MAX_FILE_SIZE = 50 * 1024 * 1024; // 50MB
 const PDF_MAGIC_BYTES = [0x25, 0x50, 0x44, 0x46]; // %PDF
 
@@ -101,6 +158,13 @@ documentsRouter.post('/', rateLimiter(RATE_LIMITS.UPLOAD_PER_MINUTE), async (c)
     }, 200);
   }
 
+  // Admission control: refuse new work while the extraction backlog exceeds its SLO
+  const admission = await queueService.pdfAdmission();
+  if (!admission.admitted) {
+    c.header('Retry-After', admission.retryAfterSeconds.toString());
+    return c.json({ error: { message: 'Extraction queue is full, try again later' } }, 503);
+  }
+
   const { path } = await storageService.uploadDocument({
     userId,
     documentId,
@@ -139,6 +203,8 @@ documentsRouter.get('/:id', async (c) => {
     return c.json({ error: { message: 'Document not found' } }, 404);
   }
 
+  // A spilled output stays in storage here (the row keeps its summary):
+  // /extraction and /analyze load it
   const extraction = await documentRepo.getExtraction(id);
   const analysis = extraction ? await analysisRepo.getByExtractionId(extraction.id) : null;
 
@@ -171,7 +237,152 @@ documentsRouter.get('/:id/extraction', async (c) => {
     return c.json({ error: { message: 'Extraction not available' } }, 404);
   }
 
-  return c.json({ data: extraction });
+  return c.json({ data: await withSpilledOutput(extraction) });
+});
+
+// ============================================================
+// GET /:id/pages?from=&to= — page-range read for the review UI
+// ============================================================
+
+documentsRouter.get('/:id/pages', async (c) => {
+  const userId = c.get('userId');
+  const id = c.req.param('id');
+
+  const parsed = pagesQuerySchema.safeParse({
+    from: c.req.query('from'),
+    to: c.req.query('to'),
+  });
+  if (!parsed.success) {
+    return c.json({ error: { message: 'Invalid page range', details: parsed.error.flatten() } }, 400);
+  }
+
+  const doc = await documentRepo.getById(userId, id);
+  if (!doc) {
+    return c.json({ error: { message: 'Document not found' } }, 404);
+  }
+
+  const { from, to } = parsed.data;
+  const pages = await documentRepo.getPages(id, from, to);
+  return c.json({ data: pages, range: { from, to }, totalPages: doc.pages });
+});
+
+// ============================================================
+// GET /:id/previews?from=&to= — signed thumbnail/preview URLs of the pages
+// in view (rendered by the PDF worker under <user>/<doc>/pages/)
+// ============================================================
+
+documentsRouter.get('/:id/previews', async (c) => {
+  const userId = c.get('userId');
+  const id = c.req.param('id');
+
+  const parsed = pagesQuerySchema.safeParse({
+    from: c.req.query('from'),
+    to: c.req.query('to'),
+  });
+  if (!parsed.success) {
+    return c.json({ error: { message: 'Invalid page range', details: parsed.error.flatten() } }, 400);
+  }
+
+  const doc = await documentRepo.getById(userId, id);
+  if (!doc?.filePath) {
+    return c.json({ error: { message: 'Document not found' } }, 404);
+  }
+
+  const { from, to } = parsed.data;
+  const last = Math.min(to, doc.pages ?? to);
+  const prefix = `${doc.filePath.slice(0, doc.filePath.lastIndexOf('/') + 1)}pages`;
+  const numbers = Array.from({ length: Math.max(last - from + 1, 0) }, (_, i) => from + i);
+  const urls = numbers.length
+    ? await storageService.getSignedUrls(
+      numbers.flatMap((n) => [`${prefix}/${n}.thumb.webp`, `${prefix}/${n}.preview.webp`]),
+    )
+    : [];
+  const data = numbers.map((page, i) => ({ page, thumb: urls[2 * i], preview: urls[2 * i + 1] }));
+  return c.json({ data, range: { from, to }, totalPages: doc.pages });
+});
+
+// ============================================================
+// GET /:id/search?q=&limit= — term/phrase lookup in the search index
+// ============================================================
+
+documentsRouter.get('/:id/search', async (c) => {
+  const userId = c.get('userId');
+  const id = c.req.param('id');
+
+  const parsed = searchQuerySchema.safeParse({
+    q: c.req.query('q'),
+    limit: c.req.query('limit'),
+  });
+  if (!parsed.success) {
+    return c.json({ error: { message: 'Invalid search query', details: parsed.error.flatten() } }, 400);
+  }
+
+  const doc = await documentRepo.getById(userId, id);
+  if (!doc) {
+    return c.json({ error: { message: 'Document not found' } }, 404);
+  }
+
+  const index = doc.filePath ? await getSearchIndex(searchIndexKey(doc.filePath, doc.id)) : null;
+  if (!index) {
+    return c.json({ error: { message: 'Search index not available' } }, 404);
+  }
+
+  const { q, limit } = parsed.data;
+  return c.json({ data: index.search(q, limit) });
+});
+
+// ============================================================
+// GET /:id/progress — live extraction progress as Server-Sent Events,
+// relayed from the worker's Redis stream instead of polling documents.status
+// ============================================================
+
+const TERMINAL_STATUSES = new Set(['completed', 'failed', 'reviewed']);
+
+documentsRouter.get('/:id/progress', async (c) => {
+  const userId = c.get('userId');
+  const id = c.req.param('id');
+
+  const doc = await documentRepo.getById(userId, id);
+  if (!doc) {
+    return c.json({ error: { message: 'Document not found' } }, 404);
+  }
+
+  return streamSSE(c, async (stream) => {
+    const send = (entry: ProgressEntry) =>
+      stream.writeSSE({ event: 'progress', id: entry.id, data: JSON.stringify(entry.event) });
+    const done = (status: string) => stream.writeSSE({ event: 'done', data: JSON.stringify({ status }) });
+
+    const latest = await progressService.latest(id);
+    // A last event from an earlier run (re-extraction or retry, before the
+    // worker resets the stream) does not finish a job that is not finished
+    const stale = Boolean(latest?.event.status) && !TERMINAL_STATUSES.has(doc.status);
+    if (latest && !stale) await send(latest);
+    if ((latest?.event.status && !stale) || TERMINAL_STATUSES.has(doc.status)) {
+      await done(latest?.event.status ?? doc.status);
+      return;
+    }
+
+    const controller = new AbortController();
+    stream.onAbort(() => controller.abort());
+    for await (const entry of progressService.follow(id, latest?.id ?? '0', controller.signal)) {
+      if (entry) {
+        await send(entry);
+        if (entry.event.status) {
+          await done(entry.event.status);
+          break;
+        }
+        continue;
+      }
+      // Quiet for a while: the job may still be queued, or its result saved
+      // by a runner whose caller writes the final status (Trigger)
+      const current = await documentRepo.getById(userId, id);
+      if (!current || TERMINAL_STATUSES.has(current.status)) {
+        await done(current?.status ?? 'deleted');
+        break;
+      }
+      await stream.writeSSE({ event: 'ping', data: '' });
+    }
+  });
 });
 
 documentsRouter.post('/:id/analyze', rateLimiter(RATE_LIMITS.ANALYSIS_PER_MINUTE), async (c) => {
@@ -185,10 +396,11 @@ documentsRouter.post('/:id/analyze', rateLimiter(RATE_LIMITS.ANALYSIS_PER_MINUTE
   }
 
   // Validate extraction exists
-  const extraction = await documentRepo.getExtraction(id);
-  if (!extraction) {
+  const stored = await documentRepo.getExtraction(id);
+  if (!stored) {
     return c.json({ error: { message: 'Extraction not available. Document must be processed first.' } }, 400);
   }
+  const extraction = await withSpilledOutput(stored);
 
   const rawText = extraction.rawText || JSON.stringify(extraction.contentJson);
   if (!rawText || rawText.length < 10) {
@@ -32,6 +32,13 @@ vi.mock('../services/trigger.js', () => ({
   },
 }));
 
+vi.mock('../services/queue.js', () => ({
+  queueService: {
+    pdfAdmission: vi.fn().mockResolvedValue({ admitted: true, estimatedWaitSeconds: 0, retryAfterSeconds: 0 }),
+  },
+  redisClient: { ping: vi.fn().mockResolvedValue('PONG') },
+}));
+
 vi.mock('../services/document-repo.js', () => ({
   documentRepo: {
     create: vi.fn().mockResolvedValue({
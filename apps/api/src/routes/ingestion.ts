@@ -4,6 +4,7 @@ import type { AppEnv } from '../types.js';
 import { IngestionPayloadSchema, RATE_LIMITS } from '@kratos/core';
 import { storageService } from '../services/storage.js';
 import { triggerService } from '../services/trigger.js';
+import { queueService } from '../services/queue.js';
 import { documentRepo } from '../services/document-repo.js';
 import { auditRepo } from '../services/audit-repo.js';
 import { rateLimiter } from '../middleware/rate-limit.js';
@@ -76,6 +77,13 @@ ingestionRouter.post('/', rateLimiter(RATE_LIMITS.UPLOAD_PER_MINUTE), async (c)
     }, 200);
   }
 
+  // Admission control: refuse new work while the extraction backlog exceeds its SLO
+  const admission = await queueService.pdfAdmission();
+  if (!admission.admitted) {
+    c.header('Retry-After', admission.retryAfterSeconds.toString());
+    return c.json({ error: { message: 'Extraction queue is full, try again later' } }, 503);
+  }
+
   const { path } = await storageService.uploadDocument({
     userId,
     documentId,
@@ -43,7 +43,7 @@ vi.mock('@kratos/db', () => {
   return {
     db: c,
     documents: { id: 'id', userId: 'user_id', status: 'status', createdAt: 'created_at' },
-    extractions: { documentId: 'document_id' },
+    extractions: { documentId: 'document_id', createdAt: 'created_at' },
   };
 });
 
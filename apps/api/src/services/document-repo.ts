@@ -1,5 +1,5 @@
-import { eq, and, desc, count, inArray } from 'drizzle-orm';
-import { db, documents, extractions } from '@kratos/db';
+import { eq, and, asc, desc, count, inArray, between } from 'drizzle-orm';
+import { db, documents, extractions, extractionPages } from '@kratos/db';
 
 export const documentRepo = {
   async listByUser(
@@ -95,13 +95,29 @@ export const documentRepo = {
     return doc ?? null;
   },
 
+  /** The document's extraction; the newest row if older ones were left behind */
   async getExtraction(documentId: string) {
     const [extraction] = await db
       .select()
       .from(extractions)
       .where(eq(extractions.documentId, documentId))
+      .orderBy(desc(extractions.createdAt))
       .limit(1);
 
     return extraction ?? null;
   },
+
+  /** Pages `from`..`to` (inclusive) by primary key; cost does not grow with document size */
+  async getPages(documentId: string, from: number, to: number) {
+    return db
+      .select()
+      .from(extractionPages)
+      .where(
+        and(
+          eq(extractionPages.documentId, documentId),
+          between(extractionPages.pageNumber, from, to),
+        ),
+      )
+      .orderBy(asc(extractionPages.pageNumber));
+  },
 };
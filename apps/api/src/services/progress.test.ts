@@ -0,0 +1,61 @@
+import { describe, test, expect, vi, beforeEach } from 'vitest';
+
+const mockXrevrange = vi.fn();
+const mockXread = vi.fn();
+const mockDisconnect = vi.fn();
+
+vi.mock('../lib/logger.js', () => ({
+  logger: { error: vi.fn(), info: vi.fn(), warn: vi.fn(), debug: vi.fn() },
+}));
+
+vi.mock('ioredis', () => ({
+  Redis: vi.fn(() => ({
+    xrevrange: mockXrevrange,
+    duplicate: vi.fn(() => ({ xread: mockXread, disconnect: mockDisconnect })),
+    on: vi.fn(),
+  })),
+}));
+
+const { progressService, parseProgressEntry, progressKey } = await import('./progress.js');
+
+const event = { stage: 'extract_pages', pagesDone: 3, pagesTotal: 10, elapsedSeconds: 1.5, etaSeconds: 3.5 };
+
+describe('progressService', () => {
+  beforeEach(() => {
+    vi.clearAllMocks();
+  });
+
+  test('parseProgressEntry reads the data field and skips malformed entries', () => {
+    expect(parseProgressEntry(['1-0', ['data', JSON.stringify(event)]])).toEqual({ id: '1-0', event });
+    expect(parseProgressEntry(['2-0', ['other', 'x']])).toBeNull();
+    expect(parseProgressEntry(['3-0', ['data', '{not json']])).toBeNull();
+  });
+
+  test('latest returns the newest event of the document stream', async () => {
+    mockXrevrange.mockResolvedValueOnce([['5-0', ['data', JSON.stringify(event)]]]);
+
+    await expect(progressService.latest('doc-1')).resolves.toEqual({ id: '5-0', event });
+    expect(mockXrevrange).toHaveBeenCalledWith(progressKey('doc-1'), '+', '-', 'COUNT', 1);
+
+    mockXrevrange.mockResolvedValueOnce([]);
+    await expect(progressService.latest('doc-2')).resolves.toBeNull();
+  });
+
+  test('follow reads after the last id, yields null on timeout and closes its connection', async () => {
+    mockXread
+      .mockResolvedValueOnce([[progressKey('doc-1'), [['6-0', ['data', JSON.stringify(event)]]]]])
+      .mockResolvedValueOnce(null);
+    const controller = new AbortController();
+
+    const seen = [];
+    for await (const entry of progressService.follow('doc-1', '5-0', controller.signal, 100)) {
+      seen.push(entry);
+      if (seen.length === 2) break;
+    }
+
+    expect(seen).toEqual([{ id: '6-0', event }, null]);
+    expect(mockXread.mock.calls.map((call) => call.at(-1))).toEqual(['5-0', '6-0']);
+    expect(mockXread).toHaveBeenCalledWith('BLOCK', 100, 'STREAMS', 'kratos:progress:doc-1', '5-0');
+    expect(mockDisconnect).toHaveBeenCalled();
+  });
+});
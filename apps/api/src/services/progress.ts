@@ -0,0 +1,90 @@
+/**
+ * Live extraction progress the PDF worker publishes to a Redis stream per
+ * document (`kratos:progress:<documentId>`, see
+ * workers/pdf-worker/src/services/progress.py). Each entry's `data` field is
+ * a JSON ProgressEvent; the last one of a job carries `status`.
+ */
+
+import { redisClient } from './queue.js';
+
+export const PROGRESS_KEY = 'kratos:progress';
+
+export interface ProgressEvent {
+  stage: string;
+  pagesDone: number;
+  pagesTotal: number;
+  elapsedSeconds: number;
+  etaSeconds?: number;
+  /** Only on the last event of a job: completed or failed */
+  status?: string;
+  pages?: number;
+  error?: string;
+}
+
+export interface ProgressEntry {
+  id: string;
+  event: ProgressEvent;
+}
+
+type StreamEntry = [id: string, fields: string[]];
+
+export function progressKey(documentId: string): string {
+  return `${PROGRESS_KEY}:${documentId}`;
+}
+
+export function parseProgressEntry([id, fields]: StreamEntry): ProgressEntry | null {
+  const at = fields.indexOf('data');
+  if (at < 0 || at + 1 >= fields.length) return null;
+  try {
+    return { id, event: JSON.parse(fields[at + 1]) as ProgressEvent };
+  } catch {
+    return null;
+  }
+}
+
+export const progressService = {
+  /** Latest event of the document's job, if its stream has not expired. */
+  async latest(documentId: string): Promise<ProgressEntry | null> {
+    const entries = (await redisClient.xrevrange(progressKey(documentId), '+', '-', 'COUNT', 1)) as StreamEntry[];
+    return entries.length ? parseProgressEntry(entries[0]) : null;
+  },
+
+  /**
+   * Events after `afterId` ('0' = from the start), as they are published.
+   * Yields null after `blockMs` without events (a chance to send a keep-alive
+   * or re-check the document). Blocking reads hold their own connection,
+   * closed when the caller stops iterating or `signal` aborts.
+   */
+  async *follow(
+    documentId: string,
+    afterId: string,
+    signal: AbortSignal,
+    blockMs = 15_000,
+  ): AsyncGenerator<ProgressEntry | null> {
+    const conn = redisClient.duplicate();
+    const close = () => conn.disconnect();
+    signal.addEventListener('abort', close, { once: true });
+    try {
+      let lastId = afterId;
+      while (!signal.aborted) {
+        const res = (await conn.xread('BLOCK', blockMs, 'STREAMS', progressKey(documentId), lastId)) as
+          | [key: string, entries: StreamEntry[]][]
+          | null;
+        if (!res) {
+          yield null;
+          continue;
+        }
+        for (const entry of res[0][1]) {
+          lastId = entry[0];
+          const parsed = parseProgressEntry(entry);
+          if (parsed) yield parsed;
+        }
+      }
+    } catch (err) {
+      if (!signal.aborted) throw err;
+    } finally {
+      signal.removeEventListener('abort', close);
+      close();
+    }
+  },
+};
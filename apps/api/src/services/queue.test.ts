@@ -1,6 +1,8 @@
 import { describe, test, expect, vi, beforeEach } from 'vitest';
 
 const mockLpush = vi.fn().mockResolvedValue(1);
+const mockHgetall = vi.fn().mockResolvedValue({});
+const mockZadd = vi.fn().mockResolvedValue(1);
 const mockQuit = vi.fn().mockResolvedValue('OK');
 
 vi.mock('../lib/logger.js', () => ({
@@ -10,19 +12,21 @@ vi.mock('../lib/logger.js', () => ({
 vi.mock('ioredis', () => ({
   Redis: vi.fn(() => ({
     lpush: mockLpush,
+    hgetall: mockHgetall,
+    zadd: mockZadd,
     quit: mockQuit,
     on: vi.fn(),
   })),
 }));
 
-const { queueService } = await import('./queue.js');
+const { queueService, QueueFullError } = await import('./queue.js');
 
 describe('QueueService', () => {
   beforeEach(() => {
     vi.clearAllMocks();
   });
 
-  test('enqueuePdfExtraction pushes job to Redis list', async () => {
+  test('enqueuePdfExtraction pushes job to the shared PDF queue', async () => {
     const job = {
       documentId: 'doc-1',
       userId: 'user-1',
@@ -32,10 +36,9 @@ describe('QueueService', () => {
 
     await queueService.enqueuePdfExtraction(job);
 
-    expect(mockLpush).toHaveBeenCalledWith(
-      'kratos:jobs:pdf',
-      JSON.stringify(job),
-    );
+    const [key, payload] = mockLpush.mock.calls[0];
+    expect(key).toBe('kratos:jobs:pdf');
+    expect(JSON.parse(payload)).toMatchObject({ ...job, enqueuedAt: expect.any(Number) });
   });
 
   test('enqueuePdfExtraction throws on Redis error', async () => {
@@ -51,6 +54,45 @@ describe('QueueService', () => {
     ).rejects.toThrow('Queue enqueue failed');
   });
 
+  test('pdfAdmission rejects while the published wait exceeds the SLO', async () => {
+    mockHgetall.mockResolvedValueOnce({ estimated_wait_seconds: '420', updated_at: String(Date.now() / 1000) });
+
+    await expect(queueService.pdfAdmission()).resolves.toEqual({
+      admitted: false,
+      estimatedWaitSeconds: 420,
+      retryAfterSeconds: 120,
+    });
+    expect(mockHgetall).toHaveBeenCalledWith('kratos:jobs:pdf:stats');
+  });
+
+  test('pdfAdmission admits on stale, missing or unreadable stats', async () => {
+    mockHgetall.mockResolvedValueOnce({ estimated_wait_seconds: '900', updated_at: String(Date.now() / 1000 - 600) });
+    await expect(queueService.pdfAdmission()).resolves.toMatchObject({ admitted: true });
+
+    mockHgetall.mockResolvedValueOnce({});
+    await expect(queueService.pdfAdmission()).resolves.toMatchObject({ admitted: true });
+
+    mockHgetall.mockRejectedValueOnce(new Error('Connection refused'));
+    await expect(queueService.pdfAdmission()).resolves.toMatchObject({ admitted: true });
+  });
+
+  test('enqueuePdfExtraction throws QueueFullError without queueing when over the SLO', async () => {
+    mockHgetall.mockResolvedValueOnce({ estimated_wait_seconds: '420', updated_at: String(Date.now() / 1000) });
+
+    await expect(
+      queueService.enqueuePdfExtraction({ documentId: 'd', userId: 'u', filePath: 'p', fileName: 'f' }),
+    ).rejects.toBeInstanceOf(QueueFullError);
+    expect(mockLpush).not.toHaveBeenCalled();
+  });
+
+  test('trackPdfDispatch counts a Trigger.dev job until its run starts, ignoring Redis errors', async () => {
+    await queueService.trackPdfDispatch('doc-1');
+    expect(mockZadd).toHaveBeenCalledWith('kratos:jobs:pdf:dispatched', expect.any(Number), 'doc-1');
+
+    mockZadd.mockRejectedValueOnce(new Error('Connection refused'));
+    await expect(queueService.trackPdfDispatch('doc-2')).resolves.toBeUndefined();
+  });
+
   test('enqueueAnalysis pushes job to analysis queue', async () => {
     const job = {
       documentId: 'doc-1',
@@ -13,9 +13,35 @@ redis.on('error', (err) => {
 });
 
 const QUEUE_KEY = 'kratos:jobs:pdf';
+// Snapshot the PDF workers publish every QUEUE_STATS_INTERVAL_SECONDS
+// (workers/pdf-worker/src/services/queue.py publish_queue_stats)
+const STATS_KEY = `${QUEUE_KEY}:stats`;
+// PDF jobs handed to Trigger.dev whose run has not started (documentId -> epoch
+// seconds); the runner removes them and counts them in the stats' depth
+const DISPATCHED_KEY = `${QUEUE_KEY}:dispatched`;
 const DOCX_QUEUE_KEY = 'kratos:jobs:docx';
 const ANALYSIS_QUEUE_KEY = 'kratos:jobs:analysis';
 
+const QUEUE_LATENCY_SLO_SECONDS = parseInt(process.env.QUEUE_LATENCY_SLO_SECONDS || '300', 10);
+const QUEUE_STATS_INTERVAL_SECONDS = parseInt(process.env.QUEUE_STATS_INTERVAL_SECONDS || '15', 10);
+
+/** Admission control rejected a PDF job: the backlog already exceeds the latency SLO. */
+export class QueueFullError extends Error {
+  constructor(
+    message: string,
+    readonly retryAfterSeconds: number,
+  ) {
+    super(message);
+    this.name = 'QueueFullError';
+  }
+}
+
+export interface PdfAdmission {
+  admitted: boolean;
+  estimatedWaitSeconds: number;
+  retryAfterSeconds: number;
+}
+
 export interface PdfJob {
   documentId: string;
   userId: string;
@@ -37,9 +63,58 @@ export interface AnalysisJob {
 }
 
 export const queueService = {
+  /**
+   * Admission control for new PDF jobs: rejects while the workers' published
+   * estimated wait exceeds QUEUE_LATENCY_SLO_SECONDS. Admits when the
+   * snapshot is missing, stale (no worker published in three intervals) or
+   * unreadable, so a Redis hiccup never blocks uploads.
+   */
+  async pdfAdmission(): Promise<PdfAdmission> {
+    const open = { admitted: true, estimatedWaitSeconds: 0, retryAfterSeconds: 0 };
+    let stats: Record<string, string>;
+    try {
+      stats = await redis.hgetall(STATS_KEY);
+    } catch (err) {
+      logger.warn({ err: (err as Error).message }, '[Queue] Stats unavailable, admitting job');
+      return open;
+    }
+    const updatedAt = Number(stats.updated_at);
+    const wait = Number(stats.estimated_wait_seconds);
+    if (!updatedAt || Date.now() / 1000 - updatedAt > 3 * QUEUE_STATS_INTERVAL_SECONDS || !Number.isFinite(wait)) {
+      return open;
+    }
+    return {
+      admitted: wait <= QUEUE_LATENCY_SLO_SECONDS,
+      estimatedWaitSeconds: wait,
+      retryAfterSeconds: Math.max(Math.ceil(wait - QUEUE_LATENCY_SLO_SECONDS), QUEUE_STATS_INTERVAL_SECONDS),
+    };
+  },
+
+  /**
+   * Count a PDF job dispatched to Trigger.dev in the backlog until its run
+   * starts. Best-effort: a Redis error never fails the upload.
+   */
+  async trackPdfDispatch(documentId: string) {
+    try {
+      await redis.zadd(DISPATCHED_KEY, Date.now() / 1000, documentId);
+    } catch (err) {
+      logger.warn({ err: (err as Error).message, documentId }, '[Queue] Could not track PDF dispatch');
+    }
+  },
+
   async enqueuePdfExtraction(job: PdfJob) {
+    const admission = await queueService.pdfAdmission();
+    if (!admission.admitted) {
+      throw new QueueFullError(
+        `PDF queue backlog (~${Math.round(admission.estimatedWaitSeconds)}s wait) exceeds SLO of ${QUEUE_LATENCY_SLO_SECONDS}s`,
+        admission.retryAfterSeconds,
+      );
+    }
+    // Always the shared list: workers with fair scheduling move jobs to their
+    // tenant's sub-queue (fair_queue.drain_shared), and any other worker
+    // consumes the list directly
     try {
-      await redis.lpush(QUEUE_KEY, JSON.stringify(job));
+      await redis.lpush(QUEUE_KEY, JSON.stringify({ ...job, enqueuedAt: Date.now() / 1000 }));
     } catch (err) {
       throw new Error(`Queue enqueue failed: ${(err as Error).message}`);
     }
@@ -0,0 +1,69 @@
+import { describe, test, expect } from 'vitest';
+import { SearchIndex, searchIndexKey, tokenize } from './search-index.js';
+
+/** Minimal encoder mirroring the worker's SearchIndex.serialize */
+function encode(text: string, pageStarts: [number, number][]): Uint8Array {
+  const tokens = [...text.matchAll(/\S+/g)].map((m) => ({
+    term: tokenize(m[0])[0],
+    start: m.index!,
+    end: m.index! + m[0].length,
+  }));
+  const byTerm = new Map<string, number[]>();
+  tokens.forEach(({ term }, i) => byTerm.set(term, [...(byTerm.get(term) ?? []), i]));
+  const terms: Record<string, [number, number]> = {};
+  const postings: number[] = [];
+  for (const term of [...byTerm.keys()].sort()) {
+    const positions = byTerm.get(term)!;
+    terms[term] = [postings.length, positions.length];
+    positions.forEach((p, i) => postings.push(p - (i ? positions[i - 1] : 0)));
+  }
+  const pages = pageStarts.map(([page, charStart]) => [
+    page,
+    tokens.findIndex((t) => t.start >= charStart),
+    charStart,
+  ]);
+  let header = Buffer.from(JSON.stringify({
+    version: 1, document_id: 'doc-1', tokens: tokens.length, postings: postings.length, terms, pages,
+  }));
+  header = Buffer.concat([header, Buffer.alloc(-header.length & 3, ' ')]);
+  const words = Buffer.alloc(4 * (postings.length + tokens.length));
+  [...postings, ...tokens.map((t) => t.start)].forEach((v, i) => words.writeUInt32LE(v, 4 * i));
+  const size = Buffer.alloc(4);
+  size.writeUInt32LE(header.length);
+  return Buffer.concat([
+    Buffer.from('KSX1'), size, header, words, Buffer.from(tokens.map((t) => t.end - t.start)),
+  ]);
+}
+
+const TEXT = 'Autor: João da Conceição\n\nCondeno o réu JOAO DA CONCEICAO';
+
+describe('SearchIndex', () => {
+  test('tokenize folds accents and keeps identifiers as digits', () => {
+    expect(tokenize('Ação nº 5º, CPF 123.456.789-09 guarda-chuva')).toEqual([
+      'acao', 'n', '5', 'cpf', '12345678909', 'guarda', 'chuva',
+    ]);
+  });
+
+  test('phrase hits carry pages and offsets', () => {
+    const index = SearchIndex.parse(encode(TEXT, [[1, 0], [2, 26]]));
+
+    const found = index.search('joão da conceição');
+
+    expect(found.total).toBe(2);
+    expect(found.hits.map((h) => h.page)).toEqual([1, 2]);
+    const hit = found.hits[1];
+    expect(TEXT.slice(hit.charStart, hit.charEnd)).toBe('JOAO DA CONCEICAO');
+    expect(hit.pageCharStart).toBe(hit.charStart - 26);
+    expect(index.search('réu joao').total).toBe(1);
+    expect(index.search('conceição autor').total).toBe(0);
+    expect(index.search('da', 1).hits).toHaveLength(1);
+  });
+
+  test('parse rejects other payloads', () => {
+    expect(() => SearchIndex.parse(Buffer.from('{"raw_text":""}'))).toThrow('Not a search index');
+  });
+
+  test('index key sits next to the PDF', () => {
+    expect(searchIndexKey('user-1/doc-1/peticao.pdf', 'doc-1')).toBe('user-1/doc-1/doc-1.search.gz');
+  });
+});
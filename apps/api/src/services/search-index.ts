@@ -0,0 +1,168 @@
+/**
+ * Reader for the in-document search index the PDF worker writes next to the
+ * PDF (`<user>/<doc>/<doc>.search.gz`, see workers/pdf-worker/src/services/search_index.py):
+ *
+ *   "KSX1" | u32 header length | header JSON, space-padded to 4 bytes |
+ *   u32[postings] | u32[token starts] | u8[token lengths]
+ *
+ * Postings are delta-encoded per term and only the queried terms are decoded.
+ * The query tokenizer must stay in step with the worker's.
+ */
+
+const MAGIC = 'KSX1';
+const FORMAT_VERSION = 1;
+
+export const SEARCH_INDEX_SUFFIX = '.search.gz';
+
+// Digit groups joined by . , / - (CPF, CNPJ, CNJ numbers, dates, amounts),
+// else runs of letters/digits (and combining accents); º/ª split tokens
+const TOKEN_RE = /[0-9]+(?:[.,/-][0-9]+)+|(?:(?![ºª])[\p{L}\p{N}]|[\u0300-\u036f])+/gu;
+const NUMBER_RE = /^[0-9]+(?:[.,/-][0-9]+)+$/;
+
+export interface SearchHit {
+  page: number;
+  charStart: number;
+  charEnd: number;
+  pageCharStart: number;
+  pageCharEnd: number;
+}
+
+export interface SearchResults {
+  query: string;
+  terms: string[];
+  total: number;
+  hits: SearchHit[];
+}
+
+interface Header {
+  version: number;
+  document_id: string;
+  tokens: number;
+  postings: number;
+  terms: Record<string, [number, number]>;
+  pages: [number, number, number][];
+}
+
+/** Accent-folded, lower-case form of a token */
+export function fold(token: string): string {
+  return token.normalize('NFKD').replace(/\p{M}/gu, '').toLowerCase();
+}
+
+/** Index terms of a query, in order */
+export function tokenize(text: string): string[] {
+  const terms: string[] = [];
+  for (const [raw] of text.matchAll(TOKEN_RE)) {
+    const term = NUMBER_RE.test(raw) ? raw.replace(/[^0-9]/g, '') : fold(raw);
+    if (term) terms.push(term);
+  }
+  return terms;
+}
+
+function bisectRight(values: ArrayLike<number>, value: number): number {
+  let lo = 0;
+  let hi = values.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (values[mid] <= value) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+function contains(sorted: number[], value: number): boolean {
+  const i = bisectRight(sorted, value) - 1;
+  return i >= 0 && sorted[i] === value;
+}
+
+export class SearchIndex {
+  private readonly view: DataView;
+  private readonly postingsAt: number;
+  private readonly startsAt: number;
+  private readonly lengthsAt: number;
+  private readonly pageTokens: number[];
+
+  private constructor(private readonly buf: Uint8Array, private readonly header: Header, body: number) {
+    this.view = new DataView(buf.buffer, buf.byteOffset, buf.byteLength);
+    this.postingsAt = body;
+    this.startsAt = body + 4 * header.postings;
+    this.lengthsAt = this.startsAt + 4 * header.tokens;
+    this.pageTokens = header.pages.map(([, first]) => first);
+  }
+
+  /** Parse a decompressed index */
+  static parse(buf: Uint8Array): SearchIndex {
+    if (new TextDecoder().decode(buf.subarray(0, 4)) !== MAGIC) {
+      throw new Error('Not a search index');
+    }
+    const view = new DataView(buf.buffer, buf.byteOffset, buf.byteLength);
+    const headerLen = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(buf.subarray(8, 8 + headerLen))) as Header;
+    if (header.version !== FORMAT_VERSION) {
+      throw new Error(`Unsupported search index version ${header.version}`);
+    }
+    return new SearchIndex(buf, header, 8 + headerLen);
+  }
+
+  get documentId() {
+    return this.header.document_id;
+  }
+
+  get tokens() {
+    return this.header.tokens;
+  }
+
+  positions(term: string): number[] {
+    const span = Object.hasOwn(this.header.terms, term) ? this.header.terms[term] : undefined;
+    if (!span) return [];
+    const [first, count] = span;
+    const out = new Array<number>(count);
+    let position = 0;
+    for (let i = 0; i < count; i++) {
+      position += this.view.getUint32(this.postingsAt + 4 * (first + i), true);
+      out[i] = position;
+    }
+    return out;
+  }
+
+  /** Hits for a term, or for a phrase when the query has several tokens */
+  search(query: string, limit = 100): SearchResults {
+    const terms = tokenize(query);
+    let matches: number[] = [];
+    if (terms.length) {
+      const lists = terms.map((term) => this.positions(term));
+      if (lists.length === 1) {
+        matches = lists[0];
+      } else if (lists.every((list) => list.length)) {
+        // Walk the rarest term's positions, binary-search the others
+        const rarest = lists.reduce((best, list, i) => (list.length < lists[best].length ? i : best), 0);
+        const others = lists.flatMap((list, i) => (i === rarest ? [] : [[i - rarest, list] as const]));
+        matches = lists[rarest]
+          .filter((pos) => others.every(([shift, list]) => contains(list, pos + shift)))
+          .map((pos) => pos - rarest);
+      }
+    }
+    const hits = matches.slice(0, limit).map((pos) => this.hit(pos, terms.length));
+    return { query, terms, total: matches.length, hits };
+  }
+
+  private hit(position: number, length: number): SearchHit {
+    const [page, , pageStart] = this.header.pages[bisectRight(this.pageTokens, position) - 1];
+    const last = position + length - 1;
+    const charStart = this.view.getUint32(this.startsAt + 4 * position, true);
+    const charEnd = this.view.getUint32(this.startsAt + 4 * last, true) + this.buf[this.lengthsAt + last];
+    return {
+      page,
+      charStart,
+      charEnd,
+      pageCharStart: charStart - pageStart,
+      pageCharEnd: charEnd - pageStart,
+    };
+  }
+}
+
+/** Object key next to the source PDF, e.g. `<user>/<doc>/<doc>.search.gz` */
+export function searchIndexKey(filePath: string, documentId: string): string {
+  const slash = filePath.lastIndexOf('/');
+  const name = `${documentId}${SEARCH_INDEX_SUFFIX}`;
+  return slash >= 0 ? `${filePath.slice(0, slash)}/${name}` : name;
+}
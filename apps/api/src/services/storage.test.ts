@@ -1,8 +1,10 @@
 import { describe, test, expect, vi, beforeEach } from 'vitest';
+import { gzipSync } from 'node:zlib';
 
 const mockUpload = vi.fn();
 const mockCreateSignedUrl = vi.fn();
 const mockGetPublicUrl = vi.fn();
+const mockDownload = vi.fn();
 
 vi.mock('@supabase/supabase-js', () => ({
   createClient: () => ({
@@ -11,6 +13,7 @@ vi.mock('@supabase/supabase-js', () => ({
         upload: mockUpload,
         createSignedUrl: mockCreateSignedUrl,
         getPublicUrl: mockGetPublicUrl,
+        download: mockDownload,
       }),
     },
   }),
@@ -71,4 +74,27 @@ describe('StorageService', () => {
     const url = await storageService.getSignedUrl('user-1/doc-1/test.pdf');
     expect(url).toBe('https://example.com/signed?token=abc');
   });
+
+  test('downloadExtractionOutput decompresses a spilled gzip output', async () => {
+    const body = JSON.stringify({ raw_text: 'Texto integral', content_json: { pages: [] } });
+    mockDownload.mockResolvedValue({ data: new Blob([gzipSync(body)]), error: null });
+
+    const output = await storageService.downloadExtractionOutput('u/d/d.extraction.json.gz');
+    expect(output.rawText).toBe('Texto integral');
+    expect(output.contentJson).toEqual({ pages: [] });
+  });
+
+  test('downloadExtractionOutput throws on storage error', async () => {
+    mockDownload.mockResolvedValue({ data: null, error: { message: 'Object not found' } });
+
+    await expect(storageService.downloadExtractionOutput('missing')).rejects.toThrow(
+      'Extraction output download failed',
+    );
+  });
+
+  test('downloadSearchIndex returns null when the document has no index', async () => {
+    mockDownload.mockResolvedValue({ data: null, error: { message: 'Object not found' } });
+
+    await expect(storageService.downloadSearchIndex('u/d/d.search.gz')).resolves.toBeNull();
+  });
 });
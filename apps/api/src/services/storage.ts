@@ -1,10 +1,35 @@
 import { createClient } from '@supabase/supabase-js';
+import zlib from 'node:zlib';
+import { SearchIndex } from './search-index.js';
 
 const supabase = createClient(
   process.env.SUPABASE_URL || '',
   process.env.SUPABASE_SERVICE_ROLE_KEY || '',
 );
 
+/** Full extraction output spilled to storage by the PDF worker */
+export interface ExtractionOutput {
+  rawText: string;
+  contentJson: Record<string, unknown>;
+}
+
+const GZIP_MAGIC = [0x1f, 0x8b];
+const ZSTD_MAGIC = [0x28, 0xb5, 0x2f, 0xfd];
+
+function startsWith(buf: Buffer, magic: number[]) {
+  return magic.every((byte, i) => buf[i] === byte);
+}
+
+function decompressOutput(buf: Buffer): Buffer {
+  if (startsWith(buf, GZIP_MAGIC)) return zlib.gunzipSync(buf);
+  if (startsWith(buf, ZSTD_MAGIC)) {
+    const zstd = (zlib as unknown as { zstdDecompressSync?: (b: Buffer) => Buffer }).zstdDecompressSync;
+    if (!zstd) throw new Error('zstd extraction outputs require Node.js with zlib zstd support');
+    return zstd(buf);
+  }
+  throw new Error('Unrecognised extraction output encoding');
+}
+
 interface UploadParams {
   userId: string;
   documentId: string;
@@ -32,4 +57,34 @@ export const storageService = {
     if (error) throw new Error(`Signed URL failed: ${error.message}`);
     return data.signedUrl;
   },
+
+  /** Signed URLs for several objects in one call; null for objects that do not exist */
+  async getSignedUrls(paths: string[], expiresIn = 3600): Promise<(string | null)[]> {
+    const { data, error } = await supabase.storage
+      .from('documents')
+      .createSignedUrls(paths, expiresIn);
+
+    if (error) throw new Error(`Signed URLs failed: ${error.message}`);
+    return data.map((item) => (item.error ? null : item.signedUrl));
+  },
+
+  /** Fetch and decompress an extraction output spilled next to the PDF (extractions.output_key) */
+  async downloadExtractionOutput(key: string): Promise<ExtractionOutput> {
+    const { data, error } = await supabase.storage.from('documents').download(key);
+
+    if (error) throw new Error(`Extraction output download failed: ${error.message}`);
+    const json = JSON.parse(decompressOutput(Buffer.from(await data.arrayBuffer())).toString('utf8'));
+    return { rawText: json.raw_text ?? '', contentJson: json.content_json ?? {} };
+  },
+
+  /** Fetch and parse a document's search index (see search-index.ts); null when it was never built */
+  async downloadSearchIndex(key: string): Promise<SearchIndex | null> {
+    const { data, error } = await supabase.storage.from('documents').download(key);
+
+    if (error) {
+      if (/not found/i.test(error.message)) return null;
+      throw new Error(`Search index download failed: ${error.message}`);
+    }
+    return SearchIndex.parse(decompressOutput(Buffer.from(await data.arrayBuffer())));
+  },
 };
@@ -6,6 +6,10 @@ vi.mock("@trigger.dev/sdk/v3", () => ({
   },
 }));
 
+vi.mock("./queue.js", () => ({
+  queueService: { trackPdfDispatch: vi.fn().mockResolvedValue(undefined) },
+}));
+
 describe("triggerService", () => {
   beforeEach(() => vi.clearAllMocks());
 
@@ -29,6 +33,8 @@ describe("triggerService", () => {
         idempotencyKey: undefined,
       }),
     );
+    const { queueService } = await import("./queue.js");
+    expect(queueService.trackPdfDispatch).toHaveBeenCalledWith("a1b2c3d4-e5f6-7890-abcd-ef1234567890");
   });
 
   it("passes idempotencyKey when pdfHash is provided", async () => {
@@ -1,4 +1,5 @@
 import { tasks } from "@trigger.dev/sdk/v3";
+import { queueService } from "./queue.js";
 
 export interface PdfJob {
   documentId: string;
@@ -27,6 +28,8 @@ export const triggerService = {
       idempotencyKey: job.pdfHash ? `pdf-extract:${job.pdfHash}` : undefined,
       idempotencyKeyTTL: "24h",
     });
+    // Backlog for admission control, until pdf_runner starts the run
+    await queueService.trackPdfDispatch(job.documentId);
   },
 
   async enqueueDocxExport(job: DocxJob): Promise<void> {
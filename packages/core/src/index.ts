@@ -89,6 +89,9 @@ export interface Extraction {
   documentId: string;
   contentJson: Record<string, unknown>;
   extractionMethod: string;
+  outputKey: string | null;
+  extractorVersion: number;
+  pdfHash: string | null;
   createdAt: Date;
 }
 
@@ -30,6 +30,11 @@ describe('ExtractionOutputSchema', () => {
     }
   });
 
+  it('parses duplicate status without output', () => {
+    const result = ExtractionOutputSchema.safeParse({ status: 'duplicate' });
+    expect(result.success).toBe(true);
+  });
+
   it('rejects invalid status value', () => {
     const result = ExtractionOutputSchema.safeParse({ status: 'unknown' });
     expect(result.success).toBe(false);
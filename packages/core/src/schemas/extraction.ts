@@ -6,12 +6,18 @@ import { z } from 'zod';
  * and TypeScript consumer (workers/trigger/src/pdf.ts).
  */
 export const ExtractionOutputSchema = z.object({
-  status: z.enum(['completed', 'failed']),
+  /** duplicate: another run holds the document's single-flight claim and saves its output */
+  status: z.enum(['completed', 'failed', 'duplicate']),
   rawText: z.string().optional(),
   tablesCount: z.number().int().min(0).optional(),
   pageCount: z.number().int().min(1).optional(),
   extractionMethod: z.string().optional(),
+  /** Pipeline revision (EXTRACTOR_VERSION in the PDF worker) */
+  extractorVersion: z.number().int().min(0).optional(),
+  pdfHash: z.string().length(64).optional(),
   contentJson: z.record(z.unknown()).optional(),
+  /** Set when the full output was spilled to storage; rawText is then omitted */
+  outputKey: z.string().min(1).optional(),
   error: z.string().optional(),
 });
 
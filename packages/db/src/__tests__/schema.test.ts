@@ -8,6 +8,7 @@ import { getTableName } from 'drizzle-orm';
 import {
   documents,
   extractions,
+  extractionPages,
   analyses,
   precedents,
   promptVersions,
@@ -95,6 +96,41 @@ describe('Schema: extractions table', () => {
   test('contentJson defaults to empty object', () => {
     expect(extractions.contentJson.hasDefault).toBe(true);
   });
+
+  test('extractorVersion is required and defaults for pre-versioning rows', () => {
+    expect(extractions.extractorVersion.notNull).toBe(true);
+    expect(extractions.extractorVersion.hasDefault).toBe(true);
+    expect(extractions.pdfHash.notNull).toBe(false);
+  });
+});
+
+describe('Schema: extraction_pages table', () => {
+  test('has correct table name', () => {
+    expect(getTableName(extractionPages)).toBe('extraction_pages');
+  });
+
+  test('has all required columns', () => {
+    const cols = getColumnNames(extractionPages);
+    expect(cols).toEqual(
+      expect.arrayContaining([
+        'documentId',
+        'pageNumber',
+        'text',
+        'charStart',
+        'charEnd',
+        'tablesCount',
+        'imagesCount',
+        'engine',
+        'tables',
+        'createdAt',
+      ]),
+    );
+  });
+
+  test('is keyed by document and page number', () => {
+    expect(extractionPages.documentId.notNull).toBe(true);
+    expect(extractionPages.pageNumber.notNull).toBe(true);
+  });
 });
 
 describe('Schema: analyses table', () => {
@@ -3,7 +3,7 @@
  * Database layer — Drizzle ORM + PostgreSQL (Supabase) + pgvector.
  *
  * Exports:
- * - **Schema tables**: `documents`, `extractions`, `analyses`, `precedents`, `promptVersions`, `auditLogs`
+ * - **Schema tables**: `documents`, `extractions`, `extractionPages`, `analyses`, `precedents`, `promptVersions`, `auditLogs`
  * - **DB client**: `db` (Drizzle instance), `queryClient` (raw postgres.js for shutdown)
  *
  * @example
@@ -15,6 +15,7 @@
 export {
   documents,
   extractions,
+  extractionPages,
   analyses,
   precedents,
   promptVersions,
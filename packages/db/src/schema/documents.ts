@@ -5,6 +5,7 @@
  * Tables:
  * - {@link documents} — Uploaded PDF files and their processing status
  * - {@link extractions} — Structured content extracted from PDFs
+ * - {@link extractionPages} — Per-page text and tables for page-range reads
  * - {@link analyses} — AI-generated legal analyses (FIRAC framework)
  * - {@link precedents} — Legal precedents with pgvector embeddings for RAG
  * - {@link promptVersions} — Versioned prompt templates for AI agents
@@ -24,6 +25,7 @@ import {
   boolean,
   index,
   unique,
+  primaryKey,
   customType,
 } from 'drizzle-orm/pg-core';
 
@@ -111,9 +113,51 @@ export const extractions = pgTable(
     rawText: text('raw_text'),
     tablesCount: integer('tables_count').default(0),
     imagesCount: integer('images_count').default(0),
+    /** Storage key of the compressed full output when spilled (raw_text is then NULL) */
+    outputKey: text('output_key'),
+    /** Pipeline revision that produced this row (0 = before versioning); older rows get re-extracted */
+    extractorVersion: integer('extractor_version').notNull().default(0),
+    /** SHA-256 of the source PDF, to reuse a current extraction of the same file */
+    pdfHash: varchar('pdf_hash', { length: 64 }),
+    createdAt: timestamp('created_at', { withTimezone: true }).notNull().defaultNow(),
+  },
+  (table) => [
+    index('idx_extractions_document_id').on(table.documentId),
+    index('idx_extractions_version').on(table.extractorVersion, table.id),
+    index('idx_extractions_pdf_hash_version').on(table.pdfHash, table.extractorVersion),
+  ],
+);
+
+// ============================================================
+// Extraction Pages — per-page content for range reads
+// ============================================================
+
+/**
+ * One row per extracted page, written in bulk by the PDF worker.
+ * Lets the review UI fetch any page range by primary key instead of
+ * loading the whole `extractions.contentJson`.
+ *
+ * @primaryKey (documentId, pageNumber)
+ * @cascade Deleting a document cascades to its pages
+ */
+export const extractionPages = pgTable(
+  'extraction_pages',
+  {
+    documentId: uuid('document_id')
+      .notNull()
+      .references(() => documents.id, { onDelete: 'cascade' }),
+    pageNumber: integer('page_number').notNull(),
+    text: text('text').notNull().default(''),
+    /** Offsets of this page inside `extractions.rawText` (end-exclusive) */
+    charStart: integer('char_start').notNull().default(0),
+    charEnd: integer('char_end').notNull().default(0),
+    tablesCount: integer('tables_count').notNull().default(0),
+    imagesCount: integer('images_count').notNull().default(0),
+    engine: varchar('engine', { length: 20 }).notNull().default('pdfplumber'),
+    tables: jsonb('tables').notNull().default([]),
     createdAt: timestamp('created_at', { withTimezone: true }).notNull().defaultNow(),
   },
-  (table) => [index('idx_extractions_document_id').on(table.documentId)],
+  (table) => [primaryKey({ columns: [table.documentId, table.pageNumber] })],
 );
 
 // ============================================================
@@ -0,0 +1,5 @@
+-- Large extraction outputs are spilled to a compressed object in the documents
+-- bucket (next to the source PDF). The row then keeps only a summary in
+-- content_json, raw_text is NULL and output_key points at the object.
+
+ALTER TABLE "extractions" ADD COLUMN "output_key" text;
@@ -0,0 +1,28 @@
+-- Per-page extraction content (text + tables), one row per page keyed by
+-- (document_id, page_number). Written in bulk by the PDF worker next to the
+-- extractions row so the review UI and the API can read any page range via
+-- the primary key instead of loading the whole content_json.
+
+CREATE TABLE IF NOT EXISTS "extraction_pages" (
+  "document_id" uuid NOT NULL REFERENCES "documents"("id") ON DELETE CASCADE,
+  "page_number" integer NOT NULL,
+  "text" text NOT NULL DEFAULT '',
+  "char_start" integer NOT NULL DEFAULT 0,
+  "char_end" integer NOT NULL DEFAULT 0,
+  "tables_count" integer NOT NULL DEFAULT 0,
+  "images_count" integer NOT NULL DEFAULT 0,
+  "engine" varchar(20) NOT NULL DEFAULT 'pdfplumber',
+  "tables" jsonb NOT NULL DEFAULT '[]',
+  "edits" jsonb NOT NULL DEFAULT '[]',
+  "created_at" timestamp with time zone NOT NULL DEFAULT now(),
+  PRIMARY KEY ("document_id", "page_number")
+);
+
+ALTER TABLE extraction_pages ENABLE ROW LEVEL SECURITY;
+
+-- Workers write with SUPABASE_SERVICE_ROLE_KEY (bypasses RLS); users read
+-- pages of their own documents.
+CREATE POLICY "users_select_own_extraction_pages" ON extraction_pages
+  FOR SELECT USING (
+    document_id IN (SELECT id FROM documents WHERE user_id = auth.uid())
+  );
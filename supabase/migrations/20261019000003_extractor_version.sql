@@ -0,0 +1,19 @@
+-- Extractor revision and source PDF hash on every extraction, so rows from
+-- an older pipeline can be found and re-extracted incrementally (PDF worker:
+-- src/services/reextraction.py) instead of reprocessing every document.
+-- Rows written before versioning are version 0.
+
+ALTER TABLE "extractions" ADD COLUMN "extractor_version" integer NOT NULL DEFAULT 0;
+ALTER TABLE "extractions" ADD COLUMN "pdf_hash" varchar(64);
+
+UPDATE "extractions"
+SET "pdf_hash" = COALESCE(
+  "content_json"->'metadata'->>'pdf_hash',
+  "content_json"->'summary'->>'pdf_hash'
+)
+WHERE "pdf_hash" IS NULL;
+
+-- Stale-row scan (extractor_version < current, keyset on id) and reuse of a
+-- current extraction of the same PDF
+CREATE INDEX "idx_extractions_version" ON "extractions" ("extractor_version", "id");
+CREATE INDEX "idx_extractions_pdf_hash_version" ON "extractions" ("pdf_hash", "extractor_version");
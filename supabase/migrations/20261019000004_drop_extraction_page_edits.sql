@@ -0,0 +1,5 @@
+-- Normalization offset maps no longer live in the page rows: a per-edit log
+-- outweighed the text normalization removes. The PDF worker uploads them
+-- next to the PDF instead (<doc>.offsets.json.gz, content_json textOffsets).
+
+ALTER TABLE "extraction_pages" DROP COLUMN IF EXISTS "edits";
@@ -0,0 +1,105 @@
+"""
+Benchmark: extraction engines (pdfplumber vs hybrid) on a PDF corpus.
+
+For every PDF, runs each engine --runs times and reports throughput (pages
+per second, best run), how many pages the hybrid engine sent to pdfium, and
+text fidelity against pdfplumber: the share of pages with identical text,
+the mean per-page similarity (difflib ratio) and whether the tables found
+are the same.
+
+Usage:
+  python benchmarks/bench_extraction_engines.py --corpus ./pdfs
+  python benchmarks/bench_extraction_engines.py --corpus ./pdfs --runs 3 --json
+"""
+
+import argparse
+import difflib
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.services.pdf_extraction import ENGINES  # noqa: E402
+
+BASELINE = "pdfplumber"
+
+
+def _similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def bench_pdf(path: Path, runs: int) -> dict:
+    timings: dict[str, float] = {}
+    outputs = {}
+    for name, engine in ENGINES.items():
+        best = float("inf")
+        for _ in range(runs):
+            start = time.perf_counter()
+            outputs[name] = engine.extract(path)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    base_pages, base_tables = outputs[BASELINE]
+    row = {"pdf": path.name, "pages": len(base_pages)}
+    for name, (pages, tables) in outputs.items():
+        row[f"{name}_pages_per_s"] = round(len(pages) / timings[name], 1) if timings[name] else 0.0
+        if name == BASELINE:
+            continue
+        sims = [_similarity(p.text, b.text) for p, b in zip(pages, base_pages)]
+        row[f"{name}_pdfium_pages"] = sum(1 for p in pages if p.engine == "pdfium")
+        row[f"{name}_identical_pages"] = sum(1 for s in sims if s == 1.0)
+        row[f"{name}_mean_similarity"] = round(sum(sims) / len(sims), 4) if sims else 1.0
+        row[f"{name}_same_tables"] = (
+            [t.raw_rows for t in tables] == [t.raw_rows for t in base_tables]
+        )
+        row[f"{name}_speedup"] = round(timings[BASELINE] / timings[name], 2) if timings[name] else 0.0
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", required=True, help="Directory of PDFs (searched recursively)")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per engine (best is kept)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    pdfs = sorted(Path(args.corpus).rglob("*.pdf"))
+    if not pdfs:
+        raise SystemExit(f"No PDFs found in {args.corpus}")
+
+    rows = []
+    for path in pdfs:
+        try:
+            rows.append(bench_pdf(path, args.runs))
+        except Exception as e:
+            print(f"[WARN] Skipping {path}: {e}", file=sys.stderr)
+
+    total_pages = sum(r["pages"] for r in rows)
+    totals = {"pdfs": len(rows), "pages": total_pages}
+    for name in ENGINES:
+        seconds = sum(r["pages"] / r[f"{name}_pages_per_s"] for r in rows if r[f"{name}_pages_per_s"])
+        totals[f"{name}_pages_per_s"] = round(total_pages / seconds, 1) if seconds else 0.0
+    for name in ENGINES:
+        if name == BASELINE:
+            continue
+        totals[f"{name}_pdfium_pages"] = sum(r[f"{name}_pdfium_pages"] for r in rows)
+        totals[f"{name}_identical_pages"] = sum(r[f"{name}_identical_pages"] for r in rows)
+        totals[f"{name}_mean_similarity"] = round(
+            sum(r[f"{name}_mean_similarity"] * r["pages"] for r in rows) / max(total_pages, 1), 4
+        )
+        totals[f"{name}_same_tables"] = all(r[f"{name}_same_tables"] for r in rows)
+
+    if args.json:
+        print(json.dumps({"totals": totals, "pdfs": rows}, indent=2))
+        return
+    for row in rows:
+        print(json.dumps(row))
+    print("TOTAL", json.dumps(totals, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: queue wait per tenant, shared FIFO vs per-tenant fair scheduling.
+
+One bulk tenant enqueues --bulk jobs, then --tenants other tenants enqueue
+--jobs each. --workers workers drain the queue in rounds of equal-length
+jobs; the wait of each job is the round it started in. Reports wait
+percentiles (in job durations) for the bulk tenant and the others, and the
+cost of one fair_queue.pop() against the Redis in use.
+
+Usage:
+  python benchmarks/bench_fair_queue.py
+  python benchmarks/bench_fair_queue.py --redis-url redis://localhost:6379/15 --bulk 5000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fakeredis  # noqa: E402
+import redis  # noqa: E402
+
+from src.services import fair_queue  # noqa: E402
+
+Q = "kratos:bench:pdf"
+
+
+def _jobs(args) -> list[dict]:
+    jobs = [{"documentId": f"bulk-{i}", "userId": "bulk"} for i in range(args.bulk)]
+    for t in range(args.tenants):
+        jobs += [{"documentId": f"t{t}-{i}", "userId": f"tenant-{t}"} for i in range(args.jobs)]
+    return jobs
+
+
+def _fifo(r, jobs, workers) -> dict[str, int]:
+    for job in jobs:
+        r.lpush(Q, json.dumps(job))
+    waits, round_ = {}, 0
+    while r.llen(Q):
+        for _ in range(workers):
+            raw = r.rpop(Q)
+            if raw is None:
+                break
+            waits[json.loads(raw)["documentId"]] = round_
+        round_ += 1
+    return waits
+
+
+def _fair(r, jobs, workers) -> tuple[dict[str, int], float]:
+    for job in jobs:
+        fair_queue.push(r, Q, job)
+    waits, round_, pops, spent = {}, 0, 0, 0.0
+    while True:
+        leases = []
+        for _ in range(workers):
+            start = time.perf_counter()
+            picked = fair_queue.pop(r, Q)
+            spent += time.perf_counter() - start
+            if picked is None:
+                break
+            pops += 1
+            job, lease = picked
+            waits[job["documentId"]] = round_
+            leases.append(lease)
+        if not leases:
+            return waits, spent / max(pops, 1)
+        for lease in leases:
+            fair_queue.release(r, Q, lease)
+        round_ += 1
+
+
+def _summary(waits: dict[str, int], bulk: bool) -> str:
+    values = sorted(v for k, v in waits.items() if k.startswith("bulk") == bulk)
+    if not values:
+        return "-"
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    return f"p50 {statistics.median(values):7.1f}  p95 {p95:6d}  max {values[-1]:6d}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--bulk", type=int, default=1000)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--redis-url", help="Real Redis (flushes the bench keys); default fakeredis")
+    args = parser.parse_args()
+
+    r = redis.from_url(args.redis_url) if args.redis_url else fakeredis.FakeRedis()
+    r.delete(*(r.keys(Q + "*") or [Q]))
+    jobs = _jobs(args)
+
+    fifo = _fifo(r, jobs, args.workers)
+    r.delete(*(r.keys(Q + "*") or [Q]))
+    fair, pop_seconds = _fair(r, jobs, args.workers)
+    r.delete(*(r.keys(Q + "*") or [Q]))
+
+    print(f"{len(jobs)} jobs, {args.workers} workers; wait in job durations")
+    for name, waits in (("fifo", fifo), ("fair", fair)):
+        print(f"{name}  bulk:   {_summary(waits, True)}")
+        print(f"{name}  others: {_summary(waits, False)}")
+    print(f"fair_queue.pop: {pop_seconds * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
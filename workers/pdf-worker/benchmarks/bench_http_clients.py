@@ -0,0 +1,169 @@
+"""
+Benchmark: per-module Supabase clients vs the shared pooled client.
+
+Runs the worker's per-document call sequence (download the PDF, mark the
+document as processing, insert the extraction, upload the spilled output)
+from N threads against a local keep-alive HTTP server that stands in for
+PostgREST and Storage, optionally adding --latency-ms per response.
+
+"legacy" builds one default client for storage and one for the database, as
+the modules did before; "shared" uses clients.get_client(). Reports per-call
+latency percentiles, documents per second and the TCP connections opened.
+
+Usage:
+  python benchmarks/bench_http_clients.py --docs 200 --concurrency 1 8 32
+  python benchmarks/bench_http_clients.py --latency-ms 20 --json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import settings  # noqa: E402
+from src.services import clients  # noqa: E402
+
+_PDF = b"%PDF-1.7\n" + b"0" * 64_000
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+    latency = 0.0
+    connections = 0
+    _count_lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._count_lock:
+            self.server.connections += 1
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.command == "GET" and self.path.startswith("/storage/"):
+            body, content_type = _PDF, "application/pdf"
+        elif self.path.startswith("/storage/"):
+            body, content_type = json.dumps({"Key": self.path}).encode(), "application/json"
+        else:
+            body, content_type = b"[]", "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = do_PUT = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+def _legacy_clients():
+    from supabase import create_client
+
+    def make():
+        return create_client(settings.supabase_url, settings.supabase_service_role_key)
+
+    return make(), make()  # storage, database
+
+
+def _shared_clients():
+    client = clients.get_client()
+    return client, client
+
+
+def _process(storage_client, db_client, i: int) -> list[float]:
+    bucket = storage_client.storage.from_(settings.storage_bucket)
+    calls = [
+        lambda: bucket.download(f"bench/{i}/document.pdf"),
+        lambda: db_client.table("documents").update({"status": "processing"}).eq("id", str(i)).execute(),
+        lambda: db_client.table("extractions").insert({"document_id": str(i)}).execute(),
+        lambda: bucket.upload(f"bench/{i}/{i}.extraction.json.gz", b"x" * 2048,
+                              {"content-type": "application/json", "upsert": "true"}),
+    ]
+    timings = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench(mode: str, server: _Server, docs: int, concurrency: int) -> dict:
+    clients.reset()
+    server.connections = 0
+    storage_client, db_client = _legacy_clients() if mode == "legacy" else _shared_clients()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        per_doc = list(pool.map(lambda i: _process(storage_client, db_client, i), range(docs)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(t for doc in per_doc for t in doc)
+    pct = statistics.quantiles(latencies, n=100)
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "p50_ms": round(pct[49] * 1000, 2),
+        "p95_ms": round(pct[94] * 1000, 2),
+        "p99_ms": round(pct[98] * 1000, 2),
+        "docs_per_s": round(docs / elapsed, 1),
+        "connections": server.connections,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Server-side delay added to every response")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    server = _Server(("127.0.0.1", 0), _Handler)
+    server.latency = args.latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings.backend = "supabase"
+    settings.supabase_url = f"http://127.0.0.1:{server.server_port}"
+    settings.supabase_service_role_key = "bench"
+
+    rows = []
+    try:
+        for concurrency in args.concurrency:
+            for mode in ("legacy", "shared"):
+                bench(mode, server, args.docs, concurrency)  # warm-up
+                rows.append(bench(mode, server, args.docs, concurrency))
+    finally:
+        clients.reset()
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.docs} documents x 4 calls, latency={args.latency_ms} ms, "
+          f"HTTP_MAX_CONNECTIONS={settings.http_max_connections}")
+    cols = list(rows[0])
+    print("  ".join(f"{c:>12}" for c in cols))
+    for row in rows:
+        print("  ".join(f"{row[c]!s:>12}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
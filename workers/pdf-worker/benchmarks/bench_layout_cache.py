@@ -0,0 +1,80 @@
+"""
+Benchmark: table extraction with and without layout templates.
+
+For every page of every PDF in the corpus (text already parsed, as in the
+engines), times page.extract_tables() against LayoutCache.extract_tables()
+with one cache shared by the whole corpus, checks the outputs are identical,
+and reports table milliseconds per page and the cache hit rate.
+
+Usage:
+  python benchmarks/bench_layout_cache.py --corpus ./pdfs
+  python benchmarks/bench_layout_cache.py --corpus ./pdfs --verify-every 10 --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import pdfplumber
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.services.layout_cache import LayoutCache  # noqa: E402
+
+
+def bench_pdf(path: Path, cache: LayoutCache) -> dict:
+    full = cached = 0.0
+    mismatches = 0
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            page.extract_text()
+            start = time.perf_counter()
+            expected = page.extract_tables()
+            full += time.perf_counter() - start
+            start = time.perf_counter()
+            got = cache.extract_tables(page)
+            cached += time.perf_counter() - start
+            mismatches += got != expected
+        pages = len(pdf.pages)
+    return {
+        "pdf": path.name,
+        "pages": pages,
+        "full_ms_per_page": round(full / pages * 1000, 2),
+        "cached_ms_per_page": round(cached / pages * 1000, 2),
+        "mismatches": mismatches,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", type=Path, required=True)
+    parser.add_argument("--verify-every", type=int, default=50)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    cache = LayoutCache(verify_every=args.verify_every)
+    rows = [bench_pdf(path, cache) for path in sorted(args.corpus.rglob("*.pdf"))]
+    stats = cache.stats()
+    pages = sum(r["pages"] for r in rows)
+    summary = {
+        "pages": pages,
+        "full_ms_per_page": round(sum(r["full_ms_per_page"] * r["pages"] for r in rows) / pages, 2),
+        "cached_ms_per_page": round(sum(r["cached_ms_per_page"] * r["pages"] for r in rows) / pages, 2),
+        "hit_rate": round(stats.hit_rate, 3),
+        **stats.model_dump(),
+    }
+    if args.json:
+        print(json.dumps({"pdfs": rows, "summary": summary}, indent=2))
+        return
+    for r in rows:
+        print(f"{r['pdf']:<30} {r['pages']:>4} pages  full {r['full_ms_per_page']:>7.2f} ms/page  "
+              f"cached {r['cached_ms_per_page']:>7.2f} ms/page  mismatches {r['mismatches']}")
+    print(f"\nTotal {pages} pages: {summary['full_ms_per_page']} -> {summary['cached_ms_per_page']} "
+          f"ms/page, hit rate {summary['hit_rate']:.1%} ({stats.hits} hits, {stats.misses} misses, "
+          f"{stats.fallbacks} fallbacks, {stats.verified} verified)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: cross-page normalization on a PDF corpus.
+
+Extracts every PDF with EXTRACTION_ENGINE (or --engine), normalizes the pages
+and reports the characters and approximate tokens (the chunker's tokenizer)
+of raw_text before and after, the repeated lines removed, hyphenations
+joined, normalization time, the gzip size of the offset maps stored next to
+the PDF (normalization.export_offsets) and whether every kept character
+maps back to the extracted text.
+
+Usage:
+  python benchmarks/bench_normalization.py --corpus ./pdfs
+  python benchmarks/bench_normalization.py --corpus ./pdfs --engine hybrid --json
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.services import normalization  # noqa: E402
+from src.services.chunking import _TOKEN_RE, build_raw_text  # noqa: E402
+from src.services.pdf_extraction import extract_pages  # noqa: E402
+
+
+def _tokens(text: str) -> int:
+    return sum(1 for _ in _TOKEN_RE.finditer(text))
+
+
+def _maps_back(pages, extracted: list[str]) -> bool:
+    return all(
+        original[normalization.original_offset(page, i)] == char
+        for page, original in zip(pages, extracted)
+        for i, char in enumerate(page.text)
+        if not char.isspace()
+    )
+
+
+def bench_pdf(path: Path, engine: str | None) -> dict:
+    pages, _ = extract_pages(path, engine)
+    extracted = [p.text for p in pages]
+    before = build_raw_text(pages)
+
+    start = time.perf_counter()
+    stats = normalization.normalize_pages(pages)
+    seconds = time.perf_counter() - start
+    after = build_raw_text(pages)
+
+    chars_before, chars_after = len(before), len(after)
+    tokens_before, tokens_after = _tokens(before), _tokens(after)
+    maps = {p.page_number: p.offsets for p in pages if p.offsets}
+    return {
+        "pdf": path.name,
+        "pages": len(pages),
+        "chars_before": chars_before,
+        "chars_after": chars_after,
+        "chars_saved_pct": round(100 * (1 - chars_after / chars_before), 1) if chars_before else 0.0,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved_pct": round(100 * (1 - tokens_after / tokens_before), 1) if tokens_before else 0.0,
+        "repeated_patterns": stats.repeated_lines,
+        "removed_lines": stats.removed_lines,
+        "joined_hyphens": stats.joined_hyphens,
+        "normalize_ms": round(seconds * 1000, 2),
+        "offset_map_bytes": len(gzip.compress(json.dumps({"pages": maps}, separators=(",", ":")).encode())),
+        "offsets_map_back": _maps_back(pages, extracted),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", required=True, help="Directory of PDFs (searched recursively)")
+    parser.add_argument("--engine", help="Extraction engine (default: EXTRACTION_ENGINE)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    pdfs = sorted(Path(args.corpus).rglob("*.pdf"))
+    if not pdfs:
+        raise SystemExit(f"No PDFs found in {args.corpus}")
+
+    rows = []
+    for path in pdfs:
+        try:
+            rows.append(bench_pdf(path, args.engine))
+        except Exception as e:
+            print(f"[WARN] Skipping {path}: {e}", file=sys.stderr)
+
+    totals = {"pdfs": len(rows), "pages": sum(r["pages"] for r in rows)}
+    for key in ("chars", "tokens"):
+        before = sum(r[f"{key}_before"] for r in rows)
+        after = sum(r[f"{key}_after"] for r in rows)
+        totals[f"{key}_before"] = before
+        totals[f"{key}_after"] = after
+        totals[f"{key}_saved_pct"] = round(100 * (1 - after / before), 1) if before else 0.0
+    totals["normalize_ms_per_page"] = round(
+        sum(r["normalize_ms"] for r in rows) / max(totals["pages"], 1), 3
+    )
+    totals["offset_map_bytes"] = sum(r["offset_map_bytes"] for r in rows)
+    totals["offsets_map_back"] = all(r["offsets_map_back"] for r in rows)
+
+    if args.json:
+        print(json.dumps({"totals": totals, "pdfs": rows}, indent=2))
+        return
+    for row in rows:
+        print(json.dumps(row))
+    print("TOTAL", json.dumps(totals, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark: inline extraction rows vs outputs spilled to compressed storage.
+
+Saves the same ExtractionResult N times through database.save_extraction in
+each mode against the local Supabase stand-in (BACKEND=local) and reports
+save latency percentiles, the table size growth (SQLite rows, as a proxy for
+the Postgres row/TOAST size) and the bytes written to storage.
+
+The result comes from a real PDF (--pdf) or is synthesized (--pages, with
+--chars-per-page of Portuguese-like text) to model large dossiers.
+
+Usage:
+  python benchmarks/bench_output_store.py --pages 400 --runs 20
+  python benchmarks/bench_output_store.py --pdf ./dossie.pdf --network-profile same-region
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import settings  # noqa: E402
+from src.models.extraction import (  # noqa: E402
+    ExtractionMetadata,
+    ExtractionResult,
+    PageContent,
+)
+from src.services import chunking  # noqa: E402
+
+_WORDS = (
+    "processo autor réu sentença recurso prazo contrato cláusula indenização "
+    "dano moral art lei código civil tribunal juiz decisão provimento apelação "
+    "audiência testemunha prova pericial honorários custas citação intimação"
+).split()
+
+
+def synthetic_result(pages: int, chars_per_page: int, seed: int = 7) -> ExtractionResult:
+    rng = random.Random(seed)
+    page_models = []
+    for n in range(1, pages + 1):
+        words: list[str] = []
+        size = 0
+        while size < chars_per_page:
+            word = rng.choice(_WORDS)
+            words.append(word)
+            size += len(word) + 1
+        page_models.append(PageContent(page_number=n, text=" ".join(words)))
+    raw_text = chunking.build_raw_text(page_models)
+    chunks = chunking.chunk_text(
+        raw_text, page_models, settings.chunk_max_tokens, settings.chunk_overlap_tokens
+    )
+    return ExtractionResult(
+        document_id="bench",
+        raw_text=raw_text,
+        pages=page_models,
+        chunks=chunks,
+        metadata=ExtractionMetadata(
+            total_pages=pages, total_characters=len(raw_text), pdf_hash="0" * 64
+        ),
+    )
+
+
+def pdf_result(path: Path) -> ExtractionResult:
+    from src.pipeline import run_pipeline
+
+    return run_pipeline("bench", path)
+
+
+def _table_bytes(db_path: Path) -> int:
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    try:
+        (size,) = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM rows WHERE tbl = 'extractions'"
+        ).fetchone()
+    finally:
+        conn.close()
+    return int(size)
+
+
+def _storage_bytes(root: Path) -> int:
+    return sum(p.stat().st_size for p in root.rglob("*.extraction.json.*"))
+
+
+def bench_mode(mode: str, result: ExtractionResult, runs: int, root: Path) -> dict:
+    from src.services import clients, database, local_backend
+
+    settings.backend = "local"
+    settings.local_backend_dir = root
+    settings.output_mode = mode
+    local_backend._client = None
+    clients.reset()
+
+    latencies = []
+    for i in range(runs):
+        document_id = f"{mode}-{i:04d}"
+        start = time.perf_counter()
+        database.save_extraction(
+            document_id, result, storage_path=f"bench/{document_id}/document.pdf"
+        )
+        latencies.append(time.perf_counter() - start)
+
+    read_start = time.perf_counter()
+    stored = database.get_extraction(f"{mode}-0000")
+    summary_seconds = time.perf_counter() - read_start
+    assert stored is not None
+    full_start = time.perf_counter()
+    _ = stored.raw_text
+    full_seconds = time.perf_counter() - full_start
+
+    ordered = sorted(latencies)
+    return {
+        "mode": mode,
+        "save_p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "save_p95_ms": round(ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000, 1),
+        "row_read_ms": round(summary_seconds * 1000, 1),
+        "full_text_read_ms": round(full_seconds * 1000, 1),
+        "table_bytes_per_row": _table_bytes(root / "tables.sqlite3") // runs,
+        "storage_bytes_per_doc": _storage_bytes(root / "storage") // runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pdf", type=Path, help="Extract this PDF instead of synthesizing")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--chars-per-page", type=int, default=3000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--compression", choices=("gzip", "zstd"), default="gzip")
+    parser.add_argument("--network-profile", default="same-region",
+                        help="Local backend network profile (none, lan, same-region, cross-region)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    settings.output_compression = args.compression
+    settings.local_backend_profile = args.network_profile
+    result = pdf_result(args.pdf) if args.pdf else synthetic_result(args.pages, args.chars_per_page)
+    payload = len(json.dumps(result.model_dump(mode="json"), ensure_ascii=False).encode())
+
+    rows = []
+    for mode in ("inline", "storage"):
+        with tempfile.TemporaryDirectory(prefix=f"kratos-bench-{mode}-") as tmp:
+            rows.append(bench_mode(mode, result, args.runs, Path(tmp)))
+
+    if args.json:
+        print(json.dumps({"payload_bytes": payload, "results": rows}, indent=2))
+        return
+
+    print(f"{result.metadata.total_pages} pages, {payload / 1e6:.2f} MB serialized, "
+          f"{args.runs} runs, profile={args.network_profile}, compression={args.compression}")
+    cols = list(rows[0])
+    print("  ".join(f"{c:>22}" for c in cols))
+    for row in rows:
+        print("  ".join(f"{row[c]!s:>22}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: page-range reads from extraction_pages vs the content_json blob.
+
+Saves synthetic documents of increasing size (--sizes, in pages) through
+database.save_extraction and database.save_pages against the local Supabase
+stand-in (BACKEND=local), then times reading a --range of pages from the
+middle of each document both ways:
+
+- blob: get_extraction() and slicing content_json["pages"] (what the review
+  screen had to do), including the download for spilled outputs;
+- rows: get_pages(), a primary-key range read.
+
+Usage:
+  python benchmarks/bench_page_reads.py --sizes 50 500 2000 --range 10
+  python benchmarks/bench_page_reads.py --network-profile same-region --json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import settings  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_output_store import synthetic_result  # noqa: E402
+
+
+def _median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def bench_size(pages: int, span: int, runs: int, chars_per_page: int) -> dict:
+    from src.services import database
+
+    document_id = f"bench-{pages}"
+    result = synthetic_result(pages, chars_per_page)
+    result.document_id = document_id
+    database.save_extraction(document_id, result, storage_path=f"bench/{document_id}/a.pdf")
+    write_start = time.perf_counter()
+    database.save_pages(document_id, result)
+    write_seconds = time.perf_counter() - write_start
+
+    first = max(1, pages // 2 - span // 2)
+    last = min(pages, first + span - 1)
+
+    def blob():
+        stored = database.get_extraction(document_id)
+        return stored.content_json["pages"][first - 1:last]
+
+    def rows():
+        return database.get_pages(document_id, first, last)
+
+    assert [p["text"] for p in blob()] == [p["text"] for p in rows()]
+    return {
+        "pages": pages,
+        "range": f"{first}-{last}",
+        "save_pages_ms": round(write_seconds * 1000, 1),
+        "blob_read_ms": _median_ms(blob, runs),
+        "rows_read_ms": _median_ms(rows, runs),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--range", type=int, default=10, help="Pages per read")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--chars-per-page", type=int, default=3000)
+    parser.add_argument("--network-profile", default="none",
+                        help="Local backend network profile (none, lan, same-region, cross-region)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    from src.services import clients, local_backend
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="kratos-bench-pages-") as tmp:
+        settings.backend = "local"
+        settings.local_backend_dir = Path(tmp)
+        settings.local_backend_profile = args.network_profile
+        local_backend._client = None
+        clients.reset()
+        for size in args.sizes:
+            rows.append(bench_size(size, args.range, args.runs, args.chars_per_page))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.range}-page reads, profile={args.network_profile}, "
+          f"OUTPUT_MODE={settings.output_mode}, median of {args.runs}")
+    cols = list(rows[0])
+    print("  ".join(f"{c:>14}" for c in cols))
+    for row in rows:
+        print("  ".join(f"{row[c]!s:>14}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
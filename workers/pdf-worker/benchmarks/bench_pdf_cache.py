@@ -0,0 +1,82 @@
+"""
+Benchmark: source PDF download vs the node-local PDF cache.
+
+Uploads a synthetic PDF of --size-mb to the local Supabase stand-in
+(BACKEND=local) and times storage.download_pdf for a cold download, a cache
+hit without verification and a verified hit (re-hash against pdf_hash),
+under a local backend network profile.
+
+Usage:
+  python benchmarks/bench_pdf_cache.py --size-mb 20 --network-profile same-region
+"""
+
+import argparse
+import hashlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import settings  # noqa: E402
+
+
+def _median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--network-profile", default="same-region",
+                        help="Local backend network profile (none, lan, same-region, cross-region)")
+    args = parser.parse_args()
+
+    from src.services import clients, local_backend, pdf_cache, storage
+
+    with tempfile.TemporaryDirectory(prefix="kratos-bench-pdf-cache-") as tmp:
+        settings.backend = "local"
+        settings.local_backend_dir = Path(tmp) / "backend"
+        settings.local_backend_profile = args.network_profile
+        settings.temp_dir = Path(tmp) / "work"
+        local_backend._client = None
+        clients.reset()
+
+        data = b"%PDF-1.4\n" + os.urandom(int(args.size_mb * 1024 * 1024))
+        sha = hashlib.sha256(data).hexdigest()
+        storage.upload_object("bench/doc/a.pdf", data)
+
+        def cold():
+            pdf_cache.evict(max_bytes=0)
+            storage.download_pdf("bench/doc/a.pdf", "doc")
+            storage.cleanup_temp_file("doc")
+
+        def hit(verify: bool):
+            def run():
+                settings.pdf_cache_verify = verify
+                storage.download_pdf("bench/doc/a.pdf", "doc", sha)
+                storage.cleanup_temp_file("doc")
+            return run
+
+        results = {
+            "cold download": _median_ms(cold, args.runs),
+            "hit": _median_ms(hit(False), args.runs),
+            "hit + verify": _median_ms(hit(True), args.runs),
+        }
+
+    print(f"{args.size_mb:g} MB PDF, profile={args.network_profile}, median of {args.runs}")
+    for name, ms in results.items():
+        print(f"{name:<15} {ms:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
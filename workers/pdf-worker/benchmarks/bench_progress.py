@@ -0,0 +1,66 @@
+"""
+Benchmark: cost of live progress events in the page loop.
+
+Simulates a job of --pages pages taking --page-ms each and reports, per
+PROGRESS_INTERVAL_SECONDS, the events written to the document's stream and
+the time page_done() adds per page. Uses --redis-url when given, else an
+in-process fakeredis.
+
+Usage:
+  python benchmarks/bench_progress.py --pages 2000 --page-ms 2
+  python benchmarks/bench_progress.py --redis-url redis://localhost:6379
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fakeredis  # noqa: E402
+import redis  # noqa: E402
+
+from src.config import settings  # noqa: E402
+from src.services import progress  # noqa: E402
+
+
+def _job(r: redis.Redis, pages: int, page_seconds: float) -> tuple[int, float]:
+    document_id = f"bench-{time.time_ns()}"
+    overhead = 0.0
+    with patch("src.services.progress.queue._get_redis", return_value=r), progress.tracking(document_id):
+        progress.stage("extract_pages", pages)
+        for _ in range(pages):
+            deadline = time.perf_counter() + page_seconds
+            while time.perf_counter() < deadline:
+                pass
+            start = time.perf_counter()
+            progress.page_done()
+            overhead += time.perf_counter() - start
+        progress.finish("completed", pages=pages)
+    events = r.xlen(progress.stream_key(document_id))
+    r.delete(progress.stream_key(document_id))
+    return events, overhead / pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--page-ms", type=float, default=2.0)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+
+    r = redis.from_url(args.redis_url) if args.redis_url else fakeredis.FakeRedis()
+    settings.progress_enabled = True
+    settings.progress_max_events = args.pages + 10
+    print(f"{'interval s':>10} {'events':>7} {'us/page':>8}")
+    for interval in (0.0, 0.25, 1.0):
+        settings.progress_interval_seconds = interval
+        events, per_page = _job(r, args.pages, args.page_ms / 1000)
+        print(f"{interval:>10.2f} {events:>7} {per_page * 1e6:>8.1f}")
+    print(f"{args.pages} pages x {args.page_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: runtime prediction and the parallel extraction path.
+
+Extracts every PDF of --corpus (or synthetic dossiers of --sizes pages, a
+quarter of them with ruled tables) on one core with EXTRACTION_ENGINE,
+then reports for each the leave-one-out prediction of runtime_model (fitted
+on all the other documents), the time limit it would get, and the
+extraction time on --workers processes.
+
+Usage:
+  python benchmarks/bench_runtime_model.py --sizes 5 20 50 100 200 --workers 2
+  python benchmarks/bench_runtime_model.py --corpus ./pdfs --workers 4
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import settings  # noqa: E402
+from src.services import pdf_extraction, runtime_model  # noqa: E402
+
+_WORDS = (
+    "o autor requer a condenação do réu ao pagamento de indenização por danos morais "
+    "nos termos do artigo 186 do código civil conforme jurisprudência do tribunal"
+).split()
+_TABLE = (
+    "1 w 72 300 m 522 300 l 72 270 m 522 270 l 72 240 m 522 240 l S "
+    "72 240 m 72 300 l 297 240 m 297 300 l 522 240 m 522 300 l S"
+)
+
+
+def _dossier(path: Path, pages: int, seed: int = 7) -> None:
+    """Text pages of Helvetica; every fourth page also draws a ruled table."""
+    rng = random.Random(seed + pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(pages)), pages),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for i in range(pages):
+        lines = (" ".join(rng.choice(_WORDS) for _ in range(12)) for _ in range(40))
+        ops = "BT /F1 10 Tf 72 780 Td 14 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        if i % 4 == 3:
+            ops += " " + _TABLE
+        data = ops.encode("latin-1")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for num, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", type=Path)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 50, 100, 200])
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="kratos-bench-runtime-") as tmp:
+        if args.corpus:
+            pdfs = sorted(args.corpus.glob("*.pdf"))
+        else:
+            pdfs = []
+            for size in args.sizes:
+                pdfs.append(Path(tmp) / f"dossier-{size}.pdf")
+                _dossier(pdfs[-1], size)
+
+        settings.extraction_workers = args.workers
+        pdf_extraction._get_pool().submit(int).result()  # start processes up front
+        engine = pdf_extraction.get_engine()
+        rows = []
+        for pdf in pdfs:
+            features = runtime_model.probe(pdf)
+            start = time.perf_counter()
+            engine.extract(pdf)
+            serial = time.perf_counter() - start
+            start = time.perf_counter()
+            pdf_extraction.extract_parallel(pdf, features.pages, args.workers, engine.name)
+            parallel = time.perf_counter() - start
+            rows.append((pdf, features, serial, parallel))
+        pdf_extraction._get_pool().shutdown()
+
+        samples = [{"features": f.model_dump(), "seconds": s} for _, f, s, _ in rows]
+        print(f"{'pdf':<24} {'pages':>6} {'tables':>7} {'1 core s':>9} {'predicted':>10} "
+              f"{'error':>7} {'limit s':>8} {f'{args.workers} procs s':>10}")
+        errors = []
+        for i, (pdf, features, serial, parallel) in enumerate(rows):
+            others = samples[:i] + samples[i + 1:]
+            model = runtime_model.RuntimeModel(coefficients=runtime_model.fit(others) if others else [])
+            predicted = model.predict(features)
+            limit = min(max(predicted * settings.runtime_timeout_factor + settings.runtime_timeout_slack_seconds,
+                            settings.runtime_min_timeout_seconds), settings.runtime_max_timeout_seconds)
+            errors.append(abs(predicted - serial) / serial)
+            print(f"{pdf.name[:24]:<24} {features.pages:>6} {features.table_ratio:>7.2f} {serial:>9.2f} "
+                  f"{predicted:>10.2f} {errors[-1]:>7.0%} {limit:>8.0f} {parallel:>10.2f}")
+        errors.sort()
+        print(f"leave-one-out error: median {errors[len(errors) // 2]:.0%}, max {errors[-1]:.0%}; "
+              f"engine={engine.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: in-document search, positional index vs scanning raw_text.
+
+Builds synthetic dossiers of --sizes pages (legal prose with party names,
+CPFs and citations), then times index build, serialized/compressed size,
+load (decompress + header parse) and term/phrase lookups, against an
+accent-insensitive regex scan of raw_text (what review search did).
+
+Usage:
+  python benchmarks/bench_search_index.py --sizes 50 400 2000
+"""
+
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.extraction import PageContent  # noqa: E402
+from src.services import output_store, search_index  # noqa: E402
+from src.services.chunking import build_raw_text  # noqa: E402
+
+_WORDS = (
+    "o autor requer a condenação do réu ao pagamento de indenização por danos morais "
+    "nos termos do artigo código civil conforme jurisprudência do superior tribunal de "
+    "justiça em sede de recurso especial a sentença julgou procedente o pedido com "
+    "fundamento na prova documental e testemunhal produzida nos autos"
+).split()
+
+QUERIES = ("indenização", "Maria Aparecida dos Santos", "987.654.321-00", "art. 186 do Código Civil")
+
+
+def _dossier(pages: int, seed: int = 7) -> list[PageContent]:
+    rng = random.Random(seed)
+    out = []
+    for n in range(1, pages + 1):
+        words = [rng.choice(_WORDS) for _ in range(450)]
+        if n % 37 == 0:
+            words[100:100] = "Maria Aparecida dos Santos CPF 987.654.321-00".split()
+        if n % 53 == 0:
+            words[200:200] = "art. 186 do Código Civil".split()
+        out.append(PageContent(page_number=n, text=" ".join(words)))
+    return out
+
+
+def _median_ms(fn, runs: int = 7) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def _scan(raw_text: str, query: str) -> int:
+    """Accent-insensitive scan: fold the whole text, regex the folded query."""
+    folded = search_index.fold(raw_text)
+    return len(re.findall(re.escape(search_index.fold(query)), folded))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 400, 2000])
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'build ms':>9} {'raw KB':>8} {'index KB':>9} {'load ms':>8} "
+          f"{'lookup ms':>10} {'scan ms':>8}")
+    for size in args.sizes:
+        pages = _dossier(size)
+        raw_text = build_raw_text(pages)
+        build = _median_ms(lambda: search_index.SearchIndex.build(raw_text, pages), runs=3)
+        index = search_index.SearchIndex.build(raw_text, pages)
+        packed = output_store.compress(index.serialize(), "gzip")
+        load = _median_ms(lambda: search_index.SearchIndex.load(packed))
+        loaded = search_index.SearchIndex.load(packed)
+        lookup = max(_median_ms(lambda q=q: loaded.search(q)) for q in QUERIES)
+        scan = max(_median_ms(lambda q=q: _scan(raw_text, q), runs=3) for q in QUERIES)
+        print(f"{size:>6} {build:>9.1f} {len(raw_text.encode()) / 1024:>8.0f} "
+              f"{len(packed) / 1024:>9.0f} {load:>8.2f} {lookup:>10.3f} {scan:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
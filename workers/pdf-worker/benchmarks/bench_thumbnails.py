@@ -0,0 +1,105 @@
+"""
+Benchmark: page thumbnails/previews beside extraction vs after it.
+
+Extracts a PDF (--pdf, or a synthetic text dossier of --pages pages) with
+EXTRACTION_ENGINE, then again while thumbnails.start renders the pages:
+inline after extraction (THUMBNAIL_WORKERS=0) and in a renderer process
+(THUMBNAIL_WORKERS=1). Reports wall time, image bytes per page and the
+renderer's peak RSS.
+
+Usage:
+  python benchmarks/bench_thumbnails.py --pages 200
+  python benchmarks/bench_thumbnails.py --pdf ./pdfs/dossie.pdf
+"""
+
+import argparse
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import settings  # noqa: E402
+from src.services import thumbnails  # noqa: E402
+from src.services.pdf_extraction import extract_pages  # noqa: E402
+
+_WORDS = (
+    "o autor requer a condenação do réu ao pagamento de indenização por danos morais "
+    "nos termos do artigo 186 do código civil conforme jurisprudência do tribunal"
+).split()
+
+
+def _dossier(path: Path, pages: int, seed: int = 7) -> None:
+    """A text-only PDF, 48 lines of Helvetica per page."""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(pages)), pages),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for i in range(pages):
+        lines = (" ".join(rng.choice(_WORDS) for _ in range(12)) for _ in range(48))
+        data = ("BT /F1 10 Tf 72 780 Td 14 TL " + " ".join(f"({line}) '" for line in lines)
+                + " ET").encode("latin-1")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for num, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def _run(pdf: Path, workers: int | None) -> tuple[float, int, int]:
+    job = pdf.parent / f"job-{workers}"
+    job.mkdir()
+    local = shutil.copy(pdf, job / "document.pdf")
+    settings.thumbnails_enabled = workers is not None
+    settings.thumbnail_workers = workers or 0
+    start = time.perf_counter()
+    render = thumbnails.start(Path(local))
+    pages, _ = extract_pages(Path(local))
+    previews = render.collect() if render else []
+    seconds = time.perf_counter() - start
+    size = sum((job / p.thumb).stat().st_size + (job / p.preview).stat().st_size for p in previews)
+    shutil.rmtree(job)
+    return seconds, len(pages), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pdf", type=Path)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="kratos-bench-thumbs-") as tmp:
+        pdf = Path(tmp) / "source.pdf"
+        if args.pdf:
+            shutil.copy(args.pdf, pdf)
+        else:
+            _dossier(pdf, args.pages)
+        # Start the renderer process up front, as a long-running worker would
+        settings.thumbnail_workers = 1
+        thumbnails._get_pool().submit(int).result()
+
+        print(f"{'mode':<22} {'wall s':>8} {'KB/page':>8}")
+        for name, workers in (("extraction only", None), ("render inline", 0), ("render in process", 1)):
+            seconds, pages, size = _run(pdf, workers)
+            print(f"{name:<22} {seconds:>8.2f} {size / max(pages, 1) / 1024:>8.1f}")
+        thumbnails._get_pool().shutdown()
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        print(f"{pages} pages, engine={settings.extraction_engine}, renderer peak RSS {peak:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
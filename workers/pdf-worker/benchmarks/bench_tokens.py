@@ -0,0 +1,96 @@
+"""
+Benchmark: token estimates at extraction time, and their calibration.
+
+Times tokens.estimate (pages + sections + total, one pass) on synthetic
+dossiers of --sizes pages against a single lookup of the stored counts.
+
+With --samples, fits TOKEN_CALIBRATION instead: the file is JSON lines of
+{"text": ..., "provider": "anthropic" | "google", "tokens": N}, where N is
+the provider's own count for text (Anthropic count_tokens, Gemini
+countTokens). Prints the least-squares ratio per provider and the error of
+the calibrated estimate per sample.
+
+Usage:
+  python benchmarks/bench_tokens.py --sizes 50 400 2000
+  python benchmarks/bench_tokens.py --samples token_samples.jsonl
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.extraction import PageContent  # noqa: E402
+from src.services import sections, tokens  # noqa: E402
+from src.services.chunking import build_raw_text  # noqa: E402
+
+_WORDS = (
+    "o autor requer a condenação do réu ao pagamento de indenização por danos morais "
+    "nos termos do artigo 186 do código civil conforme jurisprudência do superior tribunal "
+    "de justiça REsp 1.234.567/SP em sede de recurso especial, a sentença julgou procedente"
+).split()
+
+
+def _dossier(pages: int, seed: int = 7) -> list[PageContent]:
+    rng = random.Random(seed)
+    out = []
+    for n in range(1, pages + 1):
+        body = " ".join(rng.choice(_WORDS) for _ in range(450))
+        heading = "II - FUNDAMENTAÇÃO\n" if n % 40 == 1 else ""
+        out.append(PageContent(page_number=n, text=heading + body))
+    return out
+
+
+def _bench(sizes: list[int]) -> None:
+    print(f"{'pages':>6} {'tokens':>9} {'estimate ms':>12} {'lookup us':>10}")
+    for size in sizes:
+        pages = _dossier(size)
+        raw_text = build_raw_text(pages)
+        found = sections.segment(raw_text, pages)
+        samples = []
+        for _ in range(5):
+            start = time.perf_counter()
+            estimate = tokens.estimate(raw_text, pages, found)
+            samples.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(1000):
+            tokens.for_model(estimate.total, "claude-sonnet-4")
+        lookup_us = (time.perf_counter() - start) * 1000
+        print(f"{size:>6} {estimate.total:>9} {statistics.median(samples) * 1000:>12.1f} {lookup_us:>10.2f}")
+
+
+def _calibrate(path: Path) -> None:
+    rows = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+    by_provider: dict[str, list[tuple[int, int]]] = {}
+    for row in rows:
+        by_provider.setdefault(row["provider"], []).append((tokens.count(row["text"]), row["tokens"]))
+    calibration = {}
+    for provider, pairs in sorted(by_provider.items()):
+        # Least-squares ratio through the origin: sum(b*t) / sum(b*b)
+        ratio = sum(b * t for b, t in pairs) / (sum(b * b for b, _ in pairs) or 1)
+        errors = [abs(b * ratio - t) / t * 100 for b, t in pairs if t]
+        calibration[provider] = round(ratio, 3)
+        print(f"{provider:<10} {len(pairs):>5} samples  ratio {ratio:.3f}  "
+              f"error median {statistics.median(errors):.1f}%  max {max(errors):.1f}%")
+    print(f"TOKEN_CALIBRATION='{json.dumps(calibration)}'")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 400, 2000])
+    parser.add_argument("--samples", type=Path, help="JSON lines of provider token counts")
+    args = parser.parse_args()
+
+    if args.samples:
+        _calibrate(args.samples)
+    else:
+        _bench(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
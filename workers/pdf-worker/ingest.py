@@ -0,0 +1,354 @@
+"""
+Bulk ingestion: run the extraction pipeline over a directory or manifest of
+PDFs (historical backfills) with a pool of worker processes, streaming one
+NDJSON record per document and/or persisting results like the worker does.
+
+Input is a directory (searched recursively for *.pdf) or a manifest: a .txt
+file with one path per line, or .ndjson/.jsonl lines of {"path", optional
+"documentId"}. Relative manifest paths resolve against the manifest's
+directory. Document ids default to a UUID derived from the absolute path, so
+re-runs address the same documents.
+
+Memory stays bounded: at most 2 x --workers documents are in flight and
+worker processes are recycled every --max-tasks-per-child documents. A
+worker that dies (e.g. OOM) takes its in-flight documents with it; they are
+retried once on a fresh pool.
+
+Resumable: every finished document is appended to the progress file
+(default: <output>.progress, or ingest.progress) and skipped on the next
+run; --retry-failed reprocesses failures. Output is at-least-once: a crash
+between the NDJSON line and the progress line repeats that document.
+
+--persist uploads each PDF to <user-id>/<documentId>/<file> in the bucket,
+creates its documents row and saves the extraction and page rows.
+
+Usage:
+  python ingest.py ./acervo --output acervo.ndjson --workers 8
+  python ingest.py manifest.ndjson --persist --user-id <uuid> --summary-only --output out.ndjson
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import re
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+MANIFEST_SUFFIXES = (".txt", ".ndjson", ".jsonl")
+MAX_CRASH_ATTEMPTS = 2
+
+
+# ============================================================
+# Inputs and progress
+# ============================================================
+
+def document_id_for(path: Path) -> str:
+    """Stable document id for a PDF path (uuid5 of the absolute path)."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"kratos-ingest:{path.resolve()}"))
+
+
+def load_items(source: Path) -> list[dict]:
+    """Work items ({"path", "documentId"}) from a directory or manifest."""
+    if source.is_dir():
+        paths = sorted(p for p in source.rglob("*") if p.suffix.lower() == ".pdf")
+        return [{"path": str(p), "documentId": document_id_for(p)} for p in paths]
+    if source.suffix.lower() not in MANIFEST_SUFFIXES:
+        raise ValueError(f"Expected a directory or a {'/'.join(MANIFEST_SUFFIXES)} manifest: {source}")
+
+    items = []
+    for n, line in enumerate(source.read_text(encoding="utf-8").splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        entry = json.loads(line) if source.suffix.lower() != ".txt" else {"path": line}
+        if "path" not in entry:
+            raise ValueError(f"{source}:{n}: manifest entry has no 'path'")
+        path = Path(entry["path"])
+        if not path.is_absolute():
+            path = source.parent / path
+        items.append({"path": str(path), "documentId": entry.get("documentId") or document_id_for(path)})
+    return items
+
+
+def read_progress(path: Path) -> dict[str, str]:
+    """documentId -> last recorded status; tolerates a truncated last line."""
+    done: dict[str, str] = {}
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[entry["documentId"]] = entry["status"]
+    return done
+
+
+def pending_items(items: list[dict], done: dict[str, str], retry_failed: bool) -> list[dict]:
+    """Items not yet completed (nor failed, unless retrying failures)."""
+    skip = {"completed"} if retry_failed else {"completed", "failed"}
+    return [item for item in items if done.get(item["documentId"]) not in skip]
+
+
+# ============================================================
+# Worker side (runs in pool processes)
+# ============================================================
+
+def _safe_name(name: str) -> str:
+    """Same rules as the API upload (apps/api/src/routes/documents.ts)."""
+    name = re.sub(r"_{2,}", "_", re.sub(r"[^a-zA-Z0-9._-]", "_", name))
+    return re.sub(r"^[._-]+", "", name)[:200] or "document.pdf"
+
+
+def _persist(document_id: str, path: Path, result, user_id: str) -> None:
+    from src.config import settings
+    from src.models.extraction import DocumentStatus
+    from src.services import database, search_index, storage
+
+    file_name = _safe_name(path.name)
+    key = f"{user_id}/{document_id}/{file_name}"
+    data = path.read_bytes()
+    storage.upload_object(key, data, content_type="application/pdf")
+    database.register_document(
+        document_id, user_id, file_name, key, len(data), result.metadata.pdf_hash
+    )
+    try:
+        result.metadata.search_index = search_index.export_index(result, key) or ""
+    except Exception as e:  # auxiliary artifact, never fails the item
+        print(f"[ingest] search index export failed for {document_id}: {e}", file=sys.stderr)
+    database.save_extraction(document_id, result, storage_path=key)
+    if settings.page_rows_enabled:
+        database.save_pages(document_id, result)
+    database.update_document_status(
+        document_id, DocumentStatus.completed.value, pages=result.metadata.total_pages
+    )
+
+
+def process_item(item: dict, options: dict) -> dict:
+    """
+    Extract (and optionally persist) one PDF. Never raises: failures are
+    reported in the record. With options["result"] the serialized
+    ExtractionResult is returned as a JSON string under "result".
+    """
+    from src.pipeline import run_pipeline
+
+    started = time.monotonic()
+    record = {"documentId": item["documentId"], "path": item["path"], "status": "failed"}
+    try:
+        result = run_pipeline(item["documentId"], Path(item["path"]))
+        if options.get("persist"):
+            _persist(item["documentId"], Path(item["path"]), result, options["user_id"])
+        record.update(
+            status="completed",
+            pages=result.metadata.total_pages,
+            characters=result.metadata.total_characters,
+            tables=result.metadata.total_tables,
+        )
+        if options.get("result"):
+            record["result"] = result.model_dump_json()
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.monotonic() - started, 3)
+    return record
+
+
+# ============================================================
+# Coordinator
+# ============================================================
+
+class Throughput:
+    """Running totals and rates for progress lines and the final summary."""
+
+    def __init__(self, total: int, skipped: int):
+        self.started = time.monotonic()
+        self.total = total
+        self.skipped = skipped
+        self.completed = 0
+        self.failed = 0
+        self.pages = 0
+        self.busy_seconds = 0.0
+
+    def add(self, record: dict) -> None:
+        if record["status"] == "completed":
+            self.completed += 1
+            self.pages += record.get("pages", 0)
+        else:
+            self.failed += 1
+        self.busy_seconds += record.get("seconds", 0.0)
+
+    def snapshot(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        finished = self.completed + self.failed
+        remaining = self.total - finished
+        docs_per_s = finished / elapsed
+        return {
+            "total": self.total,
+            "skipped": self.skipped,
+            "completed": self.completed,
+            "failed": self.failed,
+            "pages": self.pages,
+            "elapsed_s": round(elapsed, 1),
+            "docs_per_s": round(docs_per_s, 2),
+            "pages_per_s": round(self.pages / elapsed, 1),
+            "mean_doc_s": round(self.busy_seconds / finished, 3) if finished else 0.0,
+            "eta_s": round(remaining / docs_per_s) if docs_per_s and remaining else 0,
+        }
+
+    def line(self) -> str:
+        s = self.snapshot()
+        return (
+            f"[ingest] {s['completed'] + s['failed']}/{s['total']} done "
+            f"({s['failed']} failed), {s['docs_per_s']} docs/s, {s['pages_per_s']} pages/s, "
+            f"ETA {s['eta_s']}s"
+        )
+
+
+class _Sink:
+    """Writes NDJSON records then progress entries, flushed per document."""
+
+    def __init__(self, output: Optional[Path], progress: Path):
+        self._out = open(output, "a", encoding="utf-8") if output else None
+        self._progress = open(progress, "a", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        if self._out is not None:
+            result = record.pop("result", None)
+            line = json.dumps(record, ensure_ascii=False)
+            if result is not None:  # splice the pre-serialized result in as-is
+                line = f'{line[:-1]}, "result": {result}}}'
+            self._out.write(line + "\n")
+            self._out.flush()
+        self._progress.write(json.dumps(
+            {"documentId": record["documentId"], "status": record["status"], "path": record["path"]}
+        ) + "\n")
+        self._progress.flush()
+
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+        self._progress.close()
+
+
+def _run_inline(queue: deque, options: dict, sink: _Sink, stats: Throughput,
+                interval: float) -> None:
+    last = time.monotonic()
+    while queue:
+        record = process_item(queue.popleft(), options)
+        sink.write(record)
+        stats.add(record)
+        if time.monotonic() - last >= interval:
+            last = time.monotonic()
+            print(stats.line(), file=sys.stderr)
+
+
+def _run_pool(queue: deque, options: dict, sink: _Sink, stats: Throughput,
+              workers: int, max_tasks_per_child: int, interval: float) -> None:
+    crashes: dict[str, int] = {}
+    ctx = mp.get_context("spawn")  # max_tasks_per_child cannot be used with fork
+    last = time.monotonic()
+    while queue:
+        in_flight: dict[Future, dict] = {}
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx, max_tasks_per_child=max_tasks_per_child
+        ) as pool:
+            broken = False
+            while (queue or in_flight) and not (broken and not in_flight):
+                while queue and not broken and len(in_flight) < 2 * workers:
+                    item = queue.popleft()
+                    try:
+                        in_flight[pool.submit(process_item, item, options)] = item
+                    except BrokenProcessPool:
+                        queue.appendleft(item)
+                        broken = True
+                finished, _ = wait(in_flight, timeout=interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item = in_flight.pop(future)
+                    try:
+                        record = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        crashes[item["documentId"]] = crashes.get(item["documentId"], 0) + 1
+                        if crashes[item["documentId"]] < MAX_CRASH_ATTEMPTS:
+                            queue.appendleft(item)
+                            continue
+                        record = {**item, "status": "failed", "error": "worker process died"}
+                    sink.write(record)
+                    stats.add(record)
+                if time.monotonic() - last >= interval:
+                    last = time.monotonic()
+                    print(stats.line(), file=sys.stderr)
+        if broken:
+            print("[ingest] worker process died; restarting the pool", file=sys.stderr)
+
+
+def run(args: argparse.Namespace) -> dict:
+    if args.persist and not args.user_id:
+        raise SystemExit("--persist requires --user-id (owner of the ingested documents)")
+    if args.engine:
+        os.environ["EXTRACTION_ENGINE"] = args.engine  # inherited by pool processes
+
+    items = load_items(Path(args.input))
+    output = Path(args.output) if args.output else None
+    progress = Path(args.progress) if args.progress else (
+        output.with_name(output.name + ".progress") if output else Path("ingest.progress")
+    )
+    queue = deque(pending_items(items, read_progress(progress), args.retry_failed))
+    stats = Throughput(total=len(queue), skipped=len(items) - len(queue))
+    options = {
+        "persist": args.persist,
+        "user_id": args.user_id,
+        "result": output is not None and not args.summary_only,
+    }
+    print(f"[ingest] {len(queue)} to process, {stats.skipped} already done "
+          f"(progress: {progress})", file=sys.stderr)
+
+    sink = _Sink(output, progress)
+    try:
+        if args.workers <= 0:
+            _run_inline(queue, options, sink, stats, args.progress_interval)
+        else:
+            _run_pool(queue, options, sink, stats, args.workers,
+                      args.max_tasks_per_child, args.progress_interval)
+    finally:
+        sink.close()
+    return stats.snapshot()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", help="Directory of PDFs or manifest (.txt, .ndjson, .jsonl)")
+    parser.add_argument("--output", help="NDJSON file for per-document records (appended)")
+    parser.add_argument("--summary-only", action="store_true",
+                        help="Write counts and timings only, not the full ExtractionResult")
+    parser.add_argument("--persist", action="store_true",
+                        help="Upload PDFs and save documents/extractions/page rows")
+    parser.add_argument("--user-id", help="Owner of the documents created by --persist")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (0 = run in this process)")
+    parser.add_argument("--max-tasks-per-child", type=int, default=50,
+                        help="Recycle worker processes after this many documents")
+    parser.add_argument("--engine", help="EXTRACTION_ENGINE for this run (pdfplumber, hybrid)")
+    parser.add_argument("--progress", help="Progress file (default: <output>.progress)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Reprocess documents recorded as failed")
+    parser.add_argument("--progress-interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if not args.output and not args.persist:
+        parser.error("nothing to do: give --output and/or --persist")
+    summary = run(args)
+    print(json.dumps(summary, indent=2))
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
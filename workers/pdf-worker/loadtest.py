@@ -0,0 +1,339 @@
+"""
+Load / soak test: generate PDF jobs from a local corpus at a configurable
+arrival rate and size mix, run workers against them and report queue-wait,
+download, extraction and persist latency percentiles plus sustained
+throughput.
+
+Runs fully offline: jobs go to a local Redis (BRPOP list or Celery queue)
+and workers use the local Supabase stand-in (BACKEND=local, see
+src/services/local_backend.py) seeded with the corpus, with an optional
+network profile. Use --external-workers to drive already running workers
+started with BACKEND=local, the same LOCAL_BACKEND_DIR and JOB_REPORT_KEY.
+
+Usage:
+  python loadtest.py --corpus ./pdfs --rate 0.5 --duration 600 --workers 2
+  python loadtest.py --corpus ./pdfs --rate 2 --mix small=0.7,medium=0.25,large=0.05 \\
+      --target celery --duration 3600 --network-profile same-region --report soak.json
+"""
+
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import redis
+
+SIZE_CLASSES = ("small", "medium", "large")
+STAGES = ("queue_wait", "download", "extract", "persist", "total")
+
+
+# ============================================================
+# Corpus
+# ============================================================
+
+def classify_size(pages: int) -> str:
+    """Same buckets as scripts/benchmark-extraction.ts."""
+    if pages < 10:
+        return "small"
+    if pages <= 50:
+        return "medium"
+    return "large"
+
+
+def seed_local_storage(corpus: dict[str, list[dict]]) -> None:
+    """Upload corpus PDFs into the local stand-in bucket under loadtest/<path in the corpus>."""
+    from src.config import settings
+    from src.services import local_backend
+
+    bucket = local_backend.get_client().storage.from_(settings.storage_bucket)
+    for pdfs in corpus.values():
+        for pdf in pdfs:
+            pdf["key"] = f"loadtest/{pdf['name']}"
+            bucket.upload(pdf["key"], Path(pdf["path"]), {"upsert": "true"})
+
+
+def scan_corpus(corpus_dir: Path) -> dict[str, list[dict]]:
+    """Group corpus PDFs by size class (page count)."""
+    from src.services.pdf_extraction import get_page_count
+
+    by_class: dict[str, list[dict]] = {c: [] for c in SIZE_CLASSES}
+    for path in sorted(corpus_dir.rglob("*.pdf")):
+        try:
+            pages = get_page_count(path)
+        except Exception as e:
+            print(f"[WARN] Skipping unreadable PDF {path}: {e}")
+            continue
+        by_class[classify_size(pages)].append(
+            {
+                "path": str(path.resolve()),
+                "name": path.relative_to(corpus_dir).as_posix(),
+                "pages": pages,
+                "bytes": path.stat().st_size,
+            }
+        )
+    return by_class
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """Parse "small=0.7,medium=0.25,large=0.05" into normalised weights."""
+    mix: dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SIZE_CLASSES:
+            raise ValueError(f"Unknown size class '{name}' (expected one of {SIZE_CLASSES})")
+        mix[name] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Size mix weights must sum to a positive value")
+    return {k: v / total for k, v in mix.items()}
+
+
+def next_interarrival(rate: float, arrival: str, rng: random.Random) -> float:
+    """Seconds until the next job: Poisson (exponential gaps) or uniform."""
+    if arrival == "poisson":
+        return rng.expovariate(rate)
+    return 1.0 / rate
+
+
+# ============================================================
+# Statistics
+# ============================================================
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile (same definition as the TS benchmark)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = math.ceil((p / 100) * len(ordered)) - 1
+    return ordered[max(0, idx)]
+
+
+def summarize(reports: list[dict], elapsed: float) -> dict:
+    """Aggregate job reports into latency percentiles and throughput."""
+    completed = [r for r in reports if r.get("status") == "completed"]
+    stages = {}
+    for stage in STAGES:
+        values = [r["timings"][stage] for r in completed if stage in r.get("timings", {})]
+        stages[stage] = {
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "max": round(max(values), 3) if values else 0.0,
+        }
+    pages = sum(r.get("pages", 0) for r in completed)
+    minutes = elapsed / 60 if elapsed > 0 else 0
+    return {
+        "jobs": len(reports),
+        "completed": len(completed),
+        "failed": len(reports) - len(completed),
+        "elapsed_seconds": round(elapsed, 1),
+        "docs_per_minute": round(len(completed) / minutes, 2) if minutes else 0.0,
+        "pages_per_minute": round(pages / minutes, 1) if minutes else 0.0,
+        "latency_seconds": stages,
+    }
+
+
+# ============================================================
+# Workers
+# ============================================================
+
+def _run_worker(target: str) -> None:
+    """Child process entry point: one BRPOP loop or one solo Celery worker."""
+    if target == "celery":
+        from src.celery_app import app
+        import src.tasks.extract_pdf  # noqa: F401 — registers the task
+
+        app.worker_main(["worker", "--pool=solo", "--loglevel=WARNING", "--without-gossip"])
+    else:
+        from src.tasks.extract_pdf import worker_loop
+
+        worker_loop()
+
+
+# ============================================================
+# Producer / collector
+# ============================================================
+
+def _push_job(args: argparse.Namespace, r: redis.Redis, queue_key: str, job: dict) -> None:
+    if args.target == "celery":
+        from src.tasks.extract_pdf import extract_pdf_task
+
+        extract_pdf_task.apply_async(args=[job])
+    elif args.admission:
+        from src.services.queue import enqueue_job
+
+        enqueue_job(job, queue_key)
+    else:
+        r.lpush(queue_key, json.dumps(job))
+
+
+def _collect(r: redis.Redis, report_key: str, reports: list[dict]) -> None:
+    """Move all available job reports from Redis into memory."""
+    while True:
+        item = r.rpop(report_key)
+        if item is None:
+            return
+        reports.append(json.loads(item))
+
+
+def _print_progress(reports: list[dict], elapsed: float, sent: int) -> None:
+    """One-line running summary."""
+    s = summarize(reports, elapsed)
+    total = s["latency_seconds"]["total"]
+    wait = s["latency_seconds"]["queue_wait"]
+    print(
+        f"[{elapsed:7.0f}s] sent={sent} done={s['completed']} failed={s['failed']} "
+        f"docs/min={s['docs_per_minute']} pages/min={s['pages_per_minute']} "
+        f"wait p95={wait['p95']}s total p50/p95/p99={total['p50']}/{total['p95']}/{total['p99']}s",
+        flush=True,
+    )
+
+
+def run(args: argparse.Namespace) -> dict:
+    from src.config import settings
+    from src.services.queue import QueueFullError
+
+    corpus = scan_corpus(Path(args.corpus))
+    mix = {k: v for k, v in parse_mix(args.mix).items() if corpus.get(k)}
+    if not mix:
+        raise SystemExit(f"No PDFs for the requested size mix in {args.corpus}")
+    classes, weights = zip(*mix.items())
+
+    # Offline backend shared with forked workers (they inherit settings)
+    settings.backend = "local"
+    settings.local_backend_profile = args.network_profile
+    settings.local_backend_latency_ms = args.latency_ms
+    settings.local_backend_bandwidth_mbps = args.bandwidth_mbps
+    from src.services import local_backend
+
+    seed_local_storage(corpus)
+    documents = local_backend.get_client().table("documents")
+
+    r = redis.from_url(settings.redis_url)
+    run_id = uuid.uuid4().hex[:8]
+    report_key = args.report_key or f"kratos:loadtest:{run_id}:reports"
+    settings.job_report_key = report_key
+    r.delete(report_key)
+
+    workers: list[mp.Process] = []
+    if not args.external_workers:
+        for _ in range(args.workers):
+            p = mp.Process(
+                target=_run_worker,
+                args=(args.target,),
+                daemon=True,
+            )
+            p.start()
+            workers.append(p)
+
+    rng = random.Random(args.seed)
+    reports: list[dict] = []
+    sent = 0
+    rejected = 0
+    start = time.monotonic()
+    next_arrival = start
+    last_progress = start
+
+    print(f"Load test {run_id}: target={args.target} rate={args.rate}/s mix={mix} "
+          f"duration={args.duration}s workers={'external' if args.external_workers else args.workers}")
+
+    try:
+        # Produce for the configured duration, collecting reports as they arrive
+        while time.monotonic() - start < args.duration:
+            now = time.monotonic()
+            while next_arrival <= now:
+                size_class = rng.choices(classes, weights)[0]
+                pdf = rng.choice(corpus[size_class])
+                job = {
+                    "documentId": str(uuid.uuid4()),
+                    "userId": str(uuid.uuid4()),
+                    "filePath": pdf["key"],
+                    "fileName": os.path.basename(pdf["path"]),
+                    "enqueuedAt": time.time(),
+                }
+                documents.insert({
+                    "id": job["documentId"],
+                    "user_id": job["userId"],
+                    "file_name": job["fileName"],
+                    "file_path": job["filePath"],
+                    "file_size": pdf["bytes"],
+                    "status": "pending",
+                }).execute()
+                try:
+                    _push_job(args, r, settings.queue_key, job)
+                    sent += 1
+                except QueueFullError:
+                    rejected += 1
+                next_arrival += next_interarrival(args.rate, args.arrival, rng)
+
+            _collect(r, report_key, reports)
+            time.sleep(max(0.0, min(next_arrival - time.monotonic(), 0.1)))
+            if time.monotonic() - last_progress >= args.progress_interval:
+                last_progress = time.monotonic()
+                _print_progress(reports, last_progress - start, sent)
+
+        # Drain outstanding jobs
+        drain_deadline = time.monotonic() + args.drain_timeout
+        while len(reports) < sent and time.monotonic() < drain_deadline:
+            _collect(r, report_key, reports)
+            time.sleep(0.2)
+    finally:
+        for p in workers:
+            p.terminate()
+        for p in workers:
+            p.join(timeout=5)
+
+    elapsed = time.monotonic() - start
+    _print_progress(reports, elapsed, sent)
+    summary = summarize(reports, elapsed)
+    summary.update({"run_id": run_id, "sent": sent, "rejected": rejected, "target": args.target,
+                    "rate": args.rate, "mix": mix, "workers": args.workers,
+                    "network_profile": args.network_profile})
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", required=True, help="Directory of PDFs (searched recursively)")
+    parser.add_argument("--rate", type=float, default=0.5, help="Arrival rate, jobs per second")
+    parser.add_argument("--arrival", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--mix", default="small=0.6,medium=0.3,large=0.1", help="Size class weights")
+    parser.add_argument("--duration", type=float, default=300, help="Seconds to generate load")
+    parser.add_argument("--drain-timeout", type=float, default=600, help="Seconds to wait for backlog")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes to spawn")
+    parser.add_argument("--external-workers", action="store_true",
+                        help="Do not spawn workers; rely on running ones with JOB_REPORT_KEY set")
+    parser.add_argument("--report-key", default="", help="Redis list for job reports")
+    parser.add_argument("--target", choices=("brpop", "celery"), default="brpop")
+    parser.add_argument("--admission", action="store_true",
+                        help="Enqueue through admission control and count rejected jobs (brpop only)")
+    parser.add_argument("--network-profile", default="none",
+                        help="Local backend network profile (none, lan, same-region, cross-region)")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Override per-request latency of the local backend")
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0,
+                        help="Override bandwidth of the local backend (0 = profile/unlimited)")
+    parser.add_argument("--progress-interval", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--report", default="", help="Write the JSON summary to this file")
+    args = parser.parse_args()
+
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+
+    summary = run(args)
+    print(json.dumps(summary, indent=2))
+    if args.report:
+        Path(args.report).write_text(json.dumps(summary, indent=2))
+        print(f"[OK] Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
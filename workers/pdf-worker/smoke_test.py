@@ -74,6 +74,7 @@ def push_job(document_id: str, user_id: str, storage_path: str, file_name: str):
         "userId": user_id,
         "filePath": storage_path,
         "fileName": file_name,
+        "enqueuedAt": time.time(),
     }
     r.lpush(QUEUE_KEY, json.dumps(job))
     print(f"[OK] Job pushed to {QUEUE_KEY}: {document_id}")
@@ -0,0 +1,86 @@
+"""
+KRATOS v2 — Queue-Depth Autoscaler (Celery)
+Grows/shrinks the worker pool so the backlog drains within the latency SLO.
+
+Enable with: celery -A src.celery_app worker --autoscale=<max>,<min>
+The pool always stays within the <min>..<max> bounds given on the CLI.
+"""
+
+import logging
+import time
+
+import redis
+from celery.worker.autoscale import Autoscaler
+
+from src.config import settings
+from src.services import queue
+
+logger = logging.getLogger(__name__)
+
+
+class QueueDepthAutoscaler(Autoscaler):
+    """Celery autoscaler driven by broker queue depth and average job duration."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._broker = redis.from_url(settings.celery_broker_url)
+        conf = self.worker.app.conf if self.worker else None
+        # Every queue the worker consumes (tenant shards, see fair_queue.route_task)
+        self._queue_names = (
+            [q.name for q in conf.task_queues or ()] or [conf.task_default_queue]
+            if conf else ["celery"]
+        )
+        self._last_publish = 0.0
+        self._depth = 0
+
+    def _target(self) -> int:
+        depth = self._depth = sum(queue.queue_depth(self._broker, name) for name in self._queue_names)
+        avg = queue.average_job_seconds(queue._get_redis(), settings.queue_key)
+        target = queue.desired_concurrency(
+            depth,
+            avg,
+            settings.queue_latency_slo_seconds,
+            self.min_concurrency,
+            self.max_concurrency,
+        )
+        # Never shrink below the requests already reserved by this worker
+        return max(target, min(self.qty, self.max_concurrency))
+
+    def _publish(self) -> None:
+        now = time.time()
+        if now - self._last_publish < settings.queue_stats_interval_seconds:
+            return
+        self._last_publish = now
+        procs = max(self.processes, 1)
+        r = queue._get_redis()
+        queue.publish_worker_stats(
+            r,
+            settings.queue_key,
+            concurrency=procs,
+            busy=self.qty,
+            utilisation=min(self.qty / procs, 1.0),
+        )
+        # The API's admission check reads this snapshot (Celery jobs wait in the broker)
+        ages = [queue.oldest_job_age(self._broker, name) for name in self._queue_names]
+        queue.publish_queue_stats(
+            r,
+            settings.queue_key,
+            depth=self._depth,
+            oldest_age=max((a for a in ages if a is not None), default=None),
+        )
+
+    def _maybe_scale(self, req=None):
+        try:
+            target = self._target()
+            self._publish()
+        except redis.RedisError as e:
+            logger.warning(f"Autoscaler signal unavailable, using default policy: {e}")
+            return super()._maybe_scale(req)
+
+        procs = self.processes
+        if target > procs:
+            self.scale_up(target - procs)
+            return True
+        if target < procs:
+            self.scale_down(procs - target)
+            return True
@@ -4,8 +4,10 @@ Processamento assincrono de documentos PDF.
 """
 
 from celery import Celery
+from kombu import Queue
 
 from src.config import settings
+from src.services import fair_queue
 
 app = Celery(
     "kratos_pdf_worker",
@@ -22,10 +24,28 @@ app.conf.update(
     task_track_started=True,
     task_acks_late=True,
     worker_prefetch_multiplier=1,
-    task_soft_time_limit=120,
+    # Ceiling only: each job's extraction limit comes from the runtime model
+    # (services/runtime_model.py) and its download and persist stages are
+    # bounded by STAGE_TIMEOUT_SECONDS each
+    task_soft_time_limit=settings.runtime_max_timeout_seconds + 2 * settings.stage_timeout_seconds,
     task_time_limit=settings.task_timeout_seconds,
     task_default_retry_delay=30,
     task_max_retries=3,
+    # Used when started with --autoscale=<max>,<min>
+    worker_autoscaler="src.autoscaler:QueueDepthAutoscaler",
 )
 
+if settings.celery_tenant_shards > 0:
+    # Per-tenant fairness: extract_pdf is routed to one of N shard queues by
+    # userId and workers consume all of them (plus the default queue, for
+    # producers that publish there by name) in rotation
+    app.conf.update(
+        task_queues=[
+            Queue(app.conf.task_default_queue),
+            *(Queue(f"{fair_queue.CELERY_SHARD_PREFIX}{n}")
+              for n in range(settings.celery_tenant_shards)),
+        ],
+        task_routes=(fair_queue.route_task,),
+    )
+
 app.autodiscover_tasks(["src.tasks"])
@@ -4,6 +4,8 @@ Environment-based settings via pydantic-settings.
 """
 
 from pathlib import Path
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -13,20 +15,256 @@ class Settings(BaseSettings):
     supabase_service_role_key: str = ""
     storage_bucket: str = "documents"
 
+    # Backend: "supabase" or "local" (offline stand-in, see services/local_backend.py)
+    backend: str = "supabase"
+    local_backend_dir: Path = Path("/tmp/kratos-local-backend")
+    local_backend_profile: str = "none"
+    local_backend_latency_ms: float = 0.0
+    local_backend_bandwidth_mbps: float = 0.0
+
+    # Shared HTTP pool for Supabase Storage/PostgREST (see services/clients.py)
+    http_max_connections: int = 20  # also the bound on in-flight requests
+    http_max_keepalive: int = 20
+    http_keepalive_expiry_seconds: float = 60.0
+    http_timeout_seconds: float = 60.0
+    http_connect_timeout_seconds: float = 5.0
+    http_retries: int = 3
+    http_retry_backoff_seconds: float = 0.25
+    http_retry_backoff_max_seconds: float = 5.0
+
     # Redis / Celery
     redis_url: str = "redis://localhost:6379"
     celery_broker_url: str = "redis://localhost:6379/0"
     celery_result_backend: str = "redis://localhost:6379/0"
     queue_key: str = "kratos:jobs:pdf"
 
+    # Per-tenant fair scheduling (see services/fair_queue.py): jobs queue per
+    # userId and workers alternate between tenants, TENANT_WEIGHTS (JSON
+    # {"<userId>": weight}) turns per round each. TENANT_MAX_CONCURRENCY caps
+    # one tenant's running jobs across all workers (0 = no cap),
+    # TENANT_CONCURRENCY (JSON) overrides it per tenant
+    fair_scheduling: bool = True
+    tenant_weights: dict[str, float] = {}
+    tenant_default_weight: float = 1.0
+    tenant_max_concurrency: int = 0
+    tenant_concurrency: dict[str, int] = {}
+    tenant_lease_seconds: float = 600.0  # a crashed worker's slot frees after this
+    tenant_defer_seconds: float = 5.0  # Celery: retry delay for a tenant at its cap
+    fair_scan_tenants: int = 64  # tenants considered per pick, lowest virtual time first
+    fair_poll_seconds: float = 1.0  # idle BRPOP timeout between fair-queue polls
+    celery_tenant_shards: int = 8  # pdf.tenant.<n> Celery queues (0 = default queue only)
+
+    # Autoscaling / admission control
+    queue_latency_slo_seconds: int = 300
+    queue_stats_interval_seconds: int = 15
+    # Trigger.dev runs are counted from the API's dispatch to the runner's
+    # start, for at most QUEUE_DISPATCHED_TTL_SECONDS; TRIGGER_CONCURRENCY is
+    # the pdf-extraction task's concurrency there, the capacity the runner
+    # publishes
+    queue_dispatched_ttl_seconds: int = 3600
+    trigger_concurrency: int = 10
+
+    # Per-job reports (stage timings) pushed to a Redis list; empty = off
+    job_report_key: str = ""
+    job_report_max_entries: int = 100_000
+
     # Processing limits
     max_pdf_size_mb: int = 50
     max_pages: int = 500
-    task_timeout_seconds: int = 180
+    # Time limit of each non-extraction stage (download, persist), which the
+    # runtime model does not predict
+    stage_timeout_seconds: float = 120
+    # Celery hard limit, above the soft one (RUNTIME_MAX_TIMEOUT_SECONDS +
+    # 2 x STAGE_TIMEOUT_SECONDS)
+    task_timeout_seconds: int = 1500
+
+    # Runtime prediction (services/runtime_model.py): each job's extraction
+    # time limit is its predicted seconds x RUNTIME_TIMEOUT_FACTOR +
+    # RUNTIME_TIMEOUT_SLACK_SECONDS, within RUNTIME_MIN/MAX_TIMEOUT_SECONDS
+    # (the max is also Celery's soft limit). Jobs predicted at
+    # PARALLEL_MIN_SECONDS or more extract on EXTRACTION_WORKERS processes
+    # (1 = always one core). The model refits from the last
+    # RUNTIME_MODEL_MAX_SAMPLES jobs; below RUNTIME_MODEL_MIN_SAMPLES the
+    # RUNTIME_PRIOR_* per-page prior applies
+    runtime_model_enabled: bool = True
+    runtime_model_key: str = "kratos:runtime"
+    runtime_model_max_samples: int = 2000
+    runtime_model_min_samples: int = 30
+    runtime_model_refit_seconds: float = 300
+    runtime_accuracy_window: int = 200
+    runtime_probe_pages: int = 16
+    runtime_prior_seconds: float = 2.0
+    runtime_prior_seconds_per_page: float = 0.3
+    runtime_timeout_factor: float = 3.0
+    runtime_timeout_slack_seconds: float = 30
+    runtime_min_timeout_seconds: float = 60
+    runtime_max_timeout_seconds: float = 1200
+    extraction_workers: int = 1
+    parallel_min_seconds: float = 30
+
+    # Extraction engine: "pdfplumber" (every page) or "hybrid" (pdfium text,
+    # pdfplumber only for pages with ruling lines that may form tables)
+    extraction_engine: str = "pdfplumber"
+    hybrid_line_thickness: float = 2.0  # points; thinner paths are rules
+
+    # Table layout templates (see services/layout_cache.py): pages with the
+    # same size and ruling edges reuse the table grid detected on the first
+    # one; every LAYOUT_CACHE_VERIFY_EVERY-th reuse is checked against full
+    # detection
+    layout_cache_enabled: bool = True
+    layout_cache_size: int = 512
+    layout_cache_verify_every: int = 50
+
+    # Cross-page text normalization before raw_text/chunking (see
+    # services/normalization.py): header/footer lines repeated within
+    # NORMALIZE_EDGE_LINES of the page edges on NORMALIZE_REPEAT_RATIO of the
+    # pages (and at least NORMALIZE_MIN_PAGES) are dropped, hyphenated line
+    # breaks rejoined and whitespace collapsed
+    normalize_text: bool = True
+    normalize_edge_lines: int = 4
+    normalize_repeat_ratio: float = 0.5
+    normalize_min_pages: int = 3
+
+    # Legal section index (RELATÓRIO, FUNDAMENTAÇÃO, DISPOSITIVO, ...), see
+    # services/sections.py
+    segment_sections: bool = True
+
+    # RAG chunking (approximate tokens)
+    chunk_max_tokens: int = 512
+    chunk_overlap_tokens: int = 64
+
+    # Token estimates (services/tokens.py): characters per subword token of
+    # a word, base count -> provider tokenizer ratio and input price per
+    # million tokens by model. The ratios below are uncalibrated
+    # placeholders, not fitted to provider counts: fit them with
+    # benchmarks/bench_tokens.py --samples (Anthropic count_tokens / Gemini
+    # countTokens on corpus text) and set TOKEN_CALIBRATION before relying on
+    # the estimates for budgets or costs
+    token_chars_per_word_token: int = 4
+    token_calibration: dict[str, float] = {"anthropic": 1.0, "google": 0.85}
+    token_input_usd_per_mtok: dict[str, float] = {
+        "gemini-2.5-flash": 0.30,
+        "claude-sonnet-4": 3.0,
+        "claude-opus-4": 15.0,
+    }
+
+    # Extraction output: "inline" (row payload), "storage" (compressed object
+    # next to the PDF, row keeps a summary) or "auto" (storage when the
+    # serialized result exceeds OUTPUT_INLINE_MAX_BYTES)
+    output_mode: str = "auto"
+    output_inline_max_bytes: int = 1_000_000
+    output_compression: str = "gzip"  # gzip | zstd (requires zstandard)
+
+    # Per-page rows (text + tables) in extraction_pages, keyed by
+    # (document_id, page_number), for page-range reads by the review UI
+    page_rows_enabled: bool = True
+    page_rows_batch_size: int = 200
+
+    # Re-extraction of rows from an older pipeline.EXTRACTOR_VERSION (see
+    # services/reextraction.py): runs only inside REEXTRACT_WINDOW (local
+    # "HH:MM-HH:MM" in REEXTRACT_TIMEZONE, "" = any time) while the live
+    # queue holds at most REEXTRACT_MAX_QUEUE_DEPTH jobs, at no more than
+    # REEXTRACT_RATE_PER_MINUTE documents, REEXTRACT_BATCH_SIZE per batch.
+    # Failed rows are retried once the scan is done, up to
+    # REEXTRACT_MAX_ATTEMPTS times
+    reextract_window: str = "01:00-06:00"
+    reextract_timezone: str = "America/Sao_Paulo"
+    reextract_rate_per_minute: float = 6.0
+    reextract_batch_size: int = 50
+    reextract_max_queue_depth: int = 0
+    reextract_max_attempts: int = 3
+    reextract_idle_seconds: int = 600  # wait between checks when idle/out of window
+    reextract_cost_per_cpu_hour: float = 0.04  # USD, for per-batch cost estimates
+    reextract_key: str = "kratos:reextract"  # Redis prefix: cursor, failures, progress, history
+    reextract_history: int = 200  # finished batches kept in <key>:batches
+
+    # In-document search index (accent-folded positional postings, see
+    # services/search_index.py) uploaded next to the PDF for the review UI
+    search_index_enabled: bool = True
+
+    # Live progress (services/progress.py): events per document on the Redis
+    # stream <PROGRESS_KEY>:<documentId> for the API to relay over SSE; page
+    # events at most every PROGRESS_INTERVAL_SECONDS
+    progress_enabled: bool = True
+    progress_key: str = "kratos:progress"
+    progress_interval_seconds: float = 1.0
+    progress_max_events: int = 200
+    progress_ttl_seconds: int = 3600
+
+    # Single-flight de-duplication (services/single_flight.py): one job per
+    # document and per pdfHash in flight, claimed for SINGLE_FLIGHT_LEASE_SECONDS
+    # and renewed while it runs. Duplicates are re-queued every
+    # SINGLE_FLIGHT_DEFER_SECONDS for up to SINGLE_FLIGHT_WAIT_SECONDS (0 =
+    # drop same-document duplicates at once) and reuse the leader's result;
+    # a duplicate Trigger run exits at once. single_flight.wait() polls every
+    # SINGLE_FLIGHT_POLL_SECONDS
+    single_flight_enabled: bool = True
+    single_flight_key: str = "kratos:inflight"
+    single_flight_lease_seconds: float = 60
+    single_flight_wait_seconds: float = 900
+    single_flight_defer_seconds: float = 15
+    single_flight_poll_seconds: float = 1.0
+    single_flight_result_ttl_seconds: int = 3600
+
+    # Page thumbnails (THUMBNAIL_WIDTH px) and previews (PREVIEW_WIDTH px)
+    # as WebP, uploaded under <user>/<doc>/pages/ with a <doc>.pages.json
+    # manifest (see services/thumbnails.py). THUMBNAIL_WORKERS renderer
+    # processes run beside extraction (0 = render inline afterwards); one
+    # page bitmap is capped at THUMBNAIL_MAX_PIXELS
+    thumbnails_enabled: bool = False
+    thumbnail_width: int = 160
+    preview_width: int = 800
+    thumbnail_quality: int = 60  # lossy images: thumbnails, pages with images
+    thumbnail_grayscale: bool = True
+    thumbnail_max_pixels: int = 4_000_000
+    thumbnail_workers: int = 1
+    thumbnail_upload_concurrency: int = 8
+    thumbnail_timeout_seconds: int = 600
+
+    # Columnar export of extracted tables next to the PDF: "", "arrow" or
+    # "parquet" (requires pyarrow, see services/table_export.py)
+    table_export_format: str = ""
+
+    # Opt-in per-job sampling profiler (see services/profiling.py)
+    profile_jobs: bool = False
+    profile_dir: Path = Path("/tmp/kratos-pdf-worker-profiles")
+    profile_interval_ms: float = 10.0
+    profile_keep_slowest: int = 10
+    profile_window_seconds: int = 3600
+    profile_retention_windows: int = 24
+    profile_threshold_seconds: float = 0.0  # 0 = only slowest-N
+
+    # Prometheus metrics (see services/metrics.py): GET /metrics on
+    # METRICS_PORT (0 = off), and/or the exposition written every
+    # METRICS_TEXTFILE_INTERVAL_SECONDS to METRICS_TEXTFILE for
+    # node_exporter's textfile collector. Celery prefork workers also need
+    # PROMETHEUS_MULTIPROC_DIR in the environment to aggregate their children
+    metrics_port: int = 0
+    metrics_addr: str = "0.0.0.0"
+    metrics_textfile: Optional[Path] = None
+    metrics_textfile_interval_seconds: float = 15.0
+    metrics_max_tenants: int = 20  # per-tenant series beyond TENANT_* are "other"
+
+    # Span tracing (see services/tracing.py)
+    tracing_enabled: bool = False
+    trace_sample_rate: float = 1.0
+    trace_pages: bool = False
+    trace_max_spans: int = 1000
+    trace_file: Optional[Path] = Path("/tmp/kratos-pdf-worker-traces.jsonl")
+    trace_otlp_endpoint: str = ""
 
     # Temp directory for downloaded PDFs
     temp_dir: Path = Path("/tmp/kratos-pdf-worker")
 
+    # Node-local cache of source PDFs, shared by the worker processes (see
+    # services/pdf_cache.py): keyed by storage path and sha256, least
+    # recently used entries evicted above PDF_CACHE_MAX_MB, hits re-hashed
+    # against pdf_hash when PDF_CACHE_VERIFY is set
+    pdf_cache_enabled: bool = True
+    pdf_cache_dir: Optional[Path] = None  # default: <TEMP_DIR>/.pdf-cache
+    pdf_cache_max_mb: int = 1024
+    pdf_cache_verify: bool = True
+
     # Logging
     log_level: str = "INFO"
 
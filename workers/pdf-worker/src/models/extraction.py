@@ -45,6 +45,54 @@ class PageContent(BaseModel):
     text: str = ""
     tables_count: int = 0
     images_count: int = 0
+    # Offsets of this page inside ExtractionResult.raw_text (end-exclusive)
+    char_start: int = 0
+    char_end: int = 0
+    # Backend that produced this page: "pdfplumber" or "pdfium" (hybrid engine)
+    engine: str = "pdfplumber"
+    # Run-length map of the normalized text back to the extracted text:
+    # (normalized length, extracted length) pairs; see
+    # services/normalization.original_offset. Not serialized: exported to
+    # storage on its own (ExtractionMetadata.text_offsets)
+    offsets: list[int] = Field(default_factory=list, exclude=True)
+
+
+class TextChunk(BaseModel):
+    """A token-bounded slice of raw_text, ready for embedding."""
+
+    index: int
+    page_start: int
+    page_end: int
+    char_start: int
+    char_end: int
+    token_count: int = 0
+
+
+class DocumentSection(BaseModel):
+    """A structural section of the document (see services/sections.py)."""
+
+    name: str  # canonical: relatorio, fundamentacao, dispositivo, pedidos, ...
+    heading: str = ""  # heading line as found in the text
+    # Offsets inside ExtractionResult.raw_text (end-exclusive)
+    char_start: int
+    char_end: int
+    page_start: int
+    page_end: int
+
+
+class TokenEstimate(BaseModel):
+    """Approximate LLM token counts of an extraction (see services/tokens.py)."""
+
+    # Provider-neutral base count of raw_text
+    total: int = 0
+    # Per page (aligned with ExtractionResult.pages) and per section
+    # (aligned with ExtractionResult.sections)
+    pages: list[int] = Field(default_factory=list)
+    sections: list[int] = Field(default_factory=list)
+    # total scaled by TOKEN_CALIBRATION, per provider
+    providers: dict[str, int] = Field(default_factory=dict)
+    # USD to send raw_text as input, per model of TOKEN_INPUT_USD_PER_MTOK
+    input_cost_usd: dict[str, float] = Field(default_factory=dict)
 
 
 class ExtractionMetadata(BaseModel):
@@ -54,6 +102,22 @@ class ExtractionMetadata(BaseModel):
     processing_time_seconds: float = 0.0
     pdf_hash: str = ""
     extraction_method: ExtractionMethod = ExtractionMethod.pdfplumber
+    # Seconds spent in each pipeline stage (validate, hash, extract_pages, ...)
+    stage_timings: dict[str, float] = Field(default_factory=dict)
+    # Storage key of the columnar (Arrow/Parquet) table export, if any
+    tables_artifact: str = ""
+    # Storage key of the search index (services/search_index.py), if any
+    search_index: str = ""
+    # Storage key of the normalization offset maps (services/normalization.py), if any
+    text_offsets: str = ""
+    # Storage key of the page thumbnail/preview manifest (services/thumbnails.py), if any
+    page_previews: str = ""
+    # Characters of extracted page text before normalization (0 = not normalized)
+    original_characters: int = 0
+    # pipeline.EXTRACTOR_VERSION that produced this result (0 = before versioning)
+    extractor_version: int = 0
+    # Token counts and input cost estimates, computed once at extraction
+    tokens: TokenEstimate = Field(default_factory=TokenEstimate)
 
 
 class ExtractionResult(BaseModel):
@@ -63,4 +127,6 @@ class ExtractionResult(BaseModel):
     raw_text: str = ""
     tables: list[ExtractedTable] = Field(default_factory=list)
     pages: list[PageContent] = Field(default_factory=list)
+    chunks: list[TextChunk] = Field(default_factory=list)
+    sections: list[DocumentSection] = Field(default_factory=list)
     errors: list[str] = Field(default_factory=list)
@@ -1,25 +1,35 @@
 """
 KRATOS v2 — PDF Extraction Pipeline
-Orchestrates: validate → hash → extract text → extract tables → build result.
+Orchestrates: validate → hash → extract pages (text + tables) → normalize →
+chunk → segment sections → estimate tokens → build result.
 """
 
 import hashlib
 import logging
 import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, Optional
 
 from src.config import settings
 from src.models.extraction import (
     DocumentStatus,
     ExtractionMetadata,
-    ExtractionMethod,
     ExtractionResult,
 )
-from src.services.pdf_extraction import extract_tables, extract_text_by_page, get_page_count
+from src.services import normalization, progress, sections, tokens, tracing
+from src.services.chunking import build_raw_text, chunk_text
+from src.services.pdf_extraction import extract_parallel, get_engine, get_page_count
 
 logger = logging.getLogger(__name__)
 
 
+# Revision of the extraction output. Bump it with any change that alters
+# what the pipeline produces for the same PDF (engine, normalization,
+# chunking, sections); services/reextraction.py brings older rows up to date.
+EXTRACTOR_VERSION = 2
+
+
 class PipelineError(Exception):
     """Raised when the pipeline fails validation or processing."""
 
@@ -33,21 +43,39 @@ def _compute_hash(pdf_path: Path) -> str:
     return sha.hexdigest()
 
 
-def run_pipeline(document_id: str, pdf_path: Path) -> ExtractionResult:
+@contextmanager
+def _stage(name: str, timings: dict[str, float], pages: Optional[int] = None) -> Iterator[None]:
+    """Record the wall time of a pipeline stage (seconds), trace it as a span and report it as progress."""
+    progress.stage(name, pages)
+    stage_start = time.perf_counter()
+    try:
+        with tracing.span(f"pipeline.{name}"):
+            yield
+    finally:
+        timings[name] = round(time.perf_counter() - stage_start, 4)
+
+
+def run_pipeline(document_id: str, pdf_path: Path, workers: int = 1) -> ExtractionResult:
     """
     Run the full extraction pipeline on a PDF file.
 
     1. Validate page count against config limits
     2. Compute PDF hash (SHA-256)
-    3. Extract text by page
-    4. Extract tables
-    5. Build concatenated raw_text
-    6. Construct ExtractionResult with metadata
+    3. Extract text by page and tables in one pass of EXTRACTION_ENGINE
+       (split across `workers` processes when more than one)
+    4. Normalize page text across pages (NORMALIZE_TEXT)
+    5. Build concatenated raw_text (with per-page offsets)
+    6. Split raw_text into RAG chunks
+    7. Index legal sections (SEGMENT_SECTIONS)
+    8. Estimate tokens and input cost per page, section and model
+    9. Construct ExtractionResult with metadata
     """
     start = time.time()
+    timings: dict[str, float] = {}
 
     # 1. Validate page count
-    page_count = get_page_count(pdf_path)
+    with _stage("validate", timings):
+        page_count = get_page_count(pdf_path)
     if page_count > settings.max_pages:
         raise PipelineError(
             f"PDF has {page_count} pages, exceeds limit of {settings.max_pages}"
@@ -55,38 +83,79 @@ def run_pipeline(document_id: str, pdf_path: Path) -> ExtractionResult:
     logger.info(f"[{document_id}] PDF has {page_count} pages")
 
     # 2. Compute hash
-    pdf_hash = _compute_hash(pdf_path)
-
-    # 3. Extract text by page
-    pages = extract_text_by_page(pdf_path)
-
-    # 4. Extract tables
-    tables = extract_tables(pdf_path)
+    with _stage("hash", timings):
+        pdf_hash = _compute_hash(pdf_path)
+
+    # 3. Extract text by page and tables (one pass over the document)
+    engine = get_engine()
+    with _stage("extract_pages", timings, pages=page_count):
+        if workers > 1:
+            pages, tables = extract_parallel(pdf_path, page_count, workers, engine.name)
+        else:
+            pages, tables = engine.extract(pdf_path)
+
+    # 4. Drop repeated headers/footers, rejoin hyphenation, collapse whitespace
+    original_chars = 0
+    if settings.normalize_text:
+        with _stage("normalize", timings):
+            stats = normalization.normalize_pages(pages)
+        original_chars = stats.original_characters
+        logger.info(
+            f"[{document_id}] Normalized text: {stats.original_characters} -> "
+            f"{stats.normalized_characters} chars, {stats.removed_lines} repeated lines "
+            f"({stats.repeated_lines} patterns), {stats.joined_hyphens} hyphenations"
+        )
 
     # 5. Build raw_text
-    raw_text = "\n\n".join(p.text for p in pages if p.text)
+    raw_text = build_raw_text(pages)
     total_chars = sum(len(p.text) for p in pages)
     total_tables = sum(p.tables_count for p in pages)
 
+    # 6. Chunk for RAG — computed once here so consumers never re-split
+    with _stage("chunk", timings):
+        chunks = chunk_text(
+            raw_text,
+            pages,
+            max_tokens=settings.chunk_max_tokens,
+            overlap_tokens=settings.chunk_overlap_tokens,
+        )
+
+    # 7. Section index (names, pages, offsets) for selective loading
+    document_sections = []
+    if settings.segment_sections:
+        with _stage("segment", timings):
+            document_sections = sections.segment(raw_text, pages)
+
+    # 8. Token estimates, so analysis routing and budgets never re-tokenize
+    with _stage("tokens", timings):
+        token_estimate = tokens.estimate(raw_text, pages, document_sections)
+
     elapsed = time.time() - start
     logger.info(
         f"[{document_id}] Extracted {total_chars} chars, "
-        f"{total_tables} tables in {elapsed:.1f}s"
+        f"{total_tables} tables, {len(chunks)} chunks, ~{token_estimate.total} tokens "
+        f"in {elapsed:.1f}s"
     )
 
-    # 6. Construct result
+    # 9. Construct result
     return ExtractionResult(
         document_id=document_id,
         status=DocumentStatus.completed,
         raw_text=raw_text,
         tables=tables,
         pages=pages,
+        chunks=chunks,
+        sections=document_sections,
         metadata=ExtractionMetadata(
             total_pages=page_count,
             total_tables=total_tables,
             total_characters=total_chars,
+            original_characters=original_chars,
             processing_time_seconds=round(elapsed, 2),
             pdf_hash=pdf_hash,
-            extraction_method=ExtractionMethod.pdfplumber,
+            extraction_method=engine.method,
+            extractor_version=EXTRACTOR_VERSION,
+            stage_timings=timings,
+            tokens=token_estimate,
         ),
     )
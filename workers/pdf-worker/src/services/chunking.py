@@ -0,0 +1,122 @@
+"""
+KRATOS v2 — RAG Chunking
+Builds raw_text with per-page offsets and splits it into token-bounded,
+overlapping chunks that keep page provenance.
+"""
+
+import bisect
+import re
+from array import array
+from typing import Callable
+
+from src.models.extraction import PageContent, TextChunk
+
+PAGE_SEPARATOR = "\n\n"
+
+# Approximate tokenizer: words and standalone punctuation marks
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Tokens that close a sentence — preferred chunk boundaries
+_SENTENCE_END = frozenset({".", "!", "?", ";"})
+
+
+def build_raw_text(pages: list[PageContent]) -> str:
+    """
+    Join page texts into raw_text and record each page's offsets.
+
+    Pages without text are skipped in the join (as before) and get an
+    empty span at the current position. Mutates pages in place.
+    """
+    parts: list[str] = []
+    pos = 0
+    for page in pages:
+        if not page.text:
+            page.char_start = page.char_end = pos
+            continue
+        if parts:
+            parts.append(PAGE_SEPARATOR)
+            pos += len(PAGE_SEPARATOR)
+        page.char_start = pos
+        pos += len(page.text)
+        page.char_end = pos
+        parts.append(page.text)
+    return "".join(parts)
+
+
+def page_lookup(pages: list[PageContent]) -> Callable[[int], int]:
+    """
+    Build a function mapping a raw_text offset to its page number.
+
+    Offsets falling on a page separator resolve to the preceding page.
+    Returns 0 when no page has text.
+    """
+    starts = [p.char_start for p in pages if p.char_end > p.char_start]
+    numbers = [p.page_number for p in pages if p.char_end > p.char_start]
+
+    def _page(offset: int) -> int:
+        if not starts:
+            return 0
+        idx = bisect.bisect_right(starts, offset) - 1
+        return numbers[max(idx, 0)]
+
+    return _page
+
+
+def chunk_text(
+    raw_text: str,
+    pages: list[PageContent],
+    max_tokens: int,
+    overlap_tokens: int,
+) -> list[TextChunk]:
+    """
+    Split raw_text into chunks of at most max_tokens approximate tokens.
+
+    Consecutive chunks share overlap_tokens tokens. When possible a chunk
+    ends on a sentence boundary found in the second half of the window.
+    Offsets are into raw_text; pages must already carry their offsets
+    (see build_raw_text).
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be in [0, max_tokens)")
+
+    starts = array("l")
+    ends = array("l")
+    for m in _TOKEN_RE.finditer(raw_text):
+        starts.append(m.start())
+        ends.append(m.end())
+
+    n = len(starts)
+    if n == 0:
+        return []
+
+    _page = page_lookup(pages)
+    chunks: list[TextChunk] = []
+    i = 0
+    while i < n:
+        j = min(i + max_tokens, n)
+        if j < n:
+            # Back off to the last sentence end in the second half of the window
+            for k in range(j - 1, i + max_tokens // 2 - 1, -1):
+                if raw_text[starts[k]:ends[k]] in _SENTENCE_END:
+                    j = k + 1
+                    break
+
+        char_start = starts[i]
+        char_end = ends[j - 1]
+        chunks.append(
+            TextChunk(
+                index=len(chunks),
+                page_start=_page(char_start),
+                page_end=_page(char_end - 1),
+                char_start=char_start,
+                char_end=char_end,
+                token_count=j - i,
+            )
+        )
+        if j >= n:
+            break
+        i = max(j - overlap_tokens, i + 1)
+
+    return chunks
@@ -0,0 +1,201 @@
+"""
+KRATOS v2 — Shared Supabase Client Factory
+One Supabase client per process for Storage and PostgREST, over a single
+pooled httpx client: keep-alive connections, a bound on in-flight requests
+and retries with exponential backoff. Initialisation is thread-safe and the
+client is dropped in forked children (Celery prefork), which create their own.
+
+get_async_client() builds the asyncio equivalent for async callers.
+With BACKEND=local, get_client() returns the local stand-in instead.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions, create_client
+
+from src.config import settings
+from src.services import local_backend
+
+logger = logging.getLogger(__name__)
+
+# Safe to resend whatever the outcome of the first attempt
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Raised before the request reached the server: safe to retry any method
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_TRANSIENT_ERRORS = _CONNECT_ERRORS + (httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for retry `attempt` (0-based)."""
+    cap = settings.http_retry_backoff_seconds * (2 ** attempt)
+    return random.uniform(0, min(cap, settings.http_retry_backoff_max_seconds))
+
+
+def _should_retry(request: httpx.Request, attempt: int,
+                  response: Optional[httpx.Response] = None,
+                  error: Optional[Exception] = None) -> bool:
+    if attempt >= settings.http_retries:
+        return False
+    if error is not None:
+        return isinstance(error, _CONNECT_ERRORS) or request.method in _IDEMPOTENT_METHODS
+    return response is not None and response.status_code in _RETRY_STATUSES and (
+        request.method in _IDEMPOTENT_METHODS or response.status_code == 429
+    )
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.http_timeout_seconds, connect=settings.http_connect_timeout_seconds
+    )
+
+
+class RetryingTransport(httpx.BaseTransport):
+    """Pooled transport bounding in-flight requests and retrying transient failures."""
+
+    def __init__(self, transport: Optional[httpx.BaseTransport] = None,
+                 max_in_flight: Optional[int] = None):
+        self._transport = transport or httpx.HTTPTransport(limits=_limits())
+        self._slots = threading.BoundedSemaphore(max_in_flight or settings.http_max_connections)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                with self._slots:
+                    response = self._transport.handle_request(request)
+            except _TRANSIENT_ERRORS as e:
+                if not _should_retry(request, attempt, error=e):
+                    raise
+                logger.debug(f"Retrying {request.method} {request.url.path} after {e!r}")
+            else:
+                if not _should_retry(request, attempt, response=response):
+                    return response
+                response.close()
+                logger.debug(
+                    f"Retrying {request.method} {request.url.path} after HTTP {response.status_code}"
+                )
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRetryingTransport(httpx.AsyncBaseTransport):
+    """asyncio counterpart of RetryingTransport."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 max_in_flight: Optional[int] = None):
+        self._transport = transport or httpx.AsyncHTTPTransport(limits=_limits())
+        self._slots = asyncio.BoundedSemaphore(max_in_flight or settings.http_max_connections)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                async with self._slots:
+                    response = await self._transport.handle_async_request(request)
+            except _TRANSIENT_ERRORS as e:
+                if not _should_retry(request, attempt, error=e):
+                    raise
+            else:
+                if not _should_retry(request, attempt, response=response):
+                    return response
+                await response.aclose()
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def http_client() -> httpx.Client:
+    """A new pooled, retrying httpx client (HTTP/1.1 keep-alive)."""
+    return httpx.Client(transport=RetryingTransport(), timeout=_timeout())
+
+
+_client: Optional[Client] = None
+_http: Optional[httpx.Client] = None
+_lock = threading.Lock()
+_async_client: Optional[AsyncClient] = None
+
+
+def get_client() -> Client:
+    """Process-wide Supabase client (or the local stand-in with BACKEND=local)."""
+    global _client, _http
+    if _client is not None:
+        return _client
+    with _lock:
+        if _client is None:
+            if settings.backend == "local":
+                _client = local_backend.get_client()
+            else:
+                _http = http_client()
+                client = create_client(
+                    settings.supabase_url,
+                    settings.supabase_service_role_key,
+                    options=ClientOptions(httpx_client=_http),
+                )
+                # Sub-clients are created lazily by supabase-py; build them
+                # here so concurrent first calls cannot race.
+                client.storage
+                client.postgrest
+                _client = client
+    return _client
+
+
+async def get_async_client() -> AsyncClient:
+    """Process-wide async Supabase client sharing the same pool settings."""
+    global _async_client
+    if settings.backend == "local":
+        raise RuntimeError("The local backend has no async client; use get_client()")
+    if _async_client is None:
+        from supabase import acreate_client
+
+        client = await acreate_client(
+            settings.supabase_url,
+            settings.supabase_service_role_key,
+            options=AsyncClientOptions(
+                httpx_client=httpx.AsyncClient(
+                    transport=AsyncRetryingTransport(), timeout=_timeout()
+                )
+            ),
+        )
+        if _async_client is None:  # another task may have won while awaiting
+            _async_client = client
+    return _async_client
+
+
+def reset() -> None:
+    """Drop the shared clients (tests, configuration changes)."""
+    global _client, _http, _async_client
+    with _lock:
+        if _http is not None:
+            _http.close()
+        _client = _http = _async_client = None
+
+
+def _after_fork_in_child() -> None:
+    # Pooled sockets belong to the parent; never reuse them in a child.
+    global _client, _http, _async_client, _lock
+    _client = _http = _async_client = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -3,32 +3,33 @@ KRATOS v2 — Database Service
 Saves extraction results and updates document status via Supabase REST API.
 """
 
+import json
 import logging
 from datetime import datetime, timezone
 from typing import Optional
 
-from supabase import create_client, Client
+from supabase import Client
 
 from src.config import settings
+from src.services import clients, metrics, output_store
 from src.models.extraction import ExtractionResult
 
 logger = logging.getLogger(__name__)
 
-_client: Optional[Client] = None
+PAGES_TABLE = "extraction_pages"
 
 
 def _get_client() -> Client:
-    """Lazy-initialize Supabase client."""
-    global _client
-    if _client is None:
-        _client = create_client(
-            settings.supabase_url,
-            settings.supabase_service_role_key,
-        )
-    return _client
+    """Shared process-wide client (see services/clients.py)."""
+    return clients.get_client()
 
 
-def save_extraction(document_id: str, result: ExtractionResult) -> None:
+def save_extraction(
+    document_id: str,
+    result: ExtractionResult,
+    storage_path: Optional[str] = None,
+    extraction_id: Optional[str] = None,
+) -> None:
     """
     Save an ExtractionResult to the extractions table.
 
@@ -37,22 +38,214 @@ def save_extraction(document_id: str, result: ExtractionResult) -> None:
     - content_json: full ExtractionResult as dict (tables, pages, metadata)
     - extraction_method: "pdfplumber"
     - tables_count, images_count
+    - extractor_version, pdf_hash: pipeline revision and source PDF, so
+      outdated rows can be found and re-extracted (services/reextraction.py)
+
+    When `storage_path` (the source PDF) is given and OUTPUT_MODE selects
+    storage for this size, raw_text and the full content go to a compressed
+    object next to the PDF instead; the row keeps raw_text NULL, a summary
+    in content_json and the object key in output_key.
+
+    With `extraction_id` (re-extraction) that row is overwritten in place
+    instead of inserting another: a document keeps one extraction row, and
+    the analyses referencing its id stay linked.
     """
     client = _get_client()
     total_images = sum(p.images_count for p in result.pages)
+    content_json = result.model_dump(mode="json")
+
+    row = {
+        "document_id": document_id,
+        "raw_text": result.raw_text,
+        "content_json": content_json,
+        "extraction_method": result.metadata.extraction_method.value,
+        "tables_count": result.metadata.total_tables,
+        "images_count": total_images,
+        "extractor_version": result.metadata.extractor_version,
+        "pdf_hash": result.metadata.pdf_hash or None,
+    }
+
+    if storage_path and settings.output_mode != "inline":
+        payload_bytes = (
+            len(json.dumps(content_json, ensure_ascii=False).encode())
+            if settings.output_mode == "auto"
+            else 0
+        )
+        if output_store.should_spill(payload_bytes):
+            content_json.pop("raw_text", None)  # stored once, at the top level
+            output = output_store.spill(
+                storage_path, document_id, result.raw_text, content_json
+            )
+            row.update(
+                raw_text=None,
+                content_json={"summary": output_store.summarize(result), "output": output},
+                output_key=output["key"],
+            )
+
+    with metrics.DB_WRITE_SECONDS.labels("save_extraction").time():
+        if extraction_id:
+            row.setdefault("output_key", None)  # a previously spilled output no longer applies
+            client.table("extractions").update(row).eq("id", extraction_id).execute()
+        else:
+            client.table("extractions").insert(row).execute()
 
-    client.table("extractions").insert(
+    logger.info(f"Saved extraction for document {document_id}")
+
+
+def page_rows(document_id: str, result: ExtractionResult) -> list[dict]:
+    """extraction_pages rows: one per page, with that page's tables."""
+    tables_by_page: dict[int, list[dict]] = {}
+    for table in result.tables:
+        tables_by_page.setdefault(table.page, []).append(table.model_dump(mode="json"))
+    return [
         {
             "document_id": document_id,
-            "raw_text": result.raw_text,
-            "content_json": result.model_dump(mode="json"),
-            "extraction_method": result.metadata.extraction_method.value,
-            "tables_count": result.metadata.total_tables,
-            "images_count": total_images,
+            "page_number": page.page_number,
+            "text": page.text,
+            "char_start": page.char_start,
+            "char_end": page.char_end,
+            "tables_count": page.tables_count,
+            "images_count": page.images_count,
+            "engine": page.engine,
+            "tables": tables_by_page.get(page.page_number, []),
         }
-    ).execute()
+        for page in result.pages
+    ]
 
-    logger.info(f"Saved extraction for document {document_id}")
+
+def save_pages(document_id: str, result: ExtractionResult) -> int:
+    """
+    Upsert one extraction_pages row per page, keyed by (document_id,
+    page_number), in batches of PAGE_ROWS_BATCH_SIZE. Re-extractions
+    overwrite in place, and rows past the new page count are deleted so a
+    shorter re-extraction does not leave stale pages behind. Returns the
+    number of rows written.
+    """
+    client = _get_client()
+    rows = page_rows(document_id, result)
+    batch = max(1, settings.page_rows_batch_size)
+    timer = metrics.DB_WRITE_SECONDS.labels("save_pages")
+    for i in range(0, len(rows), batch):
+        with timer.time():
+            client.table(PAGES_TABLE).upsert(
+                rows[i:i + batch], on_conflict="document_id,page_number"
+            ).execute()
+    with timer.time():
+        client.table(PAGES_TABLE).delete().eq("document_id", document_id).gt(
+            "page_number", len(result.pages)
+        ).execute()
+    logger.info(f"Saved {len(rows)} page rows for document {document_id}")
+    return len(rows)
+
+
+def get_pages(document_id: str, first: int, last: Optional[int] = None) -> list[dict]:
+    """
+    Page rows first..last (1-based, inclusive; last defaults to first) in
+    page order. A primary-key range scan: cost depends on the range, not
+    on the document size.
+    """
+    last = first if last is None else last
+    response = (
+        _get_client()
+        .table(PAGES_TABLE)
+        .select("*")
+        .eq("document_id", document_id)
+        .gte("page_number", first)
+        .lte("page_number", last)
+        .order("page_number")
+        .execute()
+    )
+    return response.data or []
+
+
+def get_extraction(document_id: str) -> Optional[output_store.StoredExtraction]:
+    """Latest extraction row for a document; spilled outputs load on access."""
+    client = _get_client()
+    response = (
+        client.table("extractions")
+        .select("*")
+        .eq("document_id", document_id)
+        .order("created_at", desc=True)
+        .limit(1)
+        .execute()
+    )
+    if not response.data:
+        return None
+    return output_store.StoredExtraction(response.data[0])
+
+
+def stale_extractions(
+    version: int, after_id: Optional[str] = None, limit: int = 50
+) -> list[dict]:
+    """
+    Extraction rows produced before `version`, in id order after `after_id`
+    (keyset pagination: rows written meanwhile carry the current version,
+    so a scan never revisits or misses a row). Only the columns needed to
+    plan a re-extraction are read.
+    """
+    query = (
+        _get_client()
+        .table("extractions")
+        .select("id,document_id,pdf_hash,extractor_version")
+        .lt("extractor_version", version)
+    )
+    if after_id:
+        query = query.gt("id", after_id)
+    return query.order("id").limit(limit).execute().data or []
+
+
+def find_current_extraction(
+    version: int,
+    document_id: Optional[str] = None,
+    pdf_hash: Optional[str] = None,
+) -> Optional[output_store.StoredExtraction]:
+    """An extraction at `version` or later for the document or the PDF hash."""
+    query = _get_client().table("extractions").select("*").gte("extractor_version", version)
+    if document_id:
+        query = query.eq("document_id", document_id)
+    if pdf_hash:
+        query = query.eq("pdf_hash", pdf_hash)
+    response = query.limit(1).execute()
+    if not response.data:
+        return None
+    return output_store.StoredExtraction(response.data[0])
+
+
+def get_documents(document_ids: list[str]) -> dict[str, dict]:
+    """documents rows by id (missing ids are absent from the result)."""
+    if not document_ids:
+        return {}
+    response = (
+        _get_client()
+        .table("documents")
+        .select("id,user_id,file_path,status,pdf_hash")
+        .in_("id", document_ids)
+        .execute()
+    )
+    return {row["id"]: row for row in response.data or []}
+
+
+def register_document(
+    document_id: str,
+    user_id: str,
+    file_name: str,
+    file_path: str,
+    file_size: int,
+    pdf_hash: Optional[str] = None,
+) -> None:
+    """Create (or refresh) a documents row for a PDF ingested outside the API."""
+    row = {
+        "id": document_id,
+        "user_id": user_id,
+        "file_name": file_name[:255],
+        "file_path": file_path,
+        "file_size": file_size,
+        "mime_type": "application/pdf",
+        "status": "pending",
+        "pdf_hash": pdf_hash,
+    }
+    with metrics.DB_WRITE_SECONDS.labels("register_document").time():
+        _get_client().table("documents").upsert(row, on_conflict="id").execute()
 
 
 def update_document_status(
@@ -72,5 +265,6 @@ def update_document_status(
     if error_message is not None:
         data["error_message"] = error_message
 
-    client.table("documents").update(data).eq("id", document_id).execute()
+    with metrics.DB_WRITE_SECONDS.labels("update_document_status").time():
+        client.table("documents").update(data).eq("id", document_id).execute()
     logger.debug(f"Updated document {document_id} status to {status}")
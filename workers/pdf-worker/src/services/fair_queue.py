@@ -0,0 +1,284 @@
+"""
+KRATOS v2 — Per-Tenant Fair Scheduling
+One sub-queue per tenant (the job's userId), so a bulk upload cannot starve
+every other user behind a single FIFO.
+
+Producers LPUSH onto the shared list, which every worker can consume.
+Fair workers move those jobs to their tenant's sub-queue with
+drain_shared(): push() LPUSHes onto `<queue>:tenant:<userId>` and adds the
+tenant to the `<queue>:tenants` sorted set (ZADD NX, score 0) in one
+MULTI, and drain_shared() RPOPs the shared list in that same MULTI, so a
+worker lost mid-move never drops a job. Workers take
+the tenant with the lowest virtual time (stride scheduling, the weighted
+round-robin of fair queueing): serving a job moves that tenant
+cost/weight ahead, so while both have work a weight-2 tenant gets two turns
+for each turn of a weight-1 tenant. A job's cost is 1 unless the worker
+prices it (runtime_model.job_cost: its expected runtime relative to the
+mean job). `<queue>:vtime` is the virtual time of the last
+job served; a tenant that was idle or capped restarts there instead of
+banking credit. A tenant leaves the set when its sub-queue drains.
+
+Concurrency caps are leases in `<queue>:running:<userId>`, a sorted set
+scored by expiry so the slot of a crashed worker frees itself after
+TENANT_LEASE_SECONDS. A tenant at its cap is skipped until a lease is
+released. Every pick is one WATCH/MULTI transaction, so any number of
+workers share the same state.
+
+Jobs without a userId share the "_shared" tenant. Workers without fair
+scheduling also BRPOP the tenant sub-queues, so jobs a fair worker already
+moved there are not stranded when scheduling is switched off.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+import zlib
+from typing import Callable, Optional
+
+import redis
+from pydantic import BaseModel
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Keys derived from the queue key (e.g. "kratos:jobs:pdf:tenants")
+TENANTS_SUFFIX = ":tenants"
+TENANT_SUFFIX = ":tenant:"
+RUNNING_SUFFIX = ":running:"
+VTIME_SUFFIX = ":vtime"
+
+SHARED_TENANT = "_shared"
+OTHER_TENANT_LABEL = "other"
+
+# Celery queues the extract_pdf task is sharded over (CELERY_TENANT_SHARDS)
+CELERY_SHARD_PREFIX = "pdf.tenant."
+
+
+class Lease(BaseModel):
+    """A running job's slot in its tenant's concurrency cap."""
+
+    tenant: str
+    id: str
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def tenant_of(job: dict) -> str:
+    return str(job.get("userId") or SHARED_TENANT)
+
+
+def tenant_key(queue_key: str, tenant: str) -> str:
+    return f"{queue_key}{TENANT_SUFFIX}{tenant}"
+
+
+def running_key(queue_key: str, tenant: str) -> str:
+    return f"{queue_key}{RUNNING_SUFFIX}{tenant}"
+
+
+def weight(tenant: str) -> float:
+    """Turns per round (TENANT_WEIGHTS, else TENANT_DEFAULT_WEIGHT)."""
+    return max(settings.tenant_weights.get(tenant, settings.tenant_default_weight), 0.01)
+
+
+def concurrency_cap(tenant: str) -> int:
+    """Running jobs allowed across all workers; 0 = no cap."""
+    return settings.tenant_concurrency.get(tenant, settings.tenant_max_concurrency)
+
+
+def _queue(pipe, queue_key: str, job: dict) -> None:
+    tenant = tenant_of(job)
+    pipe.lpush(tenant_key(queue_key, tenant), json.dumps(job))
+    pipe.zadd(queue_key + TENANTS_SUFFIX, {tenant: 0}, nx=True)
+
+
+def push(r: redis.Redis, queue_key: str, job: dict) -> None:
+    """Queue a job on its tenant's sub-queue."""
+    with r.pipeline() as pipe:
+        _queue(pipe, queue_key, job)
+        pipe.execute()
+
+
+def pop(
+    r: redis.Redis, queue_key: str, now: Optional[float] = None,
+    cost: Optional[Callable[[dict], float]] = None,
+) -> Optional[tuple[dict, Lease]]:
+    """
+    Take the next job in fair order, with a lease on its tenant's slot.
+
+    Returns None when no tenant has work below its concurrency cap. The
+    caller must release() the lease when the job finishes. cost(job) is
+    what serving the job charges its tenant (default 1).
+    """
+    tenants_key = queue_key + TENANTS_SUFFIX
+    vtime_key = queue_key + VTIME_SUFFIX
+    now = time.time() if now is None else now
+
+    def pick(pipe) -> Optional[tuple[bytes, Lease]]:
+        vtime = float(pipe.get(vtime_key) or 0)
+        stale = []
+        chosen = None
+        for raw, score in pipe.zrange(
+            tenants_key, 0, settings.fair_scan_tenants - 1, withscores=True
+        ):
+            tenant = _decode(raw)
+            key, slots = tenant_key(queue_key, tenant), running_key(queue_key, tenant)
+            pipe.watch(key, slots)
+            depth = pipe.llen(key)
+            if depth == 0:
+                stale.append(tenant)
+                continue
+            cap = concurrency_cap(tenant)
+            if cap > 0 and pipe.zcount(slots, now, "+inf") >= cap:
+                continue
+            chosen = tenant, key, slots, depth, max(score, vtime)
+            break
+
+        payload = pipe.lindex(chosen[1], -1) if chosen else None
+        charge = cost(json.loads(payload)) if cost and payload else 1.0
+        pipe.multi()
+        if stale:
+            pipe.zrem(tenants_key, *stale)
+        if chosen is None:
+            return None
+        tenant, key, slots, depth, start = chosen
+        lease = Lease(tenant=tenant, id=uuid.uuid4().hex)
+        pipe.rpop(key)
+        pipe.set(vtime_key, repr(start))
+        if depth == 1:
+            pipe.zrem(tenants_key, tenant)
+        else:
+            pipe.zadd(tenants_key, {tenant: start + charge / weight(tenant)})
+        pipe.zremrangebyscore(slots, "-inf", now)
+        pipe.zadd(slots, {lease.id: now + settings.tenant_lease_seconds})
+        pipe.expire(slots, int(settings.tenant_lease_seconds) + 60)
+        return payload, lease
+
+    picked = r.transaction(pick, tenants_key, vtime_key, value_from_callable=True)
+    if picked is None:
+        return None
+    payload, lease = picked
+    return json.loads(payload), lease
+
+
+def acquire(
+    r: redis.Redis, queue_key: str, tenant: str, now: Optional[float] = None
+) -> Optional[Lease]:
+    """A slot for a job that was not scheduled by pop() (Celery); None at the cap."""
+    slots = running_key(queue_key, tenant)
+    cap = concurrency_cap(tenant)
+    now = time.time() if now is None else now
+
+    def take(pipe) -> Optional[Lease]:
+        if cap > 0 and pipe.zcount(slots, now, "+inf") >= cap:
+            return None
+        lease = Lease(tenant=tenant, id=uuid.uuid4().hex)
+        pipe.multi()
+        pipe.zremrangebyscore(slots, "-inf", now)
+        pipe.zadd(slots, {lease.id: now + settings.tenant_lease_seconds})
+        pipe.expire(slots, int(settings.tenant_lease_seconds) + 60)
+        return lease
+
+    return r.transaction(take, slots, value_from_callable=True)
+
+
+def release(r: redis.Redis, queue_key: str, lease: Lease) -> None:
+    r.zrem(running_key(queue_key, lease.tenant), lease.id)
+
+
+def running(r: redis.Redis, queue_key: str, tenant: str, now: Optional[float] = None) -> int:
+    """Unexpired leases held by a tenant."""
+    now = time.time() if now is None else now
+    return int(r.zcount(running_key(queue_key, tenant), now, "+inf"))
+
+
+def drain_shared(r: redis.Redis, queue_key: str, limit: int = 100) -> int:
+    """
+    Move up to `limit` jobs from the shared list to their tenant sub-queues.
+
+    Each move is one WATCH/MULTI transaction (read the oldest job, then RPOP
+    it and push it together): a job is either still on the shared list or
+    on its sub-queue.
+    """
+
+    def move(pipe) -> Optional[bool]:
+        raw = pipe.lindex(queue_key, -1)
+        if raw is None:
+            return None
+        try:
+            job = json.loads(raw)
+        except ValueError:
+            job = None
+        pipe.multi()
+        pipe.rpop(queue_key)
+        if job is None:
+            logger.error(f"Dropping malformed job on {queue_key}: {raw[:200]!r}")
+            return False
+        _queue(pipe, queue_key, job)
+        return True
+
+    moved = 0
+    while moved < limit:
+        outcome = r.transaction(move, queue_key, value_from_callable=True)
+        if outcome is None:
+            break
+        moved += outcome
+    return moved
+
+
+def tenant_keys(r: redis.Redis, queue_key: str) -> list[str]:
+    """Sub-queue keys of every tenant with queued jobs."""
+    return [
+        tenant_key(queue_key, _decode(t))
+        for t in r.zrange(queue_key + TENANTS_SUFFIX, 0, -1)
+    ]
+
+
+# --- Metrics labels ---
+
+_labelled: set[str] = set()
+_labelled_lock = threading.Lock()
+
+
+def tenant_label(tenant: str) -> str:
+    """
+    Metric label for a tenant, bounding label cardinality.
+
+    Tenants named in TENANT_WEIGHTS / TENANT_CONCURRENCY always get their
+    own label; the first METRICS_MAX_TENANTS others seen by this process do
+    too, the rest are reported as "other".
+    """
+    if tenant in settings.tenant_weights or tenant in settings.tenant_concurrency:
+        return tenant
+    with _labelled_lock:
+        if tenant in _labelled:
+            return tenant
+        if len(_labelled) < settings.metrics_max_tenants:
+            _labelled.add(tenant)
+            return tenant
+    return OTHER_TENANT_LABEL
+
+
+# --- Celery routing ---
+
+def celery_shard(tenant: str) -> str:
+    """Stable tenant -> Celery queue mapping (crc32, not the salted hash())."""
+    shard = zlib.crc32(tenant.encode()) % max(settings.celery_tenant_shards, 1)
+    return f"{CELERY_SHARD_PREFIX}{shard}"
+
+
+def route_task(name, args, kwargs, options, task=None, **_kw) -> Optional[dict]:
+    """
+    Celery task router: extract_pdf goes to its tenant's shard queue.
+
+    Workers consume every shard and kombu's Redis transport rotates between
+    the queues it listens on, so tenants on different shards take turns.
+    """
+    if name != "extract_pdf" or settings.celery_tenant_shards <= 0:
+        return None
+    job = (args or [None])[0] or (kwargs or {}).get("job") or {}
+    return {"queue": celery_shard(tenant_of(job))}
@@ -0,0 +1,221 @@
+"""
+KRATOS v2 — Layout Template Cache
+Reuses table regions across pages that share a layout (PJe certidões, court
+cost sheets, bank statements: same grid, different values).
+
+pdfplumber's default ("lines") table finder derives tables from the page's
+ruling edges only, so pages with the same edges have the same tables. A
+page's fingerprint is its size plus its edges (orientation and coordinates
+rounded to 0.1 pt). On a hit the cached cell grid is applied directly:
+characters inside each cached table bbox are assigned to cells by bisecting
+the column/row boundaries, instead of re-deriving intersections and cells and
+scanning every page character once per row.
+
+Validation: the first reuse of a template, and every
+LAYOUT_CACHE_VERIFY_EVERY-th after that, also runs full detection and
+compares. On a mismatch the full result is used, the template is replaced and
+the fallback is counted. Hit/miss/fallback counts are kept per process
+(stats()) and exported as kratos_pdf_layout_cache_total{result}.
+"""
+
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from pdfplumber import utils
+from pdfplumber.table import Table, TableSettings
+from pydantic import BaseModel
+
+from src.config import settings
+from src.services import metrics
+
+RawTable = list[list[Optional[str]]]
+
+# Same text settings page.extract_tables() passes to Table.extract
+_TEXT_SETTINGS = TableSettings.resolve(None).text_settings or {}
+
+_RESULTS = {
+    result: metrics.LAYOUT_CACHE.labels(result) for result in ("hit", "miss", "fallback")
+}
+
+
+class LayoutCacheStats(BaseModel):
+    lookups: int = 0
+    hits: int = 0
+    misses: int = 0
+    fallbacks: int = 0  # verification failed: full detection used
+    verified: int = 0
+    evictions: int = 0
+    templates: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class TableTemplate:
+    """A detected table's cells, indexed for char-to-cell assignment."""
+
+    __slots__ = ("cells", "bbox", "columns", "rows", "layout", "_grid")
+
+    def __init__(self, cells: list[tuple]):
+        self.cells = [tuple(c) for c in cells]
+        table = Table(None, self.cells)
+        self.bbox = table.bbox
+        index = {cell: i for i, cell in enumerate(self.cells)}
+        # Table.extract's row/column layout: cell index, or None where a
+        # merged cell spans that position
+        self.layout = [
+            [None if cell is None else index[tuple(cell)] for cell in row.cells]
+            for row in table.rows
+        ]
+        self.columns = sorted({c[0] for c in self.cells} | {c[2] for c in self.cells})
+        self.rows = sorted({c[1] for c in self.cells} | {c[3] for c in self.cells})
+        self._grid = self._index()
+
+    def _index(self) -> Optional[dict[tuple[int, int], int]]:
+        """(row interval, column interval) -> cell; None if cells overlap."""
+        grid: dict[tuple[int, int], int] = {}
+        for i, (x0, top, x1, bottom) in enumerate(self.cells):
+            for r in range(bisect.bisect_left(self.rows, top), bisect.bisect_left(self.rows, bottom)):
+                for c in range(bisect.bisect_left(self.columns, x0),
+                               bisect.bisect_left(self.columns, x1)):
+                    if grid.setdefault((r, c), i) != i:
+                        return None
+        return grid
+
+    def extract(self, page) -> RawTable:
+        """Same output as Table(page, cells).extract() for non-overlapping cells."""
+        if self._grid is None:
+            return Table(page, self.cells).extract(**_TEXT_SETTINGS)
+        x0, top, x1, bottom = self.bbox
+        columns, rows, grid = self.columns, self.rows, self._grid
+        cell_chars: list[list[dict]] = [[] for _ in self.cells]
+        for char in page.chars:
+            h_mid = (char["x0"] + char["x1"]) / 2
+            v_mid = (char["top"] + char["bottom"]) / 2
+            if not (x0 <= h_mid < x1 and top <= v_mid < bottom):
+                continue
+            key = (bisect.bisect_right(rows, v_mid) - 1, bisect.bisect_right(columns, h_mid) - 1)
+            cell = grid.get(key)
+            if cell is not None:
+                cell_chars[cell].append(char)
+        texts = [
+            utils.extract_text(chars, **_TEXT_SETTINGS) if chars else ""
+            for chars in cell_chars
+        ]
+        return [[None if i is None else texts[i] for i in row] for row in self.layout]
+
+
+def fingerprint(page) -> str:
+    """Page size and ruling edges (rounded to 0.1 pt), hashed."""
+    edges = sorted(
+        (e["orientation"], round(e["x0"], 1), round(e["top"], 1),
+         round(e["x1"], 1), round(e["bottom"], 1))
+        for e in page.edges
+    )
+    key = repr((round(page.width, 1), round(page.height, 1), edges)).encode()
+    return hashlib.blake2b(key, digest_size=16).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("tables", "uses")
+
+    def __init__(self, tables: list[TableTemplate]):
+        self.tables = tables
+        self.uses = 0
+
+
+class LayoutCache:
+    """LRU of page fingerprint -> table templates, shared by a process."""
+
+    def __init__(self, max_entries: int = 512, verify_every: int = 50):
+        self.max_entries = max_entries
+        self.verify_every = max(1, verify_every)
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = LayoutCacheStats()
+
+    def stats(self) -> LayoutCacheStats:
+        with self._lock:
+            return self._stats.model_copy(update={"templates": len(self._entries)})
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            self._stats.lookups += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            entry.uses += 1
+            return entry
+
+    def _put(self, key: str, tables: list[TableTemplate]) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(tables)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def extract_tables(self, page) -> list[RawTable]:
+        """page.extract_tables(), reusing the page layout's cached table grid."""
+        key = fingerprint(page)
+        entry = self._get(key)
+        if entry is None:
+            _RESULTS["miss"].inc()
+            tables, raw = _detect(page)
+            self._put(key, tables)
+            return raw
+
+        _RESULTS["hit"].inc()
+        raw = [template.extract(page) for template in entry.tables]
+        if entry.uses == 1 or entry.uses % self.verify_every == 0:
+            tables, expected = _detect(page)
+            with self._lock:
+                self._stats.verified += 1
+            if raw != expected:
+                with self._lock:
+                    self._stats.fallbacks += 1
+                _RESULTS["fallback"].inc()
+                self._put(key, tables)
+                return expected
+        return raw
+
+
+def _detect(page) -> tuple[list[TableTemplate], list[RawTable]]:
+    """Full table detection, as page.extract_tables() does it."""
+    found = page.find_tables()
+    return (
+        [TableTemplate(t.cells) for t in found],
+        [t.extract(**_TEXT_SETTINGS) for t in found],
+    )
+
+
+_cache: Optional[LayoutCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> LayoutCache:
+    """Process-wide cache sized by LAYOUT_CACHE_SIZE."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LayoutCache(settings.layout_cache_size, settings.layout_cache_verify_every)
+    return _cache
+
+
+def reset() -> None:
+    """Drop the process-wide cache (tests, config changes)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def stats() -> LayoutCacheStats:
+    return get_cache().stats()
@@ -0,0 +1,356 @@
+"""
+KRATOS v2 — Local Supabase Stand-in
+In-process replacement for the Supabase client surface the worker uses
+(Storage object download/upload and PostgREST table operations), backed by
+a local directory and SQLite so several worker processes can share it.
+
+Selected with BACKEND=local. Optional latency/bandwidth profiles model
+production network conditions for benchmarks.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    """Per-request latency plus payload transfer time at a given bandwidth."""
+
+    latency_ms: float = 0.0
+    bandwidth_mbps: float = 0.0  # 0 = unlimited
+
+    def delay(self, payload_bytes: int = 0) -> float:
+        seconds = self.latency_ms / 1000
+        if self.bandwidth_mbps > 0:
+            seconds += payload_bytes * 8 / (self.bandwidth_mbps * 1_000_000)
+        return seconds
+
+    def wait(self, payload_bytes: int = 0) -> None:
+        seconds = self.delay(payload_bytes)
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+# Named profiles for LOCAL_BACKEND_PROFILE (explicit latency/bandwidth override)
+PROFILES: dict[str, NetworkProfile] = {
+    "none": NetworkProfile(),
+    "lan": NetworkProfile(latency_ms=1, bandwidth_mbps=1000),
+    "same-region": NetworkProfile(latency_ms=5, bandwidth_mbps=500),
+    "cross-region": NetworkProfile(latency_ms=40, bandwidth_mbps=100),
+}
+
+
+class LocalResponse:
+    """Mimics postgrest APIResponse (data + count)."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class LocalStorageError(Exception):
+    """Raised for missing objects, like storage3's StorageException."""
+
+
+# ============================================================
+# Storage
+# ============================================================
+
+class LocalBucket:
+    """Filesystem-backed bucket: objects live at <root>/<bucket>/<path>."""
+
+    def __init__(self, root: Path, name: str, profile: NetworkProfile):
+        self._root = root / name
+        self._profile = profile
+
+    def _path(self, path: str) -> Path:
+        target = (self._root / path).resolve()
+        if not target.is_relative_to(self._root.resolve()):
+            raise LocalStorageError(f"Invalid object path: {path}")
+        return target
+
+    def download(self, path: str) -> bytes:
+        target = self._path(path)
+        if not target.is_file():
+            raise LocalStorageError(f"Object not found: {path}")
+        data = target.read_bytes()
+        self._profile.wait(len(data))
+        return data
+
+    def upload(self, path: str, file: bytes | str | Path, file_options: Optional[dict] = None):
+        data = Path(file).read_bytes() if isinstance(file, (str, Path)) else file
+        self._profile.wait(len(data))
+        target = self._path(path)
+        upsert = str((file_options or {}).get("upsert", "false")).lower() == "true"
+        if target.exists() and not upsert:
+            raise LocalStorageError(f"Object already exists: {path}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+        tmp.write_bytes(data)
+        tmp.replace(target)
+        return LocalResponse({"Key": path})
+
+    def remove(self, paths: list[str]):
+        self._profile.wait()
+        for path in paths:
+            self._path(path).unlink(missing_ok=True)
+        return LocalResponse([{"name": p} for p in paths])
+
+
+class LocalStorage:
+    def __init__(self, root: Path, profile: NetworkProfile):
+        self._root = root
+        self._profile = profile
+
+    def from_(self, bucket: str) -> LocalBucket:
+        return LocalBucket(self._root, bucket, self._profile)
+
+
+# ============================================================
+# Tables (PostgREST subset)
+# ============================================================
+
+class LocalQuery:
+    """
+    Chainable query builder covering the PostgREST calls the worker makes:
+    select/insert/upsert/update/delete with eq/neq/gt/gte/lt/lte/in_ filters,
+    order, limit and range.
+    """
+
+    _OPS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+    def __init__(self, db: "LocalDatabase", table: str):
+        self._db = db
+        self._table = table
+        self._action = "select"
+        self._payload: Any = None
+        self._columns = "*"
+        self._on_conflict: Optional[str] = None
+        self._filters: list[tuple[str, str, Any]] = []
+        self._order: list[tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    # --- actions ---
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "LocalQuery":
+        self._action, self._columns = "select", columns
+        return self
+
+    def insert(self, data: dict | list[dict]) -> "LocalQuery":
+        self._action, self._payload = "insert", data
+        return self
+
+    def upsert(self, data: dict | list[dict], on_conflict: str = "id") -> "LocalQuery":
+        self._action, self._payload, self._on_conflict = "upsert", data, on_conflict
+        return self
+
+    def update(self, data: dict) -> "LocalQuery":
+        self._action, self._payload = "update", data
+        return self
+
+    def delete(self) -> "LocalQuery":
+        self._action = "delete"
+        return self
+
+    # --- filters / modifiers ---
+    def _filter(self, op: str, column: str, value: Any) -> "LocalQuery":
+        self._filters.append((op, column, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter("eq", column, value)
+
+    def neq(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter("neq", column, value)
+
+    def gt(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter("gt", column, value)
+
+    def gte(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter("gte", column, value)
+
+    def lt(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter("lt", column, value)
+
+    def lte(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter("lte", column, value)
+
+    def in_(self, column: str, values: list) -> "LocalQuery":
+        return self._filter("in", column, list(values))
+
+    def order(self, column: str, desc: bool = False) -> "LocalQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int) -> "LocalQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int) -> "LocalQuery":
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    # --- execution ---
+    def _where(self) -> tuple[str, list]:
+        clauses, params = ["tbl = ?"], [self._table]
+        for op, column, value in self._filters:
+            expr = f"json_extract(data, '$.{column}')"
+            if op == "in":
+                clauses.append(f"{expr} IN ({','.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{expr} {self._OPS[op]} ?")
+                params.append(value)
+        return " AND ".join(clauses), params
+
+    def _project(self, row: dict) -> dict:
+        if self._columns.strip() == "*":
+            return row
+        cols = [c.strip() for c in self._columns.split(",")]
+        return {c: row.get(c) for c in cols}
+
+    def execute(self) -> LocalResponse:
+        payload_bytes = len(json.dumps(self._payload, default=str)) if self._payload else 0
+        with self._db.connect() as conn:
+            if self._action in ("insert", "upsert"):
+                data = self._write(conn)
+            elif self._action == "update":
+                where, params = self._where()
+                rows = self._rows(conn, where, params)
+                for rid, row in rows:
+                    row.update(self._payload)
+                    conn.execute("UPDATE rows SET data = ? WHERE rid = ?",
+                                 (json.dumps(row, default=str), rid))
+                data = [r for _, r in rows]
+            elif self._action == "delete":
+                where, params = self._where()
+                rows = self._rows(conn, where, params)
+                conn.execute(f"DELETE FROM rows WHERE {where}", params)
+                data = [r for _, r in rows]
+            else:
+                where, params = self._where()
+                sql = f"SELECT rid, data FROM rows WHERE {where}"
+                if self._order:
+                    sql += " ORDER BY " + ", ".join(
+                        f"json_extract(data, '$.{c}') {'DESC' if d else 'ASC'}"
+                        for c, d in self._order
+                    )
+                if self._limit is not None:
+                    sql += f" LIMIT {int(self._limit)} OFFSET {int(self._offset)}"
+                data = [self._project(json.loads(d)) for _, d in conn.execute(sql, params)]
+
+        response_bytes = len(json.dumps(data, default=str)) if self._action == "select" else 0
+        self._db.profile.wait(payload_bytes + response_bytes)
+        return LocalResponse(data, count=len(data))
+
+    def _rows(self, conn: sqlite3.Connection, where: str, params: list) -> list[tuple[int, dict]]:
+        return [(rid, json.loads(d)) for rid, d in
+                conn.execute(f"SELECT rid, data FROM rows WHERE {where}", params)]
+
+    def _write(self, conn: sqlite3.Connection) -> list[dict]:
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        written = []
+        for row in rows:
+            row = dict(row)
+            if self._action == "upsert":
+                keys = [k.strip() for k in (self._on_conflict or "id").split(",")]
+                clause = " AND ".join(f"json_extract(data, '$.{k}') = ?" for k in keys)
+                existing = conn.execute(
+                    f"SELECT rid, data FROM rows WHERE tbl = ? AND {clause}",
+                    [self._table, *[row.get(k) for k in keys]],
+                ).fetchone()
+                if existing:
+                    merged = {**json.loads(existing[1]), **row}
+                    conn.execute("UPDATE rows SET data = ? WHERE rid = ?",
+                                 (json.dumps(merged, default=str), existing[0]))
+                    written.append(merged)
+                    continue
+            # Column defaults apply on INSERT only, as in Postgres
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("created_at", time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()))
+            conn.execute("INSERT INTO rows (tbl, data) VALUES (?, ?)",
+                         (self._table, json.dumps(row, default=str)))
+            written.append(row)
+        return written
+
+
+class LocalDatabase:
+    """SQLite file holding every table as JSON documents."""
+
+    def __init__(self, path: Path, profile: NetworkProfile):
+        self.path = path
+        self.profile = profile
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rows ("
+                "rid INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rows_tbl ON rows (tbl)")
+            # Mirrors the Postgres keys on document_id / (document_id, page_number)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_rows_document_page ON rows (tbl, "
+                "json_extract(data, '$.document_id'), json_extract(data, '$.page_number'))"
+            )
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection; commits on success, always closes."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+class LocalClient:
+    """Drop-in for supabase.Client as used by src.services.storage/database."""
+
+    def __init__(self, root: Path, profile: NetworkProfile):
+        self.storage = LocalStorage(root / "storage", profile)
+        self._db = LocalDatabase(root / "tables.sqlite3", profile)
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self._db, name)
+
+
+_client: Optional[LocalClient] = None
+_lock = threading.Lock()
+
+
+def network_profile() -> NetworkProfile:
+    """Profile from LOCAL_BACKEND_PROFILE, overridden by explicit latency/bandwidth."""
+    base = PROFILES.get(settings.local_backend_profile)
+    if base is None:
+        raise ValueError(
+            f"Unknown LOCAL_BACKEND_PROFILE '{settings.local_backend_profile}' "
+            f"(expected one of {sorted(PROFILES)})"
+        )
+    return NetworkProfile(
+        latency_ms=settings.local_backend_latency_ms or base.latency_ms,
+        bandwidth_mbps=settings.local_backend_bandwidth_mbps or base.bandwidth_mbps,
+    )
+
+
+def get_client() -> LocalClient:
+    """Shared LocalClient rooted at LOCAL_BACKEND_DIR."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = LocalClient(settings.local_backend_dir, network_profile())
+            logger.info(f"Using local Supabase stand-in at {settings.local_backend_dir}")
+        return _client
@@ -0,0 +1,265 @@
+"""
+KRATOS v2 — Worker Metrics
+Prometheus counters, gauges and histograms for the PDF worker
+(prometheus_client), exposed on METRICS_PORT (GET /metrics) and/or written
+periodically to METRICS_TEXTFILE for node_exporter's textfile collector.
+
+A labelled child is a dict lookup and an observation one bisect under a
+per-child lock, cheap enough for the per-page loop; hot loops bind their
+children once.
+
+Under Celery's prefork pool the jobs run in child processes: set
+PROMETHEUS_MULTIPROC_DIR (read by prometheus_client at import, so it must be
+in the environment) and every child records into its own files there. The
+exporters then run in the main worker process and sum the children
+(gauges per their multiprocess_mode); the directory is emptied when the
+worker starts. Without it, each process exposes only its own values,
+which is what the single-process BRPOP worker wants.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from wsgiref.simple_server import WSGIServer
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    ProcessCollector,
+    generate_latest,
+    multiprocess,
+    start_http_server as _start_http_server,
+    write_to_textfile,
+)
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Seconds: from a 1-page pdfium read to a 500-page pdfplumber run
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+PAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+BYTES_BUCKETS = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 64e6)
+RATE_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def multiprocess_dir() -> Optional[str]:
+    """PROMETHEUS_MULTIPROC_DIR, when multiprocess mode is on."""
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+
+# This process's metrics. In multiprocess mode they are backed by files and
+# exposition goes through exposition_registry() instead.
+REGISTRY = CollectorRegistry(auto_describe=True)
+if not multiprocess_dir():
+    ProcessCollector(registry=REGISTRY)  # process_resident_memory_bytes, CPU, fds
+
+
+# --- Worker metrics ---
+
+JOB_STAGE_SECONDS = Histogram(
+    "kratos_pdf_job_stage_seconds",
+    "Job latency per stage (download, extract, persist, total and pipeline stages).",
+    ("stage",),
+    registry=REGISTRY,
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "kratos_pdf_queue_wait_seconds",
+    "Time from enqueue to the start of processing.",
+    registry=REGISTRY,
+)
+TENANT_QUEUE_WAIT_SECONDS = Histogram(
+    "kratos_pdf_tenant_queue_wait_seconds",
+    "Time from enqueue to the start of processing, by tenant (see fair_queue.tenant_label).",
+    ("tenant",),
+    registry=REGISTRY,
+)
+PAGE_SECONDS = Histogram(
+    "kratos_pdf_page_seconds",
+    "Extraction time per page, by the backend that read it.",
+    ("engine",),
+    buckets=PAGE_BUCKETS, registry=REGISTRY,
+)
+PAGES_PER_SECOND = Histogram(
+    "kratos_pdf_pages_per_second",
+    "Per-job extraction throughput (pages / extract seconds).",
+    buckets=RATE_BUCKETS, registry=REGISTRY,
+)
+DOWNLOAD_BYTES = Histogram(
+    "kratos_pdf_download_bytes",
+    "Size of PDFs downloaded from storage.",
+    buckets=BYTES_BUCKETS, registry=REGISTRY,
+)
+DB_WRITE_SECONDS = Histogram(
+    "kratos_pdf_db_write_seconds",
+    "Latency of database writes, by operation.",
+    ("operation",),
+    registry=REGISTRY,
+)
+LAYOUT_CACHE = Counter(
+    "kratos_pdf_layout_cache_total",
+    "Table layout template lookups: hit, miss, fallback (verification failed).",
+    ("result",),
+    registry=REGISTRY,
+)
+SOURCE_CACHE = Counter(
+    "kratos_pdf_source_cache_total",
+    "Source PDF cache lookups: hit, miss, corrupt (failed the integrity check).",
+    ("result",),
+    registry=REGISTRY,
+)
+SOURCE_CACHE_SAVED_BYTES = Counter(
+    "kratos_pdf_source_cache_saved_bytes_total",
+    "Storage download bytes avoided by source PDF cache hits.",
+    registry=REGISTRY,
+)
+SOURCE_CACHE_BYTES = Gauge(
+    "kratos_pdf_source_cache_bytes",
+    "Size of the node's source PDF cache at the last insert.",
+    registry=REGISTRY, multiprocess_mode="mostrecent",
+)
+SINGLE_FLIGHT = Counter(
+    "kratos_pdf_single_flight_total",
+    "Job claims by outcome: leader (ran), deferred (re-queued behind a job in flight), "
+    "reused (same document's result), followed (same PDF's extraction copied), "
+    "dropped (same document still in flight).",
+    ("outcome",),
+    registry=REGISTRY,
+)
+DUPLICATE_PAGES_AVOIDED = Counter(
+    "kratos_pdf_duplicate_pages_avoided_total",
+    "Pages not extracted again because a duplicate job reused an in-flight result.",
+    registry=REGISTRY,
+)
+DUPLICATE_SECONDS_AVOIDED = Counter(
+    "kratos_pdf_duplicate_seconds_avoided_total",
+    "Download and extraction seconds of the reused results (work the duplicates skipped).",
+    registry=REGISTRY,
+)
+JOBS = Counter(
+    "kratos_pdf_jobs_total",
+    "Finished jobs by final status.",
+    ("status",),
+    registry=REGISTRY,
+)
+JOB_FAILURES = Counter(
+    "kratos_pdf_job_failures_total",
+    "Failed jobs by reason: pipeline_error (validation/limits), timeout (past the "
+    "runtime model's limit) or unexpected.",
+    ("reason",),
+    registry=REGISTRY,
+)
+RUNTIME_PREDICTION_ERROR = Gauge(
+    "kratos_pdf_runtime_prediction_error",
+    "Relative error |predicted - actual| / actual of the runtime model's predictions "
+    "over recent jobs, by quantile (at the last refit).",
+    ("quantile",),
+    registry=REGISTRY, multiprocess_mode="mostrecent",
+)
+JOBS_IN_FLIGHT = Gauge(
+    "kratos_pdf_jobs_in_flight",
+    "Jobs currently being processed (summed over live worker processes).",
+    registry=REGISTRY, multiprocess_mode="livesum",
+)
+
+
+def record_job(report: dict) -> None:
+    """Observe a finished job report (see tasks/extract_pdf.process_pdf_job)."""
+    timings = report.get("timings", {})
+    for stage, seconds in timings.items():
+        if stage == "queue_wait":
+            QUEUE_WAIT_SECONDS.observe(seconds)
+        else:
+            JOB_STAGE_SECONDS.labels(stage).observe(seconds)
+    pages, extract = report.get("pages"), timings.get("extract")
+    if pages and extract:
+        PAGES_PER_SECOND.observe(pages / extract)
+    JOBS.labels(report.get("status", "unknown")).inc()
+
+
+# --- Exposition ---
+
+def exposition_registry() -> CollectorRegistry:
+    """What the exporters serve: every process's files in multiprocess mode, else REGISTRY."""
+    if not multiprocess_dir():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def expose() -> bytes:
+    """Text exposition format of exposition_registry()."""
+    return generate_latest(exposition_registry())
+
+
+def reset_multiprocess_dir() -> None:
+    """Empty PROMETHEUS_MULTIPROC_DIR before any child records into it (worker start)."""
+    path = multiprocess_dir()
+    if not path:
+        return
+    shutil.rmtree(path, ignore_errors=True)
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+
+def process_exited(pid: int) -> None:
+    """Drop a finished child's live gauges (JOBS_IN_FLIGHT) from the aggregate."""
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+def start_http_server(port: int, addr: str = "0.0.0.0") -> WSGIServer:
+    """Serve /metrics from a daemon thread; returns the server (port 0 = any free port)."""
+    server, _thread = _start_http_server(port, addr, registry=exposition_registry())
+    logger.info(f"Serving metrics on http://{addr}:{server.server_port}/metrics")
+    return server
+
+
+def write_textfile(path: Path) -> None:
+    """Atomically replace `path` (node_exporter must never read a partial file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_to_textfile(str(path), exposition_registry())
+
+
+def _textfile_loop(path: Path, interval: float) -> None:
+    while True:
+        try:
+            write_textfile(path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics textfile {path}: {e}")
+        time.sleep(interval)
+
+
+_started = False
+
+
+def start() -> None:
+    """
+    Start the configured exporters once per process: the HTTP endpoint
+    (METRICS_PORT) and the textfile writer (METRICS_TEXTFILE).
+    """
+    global _started
+    if _started:
+        return
+    _started = True
+    if settings.metrics_port:
+        try:
+            start_http_server(settings.metrics_port, settings.metrics_addr)
+        except OSError as e:
+            logger.warning(f"Metrics endpoint unavailable on port {settings.metrics_port}: {e}")
+    if settings.metrics_textfile:
+        threading.Thread(
+            target=_textfile_loop,
+            args=(Path(settings.metrics_textfile), settings.metrics_textfile_interval_seconds),
+            name="metrics-textfile",
+            daemon=True,
+        ).start()
@@ -0,0 +1,275 @@
+"""
+KRATOS v2 — Cross-page Text Normalization
+Removes what court PDFs repeat on every page before raw_text is built:
+header/footer lines and signature stamps ("Assinado eletronicamente por…",
+"Num. … - Pág. N"), hyphenation at line breaks and redundant whitespace.
+
+Repeated lines are found statistically: a line near the top or bottom of a
+page (NORMALIZE_EDGE_LINES) whose digit-insensitive form appears on at least
+NORMALIZE_REPEAT_RATIO of the pages is dropped everywhere.
+
+Cleaned offsets map back to the extracted text (original_offset) through
+PageContent.offsets, a run-length map with one pair of numbers per rewrite.
+The maps stay out of content_json and the page rows, where they would
+outweigh the characters normalization saves: export_offsets uploads them
+as one gzip JSON object next to the PDF, `{"pages": {"<n>": [...]}}`, and
+load_offsets puts them back on the pages.
+"""
+
+import json
+import logging
+import math
+import posixpath
+import re
+from array import array
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+from pydantic import BaseModel
+
+from src.config import settings
+from src.models.extraction import ExtractionResult, PageContent
+from src.services import output_store, storage
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".offsets.json.gz"
+
+# Portuguese clitic pronouns: "deve-\nse" is "deve-se", not "devese"
+_CLITICS = frozenset({
+    "se", "me", "te", "lhe", "lhes", "nos", "vos",
+    "o", "a", "os", "as", "lo", "la", "los", "las", "no", "na", "nas",
+})
+
+_DIGITS_RE = re.compile(r"\d+")
+_SPACES_RE = re.compile(r"\s+")
+_LETTERS_RE = re.compile(r"[^\W\d_]")
+_PAGE_NUMBER_RE = re.compile(r"^[^\w#]*#[^\w#]*$")  # "3", "- 3 -"
+_HYPHEN_BREAK_RE = re.compile(r"(?<=[^\W\d_])-[ \t]*\n[ \t]*(?=([^\W\d_]+))")
+_HSPACE_RE = re.compile(r"[ \t\xa0\u2000-\u200a\u202f\u3000]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_EDGE_NEWLINES_RE = re.compile(r"\A\n+|\n+\Z")
+
+
+class NormalizationStats(BaseModel):
+    """What normalize_pages removed across the document."""
+
+    original_characters: int = 0
+    normalized_characters: int = 0
+    repeated_lines: int = 0  # distinct header/footer patterns
+    removed_lines: int = 0
+    joined_hyphens: int = 0
+
+
+def _line_key(line: str) -> str:
+    """Comparison form: page/process numbers and spacing do not matter."""
+    return _SPACES_RE.sub(" ", _DIGITS_RE.sub("#", line)).strip().lower()
+
+
+def _is_boilerplate_key(key: str) -> bool:
+    """
+    Keys worth matching across pages: text with words, or a bare page number.
+    Lines of figures and dates (table rows) repeat in shape, not content.
+    """
+    return len(_LETTERS_RE.findall(key)) >= 3 or bool(_PAGE_NUMBER_RE.match(key))
+
+
+def _lines(text: str) -> list[tuple[int, int]]:
+    """(start, end) of every line, end including the newline."""
+    spans = []
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        end = len(text) if end < 0 else end + 1
+        spans.append((start, end))
+        start = end
+    return spans
+
+
+def _edge_lines(text: str, spans: list[tuple[int, int]], edge: int) -> list[tuple[int, int]]:
+    """The first and last `edge` non-blank lines of a page."""
+    filled = [s for s in spans if text[s[0]:s[1]].strip()]
+    if len(filled) <= 2 * edge:
+        return filled
+    return filled[:edge] + filled[-edge:]
+
+
+def find_repeated_lines(pages: list[PageContent]) -> set[str]:
+    """Line keys repeated near the page edges on enough pages to be boilerplate."""
+    with_text = [p for p in pages if p.text]
+    threshold = max(
+        settings.normalize_min_pages,
+        math.ceil(settings.normalize_repeat_ratio * len(with_text)),
+    )
+    if len(with_text) < threshold:
+        return set()
+    counts: Counter[str] = Counter()
+    for page in with_text:
+        edges = _edge_lines(page.text, _lines(page.text), settings.normalize_edge_lines)
+        counts.update({_line_key(page.text[s:e]) for s, e in edges})
+    return {key for key, n in counts.items() if n >= threshold and _is_boilerplate_key(key)}
+
+
+class _Rewriter:
+    """
+    Text under successive rewrites, remembering for each character the
+    offset it came from in the original (-1 when inserted by a rewrite).
+    """
+
+    def __init__(self, text: str):
+        self.original = text
+        self.text = text
+        self.origin = array("l", range(len(text)))
+
+    def apply(self, replacements: Iterable[tuple[int, int, str]]) -> int:
+        """Replace sorted, non-overlapping [start, end) spans of the current text."""
+        parts: list[str] = []
+        origin = array("l")
+        pos = count = 0
+        for start, end, new in replacements:
+            parts.append(self.text[pos:start])
+            origin.extend(self.origin[pos:start])
+            parts.append(new)
+            origin.extend(array("l", [-1]) * len(new))
+            pos = end
+            count += 1
+        if count:
+            parts.append(self.text[pos:])
+            origin.extend(self.origin[pos:])
+            self.text = "".join(parts)
+            self.origin = origin
+        return count
+
+    def sub(self, pattern: re.Pattern, repl: Callable[[re.Match], Optional[str]]) -> int:
+        """Regex rewrite; repl returning None leaves the match untouched."""
+        def spans():
+            for m in pattern.finditer(self.text):
+                new = repl(m)
+                if new is not None and new != m.group(0):
+                    yield m.start(), m.end(), new
+        return self.apply(spans())
+
+    def offset_map(self) -> list[int]:
+        """
+        Run-length map from the current text to the original: flat
+        (current length, original length) pairs of consecutive runs, each run
+        ending where a rewrite ends. Rewrites never lengthen the text, so a
+        run's last current characters fall inside its rewritten original span.
+        """
+        runs: list[int] = []
+        n = len(self.text)
+        i = o = last_i = last_o = 0
+        while i < n or o < len(self.original):
+            if i < n and self.origin[i] == o:
+                i += 1
+                o += 1
+                continue
+            j = i
+            while j < n and self.origin[j] < 0:
+                j += 1
+            resume = self.origin[j] if j < n else len(self.original)
+            runs += (j - last_i, resume - last_o)
+            i, o = last_i, last_o = j, resume
+        return runs
+
+
+def _join_hyphen(m: re.Match) -> Optional[str]:
+    following = m.group(1)
+    if not following[0].islower():
+        return None  # "Ré-\nJoão": a name or a heading, keep the break
+    return "-" if following.lower() in _CLITICS else ""
+
+
+def _hspace(m: re.Match) -> str:
+    text, start, end = m.string, m.start(), m.end()
+    at_line_start = start == 0 or text[start - 1] == "\n"
+    at_line_end = end == len(text) or text[end] == "\n"
+    return "" if at_line_start or at_line_end else " "
+
+
+def normalize_page(page: PageContent, repeated: set[str]) -> NormalizationStats:
+    """Clean one page in place, recording its offset map; returns its stats."""
+    stats = NormalizationStats(original_characters=len(page.text))
+    if not page.text:
+        return stats
+    text = _Rewriter(page.text)
+    edge = set(_edge_lines(text.text, _lines(text.text), settings.normalize_edge_lines))
+    stats.removed_lines = text.apply(
+        (s, e, "") for s, e in _lines(text.text)
+        if (s, e) in edge and _line_key(text.text[s:e]) in repeated
+    )
+    stats.joined_hyphens = text.sub(_HYPHEN_BREAK_RE, _join_hyphen)
+    text.sub(_HSPACE_RE, _hspace)
+    text.sub(_BLANK_LINES_RE, lambda m: "\n\n")
+    text.sub(_EDGE_NEWLINES_RE, lambda m: "")
+
+    page.text = text.text
+    page.offsets = text.offset_map()
+    stats.normalized_characters = len(page.text)
+    return stats
+
+
+def normalize_pages(pages: list[PageContent]) -> NormalizationStats:
+    """Normalize every page in place (before build_raw_text and chunking)."""
+    repeated = find_repeated_lines(pages)
+    total = NormalizationStats(repeated_lines=len(repeated))
+    for page in pages:
+        stats = normalize_page(page, repeated)
+        total.original_characters += stats.original_characters
+        total.normalized_characters += stats.normalized_characters
+        total.removed_lines += stats.removed_lines
+        total.joined_hyphens += stats.joined_hyphens
+    return total
+
+
+def original_offset(page: PageContent, offset: int) -> int:
+    """
+    Map an offset in the normalized page text to the extracted text.
+
+    Offsets inside a replacement (a collapsed space, a joined hyphen) map
+    into the original characters it replaced. Add page.char_start /
+    subtract it to go from / to raw_text offsets.
+    """
+    runs = page.offsets
+    start = original = 0
+    for k in range(0, len(runs), 2):
+        if offset < start + runs[k]:
+            return original + min(offset - start, runs[k + 1])
+        start += runs[k]
+        original += runs[k + 1]
+    return original + offset - start
+
+
+def offsets_key(storage_path: str, document_id: str) -> str:
+    """Object key next to the source PDF, e.g. `<user>/<doc>/<doc>.offsets.json.gz`."""
+    name = f"{document_id}{SUFFIX}"
+    parent = posixpath.dirname(storage_path)
+    return posixpath.join(parent, name) if parent else name
+
+
+def export_offsets(result: ExtractionResult, storage_path: str) -> Optional[str]:
+    """
+    Upload the pages' offset maps next to the PDF (gzip, like the search
+    index). Returns the object key, or None when no page was rewritten. A
+    result loaded from the database has no maps and keeps the key it has
+    (a reused extraction points at the maps of the one it copies).
+    """
+    maps = {str(p.page_number): p.offsets for p in result.pages if p.offsets}
+    if not maps:
+        return result.metadata.text_offsets or None
+    body = json.dumps({"pages": maps}, separators=(",", ":")).encode()
+    packed = output_store.compress(body, "gzip")
+    key = offsets_key(storage_path, result.document_id)
+    storage.upload_object(key, packed, content_type="application/json")
+    logger.info(
+        f"[{result.document_id}] Offset maps of {len(maps)} pages -> {key} "
+        f"({len(body)} -> {len(packed)} bytes)"
+    )
+    return key
+
+
+def load_offsets(key: str, pages: list[PageContent]) -> None:
+    """Put the offset maps exported under `key` back on `pages`."""
+    maps = json.loads(output_store.decompress(storage.download_object(key)))["pages"]
+    for page in pages:
+        page.offsets = maps.get(str(page.page_number), [])
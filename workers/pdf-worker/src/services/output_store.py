@@ -0,0 +1,183 @@
+"""
+KRATOS v2 — Extraction Output Store
+Spills large extraction outputs to a compressed JSON object in the storage
+bucket, next to the source PDF, so the extractions row (and the pdf_runner
+stdout pipe) only carries a summary, counts, the PDF hash and the object
+key. StoredExtraction reads a row back and fetches the object lazily.
+
+Compression is gzip by default; OUTPUT_COMPRESSION=zstd needs the optional
+`zstandard` package.
+"""
+
+import gzip
+import json
+import logging
+import posixpath
+from functools import cached_property
+from typing import Any, Optional
+
+from src.config import settings
+from src.models.extraction import DocumentSection, ExtractionResult
+from src.services import sections, storage
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_MODES = ("inline", "storage", "auto")
+
+_SUFFIXES = {"gzip": ".json.gz", "zstd": ".json.zst"}
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError(
+            "OUTPUT_COMPRESSION=zstd requires the 'zstandard' package "
+            "(pip install zstandard)"
+        ) from e
+    return zstandard
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return _zstd().ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"Unknown OUTPUT_COMPRESSION '{compression}' (expected gzip or zstd)")
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompress by magic bytes, so readers need not know the writer's setting."""
+    if data[:2] == _GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == _ZSTD_MAGIC:
+        return _zstd().ZstdDecompressor().decompress(data)
+    raise ValueError("Unrecognised extraction output encoding")
+
+
+def output_key(storage_path: str, document_id: str, compression: str) -> str:
+    """Object key next to the source PDF, e.g. `<user>/<doc>/<doc>.extraction.json.gz`."""
+    name = f"{document_id}.extraction{_SUFFIXES[compression]}"
+    parent = posixpath.dirname(storage_path)
+    return posixpath.join(parent, name) if parent else name
+
+
+def should_spill(payload_bytes: int) -> bool:
+    """Whether a serialized output of this size goes to storage under OUTPUT_MODE."""
+    mode = settings.output_mode
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown OUTPUT_MODE '{mode}' (expected one of {OUTPUT_MODES})")
+    if mode == "auto":
+        return payload_bytes > settings.output_inline_max_bytes
+    return mode == "storage"
+
+
+def summarize(result: ExtractionResult) -> dict:
+    """Row-sized summary of a result: counts and hash, no text."""
+    meta = result.metadata
+    return {
+        "total_pages": meta.total_pages,
+        "total_tables": meta.total_tables,
+        "total_characters": meta.total_characters,
+        "chunks_count": len(result.chunks),
+        "pdf_hash": meta.pdf_hash,
+        "extraction_method": meta.extraction_method.value,
+        "extractor_version": meta.extractor_version,
+        "tables_artifact": meta.tables_artifact,
+        "search_index": meta.search_index,
+        "text_offsets": meta.text_offsets,
+        "page_previews": meta.page_previews,
+        # Token counts and cost per model, for routing without re-tokenizing
+        "tokens": meta.tokens.model_dump(),
+        # Small index kept in the row so consumers can pick sections first
+        "sections": [s.model_dump(mode="json") for s in result.sections],
+    }
+
+
+def spill(storage_path: str, document_id: str, raw_text: str, content_json: dict) -> dict:
+    """
+    Write the full output as one compressed object next to the PDF.
+
+    Returns the descriptor stored in the row's content_json["output"].
+    """
+    compression = settings.output_compression
+    body = json.dumps(
+        {"raw_text": raw_text, "content_json": content_json},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+    packed = compress(body, compression)
+    key = output_key(storage_path, document_id, compression)
+    storage.upload_object(key, packed, content_type="application/json")
+    logger.info(
+        f"[{document_id}] Spilled extraction output to {key} "
+        f"({len(body)} -> {len(packed)} bytes, {compression})"
+    )
+    return {
+        "key": key,
+        "bucket": settings.storage_bucket,
+        "compression": compression,
+        "bytes": len(body),
+        "stored_bytes": len(packed),
+    }
+
+
+def read_output(key: str) -> dict:
+    """Fetch and decompress a spilled output: {"raw_text", "content_json"}."""
+    return json.loads(decompress(storage.download_object(key)))
+
+
+class StoredExtraction:
+    """
+    An extractions row with transparent access to spilled outputs.
+
+    raw_text and content_json come from the row when stored inline; for
+    spilled rows the object is downloaded on first access and cached.
+    """
+
+    def __init__(self, row: dict):
+        self.row = row
+
+    @property
+    def output_key(self) -> Optional[str]:
+        return self.row.get("output_key")
+
+    @property
+    def spilled(self) -> bool:
+        return bool(self.output_key)
+
+    @property
+    def summary(self) -> dict:
+        return (self.row.get("content_json") or {}).get("summary", {})
+
+    @cached_property
+    def _output(self) -> dict[str, Any]:
+        return read_output(self.output_key)
+
+    @property
+    def raw_text(self) -> str:
+        if self.spilled:
+            return self._output["raw_text"]
+        return self.row.get("raw_text") or ""
+
+    @property
+    def content_json(self) -> dict:
+        if self.spilled:
+            return self._output["content_json"]
+        return self.row.get("content_json") or {}
+
+    @property
+    def sections(self) -> list[DocumentSection]:
+        """Section index, read from the row (no download for spilled rows)."""
+        index = self.summary.get("sections") if self.spilled else self.content_json.get("sections")
+        return [DocumentSection.model_validate(s) for s in index or []]
+
+    def result(self) -> ExtractionResult:
+        """The full ExtractionResult (downloads spilled outputs)."""
+        return ExtractionResult.model_validate({**self.content_json, "raw_text": self.raw_text})
+
+    def section_text(self, *names: str) -> str:
+        """Text of the named sections (e.g. "relatorio", "dispositivo")."""
+        return sections.section_text(self.raw_text, self.sections, names)
@@ -0,0 +1,171 @@
+"""
+KRATOS v2 — Source PDF Cache
+Node-local cache of downloaded source PDFs, so retries, re-extraction and
+re-analysis of a document do not fetch it from Storage again.
+
+Entries live under PDF_CACHE_DIR (default <TEMP_DIR>/.pdf-cache) and are
+shared by every worker process on the node through the filesystem:
+
+  objects/<sha256>.pdf   the PDF, addressed by content
+  paths/<key>            sha256 of the last download of a storage path
+
+Files are written under a temporary name in the same directory and renamed
+into place, so no reader sees a partial file. A hit is hard-linked (copied
+across filesystems) into the job's temp dir: another process evicting the
+entry never removes a file a job is reading, and cleanup_temp_file only
+drops the link.
+
+Recency is the object's mtime, touched on every hit; after each insert the
+least recently used objects are deleted until the cache fits in
+PDF_CACHE_MAX_MB. With PDF_CACHE_VERIFY every hit is re-hashed and must
+match the expected pdf_hash (when the caller knows it) or its content
+address; a mismatching entry is deleted and the PDF downloaded again.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from src.config import settings
+from src.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cache object names: a payload's pdfHash is only used if it is one
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+_RESULTS = {
+    result: metrics.SOURCE_CACHE.labels(result) for result in ("hit", "miss", "corrupt")
+}
+
+
+def root() -> Path:
+    return settings.pdf_cache_dir or settings.temp_dir / ".pdf-cache"
+
+
+def _object(sha: str) -> Path:
+    return root() / "objects" / f"{sha}.pdf"
+
+
+def _index(storage_path: str) -> Path:
+    key = hashlib.blake2b(storage_path.encode(), digest_size=16).hexdigest()
+    return root() / "paths" / key
+
+
+def _sha256(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _link(source: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copyfile(source, dest)
+
+
+def fetch(storage_path: str, dest: Path, expected_hash: Optional[str] = None) -> bool:
+    """
+    Place the cached PDF for `storage_path` at `dest`; False on a miss.
+
+    With `expected_hash` (the document's pdf_hash) any cached copy of that
+    content is a hit, whichever path it was downloaded from. A hash that is
+    not a hex SHA-256 is a miss, never a path.
+    """
+    try:
+        sha = expected_hash or _index(storage_path).read_text().strip()
+    except FileNotFoundError:
+        sha = ""
+    obj = _object(sha) if _SHA256.fullmatch(sha) else None
+    try:
+        if obj is None or not obj.exists():
+            _RESULTS["miss"].inc()
+            return False
+        if settings.pdf_cache_verify and _sha256(obj) != sha:
+            logger.warning(f"Cached PDF for {storage_path} failed its integrity check")
+            _RESULTS["corrupt"].inc()
+            obj.unlink(missing_ok=True)
+            return False
+        os.utime(obj)
+        _link(obj, dest)
+    except FileNotFoundError:  # evicted by another process meanwhile
+        _RESULTS["miss"].inc()
+        return False
+    _RESULTS["hit"].inc()
+    metrics.SOURCE_CACHE_SAVED_BYTES.inc(dest.stat().st_size)
+    return True
+
+
+def store(storage_path: str, data: bytes, dest: Path) -> None:
+    """Cache a downloaded PDF and place it at `dest`."""
+    sha = hashlib.sha256(data).hexdigest()
+    obj = _object(sha)
+    if obj.exists():
+        os.utime(obj)
+    else:
+        _write_atomic(obj, data)
+    _write_atomic(_index(storage_path), sha.encode())
+    _link(obj, dest)
+    evict()
+
+
+def evict(max_bytes: Optional[int] = None) -> int:
+    """Delete least recently used objects until the cache fits; returns bytes freed."""
+    limit = settings.pdf_cache_max_mb * 1024 * 1024 if max_bytes is None else max_bytes
+    entries = []
+    for path in (root() / "objects").glob("*.pdf"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total - freed <= limit:
+            break
+        path.unlink(missing_ok=True)
+        freed += size
+    metrics.SOURCE_CACHE_BYTES.set(total - freed)
+    if freed:
+        _prune_index()
+        logger.debug(f"Evicted {freed} bytes from the PDF cache")
+    return freed
+
+
+def _prune_index() -> None:
+    """Drop path entries whose object was evicted."""
+    for path in (root() / "paths").iterdir():
+        try:
+            if not _object(path.read_text().strip()).exists():
+                path.unlink(missing_ok=True)
+        except (FileNotFoundError, ValueError):
+            continue
+
+
+def size_bytes() -> int:
+    return sum(p.stat().st_size for p in (root() / "objects").glob("*.pdf"))
@@ -1,23 +1,45 @@
 """
 KRATOS v2 — Enhanced pdfplumber Extractor
 Per-page text extraction, rich table extraction with HTML/CSV output.
+
+Two engines (EXTRACTION_ENGINE):
+- pdfplumber: pdfminer layout analysis + table detection on every page.
+- hybrid: pdfium text for pages without ruling lines (pdfplumber's
+  line-based table finder cannot find tables there), pdfplumber only for
+  pages whose drawn lines could form a table. The engine used is recorded
+  per page in PageContent.engine.
+
+Either engine can run on one core or split the document into contiguous
+page ranges across EXTRACTION_WORKERS processes (extract_parallel; the
+runtime model decides per job, see services/runtime_model.py).
 """
 
 import csv
 import io
 import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Optional
 
 import pdfplumber
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
 
+from src.config import settings
 from src.models.extraction import (
     ExtractedTable,
+    ExtractionMethod,
     PageContent,
     TableCell,
 )
+from src.services import layout_cache, metrics, progress, tracing
 
 logger = logging.getLogger(__name__)
 
+_pool: Optional[ProcessPoolExecutor] = None
+
 
 def _open_pdf(source: bytes | Path):
     """Open a PDF from bytes or file path."""
@@ -63,58 +85,280 @@ def get_page_count(source: bytes | Path) -> int:
         return len(pdf.pages)
 
 
+def _build_tables(page_number: int, raw_tables: list) -> list[ExtractedTable]:
+    """Rich ExtractedTable models from pdfplumber's raw tables for one page."""
+    tables: list[ExtractedTable] = []
+    for raw_table in raw_tables:
+        if not raw_table or len(raw_table) == 0:
+            continue
+
+        headers = [_clean_cell(c) for c in raw_table[0]] if raw_table[0] else []
+        raw_rows = [
+            [_clean_cell(c) for c in row]
+            for row in raw_table[1:]
+        ] if len(raw_table) > 1 else []
+
+        cells: list[TableCell] = []
+        for r_idx, row in enumerate(raw_table):
+            for c_idx, cell in enumerate(row):
+                cells.append(TableCell(text=_clean_cell(cell), row=r_idx, col=c_idx))
+
+        rows_count = len(raw_table)
+        cols_count = len(raw_table[0]) if raw_table[0] else 0
+
+        tables.append(
+            ExtractedTable(
+                page=page_number,
+                rows_count=rows_count,
+                cols_count=cols_count,
+                cells=cells,
+                headers=headers,
+                raw_rows=raw_rows,
+                html=_table_to_html(raw_table),
+                csv=_table_to_csv(raw_table),
+            )
+        )
+    return tables
+
+
+def _plumber_page(page, page_number: int) -> tuple[PageContent, list[ExtractedTable]]:
+    """
+    Text and tables of one pdfplumber page (tables detected once, or taken
+    from a cached layout template, see services/layout_cache.py).
+    """
+    text = page.extract_text() or ""
+    if settings.layout_cache_enabled:
+        raw_tables = layout_cache.get_cache().extract_tables(page)
+    else:
+        raw_tables = page.extract_tables() or []
+    images_count = len(page.images) if hasattr(page, "images") else 0
+    page.close()  # drop cached layout objects; pages stay reachable from the PDF
+    content = PageContent(
+        page_number=page_number,
+        text=text,
+        tables_count=len(raw_tables),
+        images_count=images_count,
+        engine="pdfplumber",
+    )
+    return content, _build_tables(page_number, raw_tables)
+
+
+# ============================================================
+# Engines
+# ============================================================
+
+# Per-page latency by backend, bound once for the page loop
+_PAGE_SECONDS = {
+    engine: metrics.PAGE_SECONDS.labels(engine) for engine in ("pdfplumber", "pdfium")
+}
+
+
+class PdfplumberEngine:
+    """Every page through pdfplumber: precise layout and table detection."""
+
+    name = "pdfplumber"
+    method = ExtractionMethod.pdfplumber
+
+    def extract(
+        self, source: bytes | Path, page_range: Optional[range] = None
+    ) -> tuple[list[PageContent], list[ExtractedTable]]:
+        pages: list[PageContent] = []
+        tables: list[ExtractedTable] = []
+        with _open_pdf(source) as pdf:
+            for i in range(len(pdf.pages)) if page_range is None else page_range:
+                started = time.perf_counter()
+                with tracing.page_span(i + 1):
+                    content, page_tables = _plumber_page(pdf.pages[i], i + 1)
+                _PAGE_SECONDS[content.engine].observe(time.perf_counter() - started)
+                progress.page_done()
+                pages.append(content)
+                tables.extend(page_tables)
+        return pages, tables
+
+
+def _pdfium_text(page) -> str:
+    """Page text from pdfium, with pdfplumber's line separators."""
+    textpage = page.get_textpage()
+    try:
+        text = textpage.get_text_bounded()
+    finally:
+        textpage.close()
+    return text.replace("\r\n", "\n").replace("\r", "\n").replace("\x00", "")
+
+
+def _may_have_ruled_table(page) -> bool:
+    """
+    Whether the page draws both horizontal and vertical edges.
+
+    pdfplumber's default ("lines") table strategy builds cells from
+    intersecting ruling lines and rectangle edges, so a page without both
+    orientations cannot yield a table. Thin paths count as one orientation,
+    anything else (boxes, curves) as both.
+    """
+    thin = settings.hybrid_line_thickness
+    horizontal = vertical = False
+    for obj in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_PATH,)):
+        left, bottom, right, top = obj.get_bounds()
+        width, height = right - left, top - bottom
+        if height <= thin and width > thin:
+            horizontal = True
+        elif width <= thin and height > thin:
+            vertical = True
+        elif width > thin and height > thin:
+            return True
+        if horizontal and vertical:
+            return True
+    return False
+
+
+def _count_images(page) -> int:
+    return sum(1 for _ in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,)))
+
+
+class HybridEngine:
+    """
+    pdfium for text-only pages, pdfplumber where tables may exist.
+
+    pdfium objects are not thread-safe; use one engine call per thread.
+    """
+
+    name = "hybrid"
+    method = ExtractionMethod.hybrid
+
+    def extract(
+        self, source: bytes | Path, page_range: Optional[range] = None
+    ) -> tuple[list[PageContent], list[ExtractedTable]]:
+        pages: list[PageContent] = []
+        tables: list[ExtractedTable] = []
+        plumber = None
+        doc = pdfium.PdfDocument(source)
+        try:
+            for i in range(len(doc)) if page_range is None else page_range:
+                started = time.perf_counter()
+                with tracing.page_span(i + 1):
+                    page = doc[i]
+                    try:
+                        if _may_have_ruled_table(page):
+                            if plumber is None:
+                                plumber = _open_pdf(source)
+                            content, page_tables = _plumber_page(plumber.pages[i], i + 1)
+                            tables.extend(page_tables)
+                        else:
+                            content = PageContent(
+                                page_number=i + 1,
+                                text=_pdfium_text(page),
+                                images_count=_count_images(page),
+                                engine="pdfium",
+                            )
+                    finally:
+                        page.close()
+                _PAGE_SECONDS[content.engine].observe(time.perf_counter() - started)
+                progress.page_done()
+                pages.append(content)
+        finally:
+            doc.close()
+            if plumber is not None:
+                plumber.close()
+        return pages, tables
+
+
+ENGINES = {engine.name: engine for engine in (PdfplumberEngine(), HybridEngine())}
+
+
+def get_engine(name: Optional[str] = None):
+    """Engine by name, defaulting to EXTRACTION_ENGINE."""
+    name = name or settings.extraction_engine
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown EXTRACTION_ENGINE '{name}' (expected one of {sorted(ENGINES)})"
+        ) from None
+
+
+def extract_pages(
+    source: bytes | Path, engine: Optional[str] = None
+) -> tuple[list[PageContent], list[ExtractedTable]]:
+    """Text per page and all tables in a single pass of the selected engine."""
+    return get_engine(engine).extract(source)
+
+
+def _extract_range(
+    pdf_path: str, engine: str, start: int, stop: int
+) -> tuple[list[PageContent], list[ExtractedTable]]:
+    """One slice of extract_parallel; runs in an extraction process."""
+    return get_engine(engine).extract(Path(pdf_path), range(start, stop))
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Shared extraction processes, started on first use (spawned: no forked locks)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.extraction_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def _recycle_pool() -> None:
+    """
+    Kill the shared extraction processes; the next job starts a fresh pool.
+
+    cancel_futures only drops slices that have not started, and a running
+    slice cannot be interrupted, so the processes are terminated rather than
+    left busy with an abandoned job.
+    """
+    global _pool
+    pool, _pool = _pool, None
+    if pool is None:
+        return
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def extract_parallel(
+    pdf_path: Path, page_count: int, workers: int, engine: Optional[str] = None
+) -> tuple[list[PageContent], list[ExtractedTable]]:
+    """
+    extract_pages over `workers` contiguous page ranges in separate processes.
+
+    pdfium is not thread-safe, so slices run in processes that each open the
+    file. Results are merged in page order, the same as one pass would give.
+    Per-page metrics and spans stay in the extraction processes; progress
+    advances by slice as each one finishes. If the job is interrupted (e.g.
+    JobTimeoutError) or a slice fails, the pool is recycled so no slice keeps
+    running for the next job.
+    """
+    name = get_engine(engine).name
+    workers = max(1, min(workers, page_count))
+    bounds = [page_count * n // workers for n in range(workers + 1)]
+    futures = [
+        _get_pool().submit(_extract_range, str(pdf_path), name, start, stop)
+        for start, stop in zip(bounds, bounds[1:])
+    ]
+    try:
+        for future in as_completed(futures):
+            progress.page_done(len(future.result()[0]))
+    except BaseException:
+        _recycle_pool()
+        raise
+    pages: list[PageContent] = []
+    tables: list[ExtractedTable] = []
+    for future in futures:
+        slice_pages, slice_tables = future.result()
+        pages.extend(slice_pages)
+        tables.extend(slice_tables)
+    return pages, tables
+
+
 def extract_text_by_page(source: bytes | Path) -> list[PageContent]:
     """Extract text per page, returning PageContent list."""
-    pages: list[PageContent] = []
-    with _open_pdf(source) as pdf:
-        for i, page in enumerate(pdf.pages):
-            text = page.extract_text() or ""
-            raw_tables = page.extract_tables() or []
-            pages.append(
-                PageContent(
-                    page_number=i + 1,
-                    text=text,
-                    tables_count=len(raw_tables),
-                    images_count=len(page.images) if hasattr(page, "images") else 0,
-                )
-            )
-    return pages
+    return PdfplumberEngine().extract(source)[0]
 
 
 def extract_tables(source: bytes | Path) -> list[ExtractedTable]:
     """Extract all tables from a PDF with rich metadata."""
-    tables: list[ExtractedTable] = []
-    with _open_pdf(source) as pdf:
-        for i, page in enumerate(pdf.pages):
-            raw_tables = page.extract_tables() or []
-            for raw_table in raw_tables:
-                if not raw_table or len(raw_table) == 0:
-                    continue
-
-                headers = [_clean_cell(c) for c in raw_table[0]] if raw_table[0] else []
-                raw_rows = [
-                    [_clean_cell(c) for c in row]
-                    for row in raw_table[1:]
-                ] if len(raw_table) > 1 else []
-
-                cells: list[TableCell] = []
-                for r_idx, row in enumerate(raw_table):
-                    for c_idx, cell in enumerate(row):
-                        cells.append(TableCell(text=_clean_cell(cell), row=r_idx, col=c_idx))
-
-                rows_count = len(raw_table)
-                cols_count = len(raw_table[0]) if raw_table[0] else 0
-
-                tables.append(
-                    ExtractedTable(
-                        page=i + 1,
-                        rows_count=rows_count,
-                        cols_count=cols_count,
-                        cells=cells,
-                        headers=headers,
-                        raw_rows=raw_rows,
-                        html=_table_to_html(raw_table),
-                        csv=_table_to_csv(raw_table),
-                    )
-                )
-    return tables
+    return PdfplumberEngine().extract(source)[1]
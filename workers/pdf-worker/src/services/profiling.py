@@ -0,0 +1,188 @@
+"""
+KRATOS v2 — Per-Job Sampling Profiler
+Opt-in (PROFILE_JOBS=true) stack sampling around each job. Profiles are
+kept only for jobs over PROFILE_THRESHOLD_SECONDS or among the slowest
+PROFILE_KEEP_SLOWEST of the current window, written as collapsed stacks
+(flamegraph.pl / speedscope input) plus a JSON sidecar with the document
+id, page count and stage timings.
+
+When disabled, profiled_job() yields a no-op handle and starts no thread.
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_DEPTH = 128
+
+
+class JobProfile:
+    """Collected samples and job context for one profiled job."""
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        self.page_count: Optional[int] = None
+        self.stage_timings: dict[str, float] = {}
+        self.samples: Counter[str] = Counter()
+        self.duration = 0.0
+
+    def annotate(self, page_count: Optional[int] = None, **timings: float) -> None:
+        """Attach page count and/or stage timings (seconds) to the profile."""
+        if page_count is not None:
+            self.page_count = page_count
+        self.stage_timings.update(timings)
+
+
+class _NullProfile(JobProfile):
+    def annotate(self, page_count: Optional[int] = None, **timings: float) -> None:
+        pass
+
+
+_NULL = _NullProfile("")
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's stack every interval into collapsed-stack counts."""
+
+    def __init__(self, target_thread_id: int, interval: float, profile: JobProfile):
+        super().__init__(name="kratos-profiler", daemon=True)
+        self._target = target_thread_id
+        self._interval = interval
+        self._profile = profile
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack: list[str] = []
+            while frame is not None and len(stack) < _MAX_DEPTH:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            self._profile.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _sidecars(directory: Path) -> list[tuple[float, float, Path]]:
+    """(mtime, duration, path) of every stored profile sidecar."""
+    entries = []
+    for meta in directory.glob("*.json"):
+        try:
+            duration = json.loads(meta.read_text())["duration_seconds"]
+            entries.append((meta.stat().st_mtime, duration, meta))
+        except (OSError, ValueError, KeyError):
+            continue
+    return entries
+
+
+def _remove(meta: Path) -> None:
+    meta.unlink(missing_ok=True)
+    meta.with_suffix(".collapsed").unlink(missing_ok=True)
+
+
+def _should_keep(directory: Path, duration: float) -> bool:
+    """
+    Retention policy, shared by every process writing to the directory:
+    always keep jobs over the threshold; otherwise keep if among the slowest
+    N of the current window, evicting the fastest kept one. Profiles older
+    than the retention horizon are pruned.
+    """
+    now = time.time()
+    window = settings.profile_window_seconds
+    horizon = now - window * settings.profile_retention_windows
+
+    in_window = []
+    for mtime, d, meta in _sidecars(directory):
+        if mtime < horizon:
+            _remove(meta)
+        elif mtime >= now - window and not meta.stem.startswith("slow-"):
+            in_window.append((d, meta))
+
+    if settings.profile_threshold_seconds and duration >= settings.profile_threshold_seconds:
+        return True
+    if settings.profile_keep_slowest <= 0:
+        return False
+    if len(in_window) < settings.profile_keep_slowest:
+        return True
+    fastest_duration, fastest_meta = min(in_window)
+    if duration > fastest_duration:
+        _remove(fastest_meta)
+        return True
+    return False
+
+
+def _write(profile: JobProfile) -> Optional[Path]:
+    directory = settings.profile_dir
+    directory.mkdir(parents=True, exist_ok=True)
+    if not _should_keep(directory, profile.duration):
+        return None
+
+    over_threshold = (
+        settings.profile_threshold_seconds
+        and profile.duration >= settings.profile_threshold_seconds
+    )
+    prefix = "slow-" if over_threshold else ""
+    stem = f"{prefix}{time.strftime('%Y%m%dT%H%M%S')}-{profile.document_id}"
+    collapsed = directory / f"{stem}.collapsed"
+    collapsed.write_text(
+        "".join(f"{stack} {count}\n" for stack, count in profile.samples.most_common())
+    )
+    (directory / f"{stem}.json").write_text(json.dumps({
+        "document_id": profile.document_id,
+        "duration_seconds": round(profile.duration, 3),
+        "page_count": profile.page_count,
+        "stage_timings": profile.stage_timings,
+        "samples": sum(profile.samples.values()),
+        "interval_ms": settings.profile_interval_ms,
+    }, indent=2))
+    return collapsed
+
+
+@contextmanager
+def profiled_job(document_id: str) -> Iterator[JobProfile]:
+    """
+    Sample the calling thread's stack for the duration of a job.
+
+    Yields a JobProfile to annotate with page count and stage timings. The
+    profile is written on exit only if the retention policy keeps it;
+    failures to write are logged and never affect the job.
+    """
+    if not settings.profile_jobs:
+        yield _NULL
+        return
+
+    profile = JobProfile(document_id)
+    sampler = _Sampler(
+        threading.get_ident(), settings.profile_interval_ms / 1000, profile
+    )
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield profile
+    finally:
+        sampler.stop()
+        profile.duration = time.perf_counter() - started
+        try:
+            path = _write(profile)
+            if path:
+                logger.info(
+                    f"[{document_id}] Kept profile ({profile.duration:.1f}s, "
+                    f"{sum(profile.samples.values())} samples): {path}"
+                )
+        except OSError as e:
+            logger.warning(f"[{document_id}] Could not write profile: {e}")
@@ -0,0 +1,166 @@
+"""
+KRATOS v2 — Live Extraction Progress
+Publishes where a running job is (stage, pages done out of total, ETA) to a
+Redis stream per document, `<PROGRESS_KEY>:<documentId>`. The API relays it
+over SSE (GET /v2/documents/:id/progress), so clients no longer poll
+documents.status through Postgres to follow a job; that column keeps only
+the real transitions (downloading, extracting, completed, failed).
+
+Each event is one stream entry whose `data` field is JSON: stage,
+pagesDone, pagesTotal, elapsedSeconds, etaSeconds (when known) and, on the
+last event, status (completed/failed) plus pages or error. Streams are
+capped at about PROGRESS_MAX_EVENTS entries and expire
+PROGRESS_TTL_SECONDS after the last one, so a late subscriber still finds
+the job's latest state. Page events are throttled to one per
+PROGRESS_INTERVAL_SECONDS; stage changes and the last event always go out.
+When a job starts (after its single-flight claim) start() replaces the
+stream with one "queued" event, so a re-extraction or retry never shows the
+previous run's last event as its own.
+
+The ETA is the runtime model's prediction (services/runtime_model.py) until
+pages complete, then the observed pace over the remaining pages.
+
+The reporter is bound to the running job in a context variable, so the
+pipeline and extraction loops only call stage()/page_done(); with no job
+bound (ingest, re-extraction, benchmarks, extraction processes) these are
+no-ops. A Redis error silences the job's reporter after one warning:
+progress never fails a job.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+import redis
+
+from src.config import settings
+from src.services import queue
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["Reporter"]] = ContextVar("kratos_progress", default=None)
+
+
+def stream_key(document_id: str) -> str:
+    return f"{settings.progress_key}:{document_id}"
+
+
+class Reporter:
+    """Progress of one job, published to its document's stream."""
+
+    def __init__(self, r: redis.Redis, document_id: str):
+        self.r = r
+        self.document_id = document_id
+        self.key = stream_key(document_id)
+        self.started = time.monotonic()
+        self.stage = "queued"
+        self.pages_done = 0
+        self.pages_total = 0
+        self._pages_started: Optional[float] = None
+        self._predicted: Optional[tuple[float, float]] = None  # (seconds, at)
+        self._last_publish = 0.0
+        self._silenced = False
+
+    def predict(self, seconds: float) -> None:
+        self._predicted = (seconds, time.monotonic())
+
+    def eta(self, now: float) -> Optional[float]:
+        if self.pages_total and self.pages_done and self._pages_started is not None:
+            pace = (now - self._pages_started) / self.pages_done
+            return round(pace * (self.pages_total - self.pages_done), 1)
+        if self._predicted is not None:
+            seconds, at = self._predicted
+            return round(max(0.0, seconds - (now - at)), 1)
+        return None
+
+    def set_stage(self, name: str, pages_total: Optional[int] = None) -> None:
+        self.stage = name
+        if pages_total is not None:
+            self.pages_total = pages_total
+            self.pages_done = 0
+            self._pages_started = time.monotonic()
+        self.publish(force=True)
+
+    def advance(self, pages: int = 1) -> None:
+        self.pages_done = min(self.pages_done + pages, self.pages_total or self.pages_done + pages)
+        self.publish()
+
+    def publish(self, force: bool = False, reset: bool = False, **extra) -> None:
+        if self._silenced:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_publish < settings.progress_interval_seconds:
+            return
+        self._last_publish = now
+        event = {
+            "stage": self.stage,
+            "pagesDone": self.pages_done,
+            "pagesTotal": self.pages_total,
+            "elapsedSeconds": round(now - self.started, 1),
+        }
+        eta = self.eta(now) if "status" not in extra else 0.0
+        if eta is not None:
+            event["etaSeconds"] = eta
+        event.update(extra)
+        try:
+            with self.r.pipeline(transaction=reset) as pipe:
+                if reset:
+                    pipe.delete(self.key)
+                pipe.xadd(self.key, {"data": json.dumps(event)},
+                          maxlen=settings.progress_max_events, approximate=True)
+                pipe.expire(self.key, settings.progress_ttl_seconds)
+                pipe.execute()
+        except redis.RedisError as e:
+            self._silenced = True
+            logger.warning(f"[{self.document_id}] Progress events off for this job: {e}")
+
+
+@contextmanager
+def tracking(document_id: str) -> Iterator[Optional[Reporter]]:
+    """Bind a reporter for document_id to the running job (None when PROGRESS_ENABLED is off)."""
+    if not settings.progress_enabled:
+        yield None
+        return
+    token = _current.set(Reporter(queue._get_redis(), document_id))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def start() -> None:
+    """The job owns its document: drop earlier runs' events and publish the first one."""
+    reporter = _current.get()
+    if reporter is not None:
+        reporter.publish(force=True, reset=True)
+
+
+def stage(name: str, pages_total: Optional[int] = None) -> None:
+    """The job entered stage `name` (with `pages_total` pages to go through it)."""
+    reporter = _current.get()
+    if reporter is not None:
+        reporter.set_stage(name, pages_total)
+
+
+def page_done(pages: int = 1) -> None:
+    reporter = _current.get()
+    if reporter is not None:
+        reporter.advance(pages)
+
+
+def predict(seconds: float) -> None:
+    """Predicted seconds of the remaining work, for the ETA before any page completes."""
+    reporter = _current.get()
+    if reporter is not None:
+        reporter.predict(seconds)
+
+
+def finish(status: str, **extra) -> None:
+    """Last event of the job: status completed/failed, plus e.g. pages or error."""
+    reporter = _current.get()
+    if reporter is not None:
+        reporter.stage = status
+        reporter.publish(force=True, status=status, **extra)
@@ -0,0 +1,328 @@
+"""
+KRATOS v2 — Queue Service
+Enqueue with admission control, delayed re-queueing of deferred jobs, and
+queue depth / job age / worker utilisation signals published to Redis for
+autoscaling.
+"""
+
+import base64
+import json
+import logging
+import math
+import os
+import socket
+import time
+from typing import Optional
+
+import redis
+
+from src.config import settings
+from src.services import fair_queue
+
+logger = logging.getLogger(__name__)
+
+_redis: Optional[redis.Redis] = None
+
+# Keys derived from the queue key (e.g. "kratos:jobs:pdf:workers")
+WORKERS_SUFFIX = ":workers"
+STATS_SUFFIX = ":stats"
+DELAYED_SUFFIX = ":delayed"
+DISPATCHED_SUFFIX = ":dispatched"  # Trigger.dev runs not started yet (documentId -> epoch)
+AVG_SECONDS_SUFFIX = ":avg_seconds"
+
+# Smoothing factor for the moving average of job duration
+_EWMA_ALPHA = 0.2
+
+
+class QueueFullError(Exception):
+    """Raised when admission control rejects a job (backlog exceeds the SLO)."""
+
+
+def _get_redis() -> redis.Redis:
+    """Lazy-initialize Redis client."""
+    global _redis
+    if _redis is None:
+        _redis = redis.from_url(settings.redis_url)
+    return _redis
+
+
+def worker_id() -> str:
+    """Stable identifier for this worker process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _job_enqueued_at(raw: bytes | str) -> Optional[float]:
+    """
+    Extract the enqueue timestamp from a queued message.
+
+    Handles plain BRPOP jobs ({"documentId", ..., "enqueuedAt"}) and Celery
+    messages whose base64 body is [args, kwargs, embed] with the job as args[0].
+    """
+    try:
+        msg = json.loads(raw)
+        if "body" in msg and "headers" in msg:
+            args, _kwargs, _embed = json.loads(base64.b64decode(msg["body"]))
+            msg = args[0] if args else {}
+        value = msg.get("enqueuedAt")
+        return float(value) if value is not None else None
+    except (ValueError, TypeError, KeyError, IndexError):
+        return None
+
+
+def queue_depth(r: redis.Redis, queue_key: str) -> int:
+    """Number of jobs waiting in a Redis list queue, its tenant sub-queues and Trigger.dev."""
+    listed = sum(int(r.llen(key)) for key in (queue_key, *fair_queue.tenant_keys(r, queue_key)))
+    return listed + int(r.zcard(queue_key + DISPATCHED_SUFFIX))
+
+
+def oldest_job_age(r: redis.Redis, queue_key: str) -> Optional[float]:
+    """
+    Age in seconds of the oldest waiting job, or None if unknown/empty.
+
+    Producers LPUSH and consumers BRPOP, so the oldest job of each list (the
+    shared one and every tenant sub-queue) is its tail; the oldest Trigger.dev
+    run not started yet has the lowest score in the dispatched set.
+    """
+    stamps = [score for _, score in r.zrange(queue_key + DISPATCHED_SUFFIX, 0, 0, withscores=True)]
+    for key in (queue_key, *fair_queue.tenant_keys(r, queue_key)):
+        raw = r.lindex(key, -1)
+        enqueued_at = _job_enqueued_at(raw) if raw is not None else None
+        if enqueued_at is not None:
+            stamps.append(enqueued_at)
+    if not stamps:
+        return None
+    return max(0.0, time.time() - min(stamps))
+
+
+def record_job_duration(r: redis.Redis, queue_key: str, seconds: float) -> None:
+    """Fold a finished job's duration into the shared moving average."""
+    key = queue_key + AVG_SECONDS_SUFFIX
+    current = r.get(key)
+    if current is None:
+        avg = seconds
+    else:
+        avg = (1 - _EWMA_ALPHA) * float(current) + _EWMA_ALPHA * seconds
+    r.set(key, f"{avg:.3f}")
+
+
+def job_started(r: redis.Redis, queue_key: str, document_id: str) -> None:
+    """A Trigger.dev run started: its job leaves the dispatched set the API adds it to."""
+    r.zrem(queue_key + DISPATCHED_SUFFIX, document_id)
+
+
+def average_job_seconds(r: redis.Redis, queue_key: str) -> Optional[float]:
+    """Moving average of job duration, or None before the first job."""
+    value = r.get(queue_key + AVG_SECONDS_SUFFIX)
+    return float(value) if value is not None else None
+
+
+def publish_worker_stats(
+    r: redis.Redis,
+    queue_key: str,
+    concurrency: int,
+    busy: int,
+    utilisation: float,
+) -> None:
+    """Publish this worker's heartbeat, concurrency and utilisation."""
+    r.hset(
+        queue_key + WORKERS_SUFFIX,
+        worker_id(),
+        json.dumps({
+            "concurrency": concurrency,
+            "busy": busy,
+            "utilisation": round(utilisation, 3),
+            "heartbeat": time.time(),
+        }),
+    )
+
+
+def active_workers(r: redis.Redis, queue_key: str) -> dict[str, dict]:
+    """
+    Workers with a recent heartbeat; stale entries are pruned.
+
+    A worker is considered gone after three missed stats intervals.
+    """
+    key = queue_key + WORKERS_SUFFIX
+    cutoff = time.time() - 3 * settings.queue_stats_interval_seconds
+    workers: dict[str, dict] = {}
+    for field, value in r.hgetall(key).items():
+        name = field.decode() if isinstance(field, bytes) else field
+        try:
+            stats = json.loads(value)
+        except ValueError:
+            stats = {}
+        if stats.get("heartbeat", 0) < cutoff:
+            r.hdel(key, name)
+            continue
+        workers[name] = stats
+    return workers
+
+
+def publish_queue_stats(
+    r: redis.Redis,
+    queue_key: str,
+    depth: Optional[int] = None,
+    oldest_age: Optional[float] = None,
+    capacity: Optional[int] = None,
+) -> dict:
+    """
+    Snapshot queue depth, oldest-job age and capacity into `<queue>:stats`.
+
+    External autoscalers and dashboards read this hash instead of scanning
+    the queue themselves, and the API admits uploads against its
+    estimated_wait_seconds (queueService.pdfAdmission). Every consumer
+    publishes it: the BRPOP loop, the Celery autoscaler (passing the
+    broker's depth and oldest age) and the Trigger runner (passing
+    TRIGGER_CONCURRENCY as capacity). Dispatched Trigger.dev runs that
+    never started are forgotten after QUEUE_DISPATCHED_TTL_SECONDS.
+    Returns the published snapshot.
+    """
+    r.zremrangebyscore(
+        queue_key + DISPATCHED_SUFFIX, "-inf", time.time() - settings.queue_dispatched_ttl_seconds
+    )
+    if depth is None:
+        depth = queue_depth(r, queue_key)
+        oldest_age = oldest_job_age(r, queue_key)
+    workers = active_workers(r, queue_key)
+    if capacity is None:
+        capacity = sum(w.get("concurrency", 1) for w in workers.values())
+    avg = average_job_seconds(r, queue_key)
+    age = oldest_age
+    stats = {
+        "depth": depth,
+        "oldest_age_seconds": round(age, 1) if age is not None else -1,
+        "tenants": len(fair_queue.tenant_keys(r, queue_key)),
+        "workers": len(workers),
+        "capacity": capacity,
+        "utilisation": round(
+            sum(w.get("utilisation", 0.0) for w in workers.values()) / len(workers), 3
+        ) if workers else 0.0,
+        "estimated_wait_seconds": round(estimated_wait_seconds(depth, avg, capacity), 1),
+        "updated_at": time.time(),
+    }
+    r.hset(queue_key + STATS_SUFFIX, mapping=stats)
+    return stats
+
+
+def estimated_wait_seconds(
+    depth: int, avg_job_seconds: Optional[float], capacity: int
+) -> float:
+    """Expected time for a new job to start, given backlog and capacity."""
+    if depth <= 0 or not avg_job_seconds:
+        return 0.0
+    return depth * avg_job_seconds / max(capacity, 1)
+
+
+def desired_concurrency(
+    depth: int,
+    avg_job_seconds: Optional[float],
+    slo_seconds: float,
+    min_concurrency: int,
+    max_concurrency: int,
+) -> int:
+    """
+    Concurrency needed to drain the current backlog within the latency SLO.
+
+    Without a duration estimate yet, one slot per waiting job is assumed.
+    """
+    if depth <= 0:
+        return min_concurrency
+    if avg_job_seconds:
+        needed = math.ceil(depth * avg_job_seconds / max(slo_seconds, 1))
+    else:
+        needed = depth
+    return max(min_concurrency, min(max_concurrency, needed))
+
+
+def enqueue_job(job: dict, queue_key: Optional[str] = None) -> None:
+    """
+    Push a PDF job onto the queue, applying backpressure.
+
+    Stamps the job with `enqueuedAt` (epoch seconds) so workers can measure
+    queue wait. Jobs always go to the shared list, which every worker
+    consumes; fair-scheduling workers move them to their tenant's sub-queue.
+    Raises QueueFullError when the estimated wait for the new job exceeds
+    QUEUE_LATENCY_SLO_SECONDS.
+    """
+    r = _get_redis()
+    key = queue_key or settings.queue_key
+
+    depth = queue_depth(r, key)
+    capacity = sum(
+        w.get("concurrency", 1) for w in active_workers(r, key).values()
+    )
+    wait = estimated_wait_seconds(depth, average_job_seconds(r, key), capacity)
+    if wait > settings.queue_latency_slo_seconds:
+        raise QueueFullError(
+            f"Queue {key} backlog of {depth} jobs (~{wait:.0f}s wait) "
+            f"exceeds SLO of {settings.queue_latency_slo_seconds}s"
+        )
+
+    job.setdefault("enqueuedAt", time.time())
+    r.lpush(key, json.dumps(job))
+    logger.debug(f"Enqueued {job.get('documentId')} on {key} (depth {depth + 1})")
+
+
+def defer_job(r: redis.Redis, queue_key: str, job: dict, seconds: float) -> None:
+    """Hand a job back to the queue, to be picked up again after `seconds`."""
+    r.zadd(queue_key + DELAYED_SUFFIX, {json.dumps(job): time.time() + seconds})
+
+
+def promote_due_jobs(
+    r: redis.Redis, queue_key: str, now: Optional[float] = None, limit: int = 100
+) -> int:
+    """
+    Move deferred jobs whose delay has passed onto the shared list.
+
+    One WATCH/MULTI transaction, so concurrent workers never promote a job
+    twice. Returns the number of jobs moved.
+    """
+    delayed = queue_key + DELAYED_SUFFIX
+    now = time.time() if now is None else now
+
+    def move(pipe) -> int:
+        due = pipe.zrangebyscore(delayed, "-inf", now, start=0, num=limit)
+        if not due:
+            return 0
+        pipe.multi()
+        pipe.zrem(delayed, *due)
+        pipe.lpush(queue_key, *due)
+        return len(due)
+
+    return r.transaction(move, delayed, value_from_callable=True)
+
+
+class UtilisationTracker:
+    """Tracks the busy fraction of a fixed number of job slots over time."""
+
+    def __init__(self, concurrency: int = 1):
+        self.concurrency = concurrency
+        self.busy = 0
+        self._busy_seconds = 0.0
+        self._window_start = time.monotonic()
+        self._last_change = self._window_start
+
+    def _accumulate(self) -> None:
+        now = time.monotonic()
+        self._busy_seconds += self.busy * (now - self._last_change)
+        self._last_change = now
+
+    def job_started(self) -> None:
+        self._accumulate()
+        self.busy += 1
+
+    def job_finished(self) -> None:
+        self._accumulate()
+        self.busy = max(0, self.busy - 1)
+
+    def utilisation(self, reset: bool = True) -> float:
+        """Busy slot-seconds over available slot-seconds since the last reset."""
+        self._accumulate()
+        elapsed = self._last_change - self._window_start
+        value = (
+            self._busy_seconds / (elapsed * self.concurrency) if elapsed > 0 else 0.0
+        )
+        if reset:
+            self._busy_seconds = 0.0
+            self._window_start = self._last_change
+        return min(value, 1.0)
@@ -0,0 +1,314 @@
+"""
+KRATOS v2 — Versioned Re-extraction
+Brings extractions produced by an older pipeline.EXTRACTOR_VERSION up to
+date without reprocessing everything at once: a keyset scan over stale rows,
+processed in throttled batches inside an off-peak window and only while
+the live queue is idle.
+
+The stale row is overwritten in place, so it keeps the id its analyses
+reference. A document is not run through the pipeline again when its
+output would not change: if any extraction at the current version already
+exists for the same pdf_hash (an identical PDF uploaded by someone else,
+or earlier in the batch), that output is copied instead. Documents that
+already have a current extraction are skipped.
+
+The scan's cursor moves past every row it tries; rows that fail are kept
+in the Redis hash <REEXTRACT_KEY>:v<version>:failed and retried by batches
+run once the scan is done, up to REEXTRACT_MAX_ATTEMPTS times each.
+
+Progress of the running batch is kept in the Redis hash <REEXTRACT_KEY>:batch
+and finished batches (documents, pages, CPU seconds, estimated cost) are
+pushed to <REEXTRACT_KEY>:batches.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, time as dtime
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+import redis
+from pydantic import BaseModel, Field
+
+from src.config import settings
+from src.models.extraction import DocumentStatus, ExtractionResult
+from src.pipeline import EXTRACTOR_VERSION, run_pipeline
+from src.services import database, normalization, queue, search_index, storage, table_export
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of reextract_document
+COMPLETED = "completed"  # pipeline run on the PDF
+REUSED = "reused"  # copied from a current extraction of the same pdf_hash
+SKIPPED = "skipped"  # already current, or document not completed/missing
+FAILED = "failed"
+
+
+class BatchStats(BaseModel):
+    """Progress and cost of one re-extraction batch."""
+
+    batch_id: str = Field(default_factory=lambda: uuid.uuid4().hex[:12])
+    extractor_version: int = EXTRACTOR_VERSION
+    started_at: float = Field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    planned: int = 0
+    completed: int = 0
+    reused: int = 0
+    skipped: int = 0
+    failed: int = 0
+    pages: int = 0
+    cpu_seconds: float = 0.0  # this process and its reaped children
+    wall_seconds: float = 0.0
+    stopped: str = ""  # why the batch ended early: "window", "queue"
+    retry: bool = False  # a pass over rows that failed in earlier batches
+
+    @property
+    def processed(self) -> int:
+        return self.completed + self.reused + self.skipped + self.failed
+
+    @property
+    def estimated_cost(self) -> float:
+        """USD, from CPU time at REEXTRACT_COST_PER_CPU_HOUR."""
+        return self.cpu_seconds / 3600 * settings.reextract_cost_per_cpu_hour
+
+    def snapshot(self) -> dict:
+        return {
+            **self.model_dump(),
+            "processed": self.processed,
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "estimated_cost": round(self.estimated_cost, 6),
+        }
+
+
+def parse_window(spec: str) -> Optional[tuple[dtime, dtime]]:
+    """"HH:MM-HH:MM" -> (start, end); "" -> None (no restriction)."""
+    if not spec.strip():
+        return None
+    try:
+        start, end = (dtime.fromisoformat(part.strip()) for part in spec.split("-"))
+    except ValueError as e:
+        raise ValueError(f"Invalid REEXTRACT_WINDOW '{spec}' (expected HH:MM-HH:MM)") from e
+    return start, end
+
+
+def in_window(now: Optional[datetime] = None, spec: Optional[str] = None) -> bool:
+    """Whether `now` falls in the off-peak window; windows may wrap midnight."""
+    window = parse_window(settings.reextract_window if spec is None else spec)
+    if window is None:
+        return True
+    now = now or datetime.now(ZoneInfo(settings.reextract_timezone))
+    start, end = window
+    current = now.time().replace(tzinfo=None)
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+def live_queue_busy(r: redis.Redis) -> bool:
+    """Live extraction jobs waiting beyond REEXTRACT_MAX_QUEUE_DEPTH."""
+    return queue.queue_depth(r, settings.queue_key) > settings.reextract_max_queue_depth
+
+
+def _cursor_key() -> str:
+    return f"{settings.reextract_key}:v{EXTRACTOR_VERSION}:cursor"
+
+
+def _failed_key() -> str:
+    return f"{settings.reextract_key}:v{EXTRACTOR_VERSION}:failed"
+
+
+def _retry_rows(r: redis.Redis, limit: int) -> list[dict]:
+    """Rows that failed in earlier batches with attempts left, in id order."""
+    rows = [json.loads(raw) for raw in r.hvals(_failed_key())]
+    rows = [row for row in rows if row["attempts"] < settings.reextract_max_attempts]
+    return sorted(rows, key=lambda row: row["id"])[:limit]
+
+
+def _record_outcome(r: redis.Redis, row: dict, outcome: str) -> None:
+    """Keep a failed row (and its attempt count) for a retry pass; forget it otherwise."""
+    if outcome != FAILED:
+        r.hdel(_failed_key(), row["id"])
+        return
+    previous = r.hget(_failed_key(), row["id"])
+    attempts = json.loads(previous)["attempts"] + 1 if previous else 1
+    r.hset(_failed_key(), row["id"], json.dumps({
+        "id": row["id"], "document_id": row["document_id"],
+        "pdf_hash": row.get("pdf_hash"), "attempts": attempts,
+    }))
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process and of its children that have exited (e.g. recycled pools)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _persist(
+    document_id: str, result: ExtractionResult, file_path: str, extraction_id: str
+) -> None:
+    """Same writes as the worker onto the stale row, without touching the document status."""
+    if settings.table_export_format:
+        try:
+            result.metadata.tables_artifact = (
+                table_export.export_tables(result, file_path) or ""
+            )
+        except Exception as e:
+            logger.error(f"Table export failed for {document_id}: {e}")
+    try:
+        result.metadata.search_index = search_index.export_index(result, file_path) or ""
+    except Exception as e:
+        logger.error(f"Search index export failed for {document_id}: {e}")
+    try:
+        result.metadata.text_offsets = normalization.export_offsets(result, file_path) or ""
+    except Exception as e:
+        logger.error(f"Offset map export failed for {document_id}: {e}")
+    database.save_extraction(
+        document_id, result, storage_path=file_path, extraction_id=extraction_id
+    )
+    if settings.page_rows_enabled:
+        database.save_pages(document_id, result)
+
+
+def find_reusable(document_id: str, pdf_hash: str) -> Optional[ExtractionResult]:
+    """A current-version extraction of the same PDF, loaded for document_id, if one exists and loads."""
+    source = database.find_current_extraction(EXTRACTOR_VERSION, pdf_hash=pdf_hash)
+    if source is None:
+        return None
+    try:
+        result = source.result()
+    except Exception as e:  # e.g. rows written by the trigger worker's runner
+        logger.debug(f"Cannot reuse extraction {source.row.get('id')}: {e}")
+        return None
+    result.document_id = document_id
+    return result
+
+
+def _reuse(
+    document_id: str, pdf_hash: str, file_path: str, extraction_id: str
+) -> Optional[ExtractionResult]:
+    """Copy a current-version extraction of the same PDF, if one exists and loads."""
+    result = find_reusable(document_id, pdf_hash)
+    if result is not None:
+        _persist(document_id, result, file_path, extraction_id)
+    return result
+
+
+def reextract_document(
+    document: Optional[dict], pdf_hash: str, stats: BatchStats, extraction_id: str
+) -> str:
+    """
+    Bring one document to EXTRACTOR_VERSION by rewriting its stale
+    extraction row `extraction_id`; returns the outcome. Failures are
+    counted, never raised: the document keeps its previous extraction and
+    status.
+    """
+    if document is None or document.get("status") != DocumentStatus.completed.value:
+        stats.skipped += 1
+        return SKIPPED
+    document_id = document["id"]
+    file_path = document["file_path"]
+    cpu_start, wall_start = _cpu_seconds(), time.monotonic()
+    try:
+        if database.find_current_extraction(EXTRACTOR_VERSION, document_id=document_id):
+            stats.skipped += 1
+            return SKIPPED
+        pdf_hash = pdf_hash or document.get("pdf_hash") or ""
+        result = _reuse(document_id, pdf_hash, file_path, extraction_id) if pdf_hash else None
+        if result is not None:
+            stats.reused += 1
+            return REUSED
+        try:
+            pdf_path = storage.download_pdf(file_path, document_id, pdf_hash or None)
+            result = run_pipeline(document_id, pdf_path)
+            _persist(document_id, result, file_path, extraction_id)
+        finally:
+            storage.cleanup_temp_file(document_id)
+        stats.completed += 1
+        stats.pages += result.metadata.total_pages
+        return COMPLETED
+    except Exception as e:
+        logger.error(f"Re-extraction failed for {document_id}: {e}")
+        stats.failed += 1
+        return FAILED
+    finally:
+        stats.cpu_seconds += _cpu_seconds() - cpu_start
+        stats.wall_seconds += time.monotonic() - wall_start
+
+
+def _publish_progress(r: redis.Redis, stats: BatchStats) -> None:
+    r.hset(f"{settings.reextract_key}:batch", mapping={
+        k: "" if v is None else int(v) if isinstance(v, bool) else v
+        for k, v in stats.snapshot().items()
+    })
+
+
+def run_batch(
+    r: redis.Redis,
+    limit: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> BatchStats:
+    """
+    Re-extract up to `limit` (REEXTRACT_BATCH_SIZE) stale rows, resuming
+    from the stored cursor, or once the scan is done, retry rows that failed.
+    Documents are spaced by 60/REEXTRACT_RATE_PER_MINUTE seconds, and the
+    batch stops early when the window closes or live jobs queue up.
+    planned == 0 means no stale rows are left for this version (except
+    those out of attempts).
+    """
+    limit = limit or settings.reextract_batch_size
+    cursor = r.get(_cursor_key())
+    rows = database.stale_extractions(
+        EXTRACTOR_VERSION, after_id=cursor.decode() if cursor else None, limit=limit
+    )
+    retry = not rows
+    if retry:
+        rows = _retry_rows(r, limit)
+    stats = BatchStats(planned=len(rows), retry=retry)
+    if not rows:
+        return stats
+
+    documents = database.get_documents(sorted({row["document_id"] for row in rows}))
+    interval = 60.0 / settings.reextract_rate_per_minute if settings.reextract_rate_per_minute > 0 else 0.0
+    logger.info(
+        f"Re-extraction batch {stats.batch_id}: {len(rows)} rows older than "
+        f"v{EXTRACTOR_VERSION}{' (retrying failures)' if retry else ''}, one every {interval:.1f}s"
+    )
+    for i, row in enumerate(rows):
+        if not in_window():
+            stats.stopped = "window"
+            break
+        if live_queue_busy(r):
+            stats.stopped = "queue"
+            break
+        started = time.monotonic()
+        outcome = reextract_document(
+            documents.get(row["document_id"]), row.get("pdf_hash") or "", stats, row["id"]
+        )
+        _record_outcome(r, row, outcome)
+        if not retry:
+            r.set(_cursor_key(), row["id"])
+        _publish_progress(r, stats)
+        if i + 1 < len(rows):
+            sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    stats.finished_at = time.time()
+    _publish_progress(r, stats)
+    history = f"{settings.reextract_key}:batches"
+    r.lpush(history, json.dumps(stats.snapshot()))
+    r.ltrim(history, 0, settings.reextract_history - 1)
+    logger.info(
+        f"Re-extraction batch {stats.batch_id} done: {stats.completed} extracted, "
+        f"{stats.reused} reused, {stats.skipped} skipped, {stats.failed} failed, "
+        f"{stats.pages} pages, {stats.cpu_seconds:.1f} CPU s (~${stats.estimated_cost:.4f})"
+        + (f", stopped: {stats.stopped}" if stats.stopped else "")
+    )
+    return stats
+
+
+def batch_history(r: redis.Redis, count: int = 20) -> list[dict]:
+    """Most recent finished batches, newest first."""
+    return [json.loads(raw) for raw in r.lrange(f"{settings.reextract_key}:batches", 0, count - 1)]
@@ -0,0 +1,315 @@
+"""
+KRATOS v2 — Job Runtime Prediction
+Predicts a job's extraction seconds from what is known before extraction,
+so one static limit no longer has to fit both a 1-page petition and a
+500-page dossier. The prediction sets:
+
+- the job's extraction time limit: prediction x RUNTIME_TIMEOUT_FACTOR +
+  RUNTIME_TIMEOUT_SLACK_SECONDS, within RUNTIME_MIN/MAX_TIMEOUT_SECONDS;
+- the extraction path: jobs predicted at PARALLEL_MIN_SECONDS or more run
+  on EXTRACTION_WORKERS processes (pdf_extraction.extract_parallel);
+- the fair queue's charge per job (job_cost), relative to the mean job.
+
+Features come from a probe of the downloaded PDF: page count, file size and
+the share of pages with images and with ruling lines (possible tables),
+sampled on up to RUNTIME_PROBE_PAGES pages. Finished jobs are pushed to the
+Redis list <RUNTIME_MODEL_KEY>:samples with those features, their stage
+timings, table count and the prediction made for them. Each worker refits
+non-negative least squares on the last RUNTIME_MODEL_MAX_SAMPLES every
+RUNTIME_MODEL_REFIT_SECONDS; the target is one-core seconds (extraction
+seconds x workers). Below RUNTIME_MODEL_MIN_SAMPLES the prior
+RUNTIME_PRIOR_SECONDS + RUNTIME_PRIOR_SECONDS_PER_PAGE x pages applies.
+
+Accuracy is the relative error of the predictions made before each of the
+last RUNTIME_ACCURACY_WINDOW jobs (not the in-sample fit): median and p90,
+exported as kratos_pdf_runtime_prediction_error{quantile} and kept with the
+model at <RUNTIME_MODEL_KEY>:model.
+"""
+
+import json
+import logging
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pypdfium2 as pdfium
+import redis
+from pydantic import BaseModel, Field
+
+from src.config import settings
+from src.services import metrics, pdf_extraction
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ("intercept", "pages", "image_pages", "table_pages", "size_mb")
+
+# Ridge term on the normal equations: keeps constant columns (no images in
+# any sample yet) solvable without moving well-determined coefficients
+_RIDGE = 1e-6
+# Bounds of job_cost, so one mispredicted job cannot stall its tenant
+_MIN_COST, _MAX_COST = 0.1, 10.0
+
+_model: Optional["RuntimeModel"] = None
+
+
+class JobTimeoutError(Exception):
+    """Raised in a job that ran past its predicted time limit (or a stage's limit)."""
+
+
+class JobFeatures(BaseModel):
+    pages: int
+    size_mb: float = 0.0
+    image_ratio: float = 0.0  # share of sampled pages with image objects
+    table_ratio: float = 0.0  # share of sampled pages with ruling lines
+
+    def vector(self) -> list[float]:
+        return [
+            1.0,
+            float(self.pages),
+            self.pages * self.image_ratio,
+            self.pages * self.table_ratio,
+            self.size_mb,
+        ]
+
+
+class Accuracy(BaseModel):
+    jobs: int = 0
+    # |predicted - actual| / actual over recent jobs
+    median_error: Optional[float] = None
+    p90_error: Optional[float] = None
+
+
+class RuntimeModel(BaseModel):
+    coefficients: list[float] = Field(default_factory=list)  # per FEATURES; empty = prior
+    samples: int = 0
+    mean_seconds: float = 0.0
+    accuracy: Accuracy = Field(default_factory=Accuracy)
+    fitted_at: float = 0.0
+
+    def predict(self, features: JobFeatures) -> float:
+        """One-core extraction seconds."""
+        if not self.coefficients:
+            return settings.runtime_prior_seconds + settings.runtime_prior_seconds_per_page * features.pages
+        return max(0.0, sum(c * x for c, x in zip(self.coefficients, features.vector())))
+
+
+class Plan(BaseModel):
+    """How a job runs: its prediction, extraction processes and time limit."""
+
+    features: JobFeatures
+    predicted_seconds: float
+    workers: int = 1
+    timeout_seconds: float
+
+
+def samples_key() -> str:
+    return f"{settings.runtime_model_key}:samples"
+
+
+def model_key() -> str:
+    return f"{settings.runtime_model_key}:model"
+
+
+def probe(pdf_path: Path) -> JobFeatures:
+    """Page count, size and sampled image/table page shares of a PDF."""
+    doc = pdfium.PdfDocument(pdf_path)
+    try:
+        count = len(doc)
+        sampled = min(count, settings.runtime_probe_pages)
+        indices = sorted({n * count // sampled for n in range(sampled)}) if sampled else []
+        images = tables = 0
+        for i in indices:
+            page = doc[i]
+            try:
+                images += pdf_extraction._count_images(page) > 0
+                tables += pdf_extraction._may_have_ruled_table(page)
+            finally:
+                page.close()
+    finally:
+        doc.close()
+    seen = len(indices) or 1
+    return JobFeatures(
+        pages=count,
+        size_mb=round(Path(pdf_path).stat().st_size / (1024 * 1024), 3),
+        image_ratio=round(images / seen, 3),
+        table_ratio=round(tables / seen, 3),
+    )
+
+
+def _solve(rows: list[tuple[list[float], float]], columns: list[int]) -> list[float]:
+    """Least squares on `columns` of the feature vectors (normal equations)."""
+    size = len(columns)
+    a = [[0.0] * size for _ in range(size)]
+    b = [0.0] * size
+    for x, y in rows:
+        xs = [x[c] for c in columns]
+        for i in range(size):
+            b[i] += xs[i] * y
+            for j in range(size):
+                a[i][j] += xs[i] * xs[j]
+    for i in range(size):
+        a[i][i] += _RIDGE * (a[i][i] or 1.0)
+    # Gaussian elimination with partial pivoting
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        b[col], b[pivot] = b[pivot], b[col]
+        if a[col][col] == 0:
+            continue
+        for r in range(col + 1, size):
+            factor = a[r][col] / a[col][col]
+            b[r] -= factor * b[col]
+            for c in range(col, size):
+                a[r][c] -= factor * a[col][c]
+    coef = [0.0] * size
+    for i in reversed(range(size)):
+        if a[i][i]:
+            coef[i] = (b[i] - sum(a[i][j] * coef[j] for j in range(i + 1, size))) / a[i][i]
+    return coef
+
+
+def fit(samples: list[dict]) -> list[float]:
+    """
+    Coefficients (per FEATURES) of one-core seconds, all non-negative so
+    more pages never predict less time: features that fit negative are
+    dropped and the rest refit.
+    """
+    rows = [(JobFeatures(**s["features"]).vector(), float(s["seconds"])) for s in samples]
+    columns = list(range(len(FEATURES)))
+    coef: list[float] = []
+    while columns:
+        coef = _solve(rows, columns)
+        negative = {c for c, value in zip(columns, coef) if value < 0}
+        if not negative:
+            break
+        columns = [c for c in columns if c not in negative]
+    full = [0.0] * len(FEATURES)
+    for c, value in zip(columns, coef):
+        full[c] = value
+    return full
+
+
+def accuracy(samples: list[dict]) -> Accuracy:
+    """Error of the predictions made for the most recent jobs (newest first)."""
+    errors = sorted(
+        abs(s["predicted"] - s["seconds"]) / s["seconds"]
+        for s in samples[: settings.runtime_accuracy_window]
+        if s.get("predicted") is not None and s["seconds"] > 0
+    )
+    if not errors:
+        return Accuracy()
+    return Accuracy(
+        jobs=len(errors),
+        median_error=round(errors[len(errors) // 2], 4),
+        p90_error=round(errors[min(len(errors) - 1, int(len(errors) * 0.9))], 4),
+    )
+
+
+def current(r: redis.Redis) -> RuntimeModel:
+    """This process's model, refit from the recorded samples when stale."""
+    global _model
+    if _model is not None and time.time() - _model.fitted_at < settings.runtime_model_refit_seconds:
+        return _model
+    raw = r.lrange(samples_key(), 0, settings.runtime_model_max_samples - 1)
+    samples = [json.loads(value) for value in raw]
+    model = RuntimeModel(
+        coefficients=fit(samples) if len(samples) >= settings.runtime_model_min_samples else [],
+        samples=len(samples),
+        mean_seconds=sum(s["seconds"] for s in samples) / len(samples) if samples else 0.0,
+        accuracy=accuracy(samples),
+        fitted_at=time.time(),
+    )
+    r.set(model_key(), model.model_dump_json())
+    if model.accuracy.jobs:
+        metrics.RUNTIME_PREDICTION_ERROR.labels("0.5").set(model.accuracy.median_error)
+        metrics.RUNTIME_PREDICTION_ERROR.labels("0.9").set(model.accuracy.p90_error)
+        logger.info(
+            f"Runtime model refit on {model.samples} jobs: median error "
+            f"{model.accuracy.median_error:.0%}, p90 {model.accuracy.p90_error:.0%} "
+            f"over the last {model.accuracy.jobs}"
+        )
+    _model = model
+    return model
+
+
+def plan(pdf_path: Path, r: Optional[redis.Redis] = None) -> Plan:
+    """Probe a downloaded PDF and decide its extraction processes and time limit."""
+    features = probe(pdf_path)
+    model = _model or RuntimeModel()
+    if r is not None:
+        try:
+            model = current(r)
+        except redis.RedisError as e:
+            logger.warning(f"Runtime model unavailable, using the last fit or the prior: {e}")
+    predicted = model.predict(features)
+    workers = 1
+    if settings.extraction_workers > 1 and predicted >= settings.parallel_min_seconds:
+        workers = min(settings.extraction_workers, features.pages)
+    timeout = predicted * settings.runtime_timeout_factor + settings.runtime_timeout_slack_seconds
+    timeout = min(max(timeout, settings.runtime_min_timeout_seconds), settings.runtime_max_timeout_seconds)
+    return Plan(features=features, predicted_seconds=round(predicted, 3), workers=workers,
+                timeout_seconds=round(timeout, 1))
+
+
+def record(
+    r: redis.Redis, job_plan: Plan, extract_seconds: float, timings: dict, tables: int = 0
+) -> None:
+    """Add a finished job to the samples the model is fitted on."""
+    sample = {
+        "features": job_plan.features.model_dump(),
+        "seconds": round(extract_seconds * job_plan.workers, 4),
+        "predicted": job_plan.predicted_seconds,
+        "workers": job_plan.workers,
+        "tables": tables,
+        "timings": {k: round(v, 4) for k, v in timings.items()},
+        "at": round(time.time(), 3),
+    }
+    with r.pipeline() as pipe:
+        pipe.lpush(samples_key(), json.dumps(sample))
+        pipe.ltrim(samples_key(), 0, settings.runtime_model_max_samples - 1)
+        pipe.execute()
+
+
+def job_cost(job: dict) -> float:
+    """
+    Fair-queue charge for a queued job, 1.0 for the mean job.
+
+    Uses the producer's pageCount (and fileSize, bytes) hints with this
+    process's last fit; 1.0 without hints or before the model has samples.
+    """
+    model = _model
+    if model is None or not model.coefficients or model.mean_seconds <= 0 or not job.get("pageCount"):
+        return 1.0
+    features = JobFeatures(
+        pages=int(job["pageCount"]), size_mb=float(job.get("fileSize") or 0) / (1024 * 1024)
+    )
+    return min(max(model.predict(features) / model.mean_seconds, _MIN_COST), _MAX_COST)
+
+
+@contextmanager
+def deadline(seconds: Optional[float], limit: str = "predicted time limit") -> Iterator[None]:
+    """
+    Raise JobTimeoutError in the block after `seconds` (`limit` names the
+    limit in its message).
+
+    Uses SIGALRM, so it only applies in the main thread (the BRPOP loop,
+    Celery prefork children); elsewhere, or with no seconds, the block runs
+    without a limit.
+    """
+    if not seconds or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _expired(signum, frame):
+        raise JobTimeoutError(f"Job exceeded its {limit} of {seconds:.0f}s")
+
+    previous = signal.signal(signal.SIGALRM, _expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
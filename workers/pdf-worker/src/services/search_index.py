@@ -0,0 +1,242 @@
+"""
+KRATOS v2 — In-Document Search Index
+Positional index over raw_text for term and phrase lookups in the review
+screen (party names, CPF/CNPJ and process numbers, legal citations) without
+scanning the document text.
+
+Tokens are accent-folded and lower-cased ("Ação" -> "acao"), ordinal
+indicators are dropped ("art. 5º" -> "art", "5") and numbers written with
+separators keep only their digits, so "123.456.789-09", "123456789-09" and
+"12345678909" are the same term, as are "0001234-56.2024.8.26.0100" and its
+bare digits. Queries go through the same tokenizer; a query of several
+tokens is a phrase (consecutive positions).
+
+Serialized form (little-endian, gzip-compressed):
+
+  b"KSX1" | u32 header length | header JSON, space-padded to 4 bytes |
+  u32[postings] | u32[token starts] | u8[token lengths]
+
+The header maps each term to [first word, count] in the postings area and
+lists [page_number, first token, page char_start] per page. Each term's
+postings are its token positions, delta-encoded; token starts are raw_text
+offsets indexed by position and lengths are capped at 255. A lookup only
+decodes the postings of the queried terms and the spans of its hits.
+apps/api/src/services/search-index.ts reads the same format; keep both
+tokenizers in step.
+"""
+
+import bisect
+import json
+import logging
+import posixpath
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from itertools import accumulate
+from typing import Optional
+
+from pydantic import BaseModel
+
+from src.config import settings
+from src.models.extraction import ExtractionResult, PageContent
+from src.services import output_store, storage
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KSX1"
+FORMAT_VERSION = 1
+
+SUFFIX = ".search.gz"
+
+# Digit groups joined by . , / - (CPF, CNPJ, CNJ numbers, dates, amounts),
+# else runs of letters/digits (and combining accents); º/ª split tokens
+_TOKEN_RE = re.compile(r"[0-9]+(?:[.,/-][0-9]+)+|(?:[^\W_ºª]|[\u0300-\u036f])+")
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
+
+
+def fold(token: str) -> str:
+    """Accent-folded, lower-case form of a token."""
+    decomposed = unicodedata.normalize("NFKD", token)
+    return "".join(c for c in decomposed if not unicodedata.category(c).startswith("M")).lower()
+
+
+def tokenize(text: str) -> list[tuple[str, int, int]]:
+    """(term, start, end) for every token of text, offsets into text."""
+    tokens = []
+    for m in _TOKEN_RE.finditer(text):
+        raw = m.group(0)
+        term = _NON_DIGIT_RE.sub("", raw) if raw[0].isdigit() and not raw.isalnum() else fold(raw)
+        if term:
+            tokens.append((term, m.start(), m.end()))
+    return tokens
+
+
+class SearchHit(BaseModel):
+    page: int
+    # Offsets in raw_text (end-exclusive) and in the page's own text
+    char_start: int
+    char_end: int
+    page_char_start: int
+    page_char_end: int
+
+
+class SearchResults(BaseModel):
+    query: str
+    terms: list[str]
+    total: int
+    hits: list[SearchHit]
+
+
+def _u32(values) -> array:
+    data = array("I", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data
+
+
+def _deltas(values: list[int]) -> list[int]:
+    return [b - a for a, b in zip([0, *values], values)]
+
+
+def _contains(positions, value: int) -> bool:
+    i = bisect.bisect_left(positions, value)
+    return i < len(positions) and positions[i] == value
+
+
+class SearchIndex:
+    """Positional index: term -> token positions, position -> raw_text span."""
+
+    def __init__(self, terms: dict[str, tuple[int, int]], postings, starts, lengths,
+                 pages: list[tuple[int, int, int]], document_id: str = ""):
+        self.document_id = document_id
+        self.terms = terms
+        self._postings = postings  # delta-encoded per term
+        self.starts = starts
+        self.lengths = lengths
+        self.pages = pages
+        self._page_tokens = [first for _, first, _ in pages]
+
+    @classmethod
+    def build(cls, raw_text: str, pages: list[PageContent], document_id: str = "") -> "SearchIndex":
+        tokens = tokenize(raw_text)
+        by_term: dict[str, list[int]] = {}
+        for position, (term, _, _) in enumerate(tokens):
+            by_term.setdefault(term, []).append(position)
+        terms, postings = {}, array("I")
+        for term in sorted(by_term):
+            terms[term] = (len(postings), len(by_term[term]))
+            postings.extend(_deltas(by_term[term]))
+        starts = array("I", (start for _, start, _ in tokens))
+        token_pages = []
+        for page in pages:
+            if page.char_end > page.char_start:
+                first = bisect.bisect_left(starts, page.char_start)
+                token_pages.append((page.page_number, first, page.char_start))
+        lengths = array("B", (min(end - start, 255) for _, start, end in tokens))
+        return cls(terms, postings, starts, lengths, token_pages, document_id)
+
+    @property
+    def tokens(self) -> int:
+        return len(self.starts)
+
+    def serialize(self) -> bytes:
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "document_id": self.document_id,
+            "tokens": self.tokens,
+            "postings": len(self._postings),
+            "terms": {term: list(span) for term, span in self.terms.items()},
+            "pages": [list(page) for page in self.pages],
+        }, ensure_ascii=False, separators=(",", ":")).encode()
+        header += b" " * (-len(header) % 4)
+        return b"".join([
+            MAGIC, struct.pack("<I", len(header)), header,
+            _u32(self._postings).tobytes(), _u32(self.starts).tobytes(), bytes(self.lengths),
+        ])
+
+    @classmethod
+    def load(cls, data: bytes) -> "SearchIndex":
+        if data[:4] != MAGIC:
+            data = output_store.decompress(data)
+        if data[:4] != MAGIC:
+            raise ValueError("Not a search index")
+        (header_len,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8:8 + header_len])
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported search index version {header['version']}")
+        n_post, n_tok = header["postings"], header["tokens"]
+        body = 8 + header_len
+        words = memoryview(data)[body:body + 4 * (n_post + n_tok)].cast("I")
+        if sys.byteorder != "little":
+            words = _u32(words)
+        return cls(
+            {term: tuple(span) for term, span in header["terms"].items()},
+            words[:n_post], words[n_post:], memoryview(data)[body + 4 * (n_post + n_tok):],
+            [tuple(page) for page in header["pages"]], header.get("document_id", ""),
+        )
+
+    def positions(self, term: str) -> list[int]:
+        first, count = self.terms.get(term, (0, 0))
+        return list(accumulate(self._postings[first:first + count]))
+
+    def search(self, query: str, limit: int = 100) -> SearchResults:
+        """Hits for a term, or for a phrase when the query has several tokens."""
+        terms = [term for term, _, _ in tokenize(query)]
+        matches: list[int] = []
+        if terms:
+            lists = [self.positions(term) for term in terms]
+            if len(lists) == 1:
+                matches = lists[0]
+            elif all(lists):
+                # Walk the rarest term's positions, binary-search the others
+                rarest = min(range(len(lists)), key=lambda i: len(lists[i]))
+                others = [(i - rarest, p) for i, p in enumerate(lists) if i != rarest]
+                matches = [
+                    pos - rarest for pos in lists[rarest]
+                    if all(_contains(found, pos + shift) for shift, found in others)
+                ]
+        hits = [self._hit(pos, len(terms)) for pos in matches[:limit]]
+        return SearchResults(query=query, terms=terms, total=len(matches), hits=hits)
+
+    def _hit(self, position: int, length: int) -> SearchHit:
+        page_number, _, page_start = self.pages[bisect.bisect_right(self._page_tokens, position) - 1]
+        last = position + length - 1
+        start, end = self.starts[position], self.starts[last] + self.lengths[last]
+        return SearchHit(
+            page=page_number, char_start=start, char_end=end,
+            page_char_start=start - page_start, page_char_end=end - page_start,
+        )
+
+
+def index_key(storage_path: str, document_id: str) -> str:
+    """Object key next to the source PDF, e.g. `<user>/<doc>/<doc>.search.gz`."""
+    name = f"{document_id}{SUFFIX}"
+    parent = posixpath.dirname(storage_path)
+    return posixpath.join(parent, name) if parent else name
+
+
+def export_index(result: ExtractionResult, storage_path: str) -> Optional[str]:
+    """
+    Build the document's search index and upload it next to the PDF.
+
+    Always gzip, so the API can read it with node:zlib. Returns the object
+    key, or None when SEARCH_INDEX_ENABLED is off or there is no text.
+    """
+    if not settings.search_index_enabled or not result.raw_text:
+        return None
+    index = SearchIndex.build(result.raw_text, result.pages, result.document_id)
+    body = index.serialize()
+    packed = output_store.compress(body, "gzip")
+    key = index_key(storage_path, result.document_id)
+    storage.upload_object(key, packed, content_type="application/octet-stream")
+    logger.info(
+        f"[{result.document_id}] Search index: {index.tokens} tokens, {len(index.terms)} terms "
+        f"-> {key} ({len(body)} -> {len(packed)} bytes)"
+    )
+    return key
+
+
+def load_index(key: str) -> SearchIndex:
+    return SearchIndex.load(storage.download_object(key))
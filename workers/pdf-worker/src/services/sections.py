@@ -0,0 +1,96 @@
+"""
+KRATOS v2 — Legal Section Segmentation
+Finds the structural sections of rulings and petitions (RELATÓRIO,
+FUNDAMENTAÇÃO, DISPOSITIVO, DOS FATOS, DOS PEDIDOS, ...) in raw_text with a
+single regex scan over heading lines, and records them as an index of
+names, page ranges and character offsets (ExtractionResult.sections).
+
+Consumers slice raw_text with the offsets (section_text) to send only the
+sections an analysis needs instead of the whole document.
+"""
+
+import re
+from typing import Iterable
+
+from src.models.extraction import DocumentSection, PageContent
+from src.services.chunking import PAGE_SEPARATOR, page_lookup
+
+# Canonical section name -> heading pattern (case-insensitive, accents optional)
+SECTION_PATTERNS: dict[str, str] = {
+    "ementa": r"EMENTA",
+    "acordao": r"AC[OÓ]RD[AÃ]O",
+    "relatorio": r"RELAT[OÓ]RIO",
+    "voto": r"VOTO(?:[ \t]+D[OA][ \t]+RELATOR[A]?)?",
+    "fatos": r"(?:S[IÍ]NTESE[ \t]+)?D[OA]S?[ \t]+FATOS",
+    "direito": r"D[OA]S?[ \t]+(?:DIREITO|FUNDAMENTOS[ \t]+JUR[IÍ]DICOS)",
+    "preliminares": r"(?:D[AO]S?[ \t]+)?PRELIMINAR(?:ES)?",
+    "merito": r"(?:D[OA][ \t]+)?M[EÉ]RITO",
+    "fundamentacao": r"FUNDAMENTA[CÇ][AÃ]O|FUNDAMENTOS|MOTIVA[CÇ][AÃ]O|RAZ[OÕ]ES[ \t]+DE[ \t]+DECIDIR",
+    "tutela": r"D[AO]S?[ \t]+(?:PEDIDO[ \t]+DE[ \t]+)?TUTELA[^\n]{0,60}",
+    "provas": r"D[AO]S[ \t]+PROVAS",
+    "valor_causa": r"D[OA][ \t]+VALOR[ \t]+DA[ \t]+CAUSA",
+    "pedidos": r"D[OA]S?[ \t]+(?:PEDIDOS?|REQUERIMENTOS?)",
+    "dispositivo": r"DISPOSITIVO|CONCLUS[AÃ]O",
+}
+
+# Text before the first heading (court, parties, case number)
+PREAMBLE = "preambulo"
+# Any other upper-case "DOS/DAS ..." heading of a petition
+OTHER = "secao"
+
+_NUMBERING = r"(?:(?:[IVXLC]+|\d+(?:\.\d+)*|[a-z])[ \t]*[-–—.)][ \t]*)?"
+_KNOWN = "|".join(f"(?P<{name}>{pattern})" for name, pattern in SECTION_PATTERNS.items())
+_OTHER = rf"(?P<{OTHER}>D[OA]S?[ \t]+[A-ZÀ-Ý][A-ZÀ-Ý ,/-]{{2,60}})"
+
+# A heading is a short line (at most 90 characters) holding only the
+# (optionally numbered) title
+_HEADING_RE = re.compile(
+    rf"^(?=[^\n]{{1,90}}$)[ \t]*{_NUMBERING}(?:(?i:{_KNOWN})|{_OTHER})[ \t]*[:.]?[ \t]*$",
+    re.MULTILINE,
+)
+
+
+def segment(raw_text: str, pages: list[PageContent]) -> list[DocumentSection]:
+    """
+    Section index of raw_text, in document order.
+
+    A section runs from its heading to the next heading (or the end of the
+    text). Returns [] when no heading is found; pages must carry their
+    raw_text offsets (see chunking.build_raw_text).
+    """
+    headings = [
+        (m.start(), m.lastgroup, m.group(0).strip())
+        for m in _HEADING_RE.finditer(raw_text)
+    ]
+    if not headings:
+        return []
+    if raw_text[:headings[0][0]].strip():
+        headings.insert(0, (0, PREAMBLE, ""))
+
+    _page = page_lookup(pages)
+    sections: list[DocumentSection] = []
+    for i, (start, name, heading) in enumerate(headings):
+        end = headings[i + 1][0] if i + 1 < len(headings) else len(raw_text)
+        # Do not count the page separator before the next heading in the span
+        trimmed = len(raw_text[start:end].rstrip()) + start
+        sections.append(
+            DocumentSection(
+                name=name,
+                heading=heading,
+                char_start=start,
+                char_end=trimmed,
+                page_start=_page(start),
+                page_end=_page(max(trimmed - 1, start)),
+            )
+        )
+    return sections
+
+
+def section_text(
+    raw_text: str, sections: list[DocumentSection], names: Iterable[str]
+) -> str:
+    """Text of the sections with the given names, in document order."""
+    wanted = set(names)
+    return PAGE_SEPARATOR.join(
+        raw_text[s.char_start:s.char_end] for s in sections if s.name in wanted
+    )
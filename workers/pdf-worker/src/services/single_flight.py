@@ -0,0 +1,182 @@
+"""
+KRATOS v2 — Single-Flight Job De-duplication
+Keeps one extraction per document (and per PDF content) in flight across
+every worker, Celery and BRPOP alike. Duplicates come from a Celery retry
+racing a late ack, the BRPOP loop and Trigger both picking up a job, a
+re-submitted upload, or the same PDF uploaded twice before the first
+finished.
+
+A job claims `<key>:doc:<documentId>` and, when the job carries its
+pdfHash, `<key>:hash:<pdfHash>` with SET-if-absent semantics under
+SINGLE_FLIGHT_LEASE_SECONDS, in one WATCH/MULTI transaction. While it runs
+a daemon thread renews the lease every third of it (only while the keys
+still hold its token), so a crashed worker's claim simply expires. On
+release the leader's report is kept at `<key>:result:<documentId>` for
+SINGLE_FLIGHT_RESULT_TTL_SECONDS.
+
+A job that finds a claim does not wait in the worker: it is re-queued
+every SINGLE_FLIGHT_DEFER_SECONDS (Celery countdown, or the queue's
+delayed set for the BRPOP loop) and tries again, then:
+- same document: reuses the leader's report when it completed; otherwise
+  (leader failed) claims and runs itself;
+- same PDF, other document: runs itself with the leader's extraction
+  available for reuse (see tasks/extract_pdf.py).
+A same-document duplicate still blocked SINGLE_FLIGHT_WAIT_SECONDS after
+its first try is dropped; a different document is never dropped, it runs
+once that time has passed.
+The Trigger runner (workers/trigger/src/pdf_runner.py) claims the document
+too. A run that finds it claimed exits at once with status "duplicate"
+(waiting would outlast the Trigger task's timeout); the run in flight saves
+the document's output and status.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Optional
+
+import redis
+from pydantic import BaseModel, Field
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of a claim, as counted in kratos_pdf_single_flight_total
+LEADER = "leader"
+DEFERRED = "deferred"  # re-queued while another job holds the claim
+REUSED = "reused"  # waited for the same document and reused its report
+DROPPED = "dropped"  # same document still in flight after the wait
+FOLLOWED = "followed"  # waited for the same PDF under another document
+
+
+def doc_key(document_id: str) -> str:
+    return f"{settings.single_flight_key}:doc:{document_id}"
+
+
+def hash_key(pdf_hash: str) -> str:
+    return f"{settings.single_flight_key}:hash:{pdf_hash}"
+
+
+def result_key(document_id: str) -> str:
+    return f"{settings.single_flight_key}:result:{document_id}"
+
+
+class Flight(BaseModel):
+    """A claim on a document (and its PDF hash) held by one job."""
+
+    document_id: str
+    keys: list[str]
+    token: str = Field(default_factory=lambda: uuid.uuid4().hex)
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def claim(
+    r: redis.Redis, document_id: str, pdf_hash: Optional[str] = None
+) -> tuple[Optional[Flight], Optional[str]]:
+    """
+    Claim the document (and hash) for this job.
+
+    Returns (flight, None) on success, or (None, blocking_key) with the
+    first key another job holds.
+    """
+    keys = [doc_key(document_id)] + ([hash_key(pdf_hash)] if pdf_hash else [])
+    flight = Flight(document_id=document_id, keys=keys)
+    lease_ms = int(settings.single_flight_lease_seconds * 1000)
+
+    def take(pipe) -> Optional[str]:
+        for key in keys:
+            if pipe.exists(key):
+                return key
+        pipe.multi()
+        for key in keys:
+            pipe.set(key, flight.token, px=lease_ms)
+        return None
+
+    blocking = r.transaction(take, *keys, value_from_callable=True)
+    return (None, blocking) if blocking else (flight, None)
+
+
+def renew(r: redis.Redis, flight: Flight) -> bool:
+    """Extend the lease on keys still holding the flight's token; False once any is lost."""
+    lease_ms = int(settings.single_flight_lease_seconds * 1000)
+
+    def extend(pipe) -> bool:
+        if any(v is None or _decode(v) != flight.token for v in pipe.mget(flight.keys)):
+            return False
+        pipe.multi()
+        for key in flight.keys:
+            pipe.pexpire(key, lease_ms)
+        return True
+
+    return r.transaction(extend, *flight.keys, value_from_callable=True)
+
+
+def release(r: redis.Redis, flight: Flight, report: Optional[dict] = None) -> None:
+    """Drop the keys the flight still holds and keep its report for duplicates."""
+
+    def drop(pipe) -> None:
+        owned = [
+            key for key, value in zip(flight.keys, pipe.mget(flight.keys))
+            if value is not None and _decode(value) == flight.token
+        ]
+        pipe.multi()
+        if report is not None:
+            pipe.set(result_key(flight.document_id), json.dumps(report),
+                     ex=settings.single_flight_result_ttl_seconds)
+        if owned:
+            pipe.delete(*owned)
+
+    r.transaction(drop, *flight.keys)
+
+
+def wait(r: redis.Redis, key: str, timeout: float, poll: Optional[float] = None) -> bool:
+    """Wait until key is released; False when it is still held after timeout."""
+    poll = settings.single_flight_poll_seconds if poll is None else poll
+    deadline = time.monotonic() + timeout
+    while r.exists(key):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(min(poll, max(0.0, deadline - time.monotonic())))
+    return True
+
+
+def last_result(r: redis.Redis, document_id: str) -> Optional[dict]:
+    """The report the document's last leader released with, if still kept."""
+    value = r.get(result_key(document_id))
+    return json.loads(value) if value else None
+
+
+class Renewer:
+    """Renews a flight's lease from a daemon thread until stopped."""
+
+    def __init__(self, r: redis.Redis, flight: Flight):
+        self.r = r
+        self.flight = flight
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"single-flight-{flight.document_id}", daemon=True
+        )
+
+    def __enter__(self) -> "Renewer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        interval = settings.single_flight_lease_seconds / 3
+        while not self._stop.wait(interval):
+            try:
+                if not renew(self.r, self.flight):
+                    logger.warning(f"[{self.flight.document_id}] Lost the single-flight lease")
+                    return
+            except redis.RedisError as e:
+                logger.warning(f"[{self.flight.document_id}] Could not renew single-flight lease: {e}")
@@ -1,39 +1,41 @@
 """
 KRATOS v2 — Storage Service
-Downloads PDFs from Supabase Storage to temp directory.
+Downloads PDFs from Supabase Storage to temp directory and reads/writes
+auxiliary objects (spilled extraction outputs) in the same bucket.
 """
 
 import logging
 from pathlib import Path
 from typing import Optional
 
-from supabase import create_client, Client
+from supabase import Client
 
 from src.config import settings
+from src.services import clients, metrics, pdf_cache
 
 logger = logging.getLogger(__name__)
 
-_client: Optional[Client] = None
-
 
 def _get_client() -> Client:
-    """Lazy-initialize Supabase client."""
-    global _client
-    if _client is None:
-        _client = create_client(
-            settings.supabase_url,
-            settings.supabase_service_role_key,
-        )
-    return _client
+    """Shared process-wide client (see services/clients.py)."""
+    return clients.get_client()
 
 
-def download_pdf(storage_path: str, document_id: str) -> Path:
+def download_pdf(
+    storage_path: str, document_id: str, expected_hash: Optional[str] = None
+) -> Path:
     """
     Download a PDF from Supabase Storage to a temp file.
 
-    Returns the local Path to the downloaded file.
+    Served from the node's source PDF cache when it holds the path (or, with
+    `expected_hash`, the same content), see services/pdf_cache.py. Returns
+    the local Path to the downloaded file.
     Raises if download fails or file exceeds size limit.
     """
+    pdf_path = settings.temp_dir / document_id / "document.pdf"
+    if settings.pdf_cache_enabled and _from_cache(storage_path, pdf_path, expected_hash):
+        return pdf_path
+
     client = _get_client()
     bucket = settings.storage_bucket
 
@@ -41,6 +43,7 @@ def download_pdf(storage_path: str, document_id: str) -> Path:
         data = client.storage.from_(bucket).download(storage_path)
     except Exception as e:
         raise RuntimeError(f"Storage download failed for {storage_path}: {e}") from e
+    metrics.DOWNLOAD_BYTES.observe(len(data))
 
     if len(data) > settings.max_pdf_size_bytes:
         raise RuntimeError(
@@ -48,16 +51,56 @@ def download_pdf(storage_path: str, document_id: str) -> Path:
             f"{settings.max_pdf_size_mb} MB"
         )
 
-    # Save to temp dir
-    temp_dir = settings.temp_dir / document_id
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    pdf_path = temp_dir / "document.pdf"
-    pdf_path.write_bytes(data)
+    # Save to temp dir (through the cache, which links its copy there)
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    if not (settings.pdf_cache_enabled and _to_cache(storage_path, data, pdf_path)):
+        pdf_path.write_bytes(data)
 
     logger.info(f"Downloaded {len(data)} bytes to {pdf_path}")
     return pdf_path
 
 
+def _from_cache(storage_path: str, pdf_path: Path, expected_hash: Optional[str]) -> bool:
+    """Cache problems are logged and never fail the download."""
+    try:
+        if pdf_cache.fetch(storage_path, pdf_path, expected_hash):
+            logger.info(f"Using cached {storage_path} at {pdf_path}")
+            return True
+    except OSError as e:
+        logger.warning(f"PDF cache lookup failed for {storage_path}: {e}")
+    return False
+
+
+def _to_cache(storage_path: str, data: bytes, pdf_path: Path) -> bool:
+    try:
+        pdf_cache.store(storage_path, data, pdf_path)
+        return True
+    except OSError as e:
+        logger.warning(f"Could not cache {storage_path}: {e}")
+        return False
+
+
+def upload_object(path: str, data: bytes, content_type: str = "application/octet-stream") -> None:
+    """Upload (or overwrite) an object in the storage bucket."""
+    client = _get_client()
+    try:
+        client.storage.from_(settings.storage_bucket).upload(
+            path, data, {"content-type": content_type, "upsert": "true"}
+        )
+    except Exception as e:
+        raise RuntimeError(f"Storage upload failed for {path}: {e}") from e
+    logger.debug(f"Uploaded {len(data)} bytes to {path}")
+
+
+def download_object(path: str) -> bytes:
+    """Download an object from the storage bucket."""
+    client = _get_client()
+    try:
+        return client.storage.from_(settings.storage_bucket).download(path)
+    except Exception as e:
+        raise RuntimeError(f"Storage download failed for {path}: {e}") from e
+
+
 def cleanup_temp_file(document_id: str) -> None:
     """Remove the temp directory for a document."""
     temp_dir = settings.temp_dir / document_id
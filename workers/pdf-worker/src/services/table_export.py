@@ -0,0 +1,194 @@
+"""
+KRATOS v2 — Columnar Table Export
+Flattens every extracted table of a document into one long-format columnar
+artifact (one row per data cell, with page/table/row/column indices) with
+typed `number` and `date` columns for cells recognised as Brazilian-formatted
+values ("R$ 1.234,56", "12,5%", "31/12/2024"). Written as Parquet or Arrow
+IPC next to the source PDF when TABLE_EXPORT_FORMAT is set.
+
+Requires the optional `pyarrow` package; parsing helpers do not.
+"""
+
+import logging
+import posixpath
+import re
+from datetime import date
+from typing import Any, Optional
+
+from src.config import settings
+from src.models.extraction import ExtractionResult
+from src.services import storage
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("arrow", "parquet")
+
+_SUFFIXES = {"arrow": ".tables.arrow", "parquet": ".tables.parquet"}
+
+# 1.234.567,89 / 1234,5 / 1.234 (thousands) / 1234
+_BR_NUMBER_RE = re.compile(r"^\d{1,3}(?:\.\d{3})+(?:,\d+)?$|^\d+(?:,\d+)?$")
+# 1,234,567.89 / 1.5 (only when unambiguous with the Brazilian form)
+_INTL_NUMBER_RE = re.compile(r"^\d{1,3}(?:,\d{3})+(?:\.\d+)?$|^\d+\.\d+$")
+_DMY_RE = re.compile(r"^(\d{1,2})[/.-](\d{1,2})[/.-](\d{2}|\d{4})$")
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+_CURRENCY_RE = re.compile(r"^(?:R\$|US\$|\$|€)\s*")
+
+
+def parse_number(text: str) -> Optional[float]:
+    """
+    Parse a numeric cell, preferring Brazilian notation.
+
+    Accepts currency prefixes (R$), percent suffixes, signs and accounting
+    parentheses: "R$ 1.234,56" -> 1234.56, "(1.000,00)" -> -1000.0,
+    "12,5%" -> 12.5. Returns None for anything else.
+    """
+    s = text.strip().replace("\u00a0", " ")
+    if not s:
+        return None
+    negative = False
+    if s.startswith("(") and s.endswith(")"):
+        negative, s = True, s[1:-1].strip()
+    if s[:1] in "-−":
+        negative, s = True, s[1:].strip()
+    elif s[:1] == "+":
+        s = s[1:].strip()
+    s = _CURRENCY_RE.sub("", s)
+    if s.endswith("-"):  # "1.234,56-" (debit notation in statements)
+        negative, s = True, s[:-1].strip()
+    s = s.removesuffix("%").strip().replace(" ", "")
+
+    if _BR_NUMBER_RE.match(s):
+        value = float(s.replace(".", "").replace(",", "."))
+    elif _INTL_NUMBER_RE.match(s):
+        value = float(s.replace(",", ""))
+    else:
+        return None
+    return -value if negative else value
+
+
+def parse_date(text: str) -> Optional[date]:
+    """Parse dd/mm/yyyy (also "-", "." and 2-digit years) or ISO yyyy-mm-dd."""
+    s = text.strip()
+    try:
+        if m := _ISO_DATE_RE.match(s):
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        if m := _DMY_RE.match(s):
+            day, month, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
+            if len(m.group(3)) == 2:
+                year += 2000 if year < 70 else 1900
+            return date(year, month, day)
+    except ValueError:
+        return None
+    return None
+
+
+def table_columns(result: ExtractionResult) -> dict[str, list[Any]]:
+    """
+    Long-format column lists for all tables of a result.
+
+    `table_index` counts tables across the document, `row` counts data rows
+    (the header row is exposed through `header`), `value_type` is one of
+    number/date/text/empty.
+    """
+    columns: dict[str, list[Any]] = {
+        "document_id": [], "page": [], "table_index": [], "row": [], "col": [],
+        "header": [], "text": [], "value_type": [], "number": [], "date": [],
+    }
+    for t_idx, table in enumerate(result.tables):
+        for r_idx, row in enumerate(table.raw_rows):
+            for c_idx, text in enumerate(row):
+                parsed_date = parse_date(text)
+                number = None if parsed_date else parse_number(text)
+                if parsed_date:
+                    value_type = "date"
+                elif number is not None:
+                    value_type = "number"
+                else:
+                    value_type = "text" if text else "empty"
+                columns["document_id"].append(result.document_id)
+                columns["page"].append(table.page)
+                columns["table_index"].append(t_idx)
+                columns["row"].append(r_idx)
+                columns["col"].append(c_idx)
+                columns["header"].append(
+                    table.headers[c_idx] if c_idx < len(table.headers) else ""
+                )
+                columns["text"].append(text)
+                columns["value_type"].append(value_type)
+                columns["number"].append(number)
+                columns["date"].append(parsed_date)
+    return columns
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401 — loads the parquet submodule
+    except ImportError as e:
+        raise RuntimeError(
+            "TABLE_EXPORT_FORMAT requires the 'pyarrow' package (pip install pyarrow)"
+        ) from e
+    return pyarrow
+
+
+def to_arrow(result: ExtractionResult):
+    """All tables of a result as a pyarrow.Table (see table_columns)."""
+    pa = _pyarrow()
+    schema = pa.schema([
+        ("document_id", pa.dictionary(pa.int32(), pa.string())),
+        ("page", pa.int32()),
+        ("table_index", pa.int32()),
+        ("row", pa.int32()),
+        ("col", pa.int32()),
+        ("header", pa.dictionary(pa.int32(), pa.string())),
+        ("text", pa.string()),
+        ("value_type", pa.dictionary(pa.int8(), pa.string())),
+        ("number", pa.float64()),
+        ("date", pa.date32()),
+    ])
+    return pa.Table.from_pydict(table_columns(result), schema=schema)
+
+
+def serialize(result: ExtractionResult, fmt: str) -> bytes:
+    """Encode the tables as a Parquet file or an Arrow IPC file."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown TABLE_EXPORT_FORMAT '{fmt}' (expected one of {EXPORT_FORMATS})")
+    pa = _pyarrow()
+    table = to_arrow(result)
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        pa.parquet.write_table(table, sink, compression="zstd")
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def artifact_key(storage_path: str, document_id: str, fmt: str) -> str:
+    """Object key next to the source PDF, e.g. `<user>/<doc>/<doc>.tables.parquet`."""
+    name = f"{document_id}{_SUFFIXES[fmt]}"
+    parent = posixpath.dirname(storage_path)
+    return posixpath.join(parent, name) if parent else name
+
+
+def export_tables(result: ExtractionResult, storage_path: str) -> Optional[str]:
+    """
+    Upload the document's tables in TABLE_EXPORT_FORMAT next to the PDF.
+
+    Returns the object key, or None when export is off or there are no tables.
+    """
+    fmt = settings.table_export_format
+    if not fmt or not result.tables:
+        return None
+    data = serialize(result, fmt)
+    key = artifact_key(storage_path, result.document_id, fmt)
+    content_type = (
+        "application/vnd.apache.parquet" if fmt == "parquet"
+        else "application/vnd.apache.arrow.file"
+    )
+    storage.upload_object(key, data, content_type=content_type)
+    logger.info(
+        f"[{result.document_id}] Exported {len(result.tables)} tables to {key} "
+        f"({len(data)} bytes)"
+    )
+    return key
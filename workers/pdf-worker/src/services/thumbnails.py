@@ -0,0 +1,213 @@
+"""
+KRATOS v2 — Page Thumbnails and Previews
+Renders every page to a small thumbnail and a screen-size preview (WebP)
+while the pipeline extracts text, and uploads them next to the PDF so the
+review UI loads images of the pages in view instead of rendering the PDF
+client-side:
+
+  <user>/<doc>/pages/<n>.thumb.webp
+  <user>/<doc>/pages/<n>.preview.webp
+  <user>/<doc>/<doc>.pages.json     manifest: page sizes and keys
+
+Pages render in grayscale (THUMBNAIL_GRAYSCALE). Previews of pages without
+images (typed text) are lossless WebP, which keeps text sharp and is
+smaller than lossy at that size; pages with images (scans, stamps) and all
+thumbnails are lossy at THUMBNAIL_QUALITY.
+
+pdfium objects are not thread-safe, so rendering runs in a separate
+process (THUMBNAIL_WORKERS, 0 = inline after extraction). Pages are
+rendered one at a time and written to the job's temp dir, and a page bitmap
+never exceeds THUMBNAIL_MAX_PIXELS, so the renderer's memory does not grow
+with the document.
+"""
+
+import json
+import logging
+import math
+import multiprocessing
+import posixpath
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from pydantic import BaseModel
+
+from src.config import settings
+from src.services import storage
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = ".pages.json"
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class PagePreview(BaseModel):
+    page: int
+    # Page size in PDF points and of the rendered preview in pixels
+    width_pt: float
+    height_pt: float
+    width: int
+    height: int
+    thumb: str = ""  # file name in the job dir, then storage key
+    preview: str = ""
+
+
+def _scale(width_pt: float, height_pt: float, width_px: int, max_pixels: int) -> float:
+    """Render scale (pixels per point) for width_px, capped by max_pixels."""
+    scale = min(width_px / width_pt, math.sqrt(max_pixels / (width_pt * height_pt)))
+    # pypdfium2 rounds the bitmap size up
+    while math.ceil(width_pt * scale) > width_px:
+        scale = math.nextafter(scale, 0)
+    while math.ceil(width_pt * scale) * math.ceil(height_pt * scale) > max_pixels:
+        scale *= 0.99
+    return scale
+
+
+def render_pages(pdf_path: str, out_dir: str, options: dict) -> list[dict]:
+    """
+    Render each page's preview and thumbnail into out_dir.
+
+    Runs in the renderer process; options carries the THUMBNAIL_* settings
+    (the parent's values, not the child's environment).
+    """
+    out = Path(out_dir)
+    previews = []
+    doc = pdfium.PdfDocument(pdf_path)
+    try:
+        for i in range(len(doc)):
+            page = doc[i]
+            try:
+                width_pt, height_pt = page.get_size()
+                scale = _scale(width_pt, height_pt, options["preview_width"], options["max_pixels"])
+                has_images = next(iter(page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,))), None)
+                bitmap = page.render(scale=scale, grayscale=options["grayscale"], may_draw_forms=False)
+                try:
+                    image = bitmap.to_pil()
+                finally:
+                    bitmap.close()
+            finally:
+                page.close()
+            preview = f"page-{i + 1:05d}.preview.webp"
+            if has_images is None:
+                image.save(out / preview, "WEBP", lossless=True, method=1)
+            else:
+                image.save(out / preview, "WEBP", quality=options["quality"], method=2)
+            width, height = image.size
+            thumb_height = max(1, round(height * options["thumb_width"] / width))
+            thumb = f"page-{i + 1:05d}.thumb.webp"
+            image.thumbnail((options["thumb_width"], thumb_height))
+            image.save(out / thumb, "WEBP", quality=options["quality"], method=2)
+            image.close()
+            previews.append(PagePreview(
+                page=i + 1, width_pt=round(width_pt, 2), height_pt=round(height_pt, 2),
+                width=width, height=height, thumb=thumb, preview=preview,
+            ).model_dump())
+    finally:
+        doc.close()
+    return previews
+
+
+def _options() -> dict:
+    return {
+        "preview_width": settings.preview_width,
+        "thumb_width": settings.thumbnail_width,
+        "quality": settings.thumbnail_quality,
+        "max_pixels": settings.thumbnail_max_pixels,
+        "grayscale": settings.thumbnail_grayscale,
+    }
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Shared renderer processes, started on first use (spawned: no forked locks)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.thumbnail_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+class Render:
+    """A page render started next to extraction; collect() waits for it."""
+
+    def __init__(self, pdf_path: Path, future: Optional[Future] = None):
+        self.pdf_path = pdf_path
+        self.future = future
+        self.started = time.monotonic()
+
+    def collect(self) -> list[PagePreview]:
+        out_dir = str(self.pdf_path.parent)
+        if self.future is None:
+            pages = render_pages(str(self.pdf_path), out_dir, _options())
+        else:
+            pages = self.future.result(timeout=settings.thumbnail_timeout_seconds)
+        return [PagePreview(**page) for page in pages]
+
+    def discard(self) -> None:
+        """Wait out a render whose job failed, so its files can be cleaned up."""
+        if self.future is not None:
+            try:
+                self.future.result(timeout=settings.thumbnail_timeout_seconds)
+            except Exception:
+                pass
+
+
+def start(pdf_path: Path) -> Optional[Render]:
+    """Start rendering pdf_path's pages; None when THUMBNAILS_ENABLED is off."""
+    if not settings.thumbnails_enabled:
+        return None
+    if settings.thumbnail_workers <= 0:
+        return Render(pdf_path)
+    future = _get_pool().submit(render_pages, str(pdf_path), str(pdf_path.parent), _options())
+    return Render(pdf_path, future)
+
+
+def manifest_key(storage_path: str, document_id: str) -> str:
+    """Object key next to the source PDF, e.g. `<user>/<doc>/<doc>.pages.json`."""
+    name = f"{document_id}{MANIFEST_SUFFIX}"
+    parent = posixpath.dirname(storage_path)
+    return posixpath.join(parent, name) if parent else name
+
+
+def export_previews(render: Render, storage_path: str, document_id: str) -> str:
+    """
+    Collect a render and upload its images and manifest next to the PDF.
+
+    Images go up concurrently (THUMBNAIL_UPLOAD_CONCURRENCY); the manifest
+    is written last, so a manifest always points at uploaded images.
+    Returns the manifest key.
+    """
+    pages = render.collect()
+    local_dir = render.pdf_path.parent
+    prefix = posixpath.join(posixpath.dirname(storage_path), "pages")
+    uploads = []
+    for page in pages:
+        for kind in ("thumb", "preview"):
+            name = getattr(page, kind)
+            key = posixpath.join(prefix, f"{page.page}.{kind}.webp")
+            uploads.append((local_dir / name, key))
+            setattr(page, kind, key)
+
+    def _upload(item: tuple[Path, str]) -> int:
+        path, key = item
+        data = path.read_bytes()
+        storage.upload_object(key, data, content_type="image/webp")
+        path.unlink()
+        return len(data)
+
+    with ThreadPoolExecutor(max_workers=settings.thumbnail_upload_concurrency) as pool:
+        uploaded = sum(pool.map(_upload, uploads))
+
+    key = manifest_key(storage_path, document_id)
+    manifest = {"document_id": document_id, "pages": [p.model_dump() for p in pages]}
+    storage.upload_object(key, json.dumps(manifest).encode(), content_type="application/json")
+    logger.info(
+        f"[{document_id}] Page previews: {len(pages)} pages, {uploaded} bytes -> {key} "
+        f"({time.monotonic() - render.started:.1f}s)"
+    )
+    return key
@@ -0,0 +1,98 @@
+"""
+KRATOS v2 — Token Estimates
+Approximate LLM token counts of an extraction, per page, per section and in
+total, plus the input cost of sending the whole text to each analysis model
+(ExtractionMetadata.tokens). Routing, chunking and budget decisions read
+these instead of tokenizing raw_text again on every analysis.
+
+The estimate mimics a subword (BPE / SentencePiece) tokenizer on Portuguese
+text: a word costs one token per TOKEN_CHARS_PER_WORD_TOKEN characters
+(rounded up), digit runs one per three digits, every other symbol one, and
+each line break run one. TOKEN_CALIBRATION scales that base count to each
+provider's tokenizer. Its defaults are uncalibrated placeholders (no
+provider counts have been fitted yet): fit them against real counts with
+benchmarks/bench_tokens.py --samples.
+"""
+
+import bisect
+import re
+from array import array
+from itertools import accumulate
+
+from src.config import settings
+from src.models.extraction import DocumentSection, PageContent, TokenEstimate
+
+# Words, digit runs, single symbols and line-break runs; plain spaces are
+# merged into the following word by subword tokenizers and cost nothing
+_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|\n+|[^\w\s]|_")
+
+# Model id prefix -> provider key of TOKEN_CALIBRATION
+_PROVIDERS = {"claude": "anthropic", "gemini": "google"}
+
+
+def _piece_tokens(piece: str) -> int:
+    first = piece[0]
+    if first.isdigit():
+        return -(-len(piece) // 3)
+    if first.isalpha():
+        return -(-len(piece) // settings.token_chars_per_word_token)
+    return 1
+
+
+def count(text: str) -> int:
+    """Base (provider-neutral) token estimate of text."""
+    return sum(_piece_tokens(m.group(0)) for m in _PIECE_RE.finditer(text))
+
+
+def provider(model: str) -> str:
+    """Provider key of a model id ("claude-sonnet-4" -> "anthropic")."""
+    return _PROVIDERS.get(model.split("-", 1)[0], model)
+
+
+def for_model(base: int, model: str) -> int:
+    """Base count scaled to the tokenizer of model's provider."""
+    return round(base * settings.token_calibration.get(provider(model), 1.0))
+
+
+def estimate(
+    raw_text: str, pages: list[PageContent], document_sections: list[DocumentSection]
+) -> TokenEstimate:
+    """
+    Token counts of raw_text and of each page and section, in one pass.
+
+    Pages and sections must carry their raw_text offsets (see
+    chunking.build_raw_text and sections.segment).
+    """
+    ends = array("I")
+    weights = []
+    per_word = settings.token_chars_per_word_token
+    for m in _PIECE_RE.finditer(raw_text):
+        start, end = m.span()
+        first = raw_text[start]
+        ends.append(end)
+        # _piece_tokens, inlined: this loop runs once per word of the document
+        if first.isalpha():
+            weights.append(-((start - end) // per_word))
+        elif first.isdigit():
+            weights.append(-((start - end) // 3))
+        else:
+            weights.append(1)
+    cumulative = [0, *accumulate(weights)]
+
+    def span(start: int, end: int) -> int:
+        # Pieces ending inside (start, end]; pages and sections start after
+        # a separator or line break, so no piece straddles them
+        return cumulative[bisect.bisect_right(ends, end)] - cumulative[bisect.bisect_right(ends, start)]
+
+    total = cumulative[-1]
+    calibration = settings.token_calibration
+    return TokenEstimate(
+        total=total,
+        pages=[span(p.char_start, p.char_end) for p in pages],
+        sections=[span(s.char_start, s.char_end) for s in document_sections],
+        providers={name: round(total * ratio) for name, ratio in calibration.items()},
+        input_cost_usd={
+            model: round(for_model(total, model) * usd / 1_000_000, 6)
+            for model, usd in settings.token_input_usd_per_mtok.items()
+        },
+    )
@@ -0,0 +1,233 @@
+"""
+KRATOS v2 — Lightweight Span Tracing
+Span API around job steps, pipeline stages and (optionally) pages, with W3C
+`traceparent` propagation from the job payload so worker spans join the
+caller's trace. Finished traces are exported as OTLP/JSON — one line per
+trace to TRACE_FILE (works offline) and, if TRACE_OTLP_ENDPOINT is set,
+POSTed to an OTLP/HTTP collector.
+
+Disabled by default (TRACING_ENABLED=false): span() then returns a shared
+no-op object. Overhead when enabled is bounded by TRACE_SAMPLE_RATE and
+TRACE_MAX_SPANS per trace.
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "kratos-pdf-worker"
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP status codes
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+_write_lock = threading.Lock()
+
+
+class _Trace:
+    """Spans buffered for one trace in this process; exported when the root ends."""
+
+    __slots__ = ("trace_id", "spans", "dropped")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: list[dict] = []
+        self.dropped = 0
+
+
+class Span:
+    """A timed operation. Use as a context manager (see span/start_trace)."""
+
+    __slots__ = ("name", "span_id", "parent_id", "attributes", "_trace", "_start",
+                 "_token", "_is_root")
+
+    def __init__(self, name: str, trace: _Trace, parent_id: Optional[str],
+                 attributes: dict, is_root: bool = False):
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self._trace = trace
+        self._start = 0
+        self._token = None
+        self._is_root = is_root
+
+    @property
+    def trace_id(self) -> str:
+        return self._trace.trace_id
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self._trace.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._start = time.time_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        end = time.time_ns()
+        _current.reset(self._token)
+        trace = self._trace
+        if len(trace.spans) < settings.trace_max_spans or self._is_root:
+            status = {"code": _STATUS_OK}
+            if exc is not None:
+                status = {"code": _STATUS_ERROR, "message": f"{exc_type.__name__}: {exc}"}
+            if self._is_root and trace.dropped:
+                self.attributes["kratos.dropped_spans"] = trace.dropped
+            trace.spans.append({
+                "traceId": trace.trace_id,
+                "spanId": self.span_id,
+                "parentSpanId": self.parent_id or "",
+                "name": self.name,
+                "kind": 1,  # INTERNAL
+                "startTimeUnixNano": str(self._start),
+                "endTimeUnixNano": str(end),
+                "attributes": [_attr(k, v) for k, v in self.attributes.items()],
+                "status": status,
+            })
+        else:
+            trace.dropped += 1
+        if self._is_root:
+            _export(trace)
+        return False
+
+
+class _NoopSpan:
+    """Returned when tracing is off or the trace is not sampled."""
+
+    __slots__ = ()
+    trace_id = ""
+    span_id = ""
+    traceparent = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+_current: ContextVar[Optional[Span]] = ContextVar("kratos_span", default=None)
+
+
+def _attr(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    """Parse a W3C traceparent into (trace_id, parent_span_id, sampled)."""
+    if not value:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if not match or match.group(1) == "0" * 32:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    return trace_id, parent_id, bool(int(flags, 16) & 0x01)
+
+
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes: Any):
+    """
+    Open the root span of a job in this process.
+
+    Joins the caller's trace when a valid traceparent is given (honouring
+    its sampled flag); otherwise starts a new trace sampled at
+    TRACE_SAMPLE_RATE. Spans are exported when this span ends.
+    """
+    if not settings.tracing_enabled:
+        return _NOOP
+    parent = parse_traceparent(traceparent)
+    if parent:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+        sampled = random.random() < settings.trace_sample_rate
+    if not sampled:
+        return _NOOP
+    return Span(name, _Trace(trace_id), parent_id, attributes, is_root=True)
+
+
+def span(name: str, **attributes: Any):
+    """Open a child span of the current span; a no-op outside a sampled trace."""
+    parent = _current.get()
+    if parent is None:
+        return _NOOP
+    return Span(name, parent._trace, parent.span_id, attributes)
+
+
+def page_span(page_number: int):
+    """Per-page span, only when TRACE_PAGES is enabled."""
+    if not settings.trace_pages:
+        return _NOOP
+    return span("page", **{"pdf.page": page_number})
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent of the active span, for propagating to downstream jobs."""
+    current = _current.get()
+    return current.traceparent if current is not None else None
+
+
+def _otlp_payload(trace: _Trace) -> dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attr("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": "kratos.pdf-worker"},
+                "spans": trace.spans,
+            }],
+        }]
+    }
+
+
+def _post(endpoint: str, body: bytes) -> None:
+    try:
+        req = urllib.request.Request(
+            endpoint, data=body, headers={"Content-Type": "application/json"}
+        )
+        urllib.request.urlopen(req, timeout=5).close()
+    except Exception as e:
+        logger.warning(f"OTLP export to {endpoint} failed: {e}")
+
+
+def _export(trace: _Trace) -> None:
+    """Write a finished trace to TRACE_FILE and/or the OTLP endpoint; never raises."""
+    body = json.dumps(_otlp_payload(trace), separators=(",", ":"))
+    if settings.trace_file:
+        try:
+            settings.trace_file.parent.mkdir(parents=True, exist_ok=True)
+            with _write_lock, open(settings.trace_file, "a") as f:
+                f.write(body + "\n")
+        except OSError as e:
+            logger.warning(f"Trace file export failed: {e}")
+    if settings.trace_otlp_endpoint:
+        threading.Thread(
+            target=_post,
+            args=(settings.trace_otlp_endpoint, body.encode()),
+            daemon=True,
+        ).start()
@@ -6,15 +6,34 @@ Both call process_pdf_job() which runs the extraction pipeline.
 
 import json
 import logging
+import os
 import time
+from typing import Optional
 
 import redis
+from celery.signals import worker_init, worker_process_shutdown
 
 from src.celery_app import app
 from src.config import settings
 from src.models.extraction import DocumentStatus
 from src.pipeline import PipelineError, run_pipeline
-from src.services import database, storage
+from src.services import (
+    database,
+    fair_queue,
+    metrics,
+    normalization,
+    profiling,
+    progress,
+    queue,
+    reextraction,
+    runtime_model,
+    search_index,
+    single_flight,
+    storage,
+    table_export,
+    thumbnails,
+    tracing,
+)
 
 logging.basicConfig(
     level=getattr(logging, settings.log_level, logging.INFO),
@@ -23,22 +42,214 @@ logging.basicConfig(
 logger = logging.getLogger("kratos.pdf-worker")
 
 
-def process_pdf_job(job: dict) -> None:
-    """Process a single PDF extraction job through the pipeline."""
+def process_pdf_job(job: dict) -> dict:
+    """
+    Process a single PDF extraction job through the pipeline.
+
+    Returns a job report: documentId, final status, page count and
+    per-stage timings in seconds (queue_wait, download, extract, persist,
+    total, plus the pipeline's own stages). The report is also pushed to
+    JOB_REPORT_KEY when configured. With PROFILE_JOBS=true the job is
+    stack-sampled (see services/profiling.py); with TRACING_ENABLED=true it
+    is traced, joining the caller's trace via job["traceparent"]. Timings,
+    status and failures feed the process metrics (services/metrics.py).
+    A duplicate of a job already in flight does not run again (status
+    "duplicate"), or is handed back to be re-queued after report["retryIn"]
+    seconds (status "deferred", see _run_single_flight). Progress events (stage, pages,
+    ETA) go to the document's Redis stream (services/progress.py).
+    """
     document_id = job["documentId"]
-    file_path = job["filePath"]
+    started = time.monotonic()
+    report: dict = {"documentId": document_id, "status": DocumentStatus.failed.value}
+    timings: dict[str, float] = {}
+    if "enqueuedAt" in job:
+        timings["queue_wait"] = max(0.0, time.time() - float(job["enqueuedAt"]))
+        metrics.TENANT_QUEUE_WAIT_SECONDS.labels(
+            fair_queue.tenant_label(fair_queue.tenant_of(job))
+        ).observe(timings["queue_wait"])
+
+    root = tracing.start_trace(
+        "process_pdf_job", traceparent=job.get("traceparent"), **{"document.id": document_id}
+    )
+    with root, profiling.profiled_job(document_id) as profile, \
+            metrics.JOBS_IN_FLIGHT.track_inprogress(), progress.tracking(document_id):
+        _run_single_flight(job, report, timings)
+        profile.annotate(page_count=report.get("pages"), **timings)
+        root.set_attribute("job.status", report["status"])
+        if "pages" in report:
+            root.set_attribute("pdf.pages", report["pages"])
+
+    timings["total"] = time.monotonic() - started
+    report["timings"] = {k: round(v, 4) for k, v in timings.items()}
+    metrics.record_job(report)
+    _publish_report(report)
+    return report
+
+
+def _run_single_flight(job: dict, report: dict, timings: dict) -> None:
+    """
+    _run_job under the job's single-flight claim (services/single_flight.py).
+
+    The claim is renewed while the job runs and released with its report.
+    A duplicate of the same document either reuses the leader's report or
+    is dropped; it never touches the document's status or temp dir, which
+    belong to the leader. Without Redis the job runs unguarded.
+    """
+    document_id, file_path = job["documentId"], job["filePath"]
+    pdf_hash = job.get("pdfHash")
+    if not settings.single_flight_enabled:
+        _run_job(document_id, file_path, report, timings, pdf_hash)
+        return
+    try:
+        r = queue._get_redis()
+        flight, followed = _claim(r, job, report)
+    except redis.RedisError as e:
+        logger.warning(f"Single-flight unavailable, running {document_id} unguarded: {e}")
+        _run_job(document_id, file_path, report, timings, pdf_hash)
+        return
+    if flight is None:
+        return
+    try:
+        with single_flight.Renewer(r, flight):
+            _run_job(document_id, file_path, report, timings, pdf_hash, reuse=followed)
+    finally:
+        try:
+            single_flight.release(r, flight, dict(report, timings=timings))
+        except redis.RedisError as e:
+            logger.warning(f"Could not release single-flight claim on {document_id}: {e}")
+
+
+def _claim(
+    r: redis.Redis, job: dict, report: dict
+) -> tuple[Optional[single_flight.Flight], bool]:
+    """
+    Claim the document (and PDF hash) without waiting in the worker.
+
+    A job blocked by another in flight is deferred: the report gets status
+    "deferred" and retryIn (SINGLE_FLIGHT_DEFER_SECONDS), and
+    job["singleFlight"] records since when and on what it waits, for the
+    caller to re-queue it. Once SINGLE_FLIGHT_WAIT_SECONDS have passed, a
+    same-document duplicate is dropped and a different document stops
+    waiting for the PDF and runs.
+
+    Returns (flight, followed): followed when the job waited for the same
+    PDF under another document, so its extraction can be reused. Returns
+    (None, False) when the job must not run now, with report filled in.
+    """
+    document_id = job["documentId"]
+    own_key = single_flight.doc_key(document_id)
+    waiting = job.get("singleFlight") or {}
+    since = waiting.get("since", time.time())
+    expired = time.time() - since >= settings.single_flight_wait_seconds
+    followed = waiting.get("on") == "hash"
+
+    flight, blocking = single_flight.claim(r, document_id, job.get("pdfHash"))
+    if flight is None and blocking != own_key and expired:
+        # The other document is still running: claim ours only, never drop
+        followed = True
+        flight, blocking = single_flight.claim(r, document_id)
+    if flight is None:
+        if expired and blocking == own_key:
+            _duplicate(report, single_flight.DROPPED)
+            return None, False
+        job["singleFlight"] = {
+            "since": since,
+            "on": "doc" if blocking == own_key else "hash",
+        }
+        metrics.SINGLE_FLIGHT.labels(single_flight.DEFERRED).inc()
+        report["status"] = "deferred"
+        report["retryIn"] = settings.single_flight_defer_seconds
+        logger.info(f"[{document_id}] Deferred behind in-flight job on {blocking}")
+        return None, False
+
+    if waiting.get("on") == "doc":
+        previous = single_flight.last_result(r, document_id)
+        if previous and previous.get("status") == DocumentStatus.completed.value:
+            single_flight.release(r, flight)
+            _duplicate(report, single_flight.REUSED, previous)
+            return None, False
+        # The leader failed: run the job again
+    metrics.SINGLE_FLIGHT.labels(
+        single_flight.FOLLOWED if followed else single_flight.LEADER
+    ).inc()
+    return flight, followed
+
+
+def _duplicate(report: dict, outcome: str, previous: Optional[dict] = None) -> None:
+    """Fill a duplicate's report and count the work the leader saved it."""
+    metrics.SINGLE_FLIGHT.labels(outcome).inc()
+    report["status"] = "duplicate"
+    report["duplicate"] = outcome
+    if previous:
+        report["pages"] = previous.get("pages")
+        leader = previous.get("timings", {})
+        metrics.DUPLICATE_PAGES_AVOIDED.inc(previous.get("pages") or 0)
+        metrics.DUPLICATE_SECONDS_AVOIDED.inc(leader.get("download", 0.0) + leader.get("extract", 0.0))
+    logger.info(f"[{report['documentId']}] Duplicate job {outcome}")
+
 
+def _run_job(
+    document_id: str, file_path: str, report: dict, timings: dict,
+    pdf_hash: Optional[str] = None, reuse: bool = False,
+) -> None:
+    """
+    Download → extract → persist, updating status and filling report/timings.
+
+    With reuse, a current extraction of the same pdf_hash (left by the job
+    this one waited for) is copied instead of downloading and extracting.
+    The runtime model (services/runtime_model.py) sets the extraction's time
+    limit and processes, and learns from its timings; download and persist
+    get STAGE_TIMEOUT_SECONDS each.
+    """
+    render = None
+    progress.start()
     try:
-        # 1. Downloading
-        database.update_document_status(document_id, DocumentStatus.downloading.value)
-        pdf_path = storage.download_pdf(file_path, document_id)
+        result = _reuse_extraction(document_id, pdf_hash) if reuse and pdf_hash else None
+        if result is None:
+            # 1. Downloading
+            database.update_document_status(document_id, DocumentStatus.downloading.value)
+            progress.stage("download")
+            stage_start = time.monotonic()
+            with tracing.span("storage.download_pdf", **{"storage.path": file_path}), \
+                    runtime_model.deadline(settings.stage_timeout_seconds, "download time limit"):
+                pdf_path = storage.download_pdf(file_path, document_id, pdf_hash)
+            timings["download"] = time.monotonic() - stage_start
 
-        # 2. Extracting
-        database.update_document_status(document_id, DocumentStatus.extracting.value)
-        result = run_pipeline(document_id, pdf_path)
+            # 2. Extracting (page thumbnails render alongside, if enabled)
+            database.update_document_status(document_id, DocumentStatus.extracting.value)
+            plan = _plan_runtime(document_id, pdf_path, report)
+            if plan is not None:
+                progress.predict(plan.predicted_seconds / plan.workers)
+            render = _start_previews(pdf_path)
+            stage_start = time.monotonic()
+            with tracing.span("run_pipeline"), \
+                    runtime_model.deadline(plan.timeout_seconds if plan else None):
+                result = run_pipeline(document_id, pdf_path, workers=plan.workers if plan else 1)
+            timings["extract"] = time.monotonic() - stage_start
+            if plan is not None:
+                _record_runtime(plan, result, timings)
 
-        # 3. Save extraction
-        database.save_extraction(document_id, result)
+        # 3. Save extraction and page rows (and the columnar table export, if enabled)
+        progress.stage("persist")
+        stage_start = time.monotonic()
+        with runtime_model.deadline(settings.stage_timeout_seconds, "persist time limit"):
+            with tracing.span("storage.export_tables"):
+                result.metadata.tables_artifact = _export_tables(result, file_path)
+            with tracing.span("storage.export_search_index"):
+                result.metadata.search_index = _export_search_index(result, file_path)
+            with tracing.span("storage.export_offsets"):
+                result.metadata.text_offsets = _export_offsets(result, file_path)
+            if render is not None:
+                with tracing.span("storage.export_previews"):
+                    result.metadata.page_previews = _export_previews(render, file_path, document_id)
+            with tracing.span("database.save_extraction"):
+                database.save_extraction(document_id, result, storage_path=file_path)
+            if settings.page_rows_enabled:
+                with tracing.span("database.save_pages", **{"pdf.pages": len(result.pages)}):
+                    database.save_pages(document_id, result)
+        timings["persist"] = time.monotonic() - stage_start
+        if "extract" in timings:
+            timings.update(result.metadata.stage_timings)
 
         # 4. Completed
         database.update_document_status(
@@ -46,16 +257,26 @@ def process_pdf_job(job: dict) -> None:
             DocumentStatus.completed.value,
             pages=result.metadata.total_pages,
         )
+        report["status"] = DocumentStatus.completed.value
+        report["pages"] = result.metadata.total_pages
+        progress.finish(report["status"], pages=report["pages"])
         logger.info(f"Completed document {document_id}")
 
     except PipelineError as e:
         logger.warning(f"Pipeline validation failed for {document_id}: {e}")
+        metrics.JOB_FAILURES.labels("pipeline_error").inc()
+        report["error"] = str(e)
+        progress.finish(DocumentStatus.failed.value, error=str(e))
         database.update_document_status(
             document_id, DocumentStatus.failed.value, error_message=str(e)
         )
 
     except Exception as e:
         logger.error(f"Failed document {document_id}: {e}")
+        timed_out = isinstance(e, runtime_model.JobTimeoutError)
+        metrics.JOB_FAILURES.labels("timeout" if timed_out else "unexpected").inc()
+        report["error"] = str(e)
+        progress.finish(DocumentStatus.failed.value, error=str(e))
         try:
             database.update_document_status(
                 document_id, DocumentStatus.failed.value, error_message=str(e)
@@ -64,9 +285,122 @@ def process_pdf_job(job: dict) -> None:
             logger.error(f"Failed to update status for {document_id}: {db_err}")
 
     finally:
+        if render is not None:
+            render.discard()
         storage.cleanup_temp_file(document_id)
 
 
+def _plan_runtime(document_id: str, pdf_path, report: dict) -> Optional[runtime_model.Plan]:
+    """Runtime prediction for the job; None (static limits, one core) if it cannot be made."""
+    if not settings.runtime_model_enabled:
+        return None
+    try:
+        plan = runtime_model.plan(pdf_path, queue._get_redis())
+    except Exception as e:  # an unreadable PDF fails in the pipeline, with its own error
+        logger.warning(f"Could not predict the runtime of {document_id}: {e}")
+        return None
+    report["predictedSeconds"] = plan.predicted_seconds
+    report["timeLimitSeconds"] = plan.timeout_seconds
+    report["extractionWorkers"] = plan.workers
+    logger.info(
+        f"[{document_id}] Predicted {plan.predicted_seconds:.1f}s for {plan.features.pages} pages: "
+        f"limit {plan.timeout_seconds:.0f}s, {plan.workers} extraction process(es)"
+    )
+    return plan
+
+
+def _record_runtime(plan: runtime_model.Plan, result, timings: dict) -> None:
+    try:
+        runtime_model.record(
+            queue._get_redis(), plan, timings["extract"],
+            dict(result.metadata.stage_timings, **timings), result.metadata.total_tables,
+        )
+    except redis.RedisError as e:
+        logger.warning(f"Could not record the runtime of {result.document_id}: {e}")
+
+
+def _reuse_extraction(document_id: str, pdf_hash: str):
+    """Copy of the same PDF's current extraction, counted as avoided work; None if there is none."""
+    try:
+        result = reextraction.find_reusable(document_id, pdf_hash)
+    except Exception as e:
+        logger.warning(f"Could not look up a reusable extraction for {document_id}: {e}")
+        return None
+    if result is None:
+        return None
+    # Previews are per document (and per owner): never point at the other one's
+    result.metadata.page_previews = ""
+    metrics.DUPLICATE_PAGES_AVOIDED.inc(result.metadata.total_pages)
+    metrics.DUPLICATE_SECONDS_AVOIDED.inc(result.metadata.processing_time_seconds)
+    logger.info(f"[{document_id}] Reusing the extraction of identical PDF {pdf_hash}")
+    return result
+
+
+def _export_tables(result, file_path: str) -> str:
+    """Columnar table export; failures are logged and never fail the job."""
+    try:
+        return table_export.export_tables(result, file_path) or ""
+    except runtime_model.JobTimeoutError:  # the persist stage's limit still fails the job
+        raise
+    except Exception as e:
+        logger.error(f"Table export failed for {result.document_id}: {e}")
+        return ""
+
+
+def _export_search_index(result, file_path: str) -> str:
+    """Search index upload; failures are logged and never fail the job."""
+    try:
+        return search_index.export_index(result, file_path) or ""
+    except runtime_model.JobTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Search index export failed for {result.document_id}: {e}")
+        return ""
+
+
+def _export_offsets(result, file_path: str) -> str:
+    """Normalization offset maps upload; failures are logged and never fail the job."""
+    try:
+        return normalization.export_offsets(result, file_path) or ""
+    except runtime_model.JobTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Offset map export failed for {result.document_id}: {e}")
+        return ""
+
+
+def _start_previews(pdf_path):
+    """Start the page render; failures are logged and never fail the job."""
+    try:
+        return thumbnails.start(pdf_path)
+    except Exception as e:
+        logger.error(f"Page preview render failed to start for {pdf_path}: {e}")
+        return None
+
+
+def _export_previews(render, file_path: str, document_id: str) -> str:
+    """Page thumbnails/previews upload; failures are logged and never fail the job."""
+    try:
+        return thumbnails.export_previews(render, file_path, document_id)
+    except runtime_model.JobTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Page preview export failed for {document_id}: {e}")
+        return ""
+
+
+def _publish_report(report: dict) -> None:
+    """Push a job report to JOB_REPORT_KEY (load tests, soak runs); no-op if unset."""
+    if not settings.job_report_key:
+        return
+    try:
+        r = queue._get_redis()
+        r.lpush(settings.job_report_key, json.dumps(report))
+        r.ltrim(settings.job_report_key, 0, settings.job_report_max_entries - 1)
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish job report: {e}")
+
+
 # --- Celery task (Docker deployment) ---
 
 @app.task(
@@ -77,31 +411,110 @@ def process_pdf_job(job: dict) -> None:
     acks_late=True,
 )
 def extract_pdf_task(self, job: dict) -> dict:
-    """Celery task wrapper for PDF extraction."""
+    """
+    Celery task wrapper for PDF extraction.
+
+    Tasks are routed to their tenant's shard queue (fair_queue.route_task).
+    A tenant at its TENANT_CONCURRENCY cap gets the task re-published after
+    TENANT_DEFER_SECONDS instead of holding a worker slot, and so does a
+    duplicate deferred by single-flight.
+    """
+    lease = _acquire_slot(job)
+    if lease is False:
+        extract_pdf_task.apply_async(args=[job], countdown=settings.tenant_defer_seconds)
+        return {"status": "deferred", "documentId": job["documentId"]}
     try:
-        process_pdf_job(job)
+        report = process_pdf_job(job)
+        if report["status"] == "deferred":
+            extract_pdf_task.apply_async(args=[job], countdown=report["retryIn"])
+            return {"status": "deferred", "documentId": job["documentId"]}
+        _record_duration(report["timings"]["total"])
         return {"status": "completed", "documentId": job["documentId"]}
     except Exception as exc:
         logger.error(f"Celery task failed: {exc}")
         raise self.retry(exc=exc)
+    finally:
+        if lease:
+            _release_slot(lease)
+
+
+def _acquire_slot(job: dict) -> fair_queue.Lease | bool | None:
+    """Lease in the tenant's cap: None when uncapped (or Redis is down), False when full."""
+    tenant = fair_queue.tenant_of(job)
+    if fair_queue.concurrency_cap(tenant) <= 0:
+        return None
+    try:
+        return fair_queue.acquire(queue._get_redis(), settings.queue_key, tenant) or False
+    except redis.RedisError as e:
+        logger.warning(f"Could not check concurrency for tenant {tenant}: {e}")
+        return None
+
+
+def _release_slot(lease: fair_queue.Lease) -> None:
+    try:
+        fair_queue.release(queue._get_redis(), settings.queue_key, lease)
+    except redis.RedisError as e:
+        logger.warning(f"Could not release slot for tenant {lease.tenant}: {e}")
+
+
+@worker_init.connect
+def _start_metrics(**_kwargs) -> None:
+    """Exporters run in the main process; prefork children record via PROMETHEUS_MULTIPROC_DIR."""
+    metrics.reset_multiprocess_dir()
+    metrics.start()
+
+
+@worker_process_shutdown.connect
+def _forget_child_metrics(pid: Optional[int] = None, **_kwargs) -> None:
+    metrics.process_exited(pid or os.getpid())
+
+
+def _record_duration(seconds: float) -> None:
+    """Feed the shared job-duration average used by autoscaling/admission."""
+    try:
+        queue.record_job_duration(queue._get_redis(), settings.queue_key, seconds)
+    except redis.RedisError as e:
+        logger.warning(f"Could not record job duration: {e}")
 
 
 # --- Redis BRPOP loop (local dev) ---
 
 def worker_loop() -> None:
-    """Main loop — blocks on Redis BRPOP, processes jobs one at a time."""
+    """
+    Main loop — processes jobs one at a time.
+
+    With FAIR_SCHEDULING (the default) jobs come from the tenant sub-queues
+    in fair order (services/fair_queue.py): jobs producers push to the
+    shared list are first moved to their tenant, and when nothing is
+    runnable the loop blocks on the shared list for FAIR_POLL_SECONDS.
+    Otherwise it BRPOPs the shared list and any tenant sub-queues a fair
+    worker left behind. Deferred jobs return to the shared list once their
+    delay has passed (queue.promote_due_jobs).
+    """
     r = redis.from_url(settings.redis_url)
     queue_key = settings.queue_key
+    tracker = queue.UtilisationTracker(concurrency=1)
+    last_publish = 0.0
 
+    metrics.start()
     logger.info(f"PDF worker started (BRPOP mode), listening on {queue_key}")
 
     while True:
         try:
-            result = r.brpop(queue_key, timeout=5)
-            if result:
-                _, job_json = result
-                job = json.loads(job_json)
-                process_pdf_job(job)
+            queue.promote_due_jobs(r, queue_key)
+            if settings.fair_scheduling:
+                _fair_step(r, queue_key, tracker)
+            else:
+                _shared_step(r, queue_key, tracker)
+
+            if time.time() - last_publish >= settings.queue_stats_interval_seconds:
+                last_publish = time.time()
+                queue.publish_worker_stats(
+                    r, queue_key, concurrency=1, busy=tracker.busy,
+                    utilisation=tracker.utilisation(),
+                )
+                stats = queue.publish_queue_stats(r, queue_key)
+                logger.debug(f"Queue {queue_key} stats: {stats}")
         except KeyboardInterrupt:
             logger.info("Worker shutting down")
             break
@@ -110,5 +523,42 @@ def worker_loop() -> None:
             time.sleep(1)
 
 
+def _fair_step(r: redis.Redis, queue_key: str, tracker: queue.UtilisationTracker) -> None:
+    """Run the next job in fair order, or wait briefly for one on the shared list."""
+    fair_queue.drain_shared(r, queue_key)
+    cost = runtime_model.job_cost if settings.runtime_model_enabled else None
+    picked = fair_queue.pop(r, queue_key, cost=cost)
+    if picked is None:
+        result = r.brpop(queue_key, timeout=settings.fair_poll_seconds)
+        if result:
+            fair_queue.push(r, queue_key, json.loads(result[1]))
+        return
+    job, lease = picked
+    try:
+        _loop_job(r, queue_key, tracker, job)
+    finally:
+        fair_queue.release(r, queue_key, lease)
+
+
+def _shared_step(r: redis.Redis, queue_key: str, tracker: queue.UtilisationTracker) -> None:
+    """Run the next job from the shared list or a tenant sub-queue left by a fair worker."""
+    result = r.brpop([queue_key, *fair_queue.tenant_keys(r, queue_key)], timeout=5)
+    if result:
+        _, job_json = result
+        _loop_job(r, queue_key, tracker, json.loads(job_json))
+
+
+def _loop_job(r: redis.Redis, queue_key: str, tracker: queue.UtilisationTracker, job: dict) -> None:
+    tracker.job_started()
+    try:
+        report = process_pdf_job(job)
+    finally:
+        tracker.job_finished()
+    if report["status"] == "deferred":
+        queue.defer_job(r, queue_key, job, report["retryIn"])
+        return
+    queue.record_job_duration(r, queue_key, report["timings"]["total"])
+
+
 if __name__ == "__main__":
     worker_loop()
@@ -0,0 +1,70 @@
+"""
+KRATOS v2 — Re-extraction Scheduler
+Long-running loop that re-extracts documents from an older extractor
+version during off-peak hours (see services/reextraction.py).
+
+Run next to the workers:  python -m src.tasks.reextract
+Status of the last batches:  python -m src.tasks.reextract --status
+"""
+
+import argparse
+import json
+import logging
+import time
+
+import redis
+
+from src.config import settings
+from src.pipeline import EXTRACTOR_VERSION
+from src.services import reextraction
+
+logging.basicConfig(
+    level=getattr(logging, settings.log_level, logging.INFO),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger("kratos.reextract")
+
+
+def scheduler_loop() -> None:
+    """Run batches while in the window and the live queue is idle; otherwise wait."""
+    r = redis.from_url(settings.redis_url)
+    logger.info(
+        f"Re-extraction scheduler started for v{EXTRACTOR_VERSION} "
+        f"(window {settings.reextract_window or 'any time'} {settings.reextract_timezone}, "
+        f"{settings.reextract_rate_per_minute}/min, batches of {settings.reextract_batch_size})"
+    )
+    while True:
+        try:
+            if not reextraction.in_window() or reextraction.live_queue_busy(r):
+                time.sleep(settings.reextract_idle_seconds)
+                continue
+            stats = reextraction.run_batch(r)
+            if stats.planned == 0:
+                logger.info(f"No extractions older than v{EXTRACTOR_VERSION} left")
+                time.sleep(settings.reextract_idle_seconds)
+            elif stats.stopped:
+                time.sleep(settings.reextract_idle_seconds)
+        except KeyboardInterrupt:
+            logger.info("Re-extraction scheduler shutting down")
+            break
+        except Exception as e:
+            logger.error(f"Re-extraction scheduler error: {e}")
+            time.sleep(settings.reextract_idle_seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--status", action="store_true",
+                        help="Print the most recent batches (JSON lines) and exit")
+    parser.add_argument("--count", type=int, default=20)
+    args = parser.parse_args()
+    if args.status:
+        r = redis.from_url(settings.redis_url)
+        for batch in reextraction.batch_history(r, args.count):
+            print(json.dumps(batch))
+        return
+    scheduler_loop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import pytest
+
+from src.models.extraction import PageContent
+from src.services.chunking import build_raw_text, chunk_text, page_lookup
+
+
+def _pages(*texts):
+    return [PageContent(page_number=i + 1, text=t) for i, t in enumerate(texts)]
+
+
+def test_build_raw_text_records_page_offsets():
+    pages = _pages("Primeira pagina.", "", "Terceira pagina.")
+
+    raw_text = build_raw_text(pages)
+
+    assert raw_text == "Primeira pagina.\n\nTerceira pagina."
+    assert raw_text[pages[0].char_start:pages[0].char_end] == "Primeira pagina."
+    assert raw_text[pages[2].char_start:pages[2].char_end] == "Terceira pagina."
+    assert pages[1].char_start == pages[1].char_end
+
+
+def test_page_lookup_maps_offsets_to_pages():
+    pages = _pages("abc", "", "def")
+    build_raw_text(pages)
+    lookup = page_lookup(pages)
+
+    assert lookup(0) == 1
+    assert lookup(3) == 1  # separator belongs to preceding page
+    assert lookup(pages[2].char_start) == 3
+
+
+def test_chunk_text_respects_token_budget_and_overlap():
+    pages = _pages(" ".join(f"w{i}" for i in range(100)))
+    raw_text = build_raw_text(pages)
+
+    chunks = chunk_text(raw_text, pages, max_tokens=30, overlap_tokens=10)
+
+    assert all(c.token_count <= 30 for c in chunks)
+    assert chunks[0].char_start == 0
+    assert chunks[-1].char_end == len(raw_text)
+    # Second chunk starts inside the first one (overlap)
+    assert chunks[1].char_start < chunks[0].char_end
+    assert raw_text[chunks[1].char_start:].startswith("w20")
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+
+
+def test_chunk_text_prefers_sentence_boundaries():
+    text = "Um dois tres quatro cinco. Seis sete oito nove dez onze doze"
+    pages = _pages(text)
+    raw_text = build_raw_text(pages)
+
+    chunks = chunk_text(raw_text, pages, max_tokens=8, overlap_tokens=0)
+
+    assert raw_text[chunks[0].char_start:chunks[0].char_end].endswith("cinco.")
+
+
+def test_chunk_text_tracks_page_span():
+    pages = _pages("alfa beta gama", "delta epsilon zeta")
+    raw_text = build_raw_text(pages)
+
+    chunks = chunk_text(raw_text, pages, max_tokens=4, overlap_tokens=0)
+
+    assert chunks[0].page_start == 1
+    assert chunks[0].page_end == 2
+    assert chunks[-1].page_start == 2
+
+
+def test_chunk_text_empty_document():
+    assert chunk_text("", [], max_tokens=10, overlap_tokens=2) == []
+
+
+def test_chunk_text_rejects_invalid_overlap():
+    with pytest.raises(ValueError):
+        chunk_text("abc", _pages("abc"), max_tokens=10, overlap_tokens=10)
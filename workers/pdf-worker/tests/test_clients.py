@@ -0,0 +1,125 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from src.services import clients
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(clients.settings, "http_retries", 3)
+    monkeypatch.setattr(clients.settings, "http_retry_backoff_seconds", 0.0)
+    clients.reset()
+    yield
+    clients.reset()
+
+
+def _client(handler, **kwargs) -> httpx.Client:
+    transport = clients.RetryingTransport(httpx.MockTransport(handler), **kwargs)
+    return httpx.Client(transport=transport, base_url="http://supabase.test")
+
+
+def test_idempotent_request_retried_on_503():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503 if len(calls) < 3 else 200, json=[])
+
+    response = _client(handler).get("/rest/v1/documents")
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+
+def test_post_not_retried_on_server_error_but_on_connect_error():
+    calls = []
+
+    def flaky_status(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    assert _client(flaky_status).post("/rest/v1/extractions", json={}).status_code == 503
+    assert len(calls) == 1
+
+    attempts = []
+
+    def refuses_once(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(201, json=[])
+
+    assert _client(refuses_once).post("/rest/v1/extractions", json={}).status_code == 201
+    assert len(attempts) == 2
+
+
+def test_gives_up_after_configured_retries(monkeypatch):
+    monkeypatch.setattr(clients.settings, "http_retries", 2)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    with pytest.raises(httpx.ReadTimeout):
+        _client(handler).get("/storage/v1/object/documents/a.pdf")
+    assert len(calls) == 3
+
+
+def test_in_flight_requests_are_bounded():
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def handler(request):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        return httpx.Response(200, json=[])
+
+    client = _client(handler, max_in_flight=2)
+    threads = [threading.Thread(target=client.get, args=("/rest/v1/x",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak == 2
+
+
+@patch("src.services.clients.create_client")
+def test_get_client_is_shared_and_created_once(mock_create_client, monkeypatch):
+    monkeypatch.setattr(clients.settings, "backend", "supabase")
+    mock_create_client.side_effect = lambda *a, **kw: (time.sleep(0.01), MagicMock())[1]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(clients.get_client())) for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert mock_create_client.call_count == 1
+    assert len({id(c) for c in results}) == 1
+    options = mock_create_client.call_args.kwargs["options"]
+    assert isinstance(options.httpx_client, httpx.Client)
+
+
+def test_local_backend_uses_stand_in(tmp_path, monkeypatch):
+    from src.services import local_backend
+
+    monkeypatch.setattr(clients.settings, "backend", "local")
+    monkeypatch.setattr(clients.settings, "local_backend_dir", tmp_path)
+    monkeypatch.setattr(local_backend, "_client", None)
+
+    assert isinstance(clients.get_client(), local_backend.LocalClient)
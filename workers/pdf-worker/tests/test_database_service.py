@@ -1,8 +1,12 @@
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 import src.services.database as db_mod
+from src.services import clients, local_backend
 from src.models.extraction import (
     DocumentStatus,
+    ExtractedTable,
     ExtractionMetadata,
     ExtractionMethod,
     ExtractionResult,
@@ -10,9 +14,9 @@ from src.models.extraction import (
 )
 
 
-@patch("src.services.database.create_client")
+@patch("src.services.clients.create_client")
 def test_save_extraction_inserts_row(mock_create_client):
-    db_mod._client = None
+    clients.reset()
     mock_table = MagicMock()
     mock_table.insert.return_value.execute.return_value = None
     mock_client = MagicMock()
@@ -39,12 +43,14 @@ def test_save_extraction_inserts_row(mock_create_client):
     assert insert_data["extraction_method"] == "pdfplumber"
     assert insert_data["tables_count"] == 0
     assert insert_data["images_count"] == 2
+    assert insert_data["extractor_version"] == 0
+    assert insert_data["pdf_hash"] is None
     assert "content_json" in insert_data
 
 
-@patch("src.services.database.create_client")
+@patch("src.services.clients.create_client")
 def test_update_document_status_to_completed(mock_create_client):
-    db_mod._client = None
+    clients.reset()
     mock_table = MagicMock()
     mock_table.update.return_value.eq.return_value.execute.return_value = None
     mock_client = MagicMock()
@@ -59,9 +65,9 @@ def test_update_document_status_to_completed(mock_create_client):
     assert update_data["pages"] == 5
 
 
-@patch("src.services.database.create_client")
+@patch("src.services.clients.create_client")
 def test_update_document_status_to_failed(mock_create_client):
-    db_mod._client = None
+    clients.reset()
     mock_table = MagicMock()
     mock_table.update.return_value.eq.return_value.execute.return_value = None
     mock_client = MagicMock()
@@ -73,3 +79,64 @@ def test_update_document_status_to_failed(mock_create_client):
     update_data = mock_table.update.call_args[0][0]
     assert update_data["status"] == "failed"
     assert update_data["error_message"] == "Extraction timeout"
+
+
+@pytest.fixture
+def local_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_backend.settings, "backend", "local")
+    monkeypatch.setattr(local_backend.settings, "local_backend_dir", tmp_path / "backend")
+    monkeypatch.setattr(local_backend, "_client", None)
+    clients.reset()
+    yield local_backend.get_client()
+    clients.reset()
+
+
+def _paged_result(pages: int) -> ExtractionResult:
+    return ExtractionResult(
+        document_id="doc-1",
+        pages=[PageContent(page_number=n, text=f"Página {n}") for n in range(1, pages + 1)],
+        tables=[ExtractedTable(page=3, rows_count=2, cols_count=1, raw_rows=[["1,00"]])],
+    )
+
+
+def test_save_pages_upserts_in_batches(local_client, monkeypatch):
+    monkeypatch.setattr(db_mod.settings, "page_rows_batch_size", 4)
+    upserts = []
+    real_table = local_client.table
+
+    def spy(name):
+        query = real_table(name)
+        real_upsert = query.upsert
+        query.upsert = lambda rows, **kw: upserts.append(len(rows)) or real_upsert(rows, **kw)
+        return query
+
+    monkeypatch.setattr(local_client, "table", spy)
+
+    assert db_mod.save_pages("doc-1", _paged_result(10)) == 10
+    assert upserts == [4, 4, 2]
+
+    # Re-extraction overwrites rows in place
+    db_mod.save_pages("doc-1", _paged_result(10))
+    assert len(real_table("extraction_pages").select("*").execute().data) == 10
+
+
+def test_get_pages_reads_an_inclusive_range(local_client):
+    db_mod.save_pages("doc-1", _paged_result(10))
+
+    pages = db_mod.get_pages("doc-1", 3, 5)
+
+    assert [p["page_number"] for p in pages] == [3, 4, 5]
+    assert pages[0]["text"] == "Página 3"
+    assert pages[0]["tables"][0]["raw_rows"] == [["1,00"]]
+    assert pages[1]["tables"] == []
+    assert [p["page_number"] for p in db_mod.get_pages("doc-1", 7)] == [7]
+
+
+def test_save_pages_drops_rows_past_a_shorter_reextraction(local_client):
+    db_mod.save_pages("doc-1", _paged_result(10))
+    db_mod.save_pages("doc-2", _paged_result(3))
+
+    db_mod.save_pages("doc-1", _paged_result(6))
+
+    assert [p["page_number"] for p in db_mod.get_pages("doc-1", 1, 10)] == [1, 2, 3, 4, 5, 6]
+    assert len(db_mod.get_pages("doc-2", 1, 10)) == 3
@@ -45,7 +45,7 @@ def test_process_job_success(mock_pipeline, mock_db, mock_storage):
 
     process_pdf_job(job)
 
-    mock_storage.download_pdf.assert_called_once_with("user-1/doc-1/test.pdf", "doc-1")
+    mock_storage.download_pdf.assert_called_once_with("user-1/doc-1/test.pdf", "doc-1", None)
     mock_pipeline.assert_called_once()
     mock_db.save_extraction.assert_called_once()
 
@@ -92,12 +92,17 @@ def test_process_job_pipeline_error(mock_pipeline, mock_db, mock_storage):
     mock_storage.download_pdf.return_value = Path("/tmp/test/document.pdf")
     mock_pipeline.side_effect = PipelineError("PDF has 1000 pages, exceeds limit of 500")
 
+    from src.services import metrics
     from src.tasks.extract_pdf import process_pdf_job
 
     job = {
         "documentId": "doc-3",
         "filePath": "user-1/doc-3/big.pdf",
     }
+    def failures(reason):
+        return metrics.REGISTRY.get_sample_value("kratos_pdf_job_failures_total", {"reason": reason}) or 0
+
+    before = (failures("pipeline_error"), failures("unexpected"))
 
     process_pdf_job(job)
 
@@ -105,6 +110,8 @@ def test_process_job_pipeline_error(mock_pipeline, mock_db, mock_storage):
     failed_call = [c for c in calls if c[0][1] == DocumentStatus.failed.value]
     assert len(failed_call) == 1
     assert "exceeds limit" in failed_call[0][1]["error_message"]
+    assert (failures("pipeline_error"), failures("unexpected")) == (before[0] + 1, before[1])
+    assert metrics.REGISTRY.get_sample_value("kratos_pdf_jobs_in_flight") == 0
 
 
 @patch("src.tasks.extract_pdf.storage")
@@ -119,3 +126,68 @@ def test_process_job_always_cleans_up(mock_pipeline, mock_db, mock_storage):
     process_pdf_job({"documentId": "doc-4", "filePath": "path.pdf"})
 
     mock_storage.cleanup_temp_file.assert_called_once_with("doc-4")
+
+
+@patch("src.tasks.extract_pdf.storage")
+@patch("src.tasks.extract_pdf.database")
+@patch("src.tasks.extract_pdf.run_pipeline")
+def test_process_job_returns_stage_timings(mock_pipeline, mock_db, mock_storage):
+    import time
+
+    mock_storage.download_pdf.return_value = Path("/tmp/test/document.pdf")
+    mock_pipeline.return_value = _make_pipeline_result("doc-5", pages=2)
+
+    from src.tasks.extract_pdf import process_pdf_job
+
+    report = process_pdf_job({
+        "documentId": "doc-5",
+        "filePath": "path.pdf",
+        "enqueuedAt": time.time() - 3,
+    })
+
+    assert report["status"] == DocumentStatus.completed.value
+    assert report["pages"] == 2
+    assert set(report["timings"]) == {"queue_wait", "download", "extract", "persist", "total"}
+    assert report["timings"]["queue_wait"] >= 3
+
+
+@patch("src.tasks.extract_pdf.queue")
+@patch("src.tasks.extract_pdf.storage")
+@patch("src.tasks.extract_pdf.database")
+@patch("src.tasks.extract_pdf.run_pipeline")
+def test_process_job_publishes_report_when_configured(
+    mock_pipeline, mock_db, mock_storage, mock_queue, monkeypatch
+):
+    from src.tasks import extract_pdf
+
+    monkeypatch.setattr(extract_pdf.settings, "job_report_key", "kratos:loadtest:reports")
+    monkeypatch.setattr(extract_pdf.settings, "single_flight_enabled", False)
+    mock_storage.download_pdf.side_effect = Exception("Download timeout")
+
+    report = extract_pdf.process_pdf_job({"documentId": "doc-6", "filePath": "path.pdf"})
+
+    assert report["status"] == DocumentStatus.failed.value
+    assert "Download timeout" in report["error"]
+    r = mock_queue._get_redis.return_value
+    assert r.lpush.call_args[0][0] == "kratos:loadtest:reports"
+
+
+@patch("src.tasks.extract_pdf.storage")
+@patch("src.tasks.extract_pdf.database")
+@patch("src.tasks.extract_pdf.run_pipeline")
+def test_hung_download_fails_at_the_stage_limit(mock_pipeline, mock_db, mock_storage, monkeypatch):
+    import time
+
+    from src.tasks import extract_pdf
+
+    monkeypatch.setattr(extract_pdf.settings, "single_flight_enabled", False)
+    monkeypatch.setattr(extract_pdf.settings, "stage_timeout_seconds", 0.05)
+    mock_storage.download_pdf.side_effect = lambda *a: time.sleep(5)
+
+    started = time.monotonic()
+    report = extract_pdf.process_pdf_job({"documentId": "doc-7", "filePath": "path.pdf"})
+
+    assert time.monotonic() - started < 2
+    assert report["status"] == DocumentStatus.failed.value
+    assert "download time limit" in report["error"]
+    mock_pipeline.assert_not_called()
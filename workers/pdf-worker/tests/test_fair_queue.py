@@ -0,0 +1,196 @@
+import json
+import time
+
+import fakeredis
+import pytest
+import redis
+
+from src.config import settings
+from src.services import fair_queue, queue
+
+Q = "kratos:jobs:pdf"
+
+
+@pytest.fixture
+def r(monkeypatch):
+    monkeypatch.setattr(settings, "tenant_weights", {})
+    monkeypatch.setattr(settings, "tenant_concurrency", {})
+    monkeypatch.setattr(settings, "tenant_max_concurrency", 0)
+    return fakeredis.FakeRedis()
+
+
+def _push(r, tenant, count, start=0):
+    for i in range(start, start + count):
+        fair_queue.push(r, Q, {"documentId": f"{tenant}-{i}", "userId": tenant, "enqueuedAt": time.time()})
+
+
+def _drain(r, limit=100):
+    order = []
+    while len(order) < limit and (picked := fair_queue.pop(r, Q)) is not None:
+        job, lease = picked
+        order.append(job["documentId"])
+        fair_queue.release(r, Q, lease)
+    return order
+
+
+def test_bulk_uploader_does_not_starve_others(r):
+    _push(r, "bulk", 50)
+    _push(r, "small", 2)
+
+    order = _drain(r)
+
+    # Tenants alternate; each tenant's own jobs stay FIFO
+    assert order[:4] == ["bulk-0", "small-0", "bulk-1", "small-1"]
+    assert order[4:] == [f"bulk-{i}" for i in range(2, 50)]
+    assert r.zcard(Q + fair_queue.TENANTS_SUFFIX) == 0
+
+
+def test_weights_set_turns_per_round(r, monkeypatch):
+    monkeypatch.setattr(settings, "tenant_weights", {"gold": 2.0})
+    _push(r, "gold", 6)
+    _push(r, "basic", 6)
+
+    order = [doc.split("-")[0] for doc in _drain(r, limit=9)]
+
+    assert order.count("gold") == 6 and order.count("basic") == 3
+
+
+def test_returning_tenant_does_not_bank_credit(r):
+    _push(r, "a", 10)
+    _drain(r, limit=8)
+    _push(r, "b", 4)
+
+    order = [doc.split("-")[0] for doc in _drain(r, limit=4)]
+
+    assert order == ["b", "a", "b", "a"]
+
+
+def test_concurrency_cap_skips_busy_tenant_until_release(r, monkeypatch):
+    monkeypatch.setattr(settings, "tenant_concurrency", {"bulk": 1})
+    _push(r, "bulk", 3)
+    _push(r, "small", 1)
+
+    job, lease = fair_queue.pop(r, Q)
+    assert job["documentId"] == "bulk-0"
+    assert fair_queue.pop(r, Q)[0]["documentId"] == "small-0"
+    assert fair_queue.pop(r, Q) is None
+    assert fair_queue.running(r, Q, "bulk") == 1
+
+    fair_queue.release(r, Q, lease)
+    assert fair_queue.pop(r, Q)[0]["documentId"] == "bulk-1"
+    # A lease left behind by a crashed worker expires
+    later = time.time() + settings.tenant_lease_seconds + 1
+    assert fair_queue.pop(r, Q, now=later)[0]["documentId"] == "bulk-2"
+
+
+def test_acquire_respects_cap(r, monkeypatch):
+    monkeypatch.setattr(settings, "tenant_max_concurrency", 2)
+    leases = [fair_queue.acquire(r, Q, "t") for _ in range(3)]
+
+    assert leases[0] and leases[1] and leases[2] is None
+    fair_queue.release(r, Q, leases[0])
+    assert fair_queue.acquire(r, Q, "t") is not None
+
+
+def test_shared_list_jobs_move_to_tenants_and_count_in_depth(r):
+    old = time.time() - 120
+    r.lpush(Q, json.dumps({"documentId": "legacy", "userId": "a", "enqueuedAt": old}))
+    r.lpush(Q, json.dumps({"documentId": "anon"}))
+    _push(r, "b", 1)
+
+    assert queue.queue_depth(r, Q) == 3
+    assert 119 <= queue.oldest_job_age(r, Q) <= 121
+    assert fair_queue.drain_shared(r, Q) == 2
+
+    assert r.llen(Q) == 0 and queue.queue_depth(r, Q) == 3
+    assert 119 <= queue.oldest_job_age(r, Q) <= 121
+    assert sorted(_drain(r)) == ["anon", "b-0", "legacy"]
+
+
+def test_enqueue_job_uses_the_shared_list(r, monkeypatch):
+    monkeypatch.setattr(queue, "_redis", r)
+
+    queue.enqueue_job({"documentId": "doc-1", "userId": "u1"})
+    queue.enqueue_job({"documentId": "doc-2"})
+
+    assert r.llen(Q) == 2
+    assert fair_queue.drain_shared(r, Q) == 2
+    assert r.llen(fair_queue.tenant_key(Q, "u1")) == 1
+
+
+def test_drain_shared_keeps_a_job_it_could_not_move(r, monkeypatch):
+    r.lpush(Q, json.dumps({"documentId": "doc-1", "userId": "u1"}))
+    r.lpush(Q, "not json")
+
+    def lost(pipe, queue_key, job):
+        raise redis.ConnectionError("connection lost")
+
+    move = fair_queue._queue
+    monkeypatch.setattr(fair_queue, "_queue", lost)
+    with pytest.raises(redis.ConnectionError):
+        fair_queue.drain_shared(r, Q)
+    assert r.llen(Q) == 2
+
+    monkeypatch.setattr(fair_queue, "_queue", move)
+    assert fair_queue.drain_shared(r, Q) == 1
+    assert r.llen(Q) == 0 and r.llen(fair_queue.tenant_key(Q, "u1")) == 1
+
+
+def test_worker_without_fair_scheduling_drains_tenant_queues(r, monkeypatch):
+    from src.tasks import extract_pdf
+
+    ran = []
+    monkeypatch.setattr(
+        extract_pdf, "process_pdf_job",
+        lambda job: ran.append(job["documentId"]) or {"status": "completed", "timings": {"total": 0.1}},
+    )
+    _push(r, "a", 1)
+    r.lpush(Q, json.dumps({"documentId": "shared"}))
+    tracker = queue.UtilisationTracker()
+
+    extract_pdf._shared_step(r, Q, tracker)
+    extract_pdf._shared_step(r, Q, tracker)
+
+    assert ran == ["shared", "a-0"]
+    assert queue.queue_depth(r, Q) == 0
+
+
+def test_tenant_label_bounds_cardinality(monkeypatch):
+    monkeypatch.setattr(fair_queue, "_labelled", set())
+    monkeypatch.setattr(settings, "metrics_max_tenants", 2)
+    monkeypatch.setattr(settings, "tenant_weights", {"vip": 3.0})
+
+    labels = [fair_queue.tenant_label(t) for t in ("a", "b", "c", "a", "vip")]
+
+    assert labels == ["a", "b", "other", "a", "vip"]
+
+
+def test_celery_routes_extract_pdf_to_stable_tenant_shard(monkeypatch):
+    monkeypatch.setattr(settings, "celery_tenant_shards", 4)
+    job = {"documentId": "d", "userId": "user-1"}
+
+    route = fair_queue.route_task("extract_pdf", [job], {}, {})
+
+    assert route == fair_queue.route_task("extract_pdf", [dict(job, documentId="e")], {}, {})
+    assert route["queue"].startswith(fair_queue.CELERY_SHARD_PREFIX)
+    assert fair_queue.route_task("other_task", [job], {}, {}) is None
+
+
+def test_worker_fair_step_runs_and_releases(r, monkeypatch):
+    from src.tasks import extract_pdf
+
+    ran = []
+    monkeypatch.setattr(
+        extract_pdf, "process_pdf_job",
+        lambda job: ran.append(job["documentId"]) or {"status": "completed", "timings": {"total": 0.1}},
+    )
+    monkeypatch.setattr(settings, "fair_poll_seconds", 0.01)
+    r.lpush(Q, json.dumps({"documentId": "legacy", "userId": "a"}))
+    tracker = queue.UtilisationTracker()
+
+    extract_pdf._fair_step(r, Q, tracker)
+    extract_pdf._fair_step(r, Q, tracker)
+
+    assert ran == ["legacy"]
+    assert fair_queue.running(r, Q, "a") == 0
+    assert queue.average_job_seconds(r, Q) == 0.1
@@ -0,0 +1,111 @@
+import argparse
+import json
+
+import pytest
+
+import ingest
+from tests.test_pdf_extraction import _make_pdf
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "acervo"
+    (root / "2019").mkdir(parents=True)
+    (root / "2019" / "sentenca.pdf").write_bytes(_make_pdf([(["RELATORIO", "Trata-se de acao."], False)]))
+    (root / "peticao.PDF").write_bytes(_make_pdf([(["DOS FATOS"], False), (["DOS PEDIDOS"], False)]))
+    (root / "notas.txt").write_text("ignored")
+    return root
+
+
+def _args(tmp_path, source, **overrides) -> argparse.Namespace:
+    defaults = dict(
+        input=str(source), output=str(tmp_path / "out.ndjson"), summary_only=False,
+        persist=False, user_id=None, workers=0, max_tasks_per_child=10, engine=None,
+        progress=None, retry_failed=False, progress_interval=60.0,
+    )
+    return argparse.Namespace(**{**defaults, **overrides})
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_load_items_from_directory_and_manifests(corpus, tmp_path):
+    items = ingest.load_items(corpus)
+    assert [item["path"].rsplit("/", 1)[-1] for item in items] == ["sentenca.pdf", "peticao.PDF"]
+    assert items[0]["documentId"] == ingest.document_id_for(corpus / "2019" / "sentenca.pdf")
+
+    manifest = corpus / "lote.ndjson"
+    manifest.write_text('{"path": "peticao.PDF", "documentId": "doc-1"}\n\n{"path": "2019/sentenca.pdf"}\n')
+    items = ingest.load_items(manifest)
+    assert items[0] == {"path": str(corpus / "peticao.PDF"), "documentId": "doc-1"}
+    assert items[1]["documentId"] == ingest.document_id_for(corpus / "2019" / "sentenca.pdf")
+
+    with pytest.raises(ValueError):
+        ingest.load_items(corpus / "notas.csv")
+
+
+def test_run_streams_results_and_resumes(corpus, tmp_path):
+    summary = ingest.run(_args(tmp_path, corpus))
+
+    assert summary["completed"] == 2 and summary["failed"] == 0
+    assert summary["pages"] == 3
+    records = _records(tmp_path / "out.ndjson")
+    assert {r["status"] for r in records} == {"completed"}
+    assert records[0]["result"]["document_id"] == records[0]["documentId"]
+    assert "RELATORIO" in records[0]["result"]["raw_text"]
+
+    # Second run: everything already recorded in out.ndjson.progress
+    summary = ingest.run(_args(tmp_path, corpus))
+    assert summary["total"] == 0 and summary["skipped"] == 2
+    assert len(_records(tmp_path / "out.ndjson")) == 2
+
+
+def test_failures_are_recorded_and_retried_on_request(corpus, tmp_path):
+    (corpus / "corrompido.pdf").write_bytes(b"%PDF-1.4 truncated")
+
+    summary = ingest.run(_args(tmp_path, corpus, summary_only=True))
+    assert summary["failed"] == 1
+    failed = [r for r in _records(tmp_path / "out.ndjson") if r["status"] == "failed"]
+    assert failed[0]["path"].endswith("corrompido.pdf") and failed[0]["error"]
+    assert "result" not in failed[0]
+
+    assert ingest.run(_args(tmp_path, corpus, summary_only=True))["total"] == 0
+    assert ingest.run(_args(tmp_path, corpus, summary_only=True, retry_failed=True))["total"] == 1
+
+
+def test_process_pool_run(corpus, tmp_path):
+    summary = ingest.run(_args(tmp_path, corpus, workers=2, summary_only=True))
+
+    assert summary["completed"] == 2
+    progress = _records(tmp_path / "out.ndjson.progress")
+    assert sorted(p["status"] for p in progress) == ["completed", "completed"]
+
+
+def test_persist_requires_user_id(corpus, tmp_path):
+    with pytest.raises(SystemExit):
+        ingest.run(_args(tmp_path, corpus, persist=True))
+
+
+def test_persist_registers_documents_pages_and_uploads(corpus, tmp_path, monkeypatch):
+    from src.services import clients, local_backend, storage
+
+    monkeypatch.setattr(local_backend.settings, "backend", "local")
+    monkeypatch.setattr(local_backend.settings, "local_backend_dir", tmp_path / "backend")
+    monkeypatch.setattr(local_backend, "_client", None)
+    clients.reset()
+    try:
+        summary = ingest.run(_args(tmp_path, corpus, persist=True, user_id="user-1", output=None,
+                                     progress=str(tmp_path / "ingest.progress")))
+        assert summary["completed"] == 2
+
+        client = local_backend.get_client()
+        documents = client.table("documents").select("*").execute().data
+        assert {d["status"] for d in documents} == {"completed"}
+        assert {d["user_id"] for d in documents} == {"user-1"}
+        assert len(client.table("extractions").select("*").execute().data) == 2
+        assert len(client.table("extraction_pages").select("*").execute().data) == 3
+        key = next(d["file_path"] for d in documents if d["file_name"] == "sentenca.pdf")
+        assert storage.download_object(key) == (corpus / "2019" / "sentenca.pdf").read_bytes()
+    finally:
+        clients.reset()
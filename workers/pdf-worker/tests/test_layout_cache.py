@@ -0,0 +1,142 @@
+import io
+
+import pdfplumber
+import pytest
+
+from src.services import layout_cache
+
+
+def _pdf(streams: list[str]) -> bytes:
+    """One page per content stream (Helvetica as /F1)."""
+    objects, page_ids = [], []
+    for ops in streams:
+        data = ops.encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (3 + len(objects))
+        )
+        page_ids.append(3 + len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    body = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        *objects,
+    ]
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for num, obj in enumerate(body, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref)
+    return bytes(out)
+
+
+def _statement(rows: list[list[str]], merged_title: str = "") -> str:
+    """A ruled grid of 100x20 pt cells, optionally under a title cell spanning it."""
+    ops, top = [], 700
+    cols = len(rows[0])
+    if merged_title:
+        ops.append(f"72 {top} {100 * cols} 20 re S")
+        ops.append(f"BT /F1 9 Tf 76 {top + 6} Td ({merged_title}) Tj ET")
+    for r, row in enumerate(rows):
+        y = top - 20 * (r + 1)
+        for c, value in enumerate(row):
+            ops.append(f"{72 + 100 * c} {y} 100 20 re S")
+            ops.append(f"BT /F1 9 Tf {76 + 100 * c} {y + 6} Td ({value}) Tj ET")
+    return "\n".join(ops)
+
+
+def _pages(streams):
+    pdf = pdfplumber.open(io.BytesIO(_pdf(streams)))
+    return pdf, pdf.pages
+
+
+def test_same_layout_reuses_grid_with_each_pages_values():
+    pdf, pages = _pages([
+        _statement([["Data", "Valor"], [f"0{i}/10/2026", f"{i}00,00"]]) for i in range(1, 5)
+    ])
+    cache = layout_cache.LayoutCache(verify_every=100)
+
+    results = [cache.extract_tables(page) for page in pages]
+
+    assert results == [page.extract_tables() for page in pages]
+    assert results[3] == [[["Data", "Valor"], ["04/10/2026", "400,00"]]]
+    stats = cache.stats()
+    assert (stats.misses, stats.hits, stats.verified, stats.fallbacks) == (1, 3, 1, 0)
+    assert stats.hit_rate == 0.75 and stats.templates == 1
+    pdf.close()
+
+
+def test_different_layouts_do_not_share_templates():
+    pdf, pages = _pages([
+        _statement([["A", "B"], ["1", "2"]]),
+        _statement([["A", "B", "C"], ["1", "2", "3"]]),
+        "BT /F1 11 Tf 72 700 Td (Sem tabela) Tj ET",
+    ])
+    cache = layout_cache.LayoutCache()
+
+    assert [cache.extract_tables(p) for p in pages] == [p.extract_tables() for p in pages]
+    assert cache.stats().misses == 3
+    pdf.close()
+
+
+def test_merged_cells_match_pdfplumber():
+    pdf, pages = _pages([
+        _statement([["Custas", "Valor"], ["Taxa", f"{i},00"]], merged_title=f"Calculo {i}")
+        for i in range(1, 4)
+    ])
+    cache = layout_cache.LayoutCache(verify_every=1)
+
+    for page in pages:
+        assert cache.extract_tables(page) == page.extract_tables()
+    assert cache.stats().fallbacks == 0
+    pdf.close()
+
+
+def test_failed_verification_falls_back_to_detection(monkeypatch):
+    pdf, pages = _pages([_statement([["A", "B"], [str(i), "x"]]) for i in range(3)])
+    cache = layout_cache.LayoutCache(verify_every=1)
+    cache.extract_tables(pages[0])
+    monkeypatch.setattr(layout_cache.TableTemplate, "extract", lambda self, page: [["stale"]])
+
+    assert cache.extract_tables(pages[1]) == pages[1].extract_tables()
+
+    assert cache.stats().fallbacks == 1
+    pdf.close()
+
+
+def test_lru_evicts_oldest_layout():
+    pdf, pages = _pages([_statement([["A"] * n]) for n in (1, 2, 3)])
+    cache = layout_cache.LayoutCache(max_entries=2)
+
+    for page in pages:
+        cache.extract_tables(page)
+    cache.extract_tables(pages[0])
+
+    stats = cache.stats()
+    assert (stats.evictions, stats.templates, stats.misses) == (2, 2, 4)
+    pdf.close()
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    monkeypatch.setattr(layout_cache.settings, "layout_cache_enabled", False)
+
+
+def test_engine_output_is_unchanged_by_the_cache(no_cache, monkeypatch):
+    from src.services.pdf_extraction import extract_pages
+
+    source = _pdf([_statement([["Data", "Valor"], [f"{i}", f"{i},00"]]) for i in range(6)])
+    expected = extract_pages(source, "pdfplumber")
+
+    monkeypatch.setattr(layout_cache.settings, "layout_cache_enabled", True)
+    layout_cache.reset()
+    try:
+        assert extract_pages(source, "pdfplumber") == expected
+        assert layout_cache.stats().hits == 5
+    finally:
+        layout_cache.reset()
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+import loadtest
+from src.config import settings
+from src.services import clients, local_backend
+from tests.test_pdf_extraction import _make_pdf
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert loadtest.percentile(values, 50) == 50.0
+    assert loadtest.percentile(values, 95) == 95.0
+    assert loadtest.percentile([], 95) == 0.0
+
+
+def test_parse_mix_normalises_weights():
+    mix = loadtest.parse_mix("small=3,large=1")
+    assert mix == {"small": 0.75, "large": 0.25}
+
+    with pytest.raises(ValueError):
+        loadtest.parse_mix("huge=1")
+
+
+def test_next_interarrival_uniform_and_poisson():
+    rng = random.Random(42)
+    assert loadtest.next_interarrival(4.0, "uniform", rng) == 0.25
+    gaps = [loadtest.next_interarrival(4.0, "poisson", rng) for _ in range(2000)]
+    assert 0.2 < sum(gaps) / len(gaps) < 0.3
+
+
+def test_summarize_reports_percentiles_and_throughput():
+    reports = [
+        {"status": "completed", "pages": 10, "timings": {"extract": 1.0, "total": 2.0}},
+        {"status": "completed", "pages": 20, "timings": {"extract": 3.0, "total": 4.0}},
+        {"status": "failed", "timings": {"total": 0.5}},
+    ]
+
+    summary = loadtest.summarize(reports, elapsed=60.0)
+
+    assert summary["completed"] == 2
+    assert summary["failed"] == 1
+    assert summary["docs_per_minute"] == 2.0
+    assert summary["pages_per_minute"] == 30.0
+    assert summary["latency_seconds"]["extract"]["p95"] == 3.0
+    assert summary["latency_seconds"]["queue_wait"]["p50"] == 0.0
+
+
+def test_corpus_keys_keep_subfolders(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "backend", "local")
+    monkeypatch.setattr(settings, "local_backend_dir", tmp_path / "backend")
+    monkeypatch.setattr(local_backend, "_client", None)
+    clients.reset()
+    for folder in ("tjsp", "trf3"):
+        (tmp_path / "corpus" / folder).mkdir(parents=True)
+        (tmp_path / "corpus" / folder / "sentenca.pdf").write_bytes(
+            _make_pdf([([folder.upper()], False)])
+        )
+
+    corpus = loadtest.scan_corpus(tmp_path / "corpus")
+    loadtest.seed_local_storage(corpus)
+    clients.reset()
+
+    keys = sorted(pdf["key"] for pdf in corpus["small"])
+    assert keys == ["loadtest/tjsp/sentenca.pdf", "loadtest/trf3/sentenca.pdf"]
@@ -0,0 +1,75 @@
+import subprocess
+import sys
+import urllib.request
+from pathlib import Path
+
+from src.services import metrics
+
+
+def _sample(name, **labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_record_job_splits_queue_wait_and_throughput():
+    before = (
+        _sample("kratos_pdf_job_stage_seconds_count", stage="extract"),
+        _sample("kratos_pdf_queue_wait_seconds_sum"),
+        _sample("kratos_pdf_pages_per_second_sum"),
+        _sample("kratos_pdf_jobs_total", status="completed"),
+    )
+
+    metrics.record_job({"status": "completed", "pages": 10,
+                        "timings": {"queue_wait": 3.0, "extract": 2.0}})
+
+    assert _sample("kratos_pdf_job_stage_seconds_count", stage="extract") == before[0] + 1
+    assert _sample("kratos_pdf_queue_wait_seconds_sum") == before[1] + 3.0
+    assert _sample("kratos_pdf_pages_per_second_sum") == before[2] + 5.0
+    assert _sample("kratos_pdf_jobs_total", status="completed") == before[3] + 1
+    assert _sample("kratos_pdf_job_stage_seconds_count", stage="queue_wait") == 0
+
+
+def test_http_endpoint_and_textfile(tmp_path):
+    metrics.DOWNLOAD_BYTES.observe(2048)
+    metrics.JOB_FAILURES.labels('bad "pdf"').inc()
+    server = metrics.start_http_server(0, "127.0.0.1")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as resp:
+            body = resp.read().decode()
+            assert resp.headers["Content-Type"] == metrics.CONTENT_TYPE
+    finally:
+        server.shutdown()
+    assert "kratos_pdf_download_bytes_count" in body
+    assert 'kratos_pdf_job_failures_total{reason="bad \\"pdf\\""}' in body
+    assert "process_resident_memory_bytes" in body
+
+    path = tmp_path / "textfile" / "worker.prom"
+    with metrics.JOBS_IN_FLIGHT.track_inprogress():
+        metrics.write_textfile(path)
+    assert "kratos_pdf_jobs_in_flight 1.0" in path.read_text()
+    assert [p.name for p in path.parent.iterdir()] == ["worker.prom"]
+
+
+_CHILD = """
+from src.services import metrics
+metrics.JOBS.labels("completed").inc()
+metrics.PAGE_SECONDS.labels("pdfium").observe(0.01)
+with metrics.JOBS_IN_FLIGHT.track_inprogress():
+    pass
+"""
+
+
+def test_multiprocess_mode_sums_worker_processes(tmp_path):
+    """Prefork children each record into PROMETHEUS_MULTIPROC_DIR; the exposition sums them."""
+    root = Path(__file__).resolve().parent.parent
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PATH": ""}
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", _CHILD], cwd=root, env=env, check=True)
+
+    body = subprocess.run(
+        [sys.executable, "-c", "from src.services import metrics; print(metrics.expose().decode())"],
+        cwd=root, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+
+    assert 'kratos_pdf_jobs_total{status="completed"} 2.0' in body
+    assert 'kratos_pdf_page_seconds_count{engine="pdfium"} 2.0' in body
+    assert "process_resident_memory_bytes" not in body
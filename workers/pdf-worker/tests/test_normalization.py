@@ -0,0 +1,153 @@
+import pytest
+
+from src.config import settings
+from src.models.extraction import ExtractionResult, PageContent
+from src.services import clients, local_backend
+from src.services.chunking import build_raw_text
+from src.services.normalization import (
+    find_repeated_lines,
+    normalize_pages,
+    export_offsets,
+    load_offsets,
+    original_offset,
+)
+
+HEADER = "PODER JUDICIÁRIO\nTRIBUNAL DE JUSTIÇA DO ESTADO DE SÃO PAULO\n"
+
+
+def _footer(n: int) -> str:
+    return (
+        f"\nAssinado eletronicamente por: MARIA SILVA - 0{n}/03/2026 10:1{n}:00\n"
+        f"Num. 1234567{n} - Pág. {n}"
+    )
+
+
+def _court_pages(bodies: list[str]) -> list[PageContent]:
+    return [
+        PageContent(page_number=i + 1, text=HEADER + body + _footer(i + 1))
+        for i, body in enumerate(bodies)
+    ]
+
+
+BODIES = [
+    "Trata-se de ação de cobrança ajuizada pelo autor.",
+    "O réu apresentou contes-\ntação   fora do prazo legal.",
+    "Deve-\nse observar o  disposto no art. 373 do CPC.",
+    "Ante o exposto, JULGO PROCEDENTE o pedido.",
+]
+
+
+def test_repeated_header_and_signature_lines_are_found():
+    repeated = find_repeated_lines(_court_pages(BODIES))
+
+    assert "poder judiciário" in repeated
+    assert "num. # - pág. #" in repeated
+    assert any(key.startswith("assinado eletronicamente por") for key in repeated)
+    assert not any("cobrança" in key for key in repeated)
+
+
+def test_normalize_removes_boilerplate_hyphenation_and_spaces():
+    pages = _court_pages(BODIES)
+
+    stats = normalize_pages(pages)
+
+    assert [p.text for p in pages] == [
+        "Trata-se de ação de cobrança ajuizada pelo autor.",
+        "O réu apresentou contestação fora do prazo legal.",
+        "Deve-se observar o disposto no art. 373 do CPC.",
+        "Ante o exposto, JULGO PROCEDENTE o pedido.",
+    ]
+    assert stats.removed_lines == 4 * 4
+    assert stats.joined_hyphens == 2
+    assert stats.normalized_characters < stats.original_characters / 2
+
+
+def test_every_kept_character_maps_back_to_the_extracted_text():
+    pages = _court_pages(BODIES)
+    originals = [p.text for p in pages]
+
+    normalize_pages(pages)
+
+    for page, original in zip(pages, originals):
+        for offset, char in enumerate(page.text):
+            if not char.isspace():
+                assert original[original_offset(page, offset)] == char
+        assert original_offset(page, len(page.text)) == len(original)
+
+
+def test_offset_map_is_a_pair_of_numbers_per_rewrite():
+    pages = _court_pages(BODIES)
+
+    normalize_pages(pages)
+
+    # Header removed, "contes-\ntação" joined, "   " collapsed, footer removed
+    assert len(pages[1].offsets) == 2 * 4
+    assert all(isinstance(n, int) for n in pages[1].offsets)
+
+
+def test_offsets_map_back_to_extracted_text():
+    pages = _court_pages(BODIES)
+    originals = [p.text for p in pages]
+    normalize_pages(pages)
+    raw_text = build_raw_text(pages)
+
+    page = pages[1]
+    start = raw_text.index("fora do prazo")
+    offset = original_offset(page, start - page.char_start)
+
+    assert originals[1][offset:offset + len("fora do prazo")] == "fora do prazo"
+    assert originals[1][original_offset(page, 0)] == "O"
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "backend", "local")
+    monkeypatch.setattr(settings, "local_backend_dir", tmp_path / "backend")
+    monkeypatch.setattr(local_backend, "_client", None)
+    clients.reset()
+    yield
+    clients.reset()
+
+
+def test_offset_maps_are_stored_next_to_the_pdf_not_in_the_result(backend):
+    pages = _court_pages(BODIES)
+    normalize_pages(pages)
+    result = ExtractionResult(document_id="doc-1", pages=pages)
+
+    key = export_offsets(result, "user-1/doc-1/peticao.pdf")
+
+    assert key == "user-1/doc-1/doc-1.offsets.json.gz"
+    assert "offsets" not in result.model_dump()["pages"][0]
+    restored = [PageContent.model_validate(p.model_dump()) for p in pages]
+    load_offsets(key, restored)
+    assert [p.offsets for p in restored] == [p.offsets for p in pages]
+    assert export_offsets(ExtractionResult(document_id="doc-2"), "user-1/doc-2/a.pdf") is None
+
+
+def test_short_documents_keep_their_lines():
+    pages = _court_pages(BODIES[:2])
+
+    normalize_pages(pages)
+
+    assert pages[0].text == HEADER + BODIES[0] + _footer(1)
+    assert pages[0].offsets == []
+
+
+def test_capitalised_continuation_keeps_hyphen_break():
+    pages = [PageContent(page_number=1, text="Ré-\nJoão da Silva")]
+
+    normalize_pages(pages)
+
+    assert pages[0].text == "Ré-\nJoão da Silva"
+    assert pages[0].offsets == []
+
+
+def test_table_rows_and_bare_page_numbers():
+    pages = [
+        PageContent(page_number=n, text=f"Parcelas do contrato {n}\n{n} 01/0{n}/2026 1.234,56\n{n}")
+        for n in range(1, 5)
+    ]
+
+    normalize_pages(pages)
+
+    assert [p.text for p in pages] == [f"{n} 01/0{n}/2026 1.234,56" for n in range(1, 5)]
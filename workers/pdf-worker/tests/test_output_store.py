@@ -0,0 +1,122 @@
+import gzip
+import json
+
+import pytest
+
+import src.services.database as db_mod
+import src.services.storage as storage_mod
+from src.models.extraction import (
+    DocumentSection,
+    ExtractionMetadata,
+    ExtractionResult,
+    PageContent,
+)
+from src.services import clients, local_backend, output_store
+
+
+@pytest.fixture
+def local_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_backend.settings, "backend", "local")
+    monkeypatch.setattr(local_backend.settings, "local_backend_dir", tmp_path / "backend")
+    monkeypatch.setattr(local_backend, "_client", None)
+    clients.reset()
+    monkeypatch.setattr(output_store.settings, "output_compression", "gzip")
+    return local_backend.get_client()
+
+
+def _result(text: str = "texto " * 50) -> ExtractionResult:
+    return ExtractionResult(
+        document_id="doc-1",
+        raw_text=text,
+        pages=[PageContent(page_number=1, text=text, tables_count=1)],
+        metadata=ExtractionMetadata(
+            total_pages=1, total_tables=1, total_characters=len(text), pdf_hash="ab" * 32
+        ),
+    )
+
+
+def test_small_output_stays_inline_in_auto_mode(local_client, monkeypatch):
+    monkeypatch.setattr(output_store.settings, "output_mode", "auto")
+    monkeypatch.setattr(output_store.settings, "output_inline_max_bytes", 1_000_000)
+
+    db_mod.save_extraction("doc-1", _result(), storage_path="u/doc-1/a.pdf")
+
+    stored = db_mod.get_extraction("doc-1")
+    assert not stored.spilled
+    assert stored.raw_text.startswith("texto")
+    assert stored.content_json["metadata"]["pdf_hash"] == "ab" * 32
+
+
+def test_large_output_spills_next_to_pdf(local_client, monkeypatch):
+    monkeypatch.setattr(output_store.settings, "output_mode", "auto")
+    monkeypatch.setattr(output_store.settings, "output_inline_max_bytes", 100)
+
+    db_mod.save_extraction("doc-1", _result(), storage_path="u/doc-1/a.pdf")
+
+    row = local_client.table("extractions").select("*").execute().data[0]
+    assert row["raw_text"] is None
+    assert row["output_key"] == "u/doc-1/doc-1.extraction.json.gz"
+    assert row["content_json"]["summary"]["pdf_hash"] == "ab" * 32
+    assert row["content_json"]["summary"]["total_tables"] == 1
+    assert row["tables_count"] == 1
+
+    blob = local_client.storage.from_("documents").download(row["output_key"])
+    assert json.loads(gzip.decompress(blob))["raw_text"].startswith("texto")
+
+
+def test_stored_extraction_fetches_lazily(local_client, monkeypatch):
+    monkeypatch.setattr(output_store.settings, "output_mode", "storage")
+    db_mod.save_extraction("doc-1", _result("conteúdo integral"), storage_path="u/doc-1/a.pdf")
+    downloads = []
+    real_download = storage_mod.download_object
+    monkeypatch.setattr(
+        storage_mod, "download_object", lambda key: downloads.append(key) or real_download(key)
+    )
+
+    stored = db_mod.get_extraction("doc-1")
+    assert stored.spilled and downloads == []
+    assert stored.summary["total_characters"] == len("conteúdo integral")
+
+    assert stored.raw_text == "conteúdo integral"
+    assert stored.content_json["pages"][0]["text"] == "conteúdo integral"
+    assert len(downloads) == 1
+
+
+@pytest.mark.parametrize("mode", ["inline", "storage"])
+def test_section_index_readable_without_download(local_client, monkeypatch, mode):
+    monkeypatch.setattr(output_store.settings, "output_mode", mode)
+    text = "RELATÓRIO\nFatos.\n\nDISPOSITIVO\nProcedente."
+    result = _result(text)
+    result.sections = [
+        DocumentSection(name="relatorio", heading="RELATÓRIO", char_start=0, char_end=16,
+                        page_start=1, page_end=1),
+        DocumentSection(name="dispositivo", heading="DISPOSITIVO", char_start=18,
+                        char_end=len(text), page_start=1, page_end=1),
+    ]
+    db_mod.save_extraction("doc-1", result, storage_path="u/doc-1/a.pdf")
+    downloads = []
+    real_download = storage_mod.download_object
+    monkeypatch.setattr(
+        storage_mod, "download_object", lambda key: downloads.append(key) or real_download(key)
+    )
+
+    stored = db_mod.get_extraction("doc-1")
+    assert [s.name for s in stored.sections] == ["relatorio", "dispositivo"]
+    assert downloads == []
+    assert stored.section_text("dispositivo") == "DISPOSITIVO\nProcedente."
+
+
+def test_inline_mode_never_spills(local_client, monkeypatch):
+    monkeypatch.setattr(output_store.settings, "output_mode", "inline")
+    monkeypatch.setattr(output_store.settings, "output_inline_max_bytes", 0)
+
+    db_mod.save_extraction("doc-1", _result(), storage_path="u/doc-1/a.pdf")
+
+    assert db_mod.get_extraction("doc-1").output_key is None
+
+
+def test_unknown_compression_and_encoding_rejected():
+    with pytest.raises(ValueError):
+        output_store.compress(b"{}", "lz4")
+    with pytest.raises(ValueError):
+        output_store.decompress(b"not compressed")
@@ -0,0 +1,117 @@
+import hashlib
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.config import settings
+from src.services import metrics, pdf_cache, storage
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "temp_dir", tmp_path / "tmp")
+    monkeypatch.setattr(settings, "pdf_cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(settings, "pdf_cache_enabled", True)
+    objects = {}
+    bucket = MagicMock()
+    bucket.download.side_effect = lambda path: objects[path]
+    client = MagicMock()
+    client.storage.from_.return_value = bucket
+    monkeypatch.setattr(storage, "_get_client", lambda: client)
+    bucket.objects = objects
+    return bucket
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _saved_bytes() -> float:
+    return metrics.REGISTRY.get_sample_value("kratos_pdf_source_cache_saved_bytes_total") or 0
+
+
+def test_retry_is_served_from_cache(bucket):
+    bucket.objects["u/doc-1/a.pdf"] = b"%PDF-1.4 one"
+    saved = _saved_bytes()
+
+    first = storage.download_pdf("u/doc-1/a.pdf", "doc-1")
+    storage.cleanup_temp_file("doc-1")
+    second = storage.download_pdf("u/doc-1/a.pdf", "doc-1")
+
+    assert bucket.download.call_count == 1
+    assert first == second and second.read_bytes() == b"%PDF-1.4 one"
+    assert _saved_bytes() - saved == 12
+    # The job's copy is a link: cleaning it up leaves the cache intact
+    storage.cleanup_temp_file("doc-1")
+    assert pdf_cache.size_bytes() == 12
+
+
+def test_pdf_hash_hits_same_content_under_another_path(bucket):
+    data = b"%PDF-1.4 shared"
+    bucket.objects["u/doc-1/a.pdf"] = data
+    storage.download_pdf("u/doc-1/a.pdf", "doc-1")
+
+    path = storage.download_pdf("u/doc-2/copy.pdf", "doc-2", expected_hash=_sha(data))
+
+    assert path.read_bytes() == data
+    assert bucket.download.call_count == 1
+
+
+def test_corrupt_entry_is_dropped_and_downloaded_again(bucket):
+    data = b"%PDF-1.4 original"
+    bucket.objects["u/doc-1/a.pdf"] = data
+    storage.download_pdf("u/doc-1/a.pdf", "doc-1")
+    storage.cleanup_temp_file("doc-1")
+    obj = settings.pdf_cache_dir / "objects" / f"{_sha(data)}.pdf"
+    obj.write_bytes(b"%PDF-1.4 truncat")
+
+    path = storage.download_pdf("u/doc-1/a.pdf", "doc-1", expected_hash=_sha(data))
+
+    assert path.read_bytes() == data
+    assert bucket.download.call_count == 2
+    assert obj.read_bytes() == data
+
+
+def test_malformed_hash_is_a_miss_not_a_path(bucket, tmp_path):
+    outside = tmp_path / "x.pdf"
+    outside.write_bytes(b"%PDF-1.4 not cached")
+    bucket.objects["u/doc-1/a.pdf"] = b"%PDF-1.4 one"
+    bucket.objects["u/doc-2/b.pdf"] = b"%PDF-1.4 two"
+    storage.download_pdf("u/doc-1/a.pdf", "doc-1")
+
+    path = storage.download_pdf("u/doc-2/b.pdf", "doc-2", expected_hash="../../x")
+
+    assert path.read_bytes() == b"%PDF-1.4 two"
+    assert bucket.download.call_count == 2
+    assert outside.read_bytes() == b"%PDF-1.4 not cached"
+
+
+def test_evicts_least_recently_used(bucket, monkeypatch):
+    for i, name in enumerate("abc"):
+        bucket.objects[name] = b"%PDF" + bytes([i]) * 1020
+        storage.download_pdf(name, f"doc-{name}")
+        obj = settings.pdf_cache_dir / "objects" / f"{_sha(bucket.objects[name])}.pdf"
+        os.utime(obj, (1000 + i, 1000 + i))
+    # "a" is used again, so "b" is now the oldest
+    storage.download_pdf("a", "doc-a2")
+
+    assert pdf_cache.evict(max_bytes=2048) == 1024
+
+    storage.download_pdf("a", "doc-a3")
+    storage.download_pdf("c", "doc-c2")
+    assert bucket.download.call_count == 3
+    storage.download_pdf("b", "doc-b2")
+    assert bucket.download.call_count == 4
+    assert len(list((settings.pdf_cache_dir / "paths").iterdir())) == 3
+
+
+def test_disabled_cache_writes_plain_temp_file(bucket, monkeypatch):
+    monkeypatch.setattr(settings, "pdf_cache_enabled", False)
+    bucket.objects["p"] = b"%PDF-1.4"
+
+    storage.download_pdf("p", "doc-1")
+    storage.download_pdf("p", "doc-1")
+
+    assert bucket.download.call_count == 2
+    assert not settings.pdf_cache_dir.exists()
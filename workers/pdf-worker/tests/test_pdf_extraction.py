@@ -1,5 +1,15 @@
 from unittest.mock import MagicMock, patch
 
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _no_layout_cache(monkeypatch):
+    """Mock pages stub extract_tables(); the cache is covered in test_layout_cache."""
+    from src.config import settings
+
+    monkeypatch.setattr(settings, "layout_cache_enabled", False)
+
 
 def _make_mock_pdf(pages_data):
     """Helper: create a mock pdfplumber PDF with given pages.
@@ -101,3 +111,81 @@ def test_extract_tables_skips_empty_tables(mock_pdfplumber):
     tables = extract_tables(b"%PDF-1.4")
     assert len(tables) == 1
     assert tables[0].headers == ["Header"]
+
+
+def _make_pdf(pages: list[tuple[list[str], bool]]) -> bytes:
+    """Minimal PDF: each page has text lines and optionally a ruled 2x2 table."""
+    objects: list[bytes] = []
+    page_ids = []
+    font_id = 3
+    for lines, ruled in pages:
+        ops = ["BT /F1 11 Tf 72 760 Td 14 TL"]
+        ops += [f"({line}) Tj T*" for line in lines]
+        ops.append("ET")
+        if ruled:
+            ops.append("1 w 72 600 m 372 600 l 72 570 m 372 570 l 72 540 m 372 540 l S")
+            ops.append("72 540 m 72 600 l 222 540 m 222 600 l 372 540 m 372 600 l S")
+            ops.append("BT /F1 10 Tf 80 580 Td (Valor) Tj 150 0 Td (Data) Tj ET")
+            ops.append("BT /F1 10 Tf 80 550 Td (1.234,56) Tj 150 0 Td (01/02/2026) Tj ET")
+        stream = "\n".join(ops).encode()
+        content_id = 4 + len(objects)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_id = 4 + len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(page_id)
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    head = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(head + objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(offsets) + 1, xref
+    )
+    return bytes(out)
+
+
+def test_hybrid_engine_routes_ruled_pages_to_pdfplumber():
+    from src.services.pdf_extraction import get_engine
+
+    pdf = _make_pdf([
+        (["Trata-se de acao de cobranca.", "Segunda linha do relatorio."], False),
+        (["Planilha de calculo"], True),
+    ])
+
+    pages, tables = get_engine("hybrid").extract(pdf)
+
+    assert [p.engine for p in pages] == ["pdfium", "pdfplumber"]
+    assert pages[0].text == "Trata-se de acao de cobranca.\nSegunda linha do relatorio."
+    assert pages[1].tables_count == 1
+    assert len(tables) == 1 and tables[0].page == 2
+    assert tables[0].raw_rows == [["1.234,56", "01/02/2026"]]
+
+
+def test_hybrid_text_matches_pdfplumber_on_text_pages():
+    from src.services.pdf_extraction import get_engine
+
+    pdf = _make_pdf([(["PODER JUDICIARIO", "Processo 0001234-56.2026.8.26.0100"], False)])
+
+    hybrid_pages, _ = get_engine("hybrid").extract(pdf)
+    plumber_pages, _ = get_engine("pdfplumber").extract(pdf)
+
+    assert hybrid_pages[0].text == plumber_pages[0].text
+
+
+def test_unknown_engine_rejected():
+    from src.services.pdf_extraction import get_engine
+
+    with pytest.raises(ValueError, match="EXTRACTION_ENGINE"):
+        get_engine("ocr")
@@ -0,0 +1,72 @@
+import json
+import time
+
+import pytest
+
+from src.services import profiling
+
+
+@pytest.fixture
+def profile_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.settings, "profile_jobs", True)
+    monkeypatch.setattr(profiling.settings, "profile_dir", tmp_path)
+    monkeypatch.setattr(profiling.settings, "profile_interval_ms", 1.0)
+    monkeypatch.setattr(profiling.settings, "profile_keep_slowest", 2)
+    monkeypatch.setattr(profiling.settings, "profile_threshold_seconds", 0.0)
+    return tmp_path
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def test_disabled_profiler_is_noop(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.settings, "profile_jobs", False)
+    monkeypatch.setattr(profiling.settings, "profile_dir", tmp_path / "profiles")
+
+    with profiling.profiled_job("doc-1") as profile:
+        profile.annotate(page_count=3, extract=1.0)
+
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_profile_written_in_collapsed_format(profile_settings):
+    with profiling.profiled_job("doc-1") as profile:
+        _busy(0.05)
+        profile.annotate(page_count=7, extract_pages=0.04)
+
+    collapsed = list(profile_settings.glob("*.collapsed"))
+    assert len(collapsed) == 1
+    line = collapsed[0].read_text().splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert "test_profiling:_busy" in stack
+    assert int(count) > 0
+
+    meta = json.loads(collapsed[0].with_suffix(".json").read_text())
+    assert meta["document_id"] == "doc-1"
+    assert meta["page_count"] == 7
+    assert meta["stage_timings"] == {"extract_pages": 0.04}
+
+
+def test_keeps_only_slowest_n_per_window(profile_settings):
+    for doc, seconds in [("a", 0.03), ("b", 0.06), ("c", 0.01), ("d", 0.09)]:
+        with profiling.profiled_job(doc):
+            _busy(seconds)
+
+    kept = sorted(json.loads(p.read_text())["document_id"] for p in profile_settings.glob("*.json"))
+    assert kept == ["b", "d"]
+
+
+def test_threshold_always_keeps_slow_jobs(profile_settings, monkeypatch):
+    monkeypatch.setattr(profiling.settings, "profile_keep_slowest", 0)
+    monkeypatch.setattr(profiling.settings, "profile_threshold_seconds", 0.02)
+
+    with profiling.profiled_job("fast"):
+        pass
+    with profiling.profiled_job("slow"):
+        _busy(0.03)
+
+    files = [p.name for p in profile_settings.glob("*.json")]
+    assert len(files) == 1 and files[0].startswith("slow-")
@@ -0,0 +1,93 @@
+import json
+import time
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+import redis
+
+from src.config import settings
+from src.models.extraction import DocumentStatus
+from src.services import progress
+from tests.test_pdf_extraction import _make_pdf
+
+
+@pytest.fixture
+def r(monkeypatch):
+    monkeypatch.setattr(settings, "progress_enabled", True)
+    monkeypatch.setattr(settings, "single_flight_enabled", False)
+    monkeypatch.setattr(settings, "runtime_model_enabled", False)
+    r = fakeredis.FakeRedis()
+    with patch("src.services.progress.queue._get_redis", return_value=r):
+        yield r
+
+
+def _events(r, document_id):
+    return [json.loads(fields[b"data"]) for _, fields in r.xrange(progress.stream_key(document_id))]
+
+
+def test_page_events_are_throttled_but_stages_and_finish_always_go_out(r, monkeypatch):
+    monkeypatch.setattr(settings, "progress_interval_seconds", 60)
+
+    with progress.tracking("doc-1"):
+        progress.stage("extract_pages", 50)
+        for _ in range(50):
+            progress.page_done()
+        progress.finish(DocumentStatus.completed.value, pages=50)
+    progress.page_done()  # no job bound: no-op
+
+    events = _events(r, "doc-1")
+    assert [e["stage"] for e in events] == ["extract_pages", "completed"]
+    assert events[0]["pagesDone"] == 0 and events[0]["pagesTotal"] == 50
+    assert events[1] == {**events[1], "status": "completed", "pages": 50, "pagesDone": 50, "etaSeconds": 0.0}
+    assert 0 < r.ttl(progress.stream_key("doc-1")) <= settings.progress_ttl_seconds
+
+
+def test_eta_uses_the_prediction_then_the_observed_pace():
+    reporter = progress.Reporter(fakeredis.FakeRedis(), "doc-1")
+    now = time.monotonic()
+    assert reporter.eta(now) is None
+
+    reporter.predict(40.0)
+    assert reporter.eta(time.monotonic() + 10) == pytest.approx(30.0, abs=0.2)
+
+    reporter.pages_total, reporter.pages_done = 20, 5
+    reporter._pages_started = now - 10  # 2 s per page, 15 pages to go
+    assert reporter.eta(now) == 30.0
+
+
+def test_redis_errors_silence_the_reporter_without_failing():
+    reporter = progress.Reporter(redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.2), "doc-1")
+
+    reporter.set_stage("download")
+    reporter.set_stage("extract_pages", 10)
+
+    assert reporter._silenced and reporter.stage == "extract_pages"
+
+
+@patch("src.tasks.extract_pdf.storage")
+@patch("src.tasks.extract_pdf.database")
+def test_job_publishes_stages_pages_and_completion(mock_db, mock_storage, r, tmp_path, monkeypatch):
+    from src.tasks.extract_pdf import process_pdf_job
+
+    monkeypatch.setattr(settings, "progress_interval_seconds", 0)
+    pdf = tmp_path / "document.pdf"
+    pdf.write_bytes(_make_pdf([([f"pagina {n}"], False) for n in range(3)]))
+    mock_storage.download_pdf.return_value = pdf
+    # Last event of an earlier run of the same document
+    r.xadd(progress.stream_key("doc-7"), {"data": json.dumps({"stage": "failed", "status": "failed"})})
+
+    report = process_pdf_job({"documentId": "doc-7", "filePath": "user-1/doc-7/a.pdf"})
+
+    assert report["status"] == DocumentStatus.completed.value
+    events = _events(r, "doc-7")
+    stages = [e["stage"] for e in events]
+    assert stages[:5] == ["queued", "download", "validate", "hash", "extract_pages"]
+    assert [e["status"] for e in events if "status" in e] == ["completed"]
+    assert stages[-2:] == ["persist", "completed"]
+    assert [e["pagesDone"] for e in events if e["stage"] == "extract_pages"] == [0, 1, 2, 3]
+    assert events[-1]["status"] == "completed" and events[-1]["pages"] == 3
+    # documents.status keeps only the real transitions
+    assert [c.args[1] for c in mock_db.update_document_status.call_args_list] == [
+        DocumentStatus.downloading.value, DocumentStatus.extracting.value, DocumentStatus.completed.value,
+    ]
@@ -0,0 +1,121 @@
+import base64
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import pytest
+
+import src.services.queue as queue_mod
+
+
+def _mock_redis(depth=0, avg=None, workers=None):
+    r = MagicMock()
+    r.llen.return_value = depth
+    r.zcard.return_value = 0
+    r.get.return_value = None if avg is None else str(avg).encode()
+    r.hgetall.return_value = {
+        name.encode(): json.dumps(stats).encode() for name, stats in (workers or {}).items()
+    }
+    return r
+
+
+def test_desired_concurrency_scales_with_backlog():
+    assert queue_mod.desired_concurrency(0, 30.0, 300, 1, 8) == 1
+    assert queue_mod.desired_concurrency(40, 30.0, 300, 1, 8) == 4
+    assert queue_mod.desired_concurrency(1000, 30.0, 300, 1, 8) == 8
+    # No duration estimate yet: one slot per waiting job, bounded
+    assert queue_mod.desired_concurrency(3, None, 300, 1, 8) == 3
+
+
+def test_estimated_wait_seconds():
+    assert queue_mod.estimated_wait_seconds(10, 30.0, 2) == 150.0
+    assert queue_mod.estimated_wait_seconds(10, None, 2) == 0.0
+    assert queue_mod.estimated_wait_seconds(10, 30.0, 0) == 300.0
+
+
+def test_job_enqueued_at_reads_plain_and_celery_messages():
+    plain = json.dumps({"documentId": "doc-1", "enqueuedAt": 123.5})
+    assert queue_mod._job_enqueued_at(plain) == 123.5
+
+    body = base64.b64encode(json.dumps([[{"documentId": "doc-1", "enqueuedAt": 99}], {}, {}]).encode())
+    celery_msg = json.dumps({"body": body.decode(), "headers": {"task": "extract_pdf"}})
+    assert queue_mod._job_enqueued_at(celery_msg) == 99.0
+
+    assert queue_mod._job_enqueued_at(json.dumps({"documentId": "doc-1"})) is None
+    assert queue_mod._job_enqueued_at(b"not json") is None
+
+
+def test_oldest_job_age_uses_queue_tail():
+    r = MagicMock()
+    r.lindex.return_value = json.dumps({"enqueuedAt": time.time() - 60})
+
+    age = queue_mod.oldest_job_age(r, "kratos:jobs:pdf")
+
+    r.lindex.assert_called_with("kratos:jobs:pdf", -1)
+    assert 59 <= age <= 61
+
+
+def test_enqueue_job_stamps_and_pushes(monkeypatch):
+    r = _mock_redis(depth=2, avg=10.0, workers={"w1": {"concurrency": 1, "heartbeat": time.time()}})
+    monkeypatch.setattr(queue_mod, "_redis", r)
+
+    job = {"documentId": "doc-1", "filePath": "a.pdf"}
+    queue_mod.enqueue_job(job)
+
+    key, payload = r.lpush.call_args[0]
+    assert key == "kratos:jobs:pdf"
+    assert "enqueuedAt" in json.loads(payload)
+
+
+def test_enqueue_job_applies_backpressure(monkeypatch):
+    r = _mock_redis(depth=100, avg=30.0, workers={"w1": {"concurrency": 2, "heartbeat": time.time()}})
+    monkeypatch.setattr(queue_mod, "_redis", r)
+    monkeypatch.setattr(queue_mod.settings, "queue_latency_slo_seconds", 300)
+
+    with pytest.raises(queue_mod.QueueFullError):
+        queue_mod.enqueue_job({"documentId": "doc-1"})
+    r.lpush.assert_not_called()
+
+
+def test_queue_stats_count_trigger_runs_until_they_start(monkeypatch):
+    monkeypatch.setattr(queue_mod.settings, "queue_dispatched_ttl_seconds", 3600)
+    r = fakeredis.FakeRedis()
+    key = "kratos:jobs:pdf"
+    now = time.time()
+    # Added by the API when it hands the job to Trigger.dev
+    r.zadd(key + queue_mod.DISPATCHED_SUFFIX, {"doc-1": now - 60, "doc-2": now, "lost": now - 7200})
+    queue_mod.record_job_duration(r, key, 20.0)
+
+    queue_mod.job_started(r, key, "doc-2")
+    stats = queue_mod.publish_queue_stats(r, key, capacity=2)
+
+    assert stats["depth"] == 1 and stats["capacity"] == 2
+    assert 59 <= stats["oldest_age_seconds"] <= 61
+    assert stats["estimated_wait_seconds"] == 10.0
+    assert float(r.hget(key + queue_mod.STATS_SUFFIX, "estimated_wait_seconds")) == 10.0
+
+
+def test_active_workers_prunes_stale_heartbeats():
+    r = _mock_redis(workers={
+        "alive": {"concurrency": 2, "heartbeat": time.time()},
+        "dead": {"concurrency": 2, "heartbeat": time.time() - 3600},
+    })
+
+    workers = queue_mod.active_workers(r, "kratos:jobs:pdf")
+
+    assert list(workers) == ["alive"]
+    r.hdel.assert_called_once_with("kratos:jobs:pdf:workers", "dead")
+
+
+def test_utilisation_tracker():
+    with patch("src.services.queue.time.monotonic") as clock:
+        clock.return_value = 0.0
+        tracker = queue_mod.UtilisationTracker(concurrency=1)
+        clock.return_value = 1.0
+        tracker.job_started()
+        clock.return_value = 4.0
+        tracker.job_finished()
+        clock.return_value = 4.0
+
+        assert tracker.utilisation() == pytest.approx(0.75)
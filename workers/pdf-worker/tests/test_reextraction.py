@@ -0,0 +1,122 @@
+import hashlib
+from datetime import datetime
+
+import fakeredis
+import pytest
+
+from src.config import settings
+from src.pipeline import EXTRACTOR_VERSION
+from src.services import clients, local_backend, reextraction, storage
+from tests.test_pdf_extraction import _make_pdf
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "backend", "local")
+    monkeypatch.setattr(settings, "local_backend_dir", tmp_path / "backend")
+    monkeypatch.setattr(settings, "temp_dir", tmp_path / "tmp")
+    monkeypatch.setattr(settings, "reextract_window", "")
+    monkeypatch.setattr(local_backend, "_client", None)
+    clients.reset()
+    yield local_backend.get_client()
+    clients.reset()
+
+
+def _document(client, doc_id, pdf, status="completed", version=0):
+    path = f"user-1/{doc_id}/file.pdf"
+    storage.upload_object(path, pdf)
+    client.table("documents").insert({
+        "id": doc_id, "user_id": "user-1", "file_path": path, "status": status,
+        "pdf_hash": hashlib.sha256(pdf).hexdigest(),
+    }).execute()
+    client.table("extractions").insert({
+        "id": f"ext-{doc_id}", "document_id": doc_id, "raw_text": "old",
+        "content_json": {}, "extractor_version": version,
+    }).execute()
+
+
+def _versions(client, doc_id):
+    rows = client.table("extractions").select("*").eq("document_id", doc_id).execute().data
+    return sorted(row["extractor_version"] for row in rows)
+
+
+def test_window_wraps_midnight():
+    assert reextraction.in_window(datetime(2026, 10, 19, 23, 30), "22:00-05:00")
+    assert reextraction.in_window(datetime(2026, 10, 19, 4, 59), "22:00-05:00")
+    assert not reextraction.in_window(datetime(2026, 10, 19, 12, 0), "22:00-05:00")
+    assert not reextraction.in_window(datetime(2026, 10, 19, 6, 0), "01:00-06:00")
+    assert reextraction.in_window(datetime(2026, 10, 19, 12, 0), "")
+    with pytest.raises(ValueError):
+        reextraction.parse_window("night")
+
+
+def test_batch_extracts_reuses_by_hash_and_skips(backend):
+    sentenca = _make_pdf([(["RELATORIO", "Trata-se de acao."], False)])
+    _document(backend, "doc-a", sentenca)
+    _document(backend, "doc-b", sentenca)  # same PDF, another upload
+    _document(backend, "doc-c", _make_pdf([(["DOS FATOS"], False)]), status="failed")
+    _document(backend, "doc-d", _make_pdf([(["DOS PEDIDOS"], False)]))
+    backend.table("extractions").insert({
+        "document_id": "doc-d", "content_json": {}, "extractor_version": EXTRACTOR_VERSION,
+    }).execute()
+    r = fakeredis.FakeRedis()
+    pauses = []
+
+    stats = reextraction.run_batch(r, sleep=pauses.append)
+
+    assert (stats.planned, stats.completed, stats.reused, stats.skipped, stats.failed) == (4, 1, 1, 2, 0)
+    assert stats.pages == 1 and stats.cpu_seconds > 0
+    assert len(pauses) == 3
+    # stale rows are rewritten in place, keeping the id analyses reference
+    assert _versions(backend, "doc-a") == _versions(backend, "doc-b") == [EXTRACTOR_VERSION]
+    rewritten = backend.table("extractions").select("id").eq("document_id", "doc-a").execute().data
+    assert rewritten == [{"id": "ext-doc-a"}]
+    assert _versions(backend, "doc-c") == [0]
+    reused = backend.table("extraction_pages").select("*").eq("document_id", "doc-b").execute().data
+    assert "RELATORIO" in reused[0]["text"]
+
+    history = reextraction.batch_history(r)
+    assert history[0]["batch_id"] == stats.batch_id and history[0]["processed"] == 4
+    assert r.hget(f"{settings.reextract_key}:batch", "completed") == b"1"
+    # The cursor moved past every stale row
+    assert reextraction.run_batch(r).planned == 0
+
+
+def test_batch_yields_to_live_traffic(backend):
+    _document(backend, "doc-a", _make_pdf([(["EMENTA"], False)]))
+    r = fakeredis.FakeRedis()
+    r.lpush(settings.queue_key, '{"documentId": "live"}')
+
+    stats = reextraction.run_batch(r)
+
+    assert stats.stopped == "queue" and stats.processed == 0
+    assert _versions(backend, "doc-a") == [0]
+
+    r.delete(settings.queue_key)
+    assert reextraction.run_batch(r).completed == 1
+
+
+def test_failed_rows_are_retried_once_the_scan_is_done(backend, monkeypatch):
+    _document(backend, "doc-a", _make_pdf([(["EMENTA"], False)]))
+    r = fakeredis.FakeRedis()
+    monkeypatch.setattr(settings, "reextract_max_attempts", 2)
+    run_pipeline = reextraction.run_pipeline
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("storage unavailable")
+
+    monkeypatch.setattr(reextraction, "run_pipeline", broken)
+    first = reextraction.run_batch(r)
+    second = reextraction.run_batch(r)
+
+    assert (first.retry, first.failed) == (False, 1)
+    assert (second.retry, second.failed) == (True, 1)
+    assert reextraction.run_batch(r).planned == 0  # out of attempts
+
+    monkeypatch.setattr(settings, "reextract_max_attempts", 3)
+    monkeypatch.setattr(reextraction, "run_pipeline", run_pipeline)
+    third = reextraction.run_batch(r)
+
+    assert (third.retry, third.completed) == (True, 1)
+    assert _versions(backend, "doc-a") == [EXTRACTOR_VERSION]
+    assert reextraction.run_batch(r).planned == 0
@@ -0,0 +1,163 @@
+import json
+import time
+
+import fakeredis
+import pytest
+
+from src.config import settings
+from src.services import fair_queue, metrics, pdf_extraction, runtime_model
+from tests.test_pdf_extraction import _make_pdf
+
+
+@pytest.fixture(autouse=True)
+def fresh_model(monkeypatch):
+    monkeypatch.setattr(runtime_model, "_model", None)
+    monkeypatch.setattr(settings, "runtime_model_min_samples", 10)
+
+
+def _sample(pages, table_ratio=0.0, seconds=None, predicted=None):
+    features = runtime_model.JobFeatures(pages=pages, size_mb=pages * 0.05, table_ratio=table_ratio)
+    if seconds is None:
+        seconds = 1.0 + 0.2 * pages + 0.5 * pages * table_ratio
+    return {"features": features.model_dump(), "seconds": seconds, "predicted": predicted}
+
+
+def test_probe_samples_image_and_table_pages(tmp_path):
+    pdf = tmp_path / "document.pdf"
+    pdf.write_bytes(_make_pdf([(["texto"], False), (["planilha"], True)] * 2))
+
+    features = runtime_model.probe(pdf)
+
+    assert features.pages == 4
+    assert features.table_ratio == 0.5 and features.image_ratio == 0.0
+    assert features.size_mb == round(pdf.stat().st_size / (1024 * 1024), 3)
+
+
+def test_fit_recovers_runtime_and_never_goes_negative():
+    samples = [_sample(p, t) for p in (1, 5, 20, 80, 200, 400) for t in (0.0, 0.25, 1.0)]
+
+    coef = dict(zip(runtime_model.FEATURES, runtime_model.fit(samples)))
+
+    # size_mb is collinear with pages: the fit may split the per-page cost
+    per_page = coef["pages"] + 0.05 * coef["size_mb"]
+    assert per_page == pytest.approx(0.2, rel=1e-3)
+    assert coef["table_pages"] == pytest.approx(0.5, rel=1e-3)
+    assert coef["intercept"] == pytest.approx(1.0, rel=1e-2)
+
+    # Bigger documents that happened to be faster must not predict negative time
+    odd = [_sample(p, seconds=50.0 - 0.1 * p) for p in range(1, 100, 7)]
+    assert all(c >= 0 for c in runtime_model.fit(odd))
+
+
+def test_current_uses_the_prior_until_enough_samples_then_fits_and_reports_accuracy():
+    r = fakeredis.FakeRedis()
+    for pages in (10, 20, 30):
+        runtime_model.record(r, runtime_model.Plan(
+            features=runtime_model.JobFeatures(pages=pages), predicted_seconds=1.0, timeout_seconds=60,
+        ), extract_seconds=2.0, timings={"extract": 2.0})
+
+    prior = runtime_model.current(r)
+    assert prior.coefficients == [] and prior.samples == 3
+    assert prior.predict(runtime_model.JobFeatures(pages=100)) == pytest.approx(
+        settings.runtime_prior_seconds + 100 * settings.runtime_prior_seconds_per_page
+    )
+
+    for pages in range(1, 200, 10):
+        sample = _sample(pages, predicted=(1.0 + 0.2 * pages) * 1.5)
+        r.lpush(runtime_model.samples_key(), json.dumps(sample))
+    runtime_model._model.fitted_at = 0  # stale: refit
+    model = runtime_model.current(r)
+
+    assert model.predict(runtime_model.JobFeatures(pages=300, size_mb=15)) == pytest.approx(61, rel=0.05)
+    assert model.accuracy.jobs == 23
+    assert model.accuracy.median_error == pytest.approx(0.5)
+    assert metrics.REGISTRY.get_sample_value(
+        "kratos_pdf_runtime_prediction_error", {"quantile": "0.5"}
+    ) == pytest.approx(0.5)
+    assert json.loads(r.get(runtime_model.model_key()))["samples"] == 23
+
+
+def test_plan_scales_the_time_limit_and_goes_parallel_for_long_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "runtime_prior_seconds", 0.0)
+    monkeypatch.setattr(settings, "runtime_prior_seconds_per_page", 10.0)
+    monkeypatch.setattr(settings, "extraction_workers", 4)
+    monkeypatch.setattr(settings, "parallel_min_seconds", 30)
+    small, large = tmp_path / "small.pdf", tmp_path / "large.pdf"
+    small.write_bytes(_make_pdf([(["texto"], False)]))
+    large.write_bytes(_make_pdf([(["texto"], False)] * 6))
+
+    one, six = runtime_model.plan(small), runtime_model.plan(large)
+
+    assert (one.predicted_seconds, one.workers, one.timeout_seconds) == (10.0, 1, 60)
+    assert (six.predicted_seconds, six.workers) == (60.0, 4)
+    assert six.timeout_seconds == 60 * settings.runtime_timeout_factor + settings.runtime_timeout_slack_seconds
+
+
+def test_parallel_extraction_matches_one_pass(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "extraction_workers", 2)
+    monkeypatch.setattr(pdf_extraction, "_pool", None)
+    pdf = tmp_path / "document.pdf"
+    pdf.write_bytes(_make_pdf([([f"pagina {n}"], n % 2 == 0) for n in range(5)]))
+
+    try:
+        parallel = pdf_extraction.extract_parallel(pdf, 5, workers=2, engine="hybrid")
+    finally:
+        pdf_extraction._pool.shutdown()
+        monkeypatch.setattr(pdf_extraction, "_pool", None)
+    single = pdf_extraction.get_engine("hybrid").extract(pdf)
+
+    assert [p.model_dump() for p in parallel[0]] == [p.model_dump() for p in single[0]]
+    assert [t.page for t in parallel[1]] == [1, 3, 5]
+
+
+def test_interrupted_parallel_extraction_recycles_the_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "extraction_workers", 2)
+    monkeypatch.setattr(pdf_extraction, "_pool", None)
+    pdf = tmp_path / "document.pdf"
+    pdf.write_bytes(_make_pdf([(["texto"], False)] * 4))
+
+    processes = []
+
+    def timed_out(futures):
+        processes.extend(pdf_extraction._pool._processes.values())
+        raise runtime_model.JobTimeoutError("Job exceeded its predicted time limit")
+        yield
+
+    monkeypatch.setattr(pdf_extraction, "as_completed", timed_out)
+    with pytest.raises(runtime_model.JobTimeoutError):
+        pdf_extraction.extract_parallel(pdf, 4, workers=2, engine="hybrid")
+
+    assert pdf_extraction._pool is None and processes
+    for process in processes:
+        process.join(timeout=10)
+        assert process.exitcode is not None
+
+
+def test_deadline_interrupts_a_job_past_its_limit():
+    with pytest.raises(runtime_model.JobTimeoutError):
+        with runtime_model.deadline(0.05):
+            time.sleep(1)
+    with runtime_model.deadline(None):
+        time.sleep(0.01)
+
+
+def test_fair_queue_charges_tenants_by_expected_cost(monkeypatch):
+    monkeypatch.setattr(settings, "tenant_weights", {})
+    monkeypatch.setattr(settings, "tenant_max_concurrency", 0)
+    r = fakeredis.FakeRedis()
+    q = "kratos:jobs:pdf"
+    for i in range(3):
+        fair_queue.push(r, q, {"documentId": f"big-{i}", "userId": "big", "pageCount": 400})
+        fair_queue.push(r, q, {"documentId": f"small-{i}", "userId": "small", "pageCount": 4})
+    costs = {400: 4.0, 4: 1.0}
+
+    order = []
+    while (picked := fair_queue.pop(r, q, cost=lambda job: costs[job["pageCount"]])) is not None:
+        order.append(picked[0]["documentId"])
+        fair_queue.release(r, q, picked[1])
+
+    # One 400-page job costs four turns: the small tenant drains first
+    assert order[:4] in (
+        ["big-0", "small-0", "small-1", "small-2"],
+        ["small-0", "big-0", "small-1", "small-2"],
+    )
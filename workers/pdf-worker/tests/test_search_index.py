@@ -0,0 +1,78 @@
+import pytest
+
+from src.config import settings
+from src.models.extraction import ExtractionResult, PageContent
+from src.services import clients, local_backend, search_index
+from src.services.chunking import build_raw_text
+
+PAGES = [
+    "EXCELENTÍSSIMO SENHOR DOUTOR JUIZ\nAutor: João da Conceição, CPF 123.456.789-09",
+    "",
+    "Processo nº 0001234-56.2024.8.26.0100\nNos termos do art. 5º da Constituição, "
+    "a Ação é procedente. Condeno o réu JOAO DA CONCEICAO.",
+    "Ante o exposto, julgo PROCEDENTE o pedido (CPF 12345678909).",
+]
+
+
+def _result() -> ExtractionResult:
+    pages = [PageContent(page_number=i, text=text) for i, text in enumerate(PAGES, start=1)]
+    return ExtractionResult(document_id="doc-1", raw_text=build_raw_text(pages), pages=pages)
+
+
+def test_tokens_fold_accents_and_normalize_identifiers():
+    terms = [t for t, _, _ in search_index.tokenize("Ação nº 5º, CPF 123.456.789-09 guarda-chuva")]
+    assert terms == ["acao", "n", "5", "cpf", "12345678909", "guarda", "chuva"]
+    text = "FUNDAMENTAÇÃO"
+    (term, start, end), = search_index.tokenize(text)
+    assert term == "fundamentacao" and text[start:end] == text
+
+
+def test_term_and_phrase_hits_carry_pages_and_offsets():
+    result = _result()
+    index = search_index.SearchIndex.load(
+        search_index.SearchIndex.build(result.raw_text, result.pages, "doc-1").serialize()
+    )
+
+    found = index.search("joão da conceição")
+    assert found.total == 2 and [h.page for h in found.hits] == [1, 3]
+    hit = found.hits[1]
+    assert result.raw_text[hit.char_start:hit.char_end] == "JOAO DA CONCEICAO"
+    assert PAGES[2][hit.page_char_start:hit.page_char_end] == "JOAO DA CONCEICAO"
+
+    cpf = index.search("123456789-09")
+    assert [h.page for h in cpf.hits] == [1, 4]
+    assert [h.page for h in index.search("0001234-56.2024.8.26.0100").hits] == [3]
+    assert [h.page for h in index.search("Art. 5º").hits] == [3]
+    assert index.search("procedente").total == 2
+    assert index.search("julgo improcedente").total == 0
+    assert index.search("…").total == 0
+
+
+def test_limit_keeps_total():
+    result = _result()
+    index = search_index.SearchIndex.build(result.raw_text, result.pages)
+
+    found = index.search("da", limit=1)
+
+    assert found.total == 3 and len(found.hits) == 1
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "backend", "local")
+    monkeypatch.setattr(settings, "local_backend_dir", tmp_path / "backend")
+    monkeypatch.setattr(local_backend, "_client", None)
+    clients.reset()
+    yield
+    clients.reset()
+
+
+def test_export_uploads_compressed_index_next_to_pdf(backend, monkeypatch):
+    key = search_index.export_index(_result(), "user-1/doc-1/peticao.pdf")
+
+    assert key == "user-1/doc-1/doc-1.search.gz"
+    index = search_index.load_index(key)
+    assert index.document_id == "doc-1" and index.search("constituicao").hits[0].page == 3
+
+    monkeypatch.setattr(settings, "search_index_enabled", False)
+    assert search_index.export_index(_result(), "user-1/doc-1/peticao.pdf") is None
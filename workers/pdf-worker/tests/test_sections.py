@@ -0,0 +1,64 @@
+from src.models.extraction import PageContent
+from src.services.chunking import build_raw_text
+from src.services.sections import section_text, segment
+
+SENTENCA = [
+    "PODER JUDICIÁRIO\nProcesso nº 0001234-56.2026.8.26.0100\nSENTENÇA",
+    "I - RELATÓRIO\nTrata-se de ação de cobrança ajuizada por João contra Maria.\n"
+    "É o relatório. Decido.",
+    "II - FUNDAMENTAÇÃO\nO pedido é procedente, pois a dívida está comprovada.",
+    "III - DISPOSITIVO\nAnte o exposto, JULGO PROCEDENTE o pedido.\nP.R.I.",
+]
+
+
+def _document(texts):
+    pages = [PageContent(page_number=i + 1, text=t) for i, t in enumerate(texts)]
+    return build_raw_text(pages), pages
+
+
+def test_segments_ruling_with_pages_and_offsets():
+    raw_text, pages = _document(SENTENCA)
+
+    sections = segment(raw_text, pages)
+
+    assert [s.name for s in sections] == ["preambulo", "relatorio", "fundamentacao", "dispositivo"]
+    assert [(s.page_start, s.page_end) for s in sections] == [(1, 1), (2, 2), (3, 3), (4, 4)]
+    dispositivo = sections[-1]
+    assert dispositivo.heading == "III - DISPOSITIVO"
+    assert raw_text[dispositivo.char_start:dispositivo.char_end] == SENTENCA[3]
+
+
+def test_section_text_selects_requested_sections_in_order():
+    raw_text, pages = _document(SENTENCA)
+    sections = segment(raw_text, pages)
+
+    text = section_text(raw_text, sections, ["dispositivo", "relatorio"])
+
+    assert text.startswith("I - RELATÓRIO")
+    assert text.endswith("P.R.I.")
+    assert "FUNDAMENTAÇÃO" not in text
+
+
+def test_petition_headings_without_accents_and_other_sections():
+    raw_text, pages = _document([
+        "EXCELENTISSIMO SENHOR DOUTOR JUIZ\n1. DOS FATOS\nO autor contratou o servico.",
+        "2. DO DIREITO\nAplica-se o CDC.\nDA INVERSAO DO ONUS DA PROVA\nRequer a inversao.",
+        "3. Dos Pedidos:\na) a procedencia da acao;\nDO VALOR DA CAUSA\nR$ 10.000,00.",
+    ])
+
+    sections = segment(raw_text, pages)
+
+    assert [s.name for s in sections] == [
+        "preambulo", "fatos", "direito", "secao", "pedidos", "valor_causa",
+    ]
+    assert sections[3].heading == "DA INVERSAO DO ONUS DA PROVA"
+    assert sections[4].page_start == sections[4].page_end == 3
+
+
+def test_headings_must_stand_alone_on_their_line():
+    raw_text, pages = _document([
+        "Conforme o relatório pericial, o dispositivo legal não se aplica.\n"
+        "Do pedido inicial consta o valor da causa."
+    ])
+
+    assert segment(raw_text, pages) == []
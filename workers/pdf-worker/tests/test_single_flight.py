@@ -0,0 +1,172 @@
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from src.config import settings
+from src.models.extraction import DocumentStatus
+from src.services import metrics, queue, single_flight
+from tests.test_extract_pdf_task import _make_pipeline_result
+
+
+@pytest.fixture
+def r(monkeypatch):
+    monkeypatch.setattr(settings, "single_flight_enabled", True)
+    monkeypatch.setattr(settings, "single_flight_poll_seconds", 0.01)
+    monkeypatch.setattr(settings, "single_flight_wait_seconds", 5)
+    monkeypatch.setattr(settings, "job_report_key", "")
+    r = fakeredis.FakeRedis()
+    with patch("src.tasks.extract_pdf.queue._get_redis", return_value=r):
+        yield r
+
+
+def _outcome(outcome: str) -> float:
+    return metrics.REGISTRY.get_sample_value("kratos_pdf_single_flight_total", {"outcome": outcome}) or 0
+
+
+def _pages_avoided() -> float:
+    return metrics.REGISTRY.get_sample_value("kratos_pdf_duplicate_pages_avoided_total") or 0
+
+
+def _release_later(r, flight, report, delay=0.1):
+    timer = threading.Timer(delay, single_flight.release, (r, flight, report))
+    timer.start()
+    return timer
+
+
+def test_claim_blocks_same_document_and_same_pdf(r):
+    flight, _ = single_flight.claim(r, "doc-1", "hash-a")
+
+    assert single_flight.claim(r, "doc-1", None) == (None, single_flight.doc_key("doc-1"))
+    assert single_flight.claim(r, "doc-2", "hash-a") == (None, single_flight.hash_key("hash-a"))
+    assert single_flight.claim(r, "doc-3", "hash-b")[0] is not None
+
+    single_flight.release(r, flight, {"status": "completed", "pages": 3})
+
+    assert not r.exists(*flight.keys)
+    assert single_flight.last_result(r, "doc-1") == {"status": "completed", "pages": 3}
+    assert single_flight.claim(r, "doc-2", "hash-a")[0] is not None
+
+
+def test_renew_extends_only_while_the_claim_is_held(r, monkeypatch):
+    monkeypatch.setattr(settings, "single_flight_lease_seconds", 60)
+    flight, _ = single_flight.claim(r, "doc-1", "hash-a")
+    r.pexpire(flight.keys[0], 1000)
+
+    assert single_flight.renew(r, flight)
+    assert r.pttl(flight.keys[0]) > 50_000
+
+    # Lease expired and another job claimed the document
+    r.set(flight.keys[0], "someone-else")
+    assert not single_flight.renew(r, flight)
+    single_flight.release(r, flight)
+    assert r.get(flight.keys[0]) == b"someone-else"
+
+
+def test_wait_returns_once_released_or_false_on_timeout(r):
+    flight, _ = single_flight.claim(r, "doc-1")
+    key = flight.keys[0]
+
+    assert not single_flight.wait(r, key, timeout=0.05)
+    _release_later(r, flight, None, delay=0.05)
+    assert single_flight.wait(r, key, timeout=5)
+
+
+@patch("src.tasks.extract_pdf.storage")
+@patch("src.tasks.extract_pdf.database")
+@patch("src.tasks.extract_pdf.run_pipeline")
+def test_duplicate_is_deferred_then_reuses_the_leaders_report(mock_pipeline, mock_db, mock_storage, r):
+    from src.tasks.extract_pdf import process_pdf_job
+
+    leader, _ = single_flight.claim(r, "doc-1")
+    reused, pages = _outcome(single_flight.REUSED), _pages_avoided()
+    job = {"documentId": "doc-1", "filePath": "user-1/doc-1/a.pdf"}
+
+    report = process_pdf_job(job)
+
+    assert report["status"] == "deferred"
+    assert report["retryIn"] == settings.single_flight_defer_seconds
+    assert job["singleFlight"]["on"] == "doc"
+
+    single_flight.release(r, leader, {
+        "status": DocumentStatus.completed.value, "pages": 7,
+        "timings": {"download": 0.5, "extract": 4.0},
+    })
+    report = process_pdf_job(job)
+
+    assert report["status"] == "duplicate" and report["duplicate"] == single_flight.REUSED
+    assert report["pages"] == 7
+    mock_pipeline.assert_not_called()
+    mock_db.update_document_status.assert_not_called()
+    mock_storage.cleanup_temp_file.assert_not_called()
+    assert not r.exists(single_flight.doc_key("doc-1"))
+    assert _outcome(single_flight.REUSED) == reused + 1
+    assert _pages_avoided() == pages + 7
+
+
+@patch("src.tasks.extract_pdf.storage")
+@patch("src.tasks.extract_pdf.database")
+@patch("src.tasks.extract_pdf.run_pipeline")
+def test_duplicate_still_in_flight_after_wait_is_dropped(mock_pipeline, mock_db, mock_storage, r):
+    from src.tasks.extract_pdf import process_pdf_job
+
+    single_flight.claim(r, "doc-1")
+    job = {
+        "documentId": "doc-1", "filePath": "user-1/doc-1/a.pdf",
+        "singleFlight": {"since": time.time() - settings.single_flight_wait_seconds, "on": "doc"},
+    }
+
+    report = process_pdf_job(job)
+
+    assert report["status"] == "duplicate" and report["duplicate"] == single_flight.DROPPED
+    mock_pipeline.assert_not_called()
+    mock_db.update_document_status.assert_not_called()
+
+
+@patch("src.tasks.extract_pdf.reextraction.find_reusable")
+@patch("src.tasks.extract_pdf.storage")
+@patch("src.tasks.extract_pdf.database")
+@patch("src.tasks.extract_pdf.run_pipeline")
+def test_same_pdf_under_another_document_reuses_the_extraction(
+    mock_pipeline, mock_db, mock_storage, mock_reusable, r
+):
+    from src.tasks.extract_pdf import process_pdf_job
+
+    mock_reusable.return_value = _make_pipeline_result("doc-2", pages=4)
+    leader, _ = single_flight.claim(r, "doc-1", "abc123")
+    job = {"documentId": "doc-2", "filePath": "user-2/doc-2/b.pdf", "pdfHash": "abc123"}
+
+    assert process_pdf_job(job)["status"] == "deferred"
+    assert job["singleFlight"]["on"] == "hash"
+    single_flight.release(r, leader, {"status": DocumentStatus.completed.value, "pages": 4})
+    report = process_pdf_job(job)
+
+    assert report["status"] == DocumentStatus.completed.value and report["pages"] == 4
+    mock_reusable.assert_called_once_with("doc-2", "abc123")
+    mock_storage.download_pdf.assert_not_called()
+    mock_pipeline.assert_not_called()
+    mock_db.save_extraction.assert_called_once()
+    # The follower's own claim was released with its report
+    assert not r.exists(single_flight.doc_key("doc-2"), single_flight.hash_key("abc123"))
+    assert single_flight.last_result(r, "doc-2")["status"] == DocumentStatus.completed.value
+
+
+@patch("src.tasks.extract_pdf.run_pipeline")
+def test_loop_requeues_a_deferred_job_after_its_delay(mock_pipeline, r):
+    from src.tasks.extract_pdf import _loop_job
+
+    single_flight.claim(r, "doc-1")
+    job = {"documentId": "doc-1", "filePath": "user-1/doc-1/a.pdf"}
+
+    _loop_job(r, settings.queue_key, queue.UtilisationTracker(), job)
+
+    mock_pipeline.assert_not_called()
+    assert r.llen(settings.queue_key) == 0
+    assert queue.promote_due_jobs(r, settings.queue_key) == 0
+    later = time.time() + settings.single_flight_defer_seconds + 1
+    assert queue.promote_due_jobs(r, settings.queue_key, now=later) == 1
+    requeued = json.loads(r.rpop(settings.queue_key))
+    assert requeued["documentId"] == "doc-1" and requeued["singleFlight"]["on"] == "doc"
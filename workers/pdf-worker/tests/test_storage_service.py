@@ -2,12 +2,13 @@ from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import src.services.storage as storage_mod
+from src.services import clients
 
 
-@patch("src.services.storage.create_client")
+@patch("src.services.clients.create_client")
 def test_download_pdf_saves_to_temp_dir(mock_create_client, tmp_path, monkeypatch):
     # Reset singleton
-    storage_mod._client = None
+    clients.reset()
     monkeypatch.setattr(storage_mod.settings, "temp_dir", tmp_path)
 
     mock_bucket = MagicMock()
@@ -25,9 +26,9 @@ def test_download_pdf_saves_to_temp_dir(mock_create_client, tmp_path, monkeypatc
     mock_bucket.download.assert_called_with("user-1/doc-1/test.pdf")
 
 
-@patch("src.services.storage.create_client")
+@patch("src.services.clients.create_client")
 def test_download_pdf_raises_on_error(mock_create_client):
-    storage_mod._client = None
+    clients.reset()
     mock_bucket = MagicMock()
     mock_bucket.download.side_effect = Exception("Not found")
     mock_client = MagicMock()
@@ -41,9 +42,9 @@ def test_download_pdf_raises_on_error(mock_create_client):
         assert "Storage download failed" in str(e)
 
 
-@patch("src.services.storage.create_client")
+@patch("src.services.clients.create_client")
 def test_download_pdf_rejects_oversized(mock_create_client, monkeypatch):
-    storage_mod._client = None
+    clients.reset()
     monkeypatch.setattr(storage_mod.settings, "max_pdf_size_mb", 1)
 
     big_data = b"x" * (2 * 1024 * 1024)  # 2 MB
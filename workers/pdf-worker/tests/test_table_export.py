@@ -0,0 +1,98 @@
+from datetime import date
+
+import pytest
+
+from src.models.extraction import ExtractedTable, ExtractionResult
+from src.services import table_export
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1.234,56", 1234.56),
+        ("R$ 1.234.567,89", 1234567.89),
+        ("(1.000,00)", -1000.0),
+        ("-350,00", -350.0),
+        ("1.234,56-", -1234.56),
+        ("12,5%", 12.5),
+        ("1.234", 1234.0),
+        ("42", 42.0),
+        ("1,234.56", 1234.56),
+        ("R$ 980,00", 980.0),
+        ("parcela", None),
+        ("", None),
+        ("12/2024", None),
+    ],
+)
+def test_parse_number_brazilian_formats(text, expected):
+    assert table_export.parse_number(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("31/12/2024", date(2024, 12, 31)),
+        ("05.03.21", date(2021, 3, 5)),
+        ("2024-01-15", date(2024, 1, 15)),
+        ("31/02/2024", None),
+        ("1.234,56", None),
+    ],
+)
+def test_parse_date(text, expected):
+    assert table_export.parse_date(text) == expected
+
+
+def _result() -> ExtractionResult:
+    return ExtractionResult(
+        document_id="doc-1",
+        tables=[
+            ExtractedTable(page=3, headers=["Parcela", "Vencimento", "Valor"], raw_rows=[
+                ["1", "10/01/2025", "R$ 1.500,00"],
+                ["2", "10/02/2025", ""],
+            ]),
+            ExtractedTable(page=4, headers=["Item"], raw_rows=[["Honorários"]]),
+        ],
+    )
+
+
+def test_table_columns_long_format_with_types():
+    cols = table_export.table_columns(_result())
+
+    assert len(cols["text"]) == 7
+    assert cols["page"] == [3, 3, 3, 3, 3, 3, 4]
+    assert cols["table_index"] == [0, 0, 0, 0, 0, 0, 1]
+    assert cols["row"][:4] == [0, 0, 0, 1]
+    assert cols["header"][2] == "Valor"
+    assert cols["value_type"] == ["number", "date", "number", "number", "date", "empty", "text"]
+    assert cols["number"][2] == 1500.0
+    assert cols["date"][1] == date(2025, 1, 10)
+
+
+def test_export_off_or_without_tables(monkeypatch):
+    monkeypatch.setattr(table_export.settings, "table_export_format", "")
+    assert table_export.export_tables(_result(), "u/doc-1/a.pdf") is None
+
+    monkeypatch.setattr(table_export.settings, "table_export_format", "parquet")
+    assert table_export.export_tables(ExtractionResult(document_id="d"), "a.pdf") is None
+
+
+def test_artifact_key_next_to_pdf():
+    assert table_export.artifact_key("u/doc-1/a.pdf", "doc-1", "parquet") == (
+        "u/doc-1/doc-1.tables.parquet"
+    )
+
+
+@pytest.mark.parametrize("fmt", table_export.EXPORT_FORMATS)
+def test_serialize_roundtrip(fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    data = table_export.serialize(_result(), fmt)
+
+    if fmt == "parquet":
+        table = pq.read_table(pa.BufferReader(data))
+    else:
+        table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+    assert table.num_rows == 7
+    assert table.column("number").to_pylist()[2] == 1500.0
+    assert table.column("date").type == pa.date32()
@@ -0,0 +1,87 @@
+import json
+
+import pypdfium2 as pdfium
+import pytest
+from PIL import Image
+
+from src.config import settings
+from src.services import clients, local_backend, storage, thumbnails
+
+
+def _write_pdf(path, sizes):
+    doc = pdfium.PdfDocument.new()
+    for width, height in sizes:
+        doc.new_page(width, height)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "thumbnails_enabled", True)
+    monkeypatch.setattr(settings, "thumbnail_workers", 0)
+    monkeypatch.setattr(settings, "backend", "local")
+    monkeypatch.setattr(settings, "local_backend_dir", tmp_path / "backend")
+    monkeypatch.setattr(settings, "temp_dir", tmp_path / "tmp")
+    monkeypatch.setattr(local_backend, "_client", None)
+    clients.reset()
+    path = settings.temp_dir / "doc-1"
+    path.mkdir(parents=True)
+    yield path
+    clients.reset()
+
+
+def test_renders_previews_and_thumbnails_within_pixel_budget(job_dir, monkeypatch):
+    monkeypatch.setattr(settings, "preview_width", 800)
+    monkeypatch.setattr(settings, "thumbnail_max_pixels", 1_000_000)
+    pdf = _write_pdf(job_dir / "document.pdf", [(595, 842), (1000, 2000)])
+
+    pages = thumbnails.start(pdf).collect()
+
+    assert [p.page for p in pages] == [1, 2]
+    a4, tall = pages
+    assert (a4.width, a4.width_pt) == (800, 595)
+    # 800 x 1600 at preview width would exceed the budget: scaled down
+    assert tall.width * tall.height <= 1_000_000 and tall.width < 800
+    with Image.open(job_dir / a4.thumb) as thumb:
+        assert thumb.format == "WEBP" and thumb.width == settings.thumbnail_width
+        assert thumb.height == round(a4.height * settings.thumbnail_width / a4.width)
+
+
+def test_export_uploads_pages_and_manifest(job_dir):
+    pdf = _write_pdf(job_dir / "document.pdf", [(595, 842)] * 3)
+
+    key = thumbnails.export_previews(thumbnails.start(pdf), "user-1/doc-1/peticao.pdf", "doc-1")
+
+    assert key == "user-1/doc-1/doc-1.pages.json"
+    manifest = json.loads(storage.download_object(key))
+    assert [p["thumb"] for p in manifest["pages"]] == [
+        f"user-1/doc-1/pages/{n}.thumb.webp" for n in (1, 2, 3)
+    ]
+    preview = storage.download_object(manifest["pages"][2]["preview"])
+    assert preview[:4] == b"RIFF" and preview[8:12] == b"WEBP"
+    # Uploaded images leave the job dir; only the PDF remains
+    assert [p.name for p in job_dir.iterdir()] == ["document.pdf"]
+
+
+def test_disabled_renders_nothing(job_dir, monkeypatch):
+    monkeypatch.setattr(settings, "thumbnails_enabled", False)
+
+    assert thumbnails.start(_write_pdf(job_dir / "document.pdf", [(595, 842)])) is None
+
+
+def test_renders_in_a_separate_process(job_dir, monkeypatch):
+    monkeypatch.setattr(settings, "thumbnail_workers", 1)
+    monkeypatch.setattr(thumbnails, "_pool", None)
+    pdf = _write_pdf(job_dir / "document.pdf", [(595, 842)] * 2)
+
+    render = thumbnails.start(pdf)
+    try:
+        pages = render.collect()
+    finally:
+        thumbnails._pool.shutdown()
+        monkeypatch.setattr(thumbnails, "_pool", None)
+
+    assert render.future is not None and [p.page for p in pages] == [1, 2]
+    assert (job_dir / pages[1].preview).exists()
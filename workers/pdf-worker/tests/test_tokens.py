@@ -0,0 +1,71 @@
+import pytest
+
+from src.config import settings
+from src.models.extraction import ExtractionResult, PageContent
+from src.services import output_store, tokens
+from src.services.chunking import PAGE_SEPARATOR, build_raw_text
+from src.services.sections import segment
+
+PAGES = [
+    "SENTENÇA\nProcesso nº 0001234-56.2026.8.26.0100",
+    "",
+    "I - RELATÓRIO\nTrata-se de ação de cobrança.",
+    "II - DISPOSITIVO\nJULGO PROCEDENTE o pedido.",
+]
+
+
+def _document():
+    pages = [PageContent(page_number=i, text=t) for i, t in enumerate(PAGES, start=1)]
+    raw_text = build_raw_text(pages)
+    return raw_text, pages, segment(raw_text, pages)
+
+
+def test_count_words_digits_and_symbols():
+    # condenação: 10 letters -> 3; 2026: 2; "." and the line breaks: 1 each
+    assert tokens.count("condenação 2026.\n\n") == 3 + 2 + 1 + 1
+    assert tokens.count("") == 0
+    assert tokens.count("de o a") == 3
+
+
+def test_pages_and_sections_add_up_to_the_document():
+    raw_text, pages, sections = _document()
+
+    estimate = tokens.estimate(raw_text, pages, sections)
+
+    assert estimate.total == tokens.count(raw_text)
+    assert estimate.pages == [tokens.count(p.text) for p in pages]
+    assert estimate.pages[1] == 0
+    # Page separators are the only tokens outside the pages
+    separators = tokens.count(PAGE_SEPARATOR) * (sum(1 for t in PAGES if t) - 1)
+    assert sum(estimate.pages) + separators == estimate.total
+    assert estimate.sections == [
+        tokens.count(raw_text[s.char_start:s.char_end]) for s in sections
+    ]
+
+
+def test_provider_calibration_and_cost(monkeypatch):
+    monkeypatch.setattr(settings, "token_calibration", {"anthropic": 1.2, "google": 0.5})
+    monkeypatch.setattr(settings, "token_input_usd_per_mtok", {"claude-opus-4": 15.0, "gemini-2.5-flash": 0.3})
+    raw_text, pages, sections = _document()
+
+    estimate = tokens.estimate(raw_text, pages, sections)
+
+    assert estimate.providers == {
+        "anthropic": round(estimate.total * 1.2), "google": round(estimate.total * 0.5),
+    }
+    assert estimate.input_cost_usd["claude-opus-4"] == pytest.approx(
+        tokens.for_model(estimate.total, "claude-opus-4") * 15.0 / 1e6, abs=1e-6
+    )
+    assert tokens.provider("gemini-2.5-flash") == "google"
+    assert tokens.for_model(100, "unknown-model") == 100
+
+
+def test_summary_carries_tokens():
+    raw_text, pages, sections = _document()
+    result = ExtractionResult(document_id="doc-1", raw_text=raw_text, pages=pages, sections=sections)
+    result.metadata.tokens = tokens.estimate(raw_text, pages, sections)
+
+    summary = output_store.summarize(result)
+
+    assert summary["tokens"]["total"] == result.metadata.tokens.total
+    assert len(summary["tokens"]["sections"]) == len(sections)
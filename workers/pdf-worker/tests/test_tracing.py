@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from src.services import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing.settings, "tracing_enabled", True)
+    monkeypatch.setattr(tracing.settings, "trace_sample_rate", 1.0)
+    monkeypatch.setattr(tracing.settings, "trace_file", path)
+    monkeypatch.setattr(tracing.settings, "trace_otlp_endpoint", "")
+    return path
+
+
+def _spans(path):
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    return json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+
+def test_disabled_tracing_is_noop(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing.settings, "tracing_enabled", False)
+    monkeypatch.setattr(tracing.settings, "trace_file", tmp_path / "t.jsonl")
+
+    with tracing.start_trace("job") as root, tracing.span("child"):
+        assert root.traceparent == ""
+
+    assert not (tmp_path / "t.jsonl").exists()
+
+
+def test_nested_spans_exported_as_otlp_json(trace_file):
+    with tracing.start_trace("process_pdf_job", **{"document.id": "doc-1"}) as root:
+        with tracing.span("run_pipeline") as child:
+            with tracing.span("pipeline.hash"):
+                pass
+
+    spans = {s["name"]: s for s in _spans(trace_file)}
+    assert set(spans) == {"process_pdf_job", "run_pipeline", "pipeline.hash"}
+    assert spans["run_pipeline"]["parentSpanId"] == root.span_id
+    assert spans["pipeline.hash"]["parentSpanId"] == child.span_id
+    assert {s["traceId"] for s in spans.values()} == {root.trace_id}
+    assert spans["process_pdf_job"]["attributes"][0] == {
+        "key": "document.id", "value": {"stringValue": "doc-1"}
+    }
+
+
+def test_joins_trace_from_traceparent(trace_file):
+    parent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+    with tracing.start_trace("job", traceparent=parent):
+        pass
+
+    (root,) = _spans(trace_file)
+    assert root["traceId"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+
+
+def test_unsampled_parent_is_not_recorded(trace_file):
+    parent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00"
+
+    with tracing.start_trace("job", traceparent=parent), tracing.span("child"):
+        pass
+
+    assert not trace_file.exists()
+
+
+def test_error_status_recorded(trace_file):
+    with pytest.raises(ValueError):
+        with tracing.start_trace("job"):
+            with tracing.span("storage.download_pdf"):
+                raise ValueError("boom")
+
+    spans = {s["name"]: s for s in _spans(trace_file)}
+    assert spans["storage.download_pdf"]["status"]["code"] == 2
+    assert "boom" in spans["storage.download_pdf"]["status"]["message"]
+
+
+def test_max_spans_bounds_trace_size(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing.settings, "trace_max_spans", 3)
+    monkeypatch.setattr(tracing.settings, "trace_pages", True)
+
+    with tracing.start_trace("job"):
+        for page in range(10):
+            with tracing.page_span(page + 1):
+                pass
+
+    spans = _spans(trace_file)
+    assert len(spans) == 4  # 3 pages + root
+    root = next(s for s in spans if s["name"] == "job")
+    assert {"key": "kratos.dropped_spans", "value": {"intValue": "7"}} in root["attributes"]
+
+
+def test_parse_traceparent_rejects_invalid():
+    assert tracing.parse_traceparent("garbage") is None
+    assert tracing.parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert tracing.parse_traceparent(None) is None
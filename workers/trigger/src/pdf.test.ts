@@ -84,4 +84,42 @@ describe("runPdfJob", () => {
     const { db } = await import("@kratos/db");
     expect(db.update as ReturnType<typeof vi.fn>).toHaveBeenCalled();
   });
+
+  it("leaves the document alone when another run holds its claim", async () => {
+    const { execa } = await import("execa");
+    (execa as ReturnType<typeof vi.fn>).mockResolvedValueOnce({
+      stdout: JSON.stringify({ status: "duplicate" }),
+      stderr: "",
+    });
+
+    const { runPdfJob } = await import("./pdf.js");
+    const { db } = await import("@kratos/db");
+
+    await runPdfJob({
+      documentId: "d4e5f6a7-b8c9-0123-def0-234567890123",
+      userId: "f1e2d3c4-b5a6-7890-abcd-ef1234567890",
+      filePath: "user/doc/test.pdf",
+      fileName: "test.pdf",
+    });
+
+    expect(db.insert as ReturnType<typeof vi.fn>).not.toHaveBeenCalled();
+    expect(db.update as ReturnType<typeof vi.fn>).not.toHaveBeenCalled();
+  });
+
+  it("gives the runner the timeout it is killed at", async () => {
+    const { execa } = await import("execa");
+    const { runPdfJob, RUNNER_TIMEOUT_SECONDS } = await import("./pdf.js");
+
+    await runPdfJob({
+      documentId: "e5f6a7b8-c9d0-1234-ef01-345678901234",
+      userId: "f1e2d3c4-b5a6-7890-abcd-ef1234567890",
+      filePath: "user/doc/test.pdf",
+      fileName: "test.pdf",
+    });
+
+    const [, , options] = (execa as ReturnType<typeof vi.fn>).mock.calls[0];
+    expect(RUNNER_TIMEOUT_SECONDS).toBeGreaterThan(300);
+    expect(options.timeout).toBe(RUNNER_TIMEOUT_SECONDS * 1000);
+    expect(JSON.parse(options.input).timeoutSeconds).toBe(RUNNER_TIMEOUT_SECONDS);
+  });
 });
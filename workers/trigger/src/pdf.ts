@@ -13,29 +13,45 @@ const logger = pino({ level: process.env.LOG_LEVEL || "info" });
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
 const PYTHON_RUNNER = path.join(__dirname, "pdf_runner.py");
 
+// Same settings the Python runner reads (workers/pdf-worker/src/config.py):
+// each run gets its predicted extraction limit, at most
+// RUNTIME_MAX_TIMEOUT_SECONDS, plus STAGE_TIMEOUT_SECONDS for download and
+// for persist. The runner is passed this timeout and fits its limits in it.
+const RUNTIME_MAX_TIMEOUT_SECONDS = Number(process.env.RUNTIME_MAX_TIMEOUT_SECONDS ?? 1200);
+const STAGE_TIMEOUT_SECONDS = Number(process.env.STAGE_TIMEOUT_SECONDS ?? 120);
+export const RUNNER_TIMEOUT_SECONDS = RUNTIME_MAX_TIMEOUT_SECONDS + 2 * STAGE_TIMEOUT_SECONDS + 60;
+
 export const PdfPayloadSchema = z.object({
   documentId: z.string().uuid(),
   userId: z.string().uuid(),
   filePath: z.string().min(1),
   fileName: z.string().min(1),
+  /** W3C trace context of the caller; the Python worker's spans join this trace */
+  traceparent: z.string().optional(),
 });
 
 export type PdfPayload = z.infer<typeof PdfPayloadSchema>;
 
 /** Pure function — testable without Trigger.dev runtime */
 export async function runPdfJob(payload: PdfPayload): Promise<void> {
-  const { documentId, userId, filePath } = payload;
+  const { documentId, userId, filePath, traceparent } = payload;
   const startMs = Date.now();
 
   try {
     // Invoke Python pipeline via stdin/stdout JSON interface
     const proc = await execa("python3", [PYTHON_RUNNER], {
-      input: JSON.stringify({ documentId, filePath, userId }),
+      input: JSON.stringify({
+        documentId,
+        filePath,
+        userId,
+        traceparent,
+        timeoutSeconds: RUNNER_TIMEOUT_SECONDS,
+      }),
       env: {
         ...process.env,
         PYTHONDONTWRITEBYTECODE: "1",
       },
-      timeout: 300_000, // 5 minutes max for large PDFs
+      timeout: RUNNER_TIMEOUT_SECONDS * 1000,
     });
 
     const parsed = ExtractionOutputSchema.safeParse(JSON.parse(proc.stdout));
@@ -44,6 +60,13 @@ export async function runPdfJob(payload: PdfPayload): Promise<void> {
     }
     const result = parsed.data;
 
+    if (result.status === "duplicate") {
+      // Another run holds the document's single-flight claim; it saves the
+      // extraction and the document status
+      logger.info({ documentId }, "PDF extraction already in flight, skipping duplicate run");
+      return;
+    }
+
     if (result.status === "failed") {
       throw new Error(result.error ?? "Python pipeline returned failed status");
     }
@@ -51,10 +74,13 @@ export async function runPdfJob(payload: PdfPayload): Promise<void> {
     // Save extraction to DB
     await db.insert(extractions).values({
       documentId,
-      rawText: result.rawText ?? "",
+      rawText: result.outputKey ? null : (result.rawText ?? ""),
       tablesCount: result.tablesCount ?? 0,
       extractionMethod: result.extractionMethod ?? "pdfplumber",
+      extractorVersion: result.extractorVersion ?? 0,
+      pdfHash: result.pdfHash ?? null,
       contentJson: result.contentJson ?? {},
+      outputKey: result.outputKey ?? null,
     });
 
     // Update document status + page count
@@ -80,7 +106,7 @@ export async function runPdfJob(payload: PdfPayload): Promise<void> {
 export const pdfTask = schemaTask({
   id: "pdf-extraction",
   schema: PdfPayloadSchema,
-  maxDuration: 360, // 6 minutes — generous for large PDFs (python timeout is 5min)
+  maxDuration: RUNNER_TIMEOUT_SECONDS + 60, // the runner's timeout plus saving its output
   machine: { preset: "medium-1x" }, // 2 vCPU, 4GB RAM — needed for pdfplumber
   retry: { maxAttempts: 2 },
   run: async (payload) => {
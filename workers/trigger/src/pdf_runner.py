@@ -3,14 +3,26 @@
 Thin stdin/stdout wrapper around the PDF extraction pipeline.
 Called by the Node.js Trigger.dev task via execa.
 
-Input (stdin):  JSON: { documentId, filePath, userId }
+The runtime model (services/runtime_model.py) sets the extraction's time
+limit and processes, as in the Celery task; download and persist get
+STAGE_TIMEOUT_SECONDS each. timeoutSeconds is the task's execa timeout:
+the extraction limit is cut to what is left of it after download and
+before persist, so the run fails with its own error rather than a kill.
+
+Input (stdin):  JSON: { documentId, filePath, userId, traceparent?, timeoutSeconds? }
 Output (stdout): JSON: { status, rawText, tablesCount, pageCount, extractionMethod, contentJson }
+                  or  { status, outputKey, tablesCount, pageCount, extractionMethod, contentJson: { summary, output } }
+                      when the output is spilled to storage (OUTPUT_MODE / OUTPUT_INLINE_MAX_BYTES)
                   or  { status: "failed", error: "..." }
+                  or  { status: "duplicate" } when another run holds the document's claim
 """
+import contextlib
 import json
 import sys
 import os
 import logging
+import time
+from typing import Optional
 
 # Add pdf-worker src to path so we can import from it
 _SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -21,7 +33,98 @@ sys.path.insert(0, _WORKER_DIR)
 logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
 
 from src.pipeline import run_pipeline, PipelineError  # noqa: E402
-from src.services import storage  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.services import (  # noqa: E402
+    database, normalization, output_store, profiling, progress, queue, runtime_model, search_index,
+    single_flight, storage, table_export, thumbnails, tracing,
+)
+
+
+def _claim(document_id: str):
+    """
+    Single-flight claim on the document, so two runs never share its temp
+    dir. Returns (redis, flight); flight is None when another run holds the
+    claim, and both are None without Redis. The runner never waits for that
+    run (the Trigger task would time out first): the run in flight saves
+    the document's output and status.
+    """
+    if not settings.single_flight_enabled:
+        return None, None
+    try:
+        r = queue._get_redis()
+        flight, _ = single_flight.claim(r, document_id)
+        return r, flight
+    except Exception as e:
+        logging.warning(f"Single-flight unavailable for {document_id}: {e}")
+        return None, None
+
+
+def _release(r, flight, report: dict) -> None:
+    if flight is None:
+        return
+    try:
+        single_flight.release(r, flight, report)
+    except Exception as e:
+        logging.warning(f"Could not release single-flight claim on {flight.document_id}: {e}")
+
+
+def _publish_queue_stats(document_id: str, seconds: Optional[float] = None) -> None:
+    """
+    Feed the queue stats the API admits uploads against: the job leaves the
+    dispatched set when its run starts, its duration joins the average when
+    it ends. Best-effort, like progress.
+    """
+    try:
+        r = queue._get_redis()
+        if seconds is None:
+            queue.job_started(r, settings.queue_key, document_id)
+        else:
+            queue.record_job_duration(r, settings.queue_key, seconds)
+        queue.publish_queue_stats(r, settings.queue_key, capacity=settings.trigger_concurrency)
+    except Exception as e:
+        logging.warning(f"Could not publish queue stats for {document_id}: {e}")
+
+
+def _plan(document_id: str, pdf_path) -> Optional[runtime_model.Plan]:
+    """Runtime prediction for the run; None (static limits, one core) if it cannot be made."""
+    if not settings.runtime_model_enabled:
+        return None
+    try:
+        return runtime_model.plan(pdf_path, queue._get_redis())
+    except Exception as e:  # an unreadable PDF fails in the pipeline, with its own error
+        logging.warning(f"Could not predict the runtime of {document_id}: {e}")
+        return None
+
+
+def _extraction_limit(
+    plan: Optional[runtime_model.Plan], budget: Optional[float], elapsed: float
+) -> Optional[float]:
+    """The plan's extraction limit, within what the caller's timeout leaves for it and persist."""
+    limit = plan.timeout_seconds if plan else None
+    if budget:
+        remaining = max(1.0, budget - elapsed - settings.stage_timeout_seconds)
+        limit = min(limit, remaining) if limit else remaining
+    return limit
+
+
+def _record_runtime(plan: runtime_model.Plan, result, extract_seconds: float) -> None:
+    try:
+        runtime_model.record(
+            queue._get_redis(), plan, extract_seconds,
+            dict(result.metadata.stage_timings, extract=extract_seconds),
+            result.metadata.total_tables,
+        )
+    except Exception as e:
+        logging.warning(f"Could not record the runtime of {result.document_id}: {e}")
+
+
+def _publish_failure(document_id: str, error: str) -> None:
+    """Last progress event of a failed run (the tracking context has exited by now)."""
+    try:
+        with progress.tracking(document_id):
+            progress.finish("failed", error=error)
+    except Exception:
+        pass  # progress is best-effort
 
 
 def main() -> None:
@@ -31,29 +134,155 @@ def main() -> None:
     document_id = job["documentId"]
     file_path = job["filePath"]
 
+    started = time.monotonic()
+    _publish_queue_stats(document_id)
+    r, flight = _claim(document_id)
+    if r is not None and flight is None:
+        print(json.dumps({"status": "duplicate"}))
+        return
+    flight_report = {"documentId": document_id, "status": "failed"}
+    root = tracing.start_trace(
+        "pdf_runner",
+        traceparent=job.get("traceparent") or os.environ.get("TRACEPARENT"),
+        **{"document.id": document_id},
+    )
     try:
-        pdf_path = storage.download_pdf(file_path, document_id)
-        result = run_pipeline(document_id, pdf_path)
+        renewer = single_flight.Renewer(r, flight) if flight else contextlib.nullcontext()
+        with root, profiling.profiled_job(document_id) as profile, renewer, \
+                progress.tracking(document_id):
+            # The claim makes this run the document's owner: drop a previous
+            # run's events so SSE clients do not replay its finish
+            progress.start()
+            progress.stage("download")
+            download_start = time.monotonic()
+            with tracing.span("storage.download_pdf", **{"storage.path": file_path}), \
+                    runtime_model.deadline(settings.stage_timeout_seconds, "download time limit"):
+                pdf_path = storage.download_pdf(file_path, document_id)
+            download_seconds = time.monotonic() - download_start
+            plan = _plan(document_id, pdf_path)
+            if plan is not None:
+                progress.predict(plan.predicted_seconds / plan.workers)
+            try:
+                render = thumbnails.start(pdf_path)
+            except Exception as e:  # auxiliary artifact, never fails the job
+                logging.error(f"Page preview render failed to start for {document_id}: {e}")
+                render = None
+            extract_start = time.monotonic()
+            limit = _extraction_limit(plan, job.get("timeoutSeconds"), extract_start - started)
+            with tracing.span("run_pipeline"), runtime_model.deadline(limit):
+                result = run_pipeline(document_id, pdf_path, workers=plan.workers if plan else 1)
+            extract_seconds = time.monotonic() - extract_start
+            if plan is not None:
+                _record_runtime(plan, result, extract_seconds)
+            # The caller saves the result: the API closes the progress stream
+            # when documents.status turns completed
+            progress.stage("persist")
+            with runtime_model.deadline(settings.stage_timeout_seconds, "persist time limit"):
+                try:
+                    with tracing.span("storage.export_tables"):
+                        result.metadata.tables_artifact = (
+                            table_export.export_tables(result, file_path) or ""
+                        )
+                except runtime_model.JobTimeoutError:
+                    raise
+                except Exception as e:  # auxiliary artifact, never fails the job
+                    logging.error(f"Table export failed for {document_id}: {e}")
+                try:
+                    with tracing.span("storage.export_search_index"):
+                        result.metadata.search_index = (
+                            search_index.export_index(result, file_path) or ""
+                        )
+                except runtime_model.JobTimeoutError:
+                    raise
+                except Exception as e:  # auxiliary artifact, never fails the job
+                    logging.error(f"Search index export failed for {document_id}: {e}")
+                try:
+                    with tracing.span("storage.export_offsets"):
+                        result.metadata.text_offsets = (
+                            normalization.export_offsets(result, file_path) or ""
+                        )
+                except runtime_model.JobTimeoutError:
+                    raise
+                except Exception as e:  # auxiliary artifact, never fails the job
+                    logging.error(f"Offset map export failed for {document_id}: {e}")
+                if render is not None:
+                    try:
+                        with tracing.span("storage.export_previews"):
+                            result.metadata.page_previews = thumbnails.export_previews(
+                                render, file_path, document_id
+                            )
+                    except runtime_model.JobTimeoutError:
+                        raise
+                    except Exception as e:  # auxiliary artifact, never fails the job
+                        logging.error(f"Page preview export failed for {document_id}: {e}")
+                if settings.page_rows_enabled:
+                    with tracing.span("database.save_pages"):
+                        database.save_pages(document_id, result)
+            profile.annotate(
+                page_count=result.metadata.total_pages,
+                download=download_seconds,
+                **result.metadata.stage_timings,
+            )
+        flight_report.update(status="completed", pages=result.metadata.total_pages, timings={
+            "download": download_seconds, "extract": result.metadata.processing_time_seconds,
+        })
 
         pages = [
-            {"page": p.page_number, "text": p.text, "tables": p.tables_count}
+            {
+                "page": p.page_number,
+                "text": p.text,
+                "tables": p.tables_count,
+                "char_start": p.char_start,
+                "char_end": p.char_end,
+            }
             for p in result.pages
         ]
+        chunks = [c.model_dump(mode="json") for c in result.chunks]
 
-        print(json.dumps({
+        content_json = {
+            "pages": pages,
+            "chunks": chunks,
+            "sections": [s.model_dump(mode="json") for s in result.sections],
+            "tokens": result.metadata.tokens.model_dump(),
+        }
+        if result.metadata.tables_artifact:
+            content_json["tablesArtifact"] = result.metadata.tables_artifact
+        if result.metadata.search_index:
+            content_json["searchIndex"] = result.metadata.search_index
+        if result.metadata.text_offsets:
+            content_json["textOffsets"] = result.metadata.text_offsets
+        if result.metadata.page_previews:
+            content_json["pagePreviews"] = result.metadata.page_previews
+        output = {
             "status": "completed",
             "rawText": result.raw_text,
             "tablesCount": result.metadata.total_tables,
             "pageCount": result.metadata.total_pages,
             "extractionMethod": result.metadata.extraction_method.value,
-            "contentJson": {"pages": pages},
-        }))
+            "extractorVersion": result.metadata.extractor_version,
+            "pdfHash": result.metadata.pdf_hash,
+            "contentJson": content_json,
+        }
+        body = json.dumps(output)
+        if output_store.should_spill(len(body)):
+            with runtime_model.deadline(settings.stage_timeout_seconds, "persist time limit"):
+                spilled = output_store.spill(file_path, document_id, result.raw_text, content_json)
+            del output["rawText"]
+            output["outputKey"] = spilled["key"]
+            output["contentJson"] = {
+                "summary": output_store.summarize(result),
+                "output": spilled,
+            }
+            body = json.dumps(output)
+        print(body)
 
     except PipelineError as e:
+        _publish_failure(document_id, str(e))
         print(json.dumps({"status": "failed", "error": str(e)}))
         sys.exit(1)
 
     except Exception as e:
+        _publish_failure(document_id, f"Unexpected error: {str(e)}")
         print(json.dumps({"status": "failed", "error": f"Unexpected error: {str(e)}"}))
         sys.exit(1)
 
@@ -62,6 +291,8 @@ def main() -> None:
             storage.cleanup_temp_file(document_id)
         except Exception:
             pass  # cleanup failure is non-fatal
+        _release(r, flight, flight_report)
+        _publish_queue_stats(document_id, time.monotonic() - started)
 
 
 if __name__ == "__main__":